@@ -51,12 +51,23 @@ from services.knowledge_service import init_knowledge_service
 from services.oss_service import get_oss_service, init_oss_service
 from services.video_service import get_video_service, init_video_service
 
+from utils.lazy import LazyProxy
+
 # 初始化日志
 setup_logging()
 
 logger = logging.getLogger(__name__)
 
 
+def _create_chat_dispatcher():
+    from services.chat.agent_dispatcher import AgentDispatcher
+
+    return AgentDispatcher(
+        llm_client=get_llm_service(),
+        search_service=get_search_service(),
+    )
+
+
 def create_app(config_class=None):
     """创建 Flask 应用"""
     app = Flask(__name__)
@@ -89,6 +100,12 @@ def create_app(config_class=None):
 
     # 初始化 OSS 服务
     init_oss_service(app.config)
+
+    # 离线模式：LLM / 搜索 / 图片 / OSS 全部替换为本地替身（性能分析与离线基准）
+    if app.config.get('AI_PROVIDER_FORMAT', '').lower() == 'offline':
+        from services.offline_providers import install_offline_providers
+        install_offline_providers(os.path.join(app.config.get('OUTPUT_FOLDER', 'outputs'), 'offline'))
+
     oss_service = get_oss_service()
     if oss_service and oss_service.is_available:
         logger.info("OSS 服务已初始化")
@@ -110,7 +127,9 @@ def create_app(config_class=None):
     # 初始化知识源相关服务
     init_db_service()
     init_knowledge_service(
-        max_content_length=app.config.get('KNOWLEDGE_MAX_CONTENT_LENGTH', 8000)
+        max_content_length=app.config.get('KNOWLEDGE_MAX_CONTENT_LENGTH', 8000),
+        section_top_k=app.config.get('KNOWLEDGE_SECTION_TOP_K', 4),
+        section_retrieval_enabled=app.config.get('KNOWLEDGE_SECTION_RETRIEVAL_ENABLED', True),
     )
 
     # 初始化文件解析服务
@@ -146,35 +165,41 @@ def create_app(config_class=None):
         from routes.queue_routes import init_queue_routes
         from routes.scheduler_routes import init_scheduler_routes
 
+        from services.task_queue.ownership import acquire_queue_ownership
+
         db_path = os.path.join(os.path.dirname(__file__), 'data', 'task_queue.db')
+        # 多 worker 时只有一个进程做残留任务恢复和定时派发，其余 worker 只提供接口
+        owner = acquire_queue_ownership(db_path)
         queue_manager = TaskQueueManager(db_path=db_path, max_concurrent=2)
-        asyncio.run(queue_manager.init())
+        asyncio.run(queue_manager.init() if owner else queue_manager.db.init())
 
         init_queue_routes(queue_manager)
         app.queue_manager = queue_manager
 
-        cron_scheduler = CronScheduler(queue_manager, db_path=db_path)
-        asyncio.run(cron_scheduler.start())
+        cron_scheduler = CronScheduler(queue_manager, db_path=db_path, enabled=owner)
+        asyncio.run(cron_scheduler.start() if owner else cron_scheduler._init_db())
         init_scheduler_routes(cron_scheduler)
 
-        logger.info("任务排队系统已初始化 (TaskQueueManager + CronScheduler)")
+        logger.info(
+            "任务排队系统已初始化 (TaskQueueManager + CronScheduler"
+            f"{'' if owner else '，调度由其它 worker 负责'})"
+        )
     except Exception as e:
         logger.warning(f"任务排队系统初始化失败 (可选模块): {e}")
 
-    # 初始化对话式写作服务
+    # SSE 网关：asyncio 单线程承载所有进度流，不占用 gunicorn 工作线程
+    if os.environ.get('SSE_GATEWAY_ENABLED', 'false').lower() == 'true':
+        from services.sse_gateway import init_sse_gateway
+        init_sse_gateway()
+
+    # 初始化对话式写作服务（AgentDispatcher 会导入并构造全部 Agent，首次调用时才创建）
     try:
         from services.chat.writing_session import WritingSessionManager
-        from services.chat.agent_dispatcher import AgentDispatcher
         from routes.chat_routes import init_chat_service
 
-        chat_db_path = os.path.join(os.path.dirname(__file__), 'data', 'writing_sessions.db')
-        os.makedirs(os.path.dirname(chat_db_path), exist_ok=True)
-        chat_session_mgr = WritingSessionManager(db_path=chat_db_path)
-        chat_dispatcher = AgentDispatcher(
-            llm_client=get_llm_service(),
-            search_service=get_search_service(),
-        )
-        init_chat_service(chat_session_mgr, chat_dispatcher)
+        # WAL 文件库，路径见 WRITING_SESSION_DB
+        chat_session_mgr = WritingSessionManager()
+        init_chat_service(chat_session_mgr, LazyProxy(_create_chat_dispatcher))
         logger.info("对话式写作服务已初始化")
     except Exception as e:
         logger.warning(f"对话式写作服务初始化失败 (可选模块): {e}")
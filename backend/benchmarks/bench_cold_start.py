@@ -0,0 +1,105 @@
+"""
+冷启动基准
+
+在全新子进程中以 ``python -X importtime`` 执行 ``import app`` → ``create_app()`` → 首次 ``GET /health``，
+统计各阶段耗时与导入耗时最高的模块，并检查重量级依赖（LangGraph 工作流、Playwright、全部 Agent）
+没有在启动期被导入。超过 ``--target`` 或出现重量级依赖时以非零状态退出，可直接用作回归门禁。
+
+用法：
+    cd backend && python -m benchmarks.bench_cold_start
+    cd backend && python -m benchmarks.bench_cold_start --runs 5 --target 1.5 --top 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 这些模块只应在首次生成博客 / 发布 / 对话时按需导入
+HEAVY_MODULES = (
+    'langgraph',
+    'playwright',
+    'services.blog_generator.generator',
+    'services.chat.agent_dispatcher',
+)
+
+PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {BACKEND_DIR!r})
+import app as app_module
+t1 = time.perf_counter()
+flask_app = app_module.create_app()
+t2 = time.perf_counter()
+status = flask_app.test_client().get('/health').status_code
+t3 = time.perf_counter()
+print(json.dumps({{
+    'import': t1 - t0, 'create_app': t2 - t1, 'health': t3 - t2, 'total': t3 - t0,
+    'status': status, 'modules': len(sys.modules),
+    'heavy': sorted(m for m in sys.modules if m.split('.')[0] in {HEAVY_MODULES!r}
+                    or m in {HEAVY_MODULES!r}),
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """解析 -X importtime 输出，返回 [(self_us, cumulative_us, module), ...]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            rows.append((int(self_us), int(cumulative_us), name.strip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def run_once() -> tuple:
+    env = dict(os.environ, LLM_MIN_REQUEST_INTERVAL='0')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='冷启动基准（import → create_app → /health）')
+    parser.add_argument('--runs', type=int, default=3, help='子进程次数（取最快一次）')
+    parser.add_argument('--target', type=float, default=1.0, help='首次健康检查耗时上限（秒）')
+    parser.add_argument('--top', type=int, default=15, help='打印导入自身耗时最高的模块数')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    best, imports = min(runs, key=lambda r: r[0]['total'])
+
+    print(f'冷启动（{args.runs} 次取最快）:')
+    print(f'  import app:     {best["import"]:.3f}s')
+    print(f'  create_app():   {best["create_app"]:.3f}s')
+    print(f'  GET /health:    {best["health"]:.3f}s (HTTP {best["status"]})')
+    print(f'  合计:           {best["total"]:.3f}s  目标 ≤ {args.target:.3f}s')
+    print(f'  已加载模块数:   {best["modules"]}')
+
+    print(f'\n导入自身耗时 Top {args.top}:')
+    for self_us, cumulative_us, name in sorted(imports, reverse=True)[:args.top]:
+        print(f'  {self_us / 1000:8.1f} ms  (累计 {cumulative_us / 1000:8.1f} ms)  {name}')
+
+    failed = False
+    if best['heavy']:
+        print(f'\n✗ 启动期导入了重量级模块: {", ".join(best["heavy"])}')
+        failed = True
+    if best['status'] != 200 or best['total'] > args.target:
+        print(f'\n✗ 首次健康检查超出目标: {best["total"]:.3f}s > {args.target:.3f}s')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
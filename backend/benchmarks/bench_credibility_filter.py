@@ -0,0 +1,89 @@
+"""
+源可信度筛选 LLM 开销基准
+
+模拟多次生成任务的搜索：每次从热门 URL 池（官方文档、热门论文）与长尾 URL 中抽取结果，
+用带固定延迟的模拟 LLM 对比：
+
+- 原实现：每次搜索把全部结果放进一次 LLM 调用
+- 缓存 + 规则预筛 + 分批：命中缓存的结果不再评估，未命中结果按规则预筛后分批并行评估
+
+用法：
+    cd backend && python -m benchmarks.bench_credibility_filter --searches 200 --results 20 --llm-ms 800
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.blog_generator.services.credibility_score_cache import CredibilityScoreCache  # noqa: E402
+from services.blog_generator.services.source_credibility_filter import SourceCredibilityFilter  # noqa: E402
+
+
+class SimulatedLLM:
+    """按条目数返回评分；耗时 = 固定延迟 + 每条目增量"""
+
+    def __init__(self, base_ms: float, per_item_ms: float):
+        self.base = base_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self.calls = 0
+        self.items = 0
+
+    def chat(self, messages, caller=''):
+        indices = re.findall(r'^\[(\d+)\] 标题', messages[0]['content'], re.M)
+        self.calls += 1
+        self.items += len(indices)
+        time.sleep(self.base + self.per_item * len(indices))
+        return json.dumps([
+            {'index': int(i), 'authority': 7, 'freshness': 7, 'relevance': 7, 'depth': 7, 'total_score': 7}
+            for i in indices
+        ])
+
+
+def make_result(url_id: int) -> dict:
+    return {'title': f'文档 {url_id}', 'url': f'https://example.com/page/{url_id}',
+            'content': f'关于主题的内容 {url_id} ' * 30, 'source': 'general'}
+
+
+def run_searches(flt, llm, args, rng) -> tuple:
+    start = time.perf_counter()
+    for _ in range(args.searches):
+        popular = rng.sample(range(args.popular), k=int(args.results * args.popular_share))
+        tail = [args.popular + rng.randrange(1_000_000) for _ in range(args.results - len(popular))]
+        flt.curate('主题', [make_result(i) for i in popular + tail])
+    return time.perf_counter() - start, llm.calls, llm.items
+
+
+def main():
+    parser = argparse.ArgumentParser(description='源可信度筛选 LLM 开销基准')
+    parser.add_argument('--searches', type=int, default=100, help='模拟搜索次数')
+    parser.add_argument('--results', type=int, default=20, help='每次搜索的合并结果数')
+    parser.add_argument('--popular', type=int, default=200, help='热门 URL 池大小')
+    parser.add_argument('--popular-share', type=float, default=0.6, help='每次结果中热门 URL 的占比')
+    parser.add_argument('--llm-ms', type=float, default=200, help='模拟 LLM 单次调用固定延迟（毫秒）')
+    parser.add_argument('--item-ms', type=float, default=20, help='模拟 LLM 每条目增加的延迟（毫秒）')
+    args = parser.parse_args()
+
+    baseline_llm = SimulatedLLM(args.llm_ms, args.item_ms)
+    baseline = SourceCredibilityFilter(baseline_llm, max_results=10, batch_size=10 ** 6, prescreen_factor=10 ** 6)
+    baseline.cache = None
+    base = run_searches(baseline, baseline_llm, args, random.Random(7))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        llm = SimulatedLLM(args.llm_ms, args.item_ms)
+        flt = SourceCredibilityFilter(llm, max_results=10, cache=CredibilityScoreCache(path=os.path.join(tmp, 'c.db')))
+        new = run_searches(flt, llm, args, random.Random(7))
+
+    print(f'搜索 {args.searches} 次，每次 {args.results} 条（热门占比 {args.popular_share:.0%}）')
+    print(f'{"方式":<16} {"总耗时 s":>9} {"LLM 调用":>9} {"评估条目":>9}')
+    print(f'{"全部送评（原实现）":<12} {base[0]:>9.2f} {base[1]:>9} {base[2]:>9}')
+    print(f'{"缓存+预筛+分批":<14} {new[0]:>9.2f} {new[1]:>9} {new[2]:>9}')
+
+
+if __name__ == '__main__':
+    main()
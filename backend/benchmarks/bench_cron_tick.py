@@ -0,0 +1,136 @@
+"""
+CronScheduler tick 开销与派发延迟基准
+
+在临时 SQLite 中注册 N 个定时任务（next_run_at 分布在未来 24 小时内，另有少量已到期），
+对比：
+
+- 全表扫描：加载全部任务后在 Python 中过滤到期任务 / 求最近唤醒时间（原实现）
+- 索引查询：idx_cj_due 部分索引上的到期查询与最近唤醒时间
+
+并以模拟耗时的执行器对比逐个执行与并发派发到期任务时的派发延迟。
+
+用法：
+    cd backend && python -m benchmarks.bench_cron_tick --jobs 10000 --due 20
+    cd backend && python -m benchmarks.bench_cron_tick --job-seconds 0.5 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.task_queue.cron_scheduler import CronScheduler  # noqa: E402
+from services.task_queue.models import (  # noqa: E402
+    BlogGenerationConfig, CronJob, CronSchedule, CronScheduleKind,
+)
+
+
+def build_jobs(count: int, due: int) -> list[CronJob]:
+    now = datetime.now()
+    rng = random.Random(42)
+    jobs = []
+    for i in range(count):
+        job = CronJob(
+            id=f'job{i:06d}',
+            name=f'任务 {i}',
+            schedule=CronSchedule(kind=CronScheduleKind.CRON, expr='0 8 * * *'),
+            generation=BlogGenerationConfig(topic=f'主题 {i}'),
+        )
+        if i < due:
+            job.state.next_run_at = now - timedelta(seconds=rng.uniform(0, 0.1))
+        else:
+            job.state.next_run_at = now + timedelta(seconds=rng.uniform(60, 86400))
+        jobs.append(job)
+    return jobs
+
+
+async def full_scan_tick(scheduler: CronScheduler) -> tuple:
+    now = datetime.now()
+    jobs = await scheduler.db.get_cron_jobs(include_disabled=False)
+    due = [j for j in jobs if j.state.next_run_at and j.state.next_run_at <= now and not j.state.running_at]
+    candidates = [j.state.next_run_at for j in jobs if j.state.next_run_at and not j.state.running_at]
+    return len(due), min(candidates) if candidates else None
+
+
+async def indexed_tick(scheduler: CronScheduler) -> tuple:
+    due = await scheduler.db.get_due_cron_jobs(datetime.now(), limit=scheduler.max_concurrent)
+    return len(due), await scheduler.db.get_next_cron_run_at()
+
+
+async def time_ticks(fn, scheduler, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn(scheduler)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def sequential_lag(scheduler: CronScheduler) -> float:
+    """原实现：到期任务逐个 await，记录每个任务的最大开始延迟"""
+    now = datetime.now()
+    jobs = await scheduler.db.get_cron_jobs(include_disabled=False)
+    due = sorted(
+        (j for j in jobs if j.state.next_run_at and j.state.next_run_at <= now),
+        key=lambda j: j.state.next_run_at,
+    )
+    worst = 0.0
+    for job in due:
+        worst = max(worst, (datetime.now() - job.state.next_run_at).total_seconds())
+        await scheduler.executor.execute(job)
+    return worst
+
+
+def make_scheduler(db_path: str, concurrency: int, job_seconds: float) -> CronScheduler:
+    async def enqueue(task):
+        await asyncio.sleep(job_seconds)
+        return task.id
+
+    queue = MagicMock()
+    queue.enqueue = enqueue
+    return CronScheduler(queue, db_path=db_path, max_concurrent=concurrency)
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'task_queue.db')
+        scheduler = make_scheduler(db_path, args.concurrency, args.job_seconds)
+        await scheduler._init_db()
+        await scheduler.db.save_cron_jobs(build_jobs(args.jobs, args.due))
+
+        scan_ms = await time_ticks(full_scan_tick, scheduler, args.repeat)
+        index_ms = await time_ticks(indexed_tick, scheduler, args.repeat)
+        print(f'任务: {args.jobs} 个（到期 {args.due} 个），每种方式 {args.repeat} 次 tick')
+        print(f'全表扫描 tick: {scan_ms:9.2f} ms')
+        print(f'索引查询 tick: {index_ms:9.2f} ms  ({scan_ms / index_ms:.0f}x)')
+
+        await scheduler.db.save_cron_jobs(build_jobs(args.jobs, args.due))
+        seq_worst = await sequential_lag(scheduler)
+
+        await scheduler.db.save_cron_jobs(build_jobs(args.jobs, args.due))
+        scheduler.tick_wait_seconds = args.job_seconds * args.due + 5
+        while await scheduler.db.get_due_cron_jobs(datetime.now(), limit=1):
+            await scheduler._tick()
+        dispatch = scheduler.metrics.snapshot()
+        print(f'\n到期任务派发（每个任务 {args.job_seconds:.2f}s）')
+        print(f'逐个执行: 最大开始延迟 {seq_worst:6.2f} s')
+        print(f'并发派发: 最大开始延迟 {dispatch["lag_max_seconds"]:6.2f} s  '
+              f'p95 {dispatch["lag_p95_seconds"]:.2f} s  (并发 {args.concurrency})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CronScheduler tick 开销与派发延迟基准')
+    parser.add_argument('--jobs', type=int, default=10000, help='注册任务数')
+    parser.add_argument('--due', type=int, default=20, help='已到期任务数')
+    parser.add_argument('--repeat', type=int, default=20, help='每种方式的 tick 次数')
+    parser.add_argument('--concurrency', type=int, default=4, help='并发派发上限')
+    parser.add_argument('--job-seconds', type=float, default=0.2, help='模拟单个任务执行耗时（秒）')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+跨章节去重扩展性基准
+
+生成 N 个段落（分布在多个章节，约 3% 为跨章节近似重复），对比：
+
+- 两两比较（原实现）：全部段落生成 embedding，O(n²) 余弦相似度
+- MinHash LSH：只对候选对计算 embedding 相似度；第二次调用复用段落指纹
+
+两两比较在段落数超过 --baseline-max 时按 n² 外推耗时（标注 *）。
+默认使用本地 embedding（EMBEDDING_PROVIDER=local）。
+
+用法：
+    cd backend && python -m benchmarks.bench_cross_section_dedup --paragraphs 100 500 1000 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.blog_generator.cross_section_dedup import (  # noqa: E402
+    CrossSectionDeduplicator, FingerprintCache,
+)
+from services.blog_generator.services.semantic_compressor import (  # noqa: E402
+    EmbeddingProvider, _cosine_similarity,
+)
+
+CHARS = '模型数据系统服务架构缓存检索生成评估推理训练部署监控日志队列节点状态并发事务索引分布'
+
+
+def make_sections(n_paragraphs: int, per_section: int, rng: random.Random) -> list:
+    words = [a + b for a in CHARS for b in CHARS][:300]
+    paragraphs = []
+    for i in range(n_paragraphs):
+        if paragraphs and rng.random() < 0.03:
+            # 近似重复：复制一个已有段落并替换少量词
+            source = rng.choice(paragraphs).split(' ')
+            for _ in range(2):
+                source[rng.randrange(len(source))] = rng.choice(words)
+            paragraphs.append(' '.join(source))
+        else:
+            paragraphs.append(' '.join(rng.choice(words) for _ in range(30)))
+    # 打乱后分章，近似重复大多落在不同章节
+    rng.shuffle(paragraphs)
+    return [
+        {'id': f's{i}', 'content': '\n\n'.join(paragraphs[start:start + per_section])}
+        for i, start in enumerate(range(0, n_paragraphs, per_section))
+    ]
+
+
+def brute_force(dedup: CrossSectionDeduplicator, sections: list, threshold: float) -> set:
+    """原实现：全部段落 embedding + 两两比较"""
+    paras = [(idx, p) for idx, s in enumerate(sections) for p in dedup._split_paragraphs(s['content'])]
+    embeddings = EmbeddingProvider().embed([p for _, p in paras])
+    found = set()
+    for i in range(len(paras)):
+        for j in range(i + 1, len(paras)):
+            if paras[i][0] != paras[j][0] and _cosine_similarity(embeddings[i], embeddings[j]) >= threshold:
+                found.add((paras[i][1], paras[j][1]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='跨章节去重扩展性基准')
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[100, 500, 1000, 5000], help='段落数')
+    parser.add_argument('--per-section', type=int, default=20, help='每章段落数')
+    parser.add_argument('--threshold', type=float, default=0.85, help='相似度阈值')
+    parser.add_argument('--baseline-max', type=int, default=500, help='两两比较实测的最大段落数，更大时外推')
+    args = parser.parse_args()
+    os.environ.setdefault('EMBEDDING_PROVIDER', 'local')
+
+    print(f'{"段落数":>6} {"两两比较 s":>11} {"比较对数":>10} {"LSH 首次 s":>10} {"候选对":>7} '
+          f'{"LSH 再次 s":>10} {"重复对":>6} {"召回率":>6}')
+    baseline_ref = None
+    for n in args.paragraphs:
+        sections = make_sections(n, args.per_section, random.Random(n))
+        dedup = CrossSectionDeduplicator(threshold=args.threshold, min_paragraph_len=10,
+                                         fingerprints=FingerprintCache(max_entries=100000))
+        pairs = n * (n - 1) // 2
+
+        expected = None
+        if n <= args.baseline_max:
+            start = time.perf_counter()
+            expected = brute_force(dedup, sections, args.threshold)
+            base_time = time.perf_counter() - start
+            baseline_ref = (n, base_time)
+            base_label = f'{base_time:>10.2f} '
+        elif baseline_ref:
+            base_label = f'{baseline_ref[1] * (n / baseline_ref[0]) ** 2:>10.2f}*'
+        else:
+            base_label = f'{"-":>10} '
+
+        start = time.perf_counter()
+        found = dedup.detect_duplicates(sections)
+        first = time.perf_counter() - start
+        candidates = dedup.stats['candidates']
+        start = time.perf_counter()
+        dedup.detect_duplicates(sections)
+        second = time.perf_counter() - start
+
+        recall = '-'
+        if expected is not None:
+            hits = {(d['para_a'], d['para_b']) for d in found}
+            recall = f'{len(hits & expected) / len(expected):.0%}' if expected else '100%'
+        print(f'{n:>6} {base_label} {pairs:>10} {first:>10.2f} {candidates:>7} {second:>10.2f} '
+              f'{len(found):>6} {recall:>6}')
+
+
+if __name__ == '__main__':
+    main()
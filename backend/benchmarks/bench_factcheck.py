@@ -0,0 +1,84 @@
+"""
+事实核查耗时基准
+
+用带延迟的模拟 LLM（固定延迟 + 按 Prompt 长度增量）对比：
+
+- 原实现：全部章节 + 全部证据拼成一次调用
+- 按章节并行：每章只带 BM25 检索出的相关证据，各章并行核查
+
+用法：
+    cd backend && python -m benchmarks.bench_factcheck --sections 4 8 16 32 --llm-ms 500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.blog_generator.agents.factcheck import FactCheckAgent, _build_content  # noqa: E402
+
+TOPICS = ['Transformer', 'PostgreSQL', 'Kubernetes', 'Rust', 'LangGraph', 'Redis', 'Kafka', 'React']
+
+
+class SimulatedLLM:
+    """耗时 = 固定延迟 + 每千字符增量（模拟长 Prompt 的预填充与输出开销）"""
+
+    def __init__(self, base_ms: float, per_kchar_ms: float):
+        self.base = base_ms / 1000
+        self.per_kchar = per_kchar_ms / 1000
+        self.calls = 0
+        self.chars = 0
+
+    def chat(self, messages, response_format=None):
+        prompt = messages[0]['content']
+        self.calls += 1
+        self.chars += len(prompt)
+        time.sleep(self.base + self.per_kchar * len(prompt) / 1000)
+        return json.dumps({'score': 5, 'claims': [], 'fixes': []})
+
+
+def make_article(n_sections: int, rng: random.Random) -> tuple:
+    sections, results = [], []
+    for i in range(n_sections):
+        topic = TOPICS[i % len(TOPICS)]
+        year = rng.randint(2010, 2024)
+        sections.append({
+            'id': f's{i}', 'title': f'{topic} 第 {i} 节',
+            'content': f'{topic} 于 {year} 年发布，性能提升 {rng.randint(10, 90)}%。' + '实践中需要结合场景取舍。' * 40,
+        })
+        for j in range(3):
+            results.append({'title': f'{topic} 资料 {i}-{j}', 'content': f'{topic} {year} 年发布说明 ' * 30})
+    return sections, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='事实核查耗时基准')
+    parser.add_argument('--sections', type=int, nargs='+', default=[4, 8, 16, 32], help='章节数')
+    parser.add_argument('--llm-ms', type=float, default=500, help='模拟 LLM 单次调用固定延迟（毫秒）')
+    parser.add_argument('--kchar-ms', type=float, default=100, help='模拟 LLM 每千字符 Prompt 增加的延迟（毫秒）')
+    parser.add_argument('--workers', type=int, default=8, help='并行核查线程数')
+    args = parser.parse_args()
+
+    print(f'{"章节数":>6} {"单次调用 s":>10} {"Prompt 字符":>11} {"按章并行 s":>10} {"调用数":>6} {"Prompt 字符":>11}')
+    for n in args.sections:
+        sections, results = make_article(n, random.Random(n))
+
+        llm = SimulatedLLM(args.llm_ms, args.kchar_ms)
+        evidence = '\n'.join(f"[S{i+1}] {r['title']}: {r['content'][:300]}" for i, r in enumerate(results))
+        start = time.perf_counter()
+        FactCheckAgent(llm).check(_build_content(sections), evidence)
+        single = (time.perf_counter() - start, llm.chars)
+
+        llm = SimulatedLLM(args.llm_ms, args.kchar_ms)
+        start = time.perf_counter()
+        FactCheckAgent(llm, max_workers=args.workers).check_sections(sections, results)
+        parallel = (time.perf_counter() - start, llm.calls, llm.chars)
+
+        print(f'{n:>6} {single[0]:>10.2f} {single[1]:>11} {parallel[0]:>10.2f} {parallel[1]:>6} {parallel[2]:>11}')
+
+
+if __name__ == '__main__':
+    main()
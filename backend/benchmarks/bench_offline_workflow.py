@@ -0,0 +1,161 @@
+"""
+离线端到端工作流基准
+
+使用 services.offline_providers 的确定性替身（LLM / 搜索 / 图片 / OSS）跑完整的
+BlogGenerator 流程，不消耗任何外部额度。对每种篇幅统计：
+
+- 墙钟耗时与各节点耗时（TaskLogMiddleware 的 agent_stats）
+- 峰值线程数（采样线程）与峰值 RSS
+- LLM 调用数 / token / 429 次数，搜索与图片调用数
+
+通过 --latency / --tokens-per-sec / --rate-429 模拟真实服务的耗时结构，
+便于在改动并发、缓存、重试策略前后做可复现的对比。
+
+用法：
+    cd backend && python -m benchmarks.bench_offline_workflow --workflows mini short --latency 0.2
+"""
+import argparse
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# 离线基准默认关闭客户端限流间隔，由 --min-interval 显式指定
+os.environ.setdefault('LLM_MIN_REQUEST_INTERVAL', '0')
+
+from services.offline_providers import (  # noqa: E402
+    OfflineProfile, get_offline_stats, install_offline_providers,
+)
+
+WORKFLOWS = ['mini', 'short', 'medium', 'long', 'deep']
+
+
+class _ThreadSampler:
+    """后台采样峰值线程数"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 单位为 KB，macOS 为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def run_workflow(target_length: str, topic: str, profile: OfflineProfile, output_dir: str):
+    from services.blog_generator import BlogGenerator
+
+    providers = install_offline_providers(output_dir, profile)
+    stats = get_offline_stats()
+    before = stats.snapshot()
+
+    generator = BlogGenerator(providers['llm'], search_service=providers['search'])
+    with _ThreadSampler() as sampler:
+        started = time.perf_counter()
+        result = generator.generate(topic=topic, target_length=target_length)
+        elapsed = time.perf_counter() - started
+
+    after = stats.snapshot()
+    task_log = getattr(generator, 'task_log', None)
+    nodes = {
+        name: data.get('duration_ms', 0) / 1000
+        for name, data in (getattr(task_log, 'agent_stats', None) or {}).items()
+    }
+    return {
+        'target_length': target_length,
+        'success': bool(result.get('success')),
+        'error': result.get('error'),
+        'elapsed': elapsed,
+        'nodes': nodes,
+        'peak_threads': sampler.peak,
+        'peak_rss_mb': _peak_rss_mb(),
+        'llm_calls': after['total_calls'] - before['total_calls'],
+        'input_tokens': after['input_tokens'] - before['input_tokens'],
+        'output_tokens': after['output_tokens'] - before['output_tokens'],
+        'rate_limited': after['rate_limited'] - before['rate_limited'],
+        'search_calls': after['service_calls'].get('search', 0) - before['service_calls'].get('search', 0),
+        'image_calls': after['service_calls'].get('image', 0) - before['service_calls'].get('image', 0),
+    }
+
+
+def _print_report(report, top_nodes: int):
+    status = '成功' if report['success'] else f"失败: {report['error']}"
+    print(f"\n[{report['target_length']}] {status}")
+    print(f"  耗时 {report['elapsed']:.2f}s  峰值线程 {report['peak_threads']}  "
+          f"峰值 RSS {report['peak_rss_mb']:.0f}MB")
+    print(f"  LLM 调用 {report['llm_calls']}（429: {report['rate_limited']}）  "
+          f"token 输入 {report['input_tokens']} / 输出 {report['output_tokens']}  "
+          f"搜索 {report['search_calls']}  图片 {report['image_calls']}")
+    nodes = sorted(report['nodes'].items(), key=lambda item: item[1], reverse=True)[:top_nodes]
+    for name, seconds in nodes:
+        print(f"    {name:<28} {seconds:7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线端到端工作流基准')
+    parser.add_argument('--workflows', nargs='+', default=WORKFLOWS,
+                        help='篇幅：mini / short / medium / long / deep')
+    parser.add_argument('--topic', default='Python 异步编程')
+    parser.add_argument('--latency', type=float, default=0.0, help='LLM 首字延迟秒数')
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--tokens-per-sec', type=float, default=0.0, help='LLM 输出速度，0 不模拟')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='LLM 调用返回 429 的概率')
+    parser.add_argument('--search-latency', type=float, default=0.0)
+    parser.add_argument('--image-latency', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--recordings', default=None, help='录制响应 JSONL（按消息哈希回放）')
+    parser.add_argument('--min-interval', type=float, default=None,
+                        help='LLM_MIN_REQUEST_INTERVAL（默认 0）')
+    parser.add_argument('--top-nodes', type=int, default=8, help='每个工作流打印耗时最长的节点数')
+    parser.add_argument('--verbose', action='store_true', help='输出生成流程日志')
+    args = parser.parse_args()
+
+    if args.min_interval is not None:
+        os.environ['LLM_MIN_REQUEST_INTERVAL'] = str(args.min_interval)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    profile = OfflineProfile(
+        llm_latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_sec=args.tokens_per_sec,
+        rate_limit_ratio=args.rate_429,
+        search_latency=args.search_latency,
+        image_latency=args.image_latency,
+        seed=args.seed,
+        recordings=args.recordings,
+    )
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for target_length in args.workflows:
+            report = run_workflow(target_length, args.topic, profile, os.path.join(tmp, target_length))
+            _print_report(report, args.top_nodes)
+            failed += not report['success']
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+多平台发布基准（本地静态编辑器替身）
+
+在本机启动一个静态 HTTP 服务，提供模拟 CSDN / 知乎 / 掘金等编辑器的 HTML 页面（标题输入框、
+带 setValue 的 CodeMirror 替身、发布按钮），为每个替身平台生成发布配置，然后对比：
+
+- 冷启动顺序发布：每次发布启动新 Chromium，平台逐个发布（原实现）
+- 常驻浏览器池：复用浏览器与平台上下文，跨平台并发发布
+
+需要已安装 Chromium（playwright install chromium）。
+
+用法：
+    cd backend && python -m benchmarks.bench_publish_pool --platforms 4 --rounds 3
+    cd backend && python -m benchmarks.bench_publish_pool --concurrency 4 --headed
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.publishers.browser_pool import BrowserPool  # noqa: E402
+from services.publishers.publisher import Publisher  # noqa: E402
+
+EDITOR_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>editor</title></head>
+<body>
+  <input class="title-input" placeholder="标题">
+  <div class="CodeMirror"></div>
+  <button id="publish" onclick="history.pushState({}, '', location.pathname + '?published=1')">发布</button>
+  <script>
+    const cm = document.querySelector('.CodeMirror');
+    cm.CodeMirror = { value: '', setValue(v) { this.value = v; cm.textContent = v.slice(0, 200); } };
+  </script>
+</body></html>
+"""
+
+PLATFORM_YAML = """
+platform:
+  id: {pid}
+  name: {pid}
+  editor_url: http://127.0.0.1:{port}/{pid}/editor.html
+  cookie_domain: 127.0.0.1
+  settle_ms: {settle_ms}
+header:
+  enabled: false
+login_check:
+  type: url_not_contains
+  value: login
+content_upload:
+  type: codemirror
+  title_selector: .title-input
+  content_selector: .CodeMirror
+workflow:
+  - action: click
+    name: 发布
+    selector: "#publish"
+    wait_after: 100
+result_url:
+  type: current_url
+"""
+
+
+def start_static_server(root: str) -> tuple:
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=root)
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def build_fixture(root: str, platforms: list, port: int, settle_ms: int) -> str:
+    config_dir = os.path.join(root, 'configs')
+    os.makedirs(config_dir)
+    for pid in platforms:
+        os.makedirs(os.path.join(root, pid))
+        with open(os.path.join(root, pid, 'editor.html'), 'w', encoding='utf-8') as f:
+            f.write(EDITOR_HTML)
+        with open(os.path.join(config_dir, f'{pid}.yaml'), 'w', encoding='utf-8') as f:
+            f.write(PLATFORM_YAML.format(pid=pid, port=port, settle_ms=settle_ms))
+    return config_dir
+
+
+async def publish_round(publisher: Publisher, platforms: list, concurrent: bool, headless: bool) -> list:
+    cookies = [{'name': 'sid', 'value': 'bench'}]
+    kwargs = dict(title='基准测试文章', content='# 正文\n\n' + '内容段落。' * 2000, headless=headless)
+    if concurrent:
+        return await publisher.publish_to_multiple(
+            platforms=platforms, cookies_map={p: cookies for p in platforms}, **kwargs,
+        )
+    return [await publisher.publish(platform_id=p, cookies=cookies, **kwargs) for p in platforms]
+
+
+def run_mode(config_dir: str, platforms: list, rounds: int, pool: BrowserPool,
+             concurrent: bool, headless: bool, warmup: bool) -> tuple:
+    publisher = Publisher(config_dir=config_dir, pool=pool)
+    if warmup:
+        asyncio.run(publish_round(publisher, platforms, concurrent, headless))
+    timings, failures = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = asyncio.run(publish_round(publisher, platforms, concurrent, headless))
+        timings.append(time.perf_counter() - start)
+        failures += [r['message'] for r in results if not r['success']]
+    pool.close()
+    return timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多平台发布基准（浏览器池 vs 冷启动）')
+    parser.add_argument('--platforms', type=int, default=4, help='替身平台数')
+    parser.add_argument('--rounds', type=int, default=3, help='发布轮数（每轮发布到全部平台）')
+    parser.add_argument('--concurrency', type=int, default=2, help='浏览器池跨平台并发数')
+    parser.add_argument('--settle-ms', type=int, default=300, help='打开编辑器后的等待时间（毫秒）')
+    parser.add_argument('--headed', action='store_true', help='有头模式运行')
+    args = parser.parse_args()
+
+    headless = not args.headed
+    platforms = [f'platform{i}' for i in range(args.platforms)]
+    with tempfile.TemporaryDirectory() as root:
+        server, port = start_static_server(root)
+        config_dir = build_fixture(root, platforms, port, args.settle_ms)
+        try:
+            cold, cold_failed = run_mode(
+                config_dir, platforms, args.rounds,
+                BrowserPool(max_concurrency=1, keep_alive=False),
+                concurrent=False, headless=headless, warmup=False,
+            )
+            warm, warm_failed = run_mode(
+                config_dir, platforms, args.rounds,
+                BrowserPool(max_concurrency=args.concurrency, keep_alive=True),
+                concurrent=True, headless=headless, warmup=True,
+            )
+        finally:
+            server.shutdown()
+
+    total = args.platforms * args.rounds
+    if len(cold_failed) == total or len(warm_failed) == total:
+        print(f'全部发布失败（是否已执行 playwright install chromium？）: {(cold_failed or warm_failed)[0].splitlines()[0]}')
+        sys.exit(1)
+
+    per_round = lambda ts: sum(ts) / len(ts)  # noqa: E731
+    print(f'平台: {args.platforms} 个 × {args.rounds} 轮（编辑器等待 {args.settle_ms}ms）')
+    print(f'冷启动顺序发布:   {per_round(cold):7.2f} s/轮  失败 {len(cold_failed)}')
+    print(f'常驻浏览器池并发: {per_round(warm):7.2f} s/轮  失败 {len(warm_failed)}  '
+          f'(并发 {args.concurrency}, {per_round(cold) / per_round(warm):.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+搜索结果缓存基准
+
+模拟若干篇主题相近的文章依次执行研究阶段：每篇文章对每个搜索源发出
+主查询 + 子查询（SubQueryEngine 模板）+ 缺口查询，相近主题之间共享部分查询。
+以带固定延迟的模拟上游对比无缓存与 SearchResultCache 下的上游请求数与总耗时。
+
+用法：
+    cd backend && python -m benchmarks.bench_search_cache --articles 20 --upstream-ms 300
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.blog_generator.services.search_result_cache import SearchResultCache  # noqa: E402
+
+SOURCES = ('general', 'google', 'sogou', 'arxiv')
+TOPICS = ['LangGraph 多智能体', 'LangGraph 工作流', 'RAG 检索增强', 'RAG 评估', 'Agent 记忆机制']
+TEMPLATES = ['{t} 核心概念 tutorial', '{t} 最佳实践 best practices', '{t} 实际案例 use cases', '{t}']
+GAPS = ['向量数据库选型', '上下文窗口限制', '工具调用失败处理', '评测指标', '部署成本']
+
+
+class Upstream:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    def search(self, query: str, max_results: int):
+        self.calls += 1
+        time.sleep(self.delay)
+        return {'success': True, 'results': [{'url': f'https://example.com/{hash(query)}/{i}'} for i in range(max_results)]}
+
+
+def article_queries(rng: random.Random) -> list:
+    topic = rng.choice(TOPICS)
+    queries = [tpl.format(t=topic) for tpl in TEMPLATES]
+    queries += [f'{topic} {gap}' for gap in rng.sample(GAPS, 2)]
+    return queries
+
+
+def run(args, cache) -> tuple:
+    upstream = Upstream(args.upstream_ms / 1000)
+    rng = random.Random(11)
+    start = time.perf_counter()
+    for _ in range(args.articles):
+        for query in article_queries(rng):
+            for source in SOURCES:
+                if cache is None:
+                    upstream.search(query, 5)
+                else:
+                    cache.fetch(source, query, 5, lambda q=query: upstream.search(q, 5))
+    return upstream.calls, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='搜索结果缓存基准')
+    parser.add_argument('--articles', type=int, default=20, help='模拟文章数')
+    parser.add_argument('--upstream-ms', type=float, default=50, help='模拟上游搜索延迟（毫秒）')
+    args = parser.parse_args()
+
+    base_calls, base_time = run(args, None)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SearchResultCache(path=os.path.join(tmp, 'search.db'))
+        cached_calls, cached_time = run(args, cache)
+
+    print(f'文章 {args.articles} 篇，源 {len(SOURCES)} 个，上游延迟 {args.upstream_ms:.0f}ms')
+    print(f'无缓存:   上游请求 {base_calls:5d} 次，耗时 {base_time:7.2f} s')
+    print(f'结果缓存: 上游请求 {cached_calls:5d} 次，耗时 {cached_time:7.2f} s  '
+          f'（命中 {cache.stats["hits"]}，未命中 {cache.stats["misses"]}）')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+多进程任务状态基准
+
+模拟 N 个生成进程（每个进程串行处理任务：CPU 密集的"生成"步骤 + 进度事件写入），
+所有进程共享同一个 SQLite WAL 任务状态文件，同时主进程作为 SSE 订阅端读取全部事件。
+对比 1 个进程与 N 个进程的任务吞吐，验证共享存储不会成为多核扩展的瓶颈。
+
+用法：
+    cd backend && python -m benchmarks.bench_task_backend --workers 1 4 --tasks 64
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.task_service import TaskManager  # noqa: E402
+from services.task_store import SQLiteTaskStore  # noqa: E402
+
+
+def _manager(db_path) -> TaskManager:
+    mgr = object.__new__(TaskManager)
+    mgr._initialized = False
+    mgr.__init__(store=SQLiteTaskStore(db_path))
+    return mgr
+
+
+def _generation_step(seed: str, rounds: int) -> str:
+    digest = seed.encode()
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return digest.hex()
+
+
+def _worker(db_path, task_ids, steps, rounds):
+    mgr = _manager(db_path)
+    for task_id in task_ids:
+        mgr.set_running(task_id)
+        for i in range(steps):
+            if mgr.is_cancelled(task_id):
+                break
+            _generation_step(f'{task_id}-{i}', rounds)
+            mgr.send_progress(task_id, 'content', i * 100 // steps, f'step {i}')
+        mgr.send_complete(task_id, {'ok': True})
+
+
+def run(workers, tasks, steps, rounds):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'task_state.db')
+        web = _manager(db_path)
+        task_ids = [web.create_task() for _ in range(tasks)]
+        queues = {task_id: web.get_queue(task_id) for task_id in task_ids}
+
+        ctx = multiprocessing.get_context('spawn')
+        processes = [
+            ctx.Process(target=_worker, args=(db_path, task_ids[i::workers], steps, rounds))
+            for i in range(workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+
+        # 订阅端：读取全部任务的事件直到完成
+        events, pending = 0, set(task_ids)
+        while pending:
+            for task_id in list(pending):
+                queue = queues[task_id]
+                while True:
+                    try:
+                        message = queue.get_nowait()
+                    except Exception:
+                        break
+                    events += 1
+                    if message['event'] == 'complete':
+                        pending.discard(task_id)
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+    return elapsed, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程任务状态基准')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 4])
+    parser.add_argument('--tasks', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=50, help='每个任务的进度事件数')
+    parser.add_argument('--rounds', type=int, default=20000, help='每步 CPU 工作量（sha256 轮数）')
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        elapsed, events = run(workers, args.tasks, args.steps, args.rounds)
+        throughput = args.tasks / elapsed
+        baseline = baseline or throughput
+        print(f"workers={workers:<3} 耗时 {elapsed:6.2f}s  任务 {throughput:6.1f}/s  "
+              f"事件 {events / elapsed:8.0f}/s  加速比 {throughput / baseline:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
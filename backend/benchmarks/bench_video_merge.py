@@ -0,0 +1,83 @@
+"""
+视频合并基准测试
+
+用 FFmpeg 生成合成片段（testsrc 画面 + 正弦音频），对比：
+- legacy: 原实现，concat 后统一 libx264 重新编码
+- pipeline: media_pipeline.concat_videos，探测编码一致后流拷贝
+
+用法（需要本机安装 ffmpeg / ffprobe）：
+    cd backend && python -m benchmarks.bench_video_merge --clips 6 --duration 5
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services import media_pipeline  # noqa: E402
+
+
+def make_clip(path: str, duration: int, size: str):
+    cmd = [
+        media_pipeline.FFMPEG_PATH, '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc=duration={duration}:size={size}:rate=30',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest', path,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def bench(label: str, func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"{label:<10} best={best:.3f}s  avg={sum(timings) / len(timings):.3f}s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='视频合并基准测试')
+    parser.add_argument('--clips', type=int, default=6)
+    parser.add_argument('--duration', type=int, default=5)
+    parser.add_argument('--size', default='720x1280')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if not shutil.which(media_pipeline.FFMPEG_PATH) or not shutil.which(media_pipeline.FFPROBE_PATH):
+        print('未找到 ffmpeg / ffprobe，跳过基准测试')
+        return 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        clips = []
+        for i in range(args.clips):
+            path = os.path.join(temp_dir, f'clip_{i}.mp4')
+            make_clip(path, args.duration, args.size)
+            clips.append(path)
+        print(f"生成 {args.clips} 个 {args.duration}s {args.size} 合成片段")
+
+        output = os.path.join(temp_dir, 'out.mp4')
+        legacy = bench(
+            'legacy',
+            lambda: media_pipeline.concat_videos(clips, output, force_reencode=True),
+            args.repeat,
+        )
+        modes = []
+        pipeline = bench(
+            'pipeline',
+            lambda: modes.append(media_pipeline.concat_videos(clips, output)),
+            args.repeat,
+        )
+        print(f"pipeline 模式: {modes[-1]}, 加速比: {legacy / pipeline:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+对话式写作单章节编辑延迟基准
+
+按不同文档规模（章节数）对比编辑一个章节并读回会话的耗时：
+
+- 整体重写：sections 整篇 JSON 存在会话行内，每次编辑重新序列化并写回，再从库中读出（原实现）
+- 局部写入：WritingSessionManager.update_section 只写该章节一行，读取命中热会话 LRU
+
+用法：
+    cd backend && python -m benchmarks.bench_writing_session --sections 10 50 200 --section-chars 3000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.chat.writing_session import WritingSessionManager  # noqa: E402
+
+
+def build_sections(count: int, chars: int) -> list:
+    return [{'id': f's{i}', 'title': f'第 {i} 章', 'content': '字' * chars} for i in range(count)]
+
+
+def blob_edit_ms(db_path: str, sections: list, edits: int) -> float:
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE writing_sessions (session_id TEXT PRIMARY KEY, sections TEXT)')
+    conn.execute("INSERT INTO writing_sessions VALUES ('ws', ?)", (json.dumps(sections, ensure_ascii=False),))
+    conn.commit()
+    start = time.perf_counter()
+    for n in range(edits):
+        current = json.loads(conn.execute("SELECT sections FROM writing_sessions WHERE session_id = 'ws'").fetchone()[0])
+        current[n % len(current)]['content'] = f'改写 {n}' + current[n % len(current)]['content'][8:]
+        conn.execute("UPDATE writing_sessions SET sections = ? WHERE session_id = 'ws'",
+                     (json.dumps(current, ensure_ascii=False),))
+        conn.commit()
+    conn.close()
+    return (time.perf_counter() - start) / edits * 1000
+
+
+def section_edit_ms(db_path: str, sections: list, edits: int) -> tuple:
+    """返回 (写入 ms, 写入 + 读回 ms)"""
+    mgr = WritingSessionManager(db_path=db_path)
+    session_id = mgr.create(topic='基准', sections=sections).session_id
+    write = total = 0.0
+    for n in range(edits):
+        section = dict(sections[n % len(sections)], content=f'改写 {n}' + sections[0]['content'][8:])
+        start = time.perf_counter()
+        mgr.update_section(session_id, section['id'], section)
+        written = time.perf_counter()
+        mgr.get(session_id)
+        write += written - start
+        total += time.perf_counter() - start
+    return write / edits * 1000, total / edits * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对话式写作单章节编辑延迟基准')
+    parser.add_argument('--sections', type=int, nargs='+', default=[10, 50, 200], help='文档章节数')
+    parser.add_argument('--section-chars', type=int, default=3000, help='每章字数')
+    parser.add_argument('--edits', type=int, default=50, help='每种规模的编辑次数')
+    args = parser.parse_args()
+
+    print(f'{"章节数":>6} {"整体重写+读回 ms":>16} {"局部写入 ms":>12} {"局部写入+读回 ms":>16}')
+    for count in args.sections:
+        sections = build_sections(count, args.section_chars)
+        with tempfile.TemporaryDirectory() as tmp:
+            blob = blob_edit_ms(os.path.join(tmp, 'blob.db'), sections, args.edits)
+            write, partial = section_edit_ms(os.path.join(tmp, 'sessions.db'), sections, args.edits)
+        print(f'{count:>6} {blob:>16.2f} {write:>12.2f} {partial:>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
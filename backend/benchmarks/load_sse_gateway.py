@@ -0,0 +1,157 @@
+"""
+SSE 网关压测
+
+在进程内启动 SSEGateway，保持 N 个并发订阅者（默认 500），同时模拟持续到来的
+生成任务：每个"生成请求"由一个工作线程按固定节奏发送 progress / stream 事件并以
+complete 结束，完成后订阅者立即重新订阅下一个任务。
+
+输出：投递事件数、投递延迟 p50/p95/p99、峰值线程数、网关 /health 响应延迟。
+
+用法：
+    cd backend && python -m benchmarks.load_sse_gateway --subscribers 500 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.sse_gateway import SSEGateway  # noqa: E402
+from services.task_service import TaskManager  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Producer:
+    """模拟生成请求：每个任务一个工作线程，按节奏发送事件"""
+
+    def __init__(self, task_manager, events_per_task, interval):
+        self.task_manager = task_manager
+        self.events_per_task = events_per_task
+        self.interval = interval
+        self.started = 0
+
+    def new_task(self) -> str:
+        task_id = self.task_manager.create_task(task_id=f'load_{uuid.uuid4().hex[:10]}')
+        self.started += 1
+        threading.Thread(target=self._run, args=(task_id,), daemon=True).start()
+        return task_id
+
+    def _run(self, task_id):
+        time.sleep(self.interval)
+        for i in range(self.events_per_task):
+            self.task_manager.send_progress(task_id, 'content', i * 100 // self.events_per_task, f'step {i}')
+            time.sleep(self.interval)
+        self.task_manager.send_complete(task_id, {'ok': True})
+
+
+async def subscriber(port, producer, deadline, latencies, counters):
+    """一个订阅者：循环订阅新任务直到截止时间"""
+    while time.time() < deadline:
+        task_id = producer.new_task()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'GET /api/tasks/{task_id}/stream HTTP/1.1\r\nHost: load\r\n\r\n'.encode())
+        await writer.drain()
+        await reader.readuntil(b'\r\n\r\n')
+        buffer = b''
+        done = False
+        while not done:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            now = time.time()
+            while b'\n\n' in buffer:
+                frame, buffer = buffer.split(b'\n\n', 1)
+                fields = dict(line.split(': ', 1) for line in frame.decode().split('\n') if ': ' in line)
+                data = json.loads(fields.get('data', '{}'))
+                if '_ts' in data:
+                    latencies.append((now - data['_ts']) * 1000)
+                counters['events'] += 1
+                if fields.get('event') == 'complete':
+                    counters['tasks'] += 1
+                    done = True
+        writer.close()
+
+
+async def probe_health(port, deadline, latencies):
+    """订阅者满载期间持续请求 /health，观察网关是否仍可及时响应"""
+    while time.time() < deadline:
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /health HTTP/1.1\r\nHost: load\r\n\r\n')
+        await writer.drain()
+        await reader.read()
+        writer.close()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SSE 网关压测')
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--events-per-task', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.1, help='生成任务发送事件的间隔（秒）')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = args.subscribers * 2 + 256
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+    task_manager = TaskManager()
+    gateway = SSEGateway(task_manager=task_manager, host='127.0.0.1', port=0)
+    if not gateway.start():
+        print('网关启动失败')
+        return 1
+
+    producer = Producer(task_manager, args.events_per_task, args.interval)
+    latencies, health_latencies = [], []
+    counters = {'events': 0, 'tasks': 0}
+    peak = {'threads': threading.active_count(), 'active': 0}
+
+    def sample():
+        while time.time() < deadline:
+            peak['threads'] = max(peak['threads'], threading.active_count())
+            peak['active'] = max(peak['active'], gateway.stats['active'])
+            time.sleep(0.2)
+
+    async def run():
+        await asyncio.gather(
+            probe_health(gateway.port, deadline, health_latencies),
+            *[subscriber(gateway.port, producer, deadline, latencies, counters)
+              for _ in range(args.subscribers)],
+        )
+
+    deadline = time.time() + args.duration
+    threading.Thread(target=sample, daemon=True).start()
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    gateway.stop()
+
+    print(f"订阅者: {args.subscribers}  峰值在线: {peak['active']}  耗时: {elapsed:.1f}s")
+    print(f"完成任务: {counters['tasks']}  投递事件: {counters['events']} "
+          f"({counters['events'] / elapsed:.0f}/s)")
+    print(f"投递延迟 ms: p50={percentile(latencies, 50):.1f}  "
+          f"p95={percentile(latencies, 95):.1f}  p99={percentile(latencies, 99):.1f}")
+    print(f"/health 延迟 ms: p50={percentile(health_latencies, 50):.1f}  "
+          f"p95={percentile(health_latencies, 95):.1f}")
+    print(f"峰值线程数: {peak['threads']}（含模拟生成任务的工作线程 {args.subscribers} 个左右）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -60,6 +60,10 @@ class Config:
     KNOWLEDGE_MAX_DOC_ITEMS = int(os.getenv('KNOWLEDGE_MAX_DOC_ITEMS', '10'))  # 文档知识最大条目数
     KNOWLEDGE_CHUNK_SIZE = int(os.getenv('KNOWLEDGE_CHUNK_SIZE', '2000'))  # 知识分块大小（字符）
     KNOWLEDGE_CHUNK_OVERLAP = int(os.getenv('KNOWLEDGE_CHUNK_OVERLAP', '200'))  # 分块重叠大小
+    KNOWLEDGE_CHUNK_TOKENS = int(os.getenv('KNOWLEDGE_CHUNK_TOKENS', '1000'))  # 流式分块大小（token）
+    KNOWLEDGE_CHUNK_OVERLAP_TOKENS = int(os.getenv('KNOWLEDGE_CHUNK_OVERLAP_TOKENS', '100'))  # 流式分块重叠（token）
+    KNOWLEDGE_SECTION_RETRIEVAL_ENABLED = os.getenv('KNOWLEDGE_SECTION_RETRIEVAL_ENABLED', 'true').lower() == 'true'  # 按章节检索文档分块
+    KNOWLEDGE_SECTION_TOP_K = int(os.getenv('KNOWLEDGE_SECTION_TOP_K', '4'))  # 每章节检索的文档分块数
     
     # 多模态模型配置（用于图片摘要）
     IMAGE_CAPTION_MODEL = os.getenv('IMAGE_CAPTION_MODEL', 'qwen3-vl-plus-2025-12-19')
@@ -8,9 +8,10 @@
 - shared/        共享模板（文档解析等）
 """
 
-from .prompt_manager import PromptManager, get_prompt_manager
+from .prompt_manager import PromptManager, get_prompt_manager, cached_prompt_message
 
 __all__ = [
     'PromptManager',
     'get_prompt_manager',
+    'cached_prompt_message',
 ]
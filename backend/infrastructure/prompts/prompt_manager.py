@@ -3,19 +3,44 @@
 
 基于 blog_generator 版本改造，支持多子目录模板加载。
 模板引用使用子目录前缀：render("blog/planner", ...) 替代 render("planner", ...)
+
+运行模式（PROMPT_TEMPLATE_MODE）：
+- production（默认）：启动时预编译全部模板，关闭 auto_reload（渲染时不再 stat 模板文件），
+  static_block 渲染结果按参数缓存；可选 PROMPT_TEMPLATE_BYTECODE_DIR 持久化编译结果，
+  多进程 / 重启时跳过编译
+- development：修改模板后立即生效，不预编译、不缓存
+
+每个模板的渲染次数与耗时可通过 get_render_metrics() 查看。
 """
 
 import os
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import Any, Dict, Optional, Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
 logger = logging.getLogger(__name__)
 
 # 默认模板根目录
 BASE_DIR = os.path.dirname(__file__)
 
+# 模板中 {{ cache_breakpoint }} 的位置：之前为跨章节不变的稳定前缀（可被提供商缓存），之后为可变内容
+CACHE_BREAKPOINT = '<<<PROMPT_CACHE_BREAKPOINT>>>'
+
+
+def cached_prompt_message(prefix: str, suffix: str, role: str = "user") -> Dict[str, Any]:
+    """
+    构造带稳定前缀标记的消息
+
+    content 为完整 prompt（前缀在前），cache_prefix 标记可被提供商缓存的前缀部分：
+    Anthropic 在前缀末尾插入 cache_control 断点，OpenAI 兼容接口依赖前缀自动缓存。
+    """
+    if not prefix:
+        return {"role": role, "content": suffix}
+    return {"role": role, "content": f"{prefix}\n\n{suffix}", "cache_prefix": prefix}
+
 
 class PromptManager:
     """
@@ -38,11 +63,21 @@ class PromptManager:
             base_dir: 模板根目录路径，默认为 infrastructure/prompts/
         """
         self.base_dir = base_dir or BASE_DIR
+        self.production = os.getenv('PROMPT_TEMPLATE_MODE', 'production').lower() != 'development'
+
+        bytecode_dir = os.getenv('PROMPT_TEMPLATE_BYTECODE_DIR', '')
+        bytecode_cache = None
+        if self.production and bytecode_dir:
+            os.makedirs(bytecode_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
 
-        # 初始化 Jinja2 环境，加载整个目录树
+        # 初始化 Jinja2 环境，加载整个目录树（Prompt 是纯文本，不做 HTML 转义）
         self.env = Environment(
             loader=FileSystemLoader(self.base_dir),
-            autoescape=select_autoescape(['html', 'xml']),
+            autoescape=False,
+            auto_reload=not self.production,
+            cache_size=-1,
+            bytecode_cache=bytecode_cache,
             trim_blocks=True,
             lstrip_blocks=True,
         )
@@ -50,8 +85,19 @@ class PromptManager:
         # 添加自定义过滤器
         self.env.filters['truncate'] = self._truncate
         self.env.filters['tojson'] = self._tojson
+        self.env.globals['static_block'] = self.render_static
 
-        logger.info(f"Prompt 管理器初始化完成，模板根目录: {self.base_dir}")
+        self._static_cache: Dict[Tuple, str] = {}
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._metrics_lock = threading.Lock()
+
+        if self.production:
+            self.precompile()
+
+        logger.info(
+            f"Prompt 管理器初始化完成，模板根目录: {self.base_dir}，"
+            f"模式: {'production' if self.production else 'development'}"
+        )
 
     @classmethod
     def get_instance(cls, base_dir: str = None) -> 'PromptManager':
@@ -81,6 +127,19 @@ class PromptManager:
         import json
         return json.dumps(obj, ensure_ascii=False, indent=indent)
 
+    def precompile(self) -> int:
+        """预编译目录下全部模板（编译结果保留在环境缓存中），返回成功编译的模板数"""
+        start = time.perf_counter()
+        compiled = 0
+        for name in self.env.list_templates(extensions=['j2']):
+            try:
+                self.env.get_template(name)
+                compiled += 1
+            except Exception as e:
+                logger.warning(f"模板预编译失败 [{name}]: {e}")
+        logger.info(f"预编译 {compiled} 个 Prompt 模板，耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+        return compiled
+
     def render(self, template_name: str, **kwargs) -> str:
         """
         渲染模板
@@ -96,16 +155,93 @@ class PromptManager:
         if not template_name.endswith('.j2'):
             template_name = f"{template_name}.j2"
 
+        start = time.perf_counter()
         try:
             template = self.env.get_template(template_name)
             # 自动注入当前时间戳
-            kwargs['current_time'] = datetime.now().strftime('%Y年%m月%d日')
-            kwargs['current_year'] = datetime.now().year
-            kwargs['current_month'] = datetime.now().month
-            return template.render(**kwargs)
+            now = datetime.now()
+            kwargs['current_time'] = now.strftime('%Y年%m月%d日')
+            kwargs['current_year'] = now.year
+            kwargs['current_month'] = now.month
+            kwargs.setdefault('cache_breakpoint', '')
+            rendered = template.render(**kwargs)
         except Exception as e:
             logger.error(f"模板渲染失败 [{template_name}]: {e}")
             raise
+        self._record_render(template_name, time.perf_counter() - start)
+        return rendered
+
+    def render_static(self, template_name: str, **kwargs) -> str:
+        """
+        渲染静态子模块（风格 / 受众等只依赖少量枚举参数的指令片段）
+
+        production 模式下按 (模板, 参数) 缓存渲染结果；模板中通过
+        {{ static_block('blog/_writer_style', audience_adaptation=...) }} 引用。
+        参数必须可哈希，否则直接渲染不缓存。
+        """
+        if not self.production:
+            return self.render(template_name, **kwargs)
+        try:
+            key = (template_name, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return self.render(template_name, **kwargs)
+
+        cached = self._static_cache.get(key)
+        if cached is None:
+            cached = self._static_cache[key] = self.render(template_name, **kwargs)
+        else:
+            name = template_name if template_name.endswith('.j2') else f"{template_name}.j2"
+            with self._metrics_lock:
+                self._metrics.setdefault(name, self._new_metric())['static_hits'] += 1
+        return cached
+
+    @staticmethod
+    def _new_metric() -> Dict[str, float]:
+        return {'renders': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'static_hits': 0}
+
+    def _record_render(self, template_name: str, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+        with self._metrics_lock:
+            metric = self._metrics.setdefault(template_name, self._new_metric())
+            metric['renders'] += 1
+            metric['total_ms'] += elapsed_ms
+            metric['max_ms'] = max(metric['max_ms'], elapsed_ms)
+
+    def get_render_metrics(self) -> Dict[str, Dict[str, float]]:
+        """每个模板的渲染次数、总耗时、平均 / 最大耗时（ms）与静态块缓存命中数"""
+        with self._metrics_lock:
+            return {
+                name: {
+                    'renders': m['renders'],
+                    'total_ms': round(m['total_ms'], 3),
+                    'avg_ms': round(m['total_ms'] / m['renders'], 3) if m['renders'] else 0.0,
+                    'max_ms': round(m['max_ms'], 3),
+                    'static_hits': m['static_hits'],
+                }
+                for name, m in self._metrics.items()
+            }
+
+    def reset_render_metrics(self) -> None:
+        with self._metrics_lock:
+            self._metrics.clear()
+
+    def render_split(self, template_name: str, **kwargs) -> Tuple[str, str]:
+        """
+        渲染模板并在 {{ cache_breakpoint }} 处拆分为 (稳定前缀, 可变后缀)
+
+        前缀传给 LLMService 的 cache_prefix 以命中提供商的 prompt 缓存；
+        模板未声明断点时前缀为空。
+        """
+        rendered = self.render(template_name, cache_breakpoint=CACHE_BREAKPOINT, **kwargs)
+        if CACHE_BREAKPOINT not in rendered:
+            return '', rendered
+        prefix, suffix = rendered.split(CACHE_BREAKPOINT, 1)
+        return prefix.rstrip(), suffix.strip()
+
+    def render_cached_message(self, template_name: str, **kwargs) -> Dict[str, Any]:
+        """渲染模板为单条 user 消息，带 cache_prefix 标记（见 cached_prompt_message）"""
+        return cached_prompt_message(*self.render_split(template_name, **kwargs))
 
     # ========== Blog Agent 便捷方法 ==========
 
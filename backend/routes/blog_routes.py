@@ -2,6 +2,7 @@
 博客生成路由
 /api/blog/upload, /api/blog/generate, /api/blog/documents, etc.
 """
+import io
 import os
 import uuid
 import logging
@@ -55,7 +56,9 @@ def _record_task_to_queue(task_id: str, topic: str, article_type: str,
 def init_blog_services(app_config):
     """初始化搜索服务和博客生成服务（在 create_app 中调用）"""
     try:
-        init_search_service(app_config)
+        # 离线模式下搜索服务已由 install_offline_providers 替换，不再覆盖
+        if app_config.get('AI_PROVIDER_FORMAT', '').lower() != 'offline':
+            init_search_service(app_config)
         search_service = get_search_service()
         if search_service and search_service.is_available():
             logger.info("智谱搜索服务已初始化")
@@ -159,10 +162,20 @@ def upload_document():
 
                     db_service.save_parse_result(doc_id, markdown, mineru_folder)
 
-                    chunk_size = app.config.get('KNOWLEDGE_CHUNK_SIZE', 2000)
-                    chunk_overlap = app.config.get('KNOWLEDGE_CHUNK_OVERLAP', 200)
-                    chunks = file_parser.chunk_markdown(markdown, chunk_size, chunk_overlap)
-                    db_service.save_chunks(doc_id, chunks)
+                    # 流式分块：从解析结果文件逐行读取，按批写入数据库
+                    chunk_tokens = app.config.get('KNOWLEDGE_CHUNK_TOKENS', 1000)
+                    chunk_overlap_tokens = app.config.get('KNOWLEDGE_CHUNK_OVERLAP_TOKENS', 100)
+                    markdown_path = result.get('markdown_path')
+                    if markdown_path and os.path.exists(markdown_path):
+                        chunk_iter = file_parser.iter_markdown_chunks_from_file(
+                            markdown_path, chunk_tokens, chunk_overlap_tokens,
+                            encoding=result.get('markdown_encoding', 'utf-8')
+                        )
+                    else:
+                        chunk_iter = file_parser.iter_markdown_chunks(
+                            io.StringIO(markdown), chunk_tokens, chunk_overlap_tokens
+                        )
+                    chunks_count = db_service.save_chunks_stream(doc_id, chunk_iter)
 
                     llm_service = get_llm_service()
                     if llm_service:
@@ -176,7 +189,7 @@ def upload_document():
                     elif images:
                         db_service.save_images(doc_id, images)
 
-                    logger.info(f"文档解析完成: {doc_id}, chunks={len(chunks)}, images={len(images)}")
+                    logger.info(f"文档解析完成: {doc_id}, chunks={chunks_count}, images={len(images)}")
 
                 except Exception as e:
                     logger.error(f"文档解析异常: {doc_id}, {e}", exc_info=True)
@@ -17,7 +17,6 @@ import json
 import logging
 import os
 import re
-import time
 import threading
 from functools import lru_cache
 
@@ -30,13 +29,10 @@ feishu_bp = Blueprint('feishu', __name__, url_prefix='/api/feishu')
 
 # ========== 配置 ==========
 
-FEISHU_APP_ID = os.getenv('FEISHU_APP_ID', '')
-FEISHU_APP_SECRET = os.getenv('FEISHU_APP_SECRET', '')
+# FEISHU_APP_ID / FEISHU_APP_SECRET 由 services.feishu_client 读取
 FEISHU_VERIFICATION_TOKEN = os.getenv('FEISHU_VERIFICATION_TOKEN', '')
 FEISHU_ENCRYPT_KEY = os.getenv('FEISHU_ENCRYPT_KEY', '')
 
-FEISHU_API_BASE = 'https://open.feishu.cn/open-apis'
-
 # 内部 API 地址（同进程调用）
 VIBE_BLOG_INTERNAL = os.getenv('VIBE_BLOG_INTERNAL', 'http://localhost:5001')
 
@@ -50,81 +46,24 @@ CARD_TEMPLATES = {
     'info': os.getenv('FEISHU_TPL_INFO', ''),
 }
 
-# ========== Token 管理 ==========
-
-_token_cache = {'token': '', 'expires_at': 0}
-
-
-def _get_tenant_access_token():
-    """获取飞书 tenant_access_token（带缓存）。"""
-    now = time.time()
-    if _token_cache['token'] and _token_cache['expires_at'] > now + 60:
-        return _token_cache['token']
-
-    resp = requests.post(
-        f'{FEISHU_API_BASE}/auth/v3/tenant_access_token/internal',
-        json={'app_id': FEISHU_APP_ID, 'app_secret': FEISHU_APP_SECRET},
-        timeout=10,
-    )
-    data = resp.json()
-    if data.get('code') != 0:
-        logger.error('获取飞书 token 失败: %s', data)
-        return ''
-
-    token = data['tenant_access_token']
-    _token_cache['token'] = token
-    _token_cache['expires_at'] = now + data.get('expire', 7200)
-    return token
+# ========== 飞书消息发送 ==========
 
+def _feishu_client():
+    """所有飞书 API 调用共用一个连接池客户端（含 token 缓存）。"""
+    from services.feishu_client import get_feishu_client
+    return get_feishu_client()
 
-# ========== 飞书消息发送 ==========
 
 def _send_feishu_message(chat_id, text, msg_type='chat_id'):
     """通过飞书 API 发送文本消息到群聊。"""
-    token = _get_tenant_access_token()
-    if not token:
-        logger.error('无法发送飞书消息：token 为空')
-        return
-
-    resp = requests.post(
-        f'{FEISHU_API_BASE}/im/v1/messages',
-        params={'receive_id_type': msg_type},
-        headers={
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json; charset=utf-8',
-        },
-        json={
-            'receive_id': chat_id,
-            'msg_type': 'text',
-            'content': json.dumps({'text': text}),
-        },
-        timeout=10,
-    )
-    data = resp.json()
+    data = _feishu_client().send_message(chat_id, 'text', {'text': text}, receive_id_type=msg_type)
     if data.get('code') != 0:
         logger.error('飞书发送消息失败: %s', data)
 
 
 def _reply_feishu_message(message_id, text):
     """回复飞书消息（引用回复）。"""
-    token = _get_tenant_access_token()
-    if not token:
-        logger.error('无法回复飞书消息：token 为空')
-        return
-
-    resp = requests.post(
-        f'{FEISHU_API_BASE}/im/v1/messages/{message_id}/reply',
-        headers={
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json; charset=utf-8',
-        },
-        json={
-            'msg_type': 'text',
-            'content': json.dumps({'text': text}),
-        },
-        timeout=10,
-    )
-    data = resp.json()
+    data = _feishu_client().reply_message(message_id, 'text', {'text': text})
     if data.get('code') != 0:
         logger.error('飞书回复消息失败: %s', data)
 
@@ -182,33 +121,17 @@ def _note_element(content):
     }
 
 
+def _card_content(title, elements, header_color='blue', template_key=None, variables=None):
+    """卡片消息内容：模板优先，无模板时降级为代码构建。"""
+    tpl_content = _build_template_content(template_key, variables) if template_key else None
+    return tpl_content or _build_card(title, elements, header_color)
+
+
 def _reply_card(message_id, title, elements, header_color='blue',
                template_key=None, variables=None):
     """用卡片消息回复飞书消息。模板优先，无模板时降级为代码构建。"""
-    token = _get_tenant_access_token()
-    if not token:
-        logger.error('无法回复飞书卡片：token 为空')
-        return
-
-    tpl_content = _build_template_content(template_key, variables) if template_key else None
-    if tpl_content:
-        content = json.dumps(tpl_content)
-    else:
-        content = json.dumps(_build_card(title, elements, header_color))
-
-    resp = requests.post(
-        f'{FEISHU_API_BASE}/im/v1/messages/{message_id}/reply',
-        headers={
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json; charset=utf-8',
-        },
-        json={
-            'msg_type': 'interactive',
-            'content': content,
-        },
-        timeout=10,
-    )
-    data = resp.json()
+    content = _card_content(title, elements, header_color, template_key, variables)
+    data = _feishu_client().reply_message(message_id, 'interactive', content)
     if data.get('code') != 0:
         logger.error('飞书卡片回复失败: %s', data)
 
@@ -216,127 +139,75 @@ def _reply_card(message_id, title, elements, header_color='blue',
 def _send_card(chat_id, title, elements, header_color='blue', msg_type='chat_id',
               template_key=None, variables=None):
     """主动发送卡片消息到聊天。模板优先，无模板时降级为代码构建。"""
-    token = _get_tenant_access_token()
-    if not token:
-        logger.error('无法发送飞书卡片：token 为空')
-        return
-
-    tpl_content = _build_template_content(template_key, variables) if template_key else None
-    if tpl_content:
-        content = json.dumps(tpl_content)
-    else:
-        content = json.dumps(_build_card(title, elements, header_color))
-
-    resp = requests.post(
-        f'{FEISHU_API_BASE}/im/v1/messages',
-        params={'receive_id_type': msg_type},
-        headers={
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json; charset=utf-8',
-        },
-        json={
-            'receive_id': chat_id,
-            'msg_type': 'interactive',
-            'content': content,
-        },
-        timeout=10,
-    )
-    data = resp.json()
+    content = _card_content(title, elements, header_color, template_key, variables)
+    data = _feishu_client().send_message(chat_id, 'interactive', content, receive_id_type=msg_type)
     if data.get('code') != 0:
         logger.error('飞书卡片发送失败: %s', data)
 
 
-# ========== 进度轮询推送 ==========
-
-def _poll_task_progress(task_id, chat_id, user_id, topic):
-    """轮询任务进度，关键节点主动推送飞书卡片通知。"""
-    from services.task_service import TaskManager
-    tm = TaskManager()
-
-    last_stage = ''
-    poll_interval = 5  # 秒
-    max_wait = 1800    # 最多等 30 分钟
-    elapsed = 0
-
-    while elapsed < max_wait:
-        time.sleep(poll_interval)
-        elapsed += poll_interval
-
-        task = tm.get_task(task_id)
-        if not task:
-            break
-
-        # 阶段变化时推送进度
-        if task.current_stage and task.current_stage != last_stage:
-            last_stage = task.current_stage
-            stage_names = {
-                'analyze': '📊 分析主题',
-                'metaphor': '🎭 构思比喻',
-                'outline': '📋 生成大纲',
-                'research': '🔍 调研搜索',
-                'content': '✍️ 撰写内容',
-                'image': '🎨 生成配图',
-                'review': '🔍 审阅优化',
-                'assemble': '📦 组装文章',
-            }
-            stage_label = stage_names.get(last_stage, f'⚙️ {last_stage}')
-            progress = task.overall_progress or 0
-            bar = _progress_bar(progress)
-            _send_card(chat_id, f'⏳ 生成中：{topic}', [
-                _md_element(f'**当前阶段**：{stage_label}'),
-                _md_element(f'**总体进度**：{bar} {progress}%'),
-            ], header_color='blue',
-               template_key='progress',
-               variables={'topic': topic, 'stage': stage_label, 'progress': f'{progress}%'})
-
-        # 完成
-        if task.status == 'completed':
-            outputs = task.outputs or {}
-            word_count = outputs.get('word_count', 0)
-            section_count = outputs.get('section_count', 0)
-            _send_card(chat_id, f'✅ 写作完成：{topic}', [
-                _md_element(
-                    f'**字数**：~{word_count}\n'
-                    f'**章节**：{section_count}\n'
-                ),
-                _hr_element(),
-                _md_element('发送 **预览** 查看文章内容\n发送 **发布** 发布文章'),
-            ], header_color='green',
-               template_key='completed',
-               variables={'topic': topic, 'word_count': str(word_count), 'section_count': str(section_count)})
-            _user_sessions[user_id] = {
-                **_user_sessions.get(user_id, {}),
-                'status': 'completed',
-            }
-            return
+# ========== 进度推送 ==========
 
-        # 失败
-        if task.status == 'failed':
-            error_msg = task.error or '未知错误'
-            _send_card(chat_id, f'❌ 生成失败：{topic}', [
-                _md_element(f'**错误**：{error_msg[:200]}'),
-                _hr_element(),
-                _md_element('发送 **写作** 重试，或发送新主题'),
-            ], header_color='red',
-               template_key='failed',
-               variables={'topic': topic, 'error': error_msg[:200]})
-            _user_sessions[user_id] = {
-                **_user_sessions.get(user_id, {}),
-                'status': 'failed',
-            }
-            return
+_STAGE_NAMES = {
+    'analyze': '📊 分析主题',
+    'metaphor': '🎭 构思比喻',
+    'outline': '📋 生成大纲',
+    'research': '🔍 调研搜索',
+    'content': '✍️ 撰写内容',
+    'image': '🎨 生成配图',
+    'review': '🔍 审阅优化',
+    'assemble': '📦 组装文章',
+}
 
-        # 取消
-        if task.status == 'cancelled':
-            _send_card(chat_id, f'🚫 已取消：{topic}', [
-                _md_element('任务已取消。发送新主题重新开始。'),
-            ], header_color='grey')
-            return
 
-    # 超时
-    _send_card(chat_id, f'⏰ 超时：{topic}', [
-        _md_element('生成时间过长，请发送 **状态** 查看进度。'),
-    ], header_color='orange')
+def _progress_card(topic, kind, task):
+    """任务进度通知卡片（供 FeishuNotifier 渲染）。"""
+    if kind == 'progress':
+        stage_label = _STAGE_NAMES.get(task.current_stage, f'⚙️ {task.current_stage}')
+        progress = task.overall_progress or 0
+        bar = _progress_bar(progress)
+        content = _card_content(f'⏳ 生成中：{topic}', [
+            _md_element(f'**当前阶段**：{stage_label}'),
+            _md_element(f'**总体进度**：{bar} {progress}%'),
+        ], header_color='blue',
+           template_key='progress',
+           variables={'topic': topic, 'stage': stage_label, 'progress': f'{progress}%'})
+
+    elif kind == 'completed':
+        outputs = task.outputs or {}
+        word_count = outputs.get('word_count', 0)
+        section_count = outputs.get('section_count', 0)
+        content = _card_content(f'✅ 写作完成：{topic}', [
+            _md_element(
+                f'**字数**：~{word_count}\n'
+                f'**章节**：{section_count}\n'
+            ),
+            _hr_element(),
+            _md_element('发送 **预览** 查看文章内容\n发送 **发布** 发布文章'),
+        ], header_color='green',
+           template_key='completed',
+           variables={'topic': topic, 'word_count': str(word_count), 'section_count': str(section_count)})
+
+    elif kind == 'failed':
+        error_msg = task.error or '未知错误'
+        content = _card_content(f'❌ 生成失败：{topic}', [
+            _md_element(f'**错误**：{error_msg[:200]}'),
+            _hr_element(),
+            _md_element('发送 **写作** 重试，或发送新主题'),
+        ], header_color='red',
+           template_key='failed',
+           variables={'topic': topic, 'error': error_msg[:200]})
+
+    elif kind == 'cancelled':
+        content = _build_card(f'🚫 已取消：{topic}', [
+            _md_element('任务已取消。发送新主题重新开始。'),
+        ], header_color='grey')
+
+    else:  # timeout
+        content = _build_card(f'⏰ 超时：{topic}', [
+            _md_element('生成时间过长，请发送 **状态** 查看进度。'),
+        ], header_color='orange')
+
+    return {'msg_type': 'interactive', 'content': content}
 
 
 def _progress_bar(percent, length=10):
@@ -346,12 +217,21 @@ def _progress_bar(percent, length=10):
 
 
 def _start_progress_watcher(task_id, chat_id, user_id, topic):
-    """启动进度轮询线程。"""
-    threading.Thread(
-        target=_poll_task_progress,
-        args=(task_id, chat_id, user_id, topic),
-        daemon=True,
-    ).start()
+    """订阅任务事件，阶段变化 / 完成 / 失败时主动推送飞书卡片通知。"""
+    from services.feishu_notifier import get_feishu_notifier
+
+    def on_finish(kind):
+        if kind in ('completed', 'failed'):
+            _user_sessions[user_id] = {
+                **_user_sessions.get(user_id, {}),
+                'status': kind,
+            }
+
+    get_feishu_notifier().watch(
+        task_id, chat_id,
+        render=lambda kind, task: _progress_card(topic, kind, task),
+        on_finish=on_finish,
+    )
 
 
 # ========== 意图识别 ==========
@@ -301,36 +301,38 @@ def sync_publish():
         from services.publishers.publisher import Publisher
         publisher = Publisher()
 
+        ready_platforms = []
         for platform in blog_platforms:
-            platform_cookies = cookies.get(platform, [])
-            if not platform_cookies:
+            if cookies.get(platform):
+                ready_platforms.append(platform)
+            else:
                 results['blog'][platform] = {'success': False, 'error': '未提供Cookie'}
-                continue
 
+        # 各平台并发发布（共享常驻浏览器池）
+        if ready_platforms:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(publisher.publish(
-                        platform_id=platform,
-                        cookies=platform_cookies,
-                        title=record.get('topic', ''),
-                        content=record.get('markdown_content', ''),
-                        headless=True
-                    ))
-                    results['blog'][platform] = result
-
-                    if result.get('success'):
-                        from datetime import datetime
-                        db_service.update_publish_platforms(record_id, platform, {
-                            'status': 'published',
-                            'url': result.get('url', ''),
-                            'published_at': datetime.now().isoformat()
-                        })
-                finally:
-                    loop.close()
+                platform_results = loop.run_until_complete(publisher.publish_to_multiple(
+                    platforms=ready_platforms,
+                    cookies_map=cookies,
+                    title=record.get('topic', ''),
+                    content=record.get('markdown_content', ''),
+                ))
             except Exception as e:
-                results['blog'][platform] = {'success': False, 'error': str(e)}
+                platform_results = [{'success': False, 'error': str(e)}] * len(ready_platforms)
+            finally:
+                loop.close()
+
+            from datetime import datetime
+            for platform, result in zip(ready_platforms, platform_results):
+                results['blog'][platform] = result
+                if result.get('success'):
+                    db_service.update_publish_platforms(record_id, platform, {
+                        'status': 'published',
+                        'url': result.get('url', ''),
+                        'published_at': datetime.now().isoformat()
+                    })
 
         if xhs_enabled:
             xhs_cookies = cookies.get('xiaohongshu', [])
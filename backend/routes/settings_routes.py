@@ -4,6 +4,7 @@
 接口：
 - GET  /api/settings       获取所有可配置项的当前值
 - PUT  /api/settings       批量更新配置（运行时覆盖 os.environ）
+- GET  /api/settings/search-sources/stats  搜索源延迟（p50/p95）、成功率、产出与对冲统计
 """
 import os
 import logging
@@ -264,3 +265,14 @@ def update_settings():
         'updated': updated,
         'errors': errors,
     })
+
+
+@settings_bp.route('/search-sources/stats', methods=['GET'])
+def get_search_source_stats():
+    """搜索源统计（智能搜索未初始化时读取持久化文件）"""
+    from services.blog_generator.services.smart_search_service import get_smart_search_service
+    from services.blog_generator.services.source_curator import SourceCurator, default_stats_path
+
+    service = get_smart_search_service()
+    curator = service.curator if service else SourceCurator(stats_path=default_stats_path())
+    return jsonify({'success': True, 'sources': curator.get_stats()})
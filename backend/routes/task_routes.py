@@ -13,6 +13,7 @@ from services import (
     get_llm_service, get_image_service,
     get_task_manager, create_pipeline_service,
 )
+from services.sse_gateway import format_sse, is_terminal
 
 logger = logging.getLogger(__name__)
 
@@ -99,22 +100,8 @@ def stream_task_progress(task_id: str):
                     message = None
 
                 if message:
-                    event_type = message.get('event', 'progress')
-                    data = message.get('data', {})
-                    event_id = message.get('id', '')
-                    timestamp = message.get('timestamp')
-                    if timestamp:
-                        data['_ts'] = timestamp
-                    lines = []
-                    if event_id:
-                        lines.append(f"id: {event_id}")
-                    lines.append(f"event: {event_type}")
-                    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
-                    yield "".join(line + "\n" for line in lines) + "\n"
-
-                    if event_type in ('complete', 'cancelled'):
-                        break
-                    if event_type == 'error' and not data.get('recoverable'):
+                    yield format_sse(message)
+                    if is_terminal(message):
                         break
 
                 if time.time() - last_heartbeat > 30:
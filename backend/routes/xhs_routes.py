@@ -19,6 +19,7 @@ from services import (
 from services.database_service import get_db_service
 from services.oss_service import get_oss_service
 from services.video_service import get_video_service
+from services.sse_gateway import format_sse, is_terminal
 
 logger = logging.getLogger(__name__)
 
@@ -100,13 +101,8 @@ def xhs_stream(task_id: str):
                     message = None
 
                 if message:
-                    event_type = message.get('event', 'progress')
-                    data = message.get('data', {})
-                    yield f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
-
-                    if event_type in ('complete', 'cancelled'):
-                        break
-                    if event_type == 'error' and not data.get('recoverable'):
+                    yield format_sse(message, include_id=False)
+                    if is_terminal(message):
                         break
 
                 if time.time() - last_heartbeat > 30:
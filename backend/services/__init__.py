@@ -1,42 +1,47 @@
 """
 vibe-blog 服务模块
+
+导出项按需加载（PEP 562 模块级 __getattr__）：首次访问时才导入对应子模块，
+避免 `from services import get_llm_service` 连带导入 langgraph / 博客生成器等重型依赖。
 """
-from .llm_service import LLMService, get_llm_service, init_llm_service
-from .transform_service import TransformService, create_transform_service
-from .image_service import (
-    NanoBananaService, 
-    get_image_service, 
-    init_image_service,
-    AspectRatio,
-    ImageSize,
-    STORYBOOK_STYLE_PREFIX
-)
-from .task_service import TaskManager, get_task_manager
-from .pipeline_service import PipelineService, create_pipeline_service
-from .blog_generator import BlogGenerator, SearchService, init_search_service, get_search_service
-from .blog_generator.blog_service import BlogService, init_blog_service, get_blog_service
+import importlib
+
+_EXPORTS = {
+    'LLMService': '.llm_service',
+    'get_llm_service': '.llm_service',
+    'init_llm_service': '.llm_service',
+    'TransformService': '.transform_service',
+    'create_transform_service': '.transform_service',
+    'NanoBananaService': '.image_service',
+    'get_image_service': '.image_service',
+    'init_image_service': '.image_service',
+    'AspectRatio': '.image_service',
+    'ImageSize': '.image_service',
+    'STORYBOOK_STYLE_PREFIX': '.image_service',
+    'TaskManager': '.task_service',
+    'get_task_manager': '.task_service',
+    'PipelineService': '.pipeline_service',
+    'create_pipeline_service': '.pipeline_service',
+    'BlogGenerator': '.blog_generator',
+    'SearchService': '.blog_generator.services.search_service',
+    'init_search_service': '.blog_generator.services.search_service',
+    'get_search_service': '.blog_generator.services.search_service',
+    'BlogService': '.blog_generator.blog_service',
+    'init_blog_service': '.blog_generator.blog_service',
+    'get_blog_service': '.blog_generator.blog_service',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'LLMService',
-    'get_llm_service', 
-    'init_llm_service',
-    'TransformService',
-    'create_transform_service',
-    'NanoBananaService',
-    'get_image_service',
-    'init_image_service',
-    'AspectRatio',
-    'ImageSize',
-    'STORYBOOK_STYLE_PREFIX',
-    'TaskManager',
-    'get_task_manager',
-    'PipelineService',
-    'create_pipeline_service',
-    'BlogGenerator',
-    'BlogService',
-    'init_blog_service',
-    'get_blog_service',
-    'SearchService',
-    'init_search_service',
-    'get_search_service',
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
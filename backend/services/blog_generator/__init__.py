@@ -10,14 +10,26 @@
 - Questioner: 追问深化
 - Reviewer: 质量审核
 - Assembler: 文档组装
+
+导出项按需加载：BlogGenerator 依赖 langgraph，仅在首次访问时导入，
+导入本包的其他子模块（如 services.search_service）不会连带加载工作流。
 """
+import importlib
+
+_EXPORTS = {
+    'BlogGenerator': '.generator',
+    'SearchService': '.services.search_service',
+    'init_search_service': '.services.search_service',
+    'get_search_service': '.services.search_service',
+}
+
+__all__ = list(_EXPORTS)
 
-from .generator import BlogGenerator
-from .services.search_service import SearchService, init_search_service, get_search_service
 
-__all__ = [
-    'BlogGenerator',
-    'SearchService',
-    'init_search_service',
-    'get_search_service',
-]
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
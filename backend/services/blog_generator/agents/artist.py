@@ -533,7 +533,7 @@ class ArtistAgent:
             illustration_type: 插图类型 ID（可选，用于 Type × Style 二维渲染）
             
         Returns:
-            图片本地路径，失败返回 None
+            图片源 URL（由 run() 整组上传到 OSS），失败返回 None
         """
         image_service = get_image_service()
         if not image_service or not image_service.is_available():
@@ -560,18 +560,18 @@ class ArtistAgent:
             aspect_ratio_enum = AspectRatio.PORTRAIT_9_16 if aspect_ratio == "9:16" else AspectRatio.LANDSCAPE_16_9
             logger.info(f"使用宽高比: {aspect_ratio}")
             
+            # 不在生成线程里逐张上传，生成完成后由 run() 整组并发上传到 OSS
             result = image_service.generate(
                 prompt=full_prompt,
                 aspect_ratio=aspect_ratio_enum,
                 image_size=ImageSize.SIZE_1K,
-                max_wait_time=600
+                max_wait_time=600,
+                download=False
             )
             
-            if result and (result.oss_url or result.local_path):
-                # 优先返回 OSS URL
-                final_path = result.oss_url or result.local_path
-                logger.info(f"AI 图片生成成功: {final_path}")
-                return final_path
+            if result and result.url:
+                logger.info(f"AI 图片生成成功: {result.url}")
+                return result.url
             else:
                 logger.warning(f"AI 图片生成失败: {caption}")
                 return None
@@ -1042,6 +1042,17 @@ class ArtistAgent:
                         'error': str(e)
                     }
         
+        # AI 图片整组并发上传到 OSS，上传失败的视为未生成
+        ai_images = [
+            r['image_resource'] for r in results
+            if r and r['success'] and r['image_resource']['render_method'] == 'ai_image'
+            and r['image_resource']['rendered_path']
+        ]
+        if ai_images:
+            oss_urls = get_image_service().upload_images_to_oss([img['rendered_path'] for img in ai_images])
+            for image_resource, oss_url in zip(ai_images, oss_urls):
+                image_resource['rendered_path'] = oss_url
+        
         # 第三步：按原始顺序组装结果，更新章节关联
         images = []
         section_image_ids = {i: [] for i in range(len(sections))}
@@ -1152,11 +1163,12 @@ class ArtistAgent:
                     prompt=image_prompt,
                     aspect_ratio=image_aspect_ratio,
                     image_size=ImageSize.SIZE_1K,
-                    max_wait_time=600
+                    max_wait_time=600,
+                    download=False
                 )
                 
-                if result and (result.oss_url or result.url):
-                    image_url = result.oss_url or result.url
+                if result and result.url:
+                    image_url = result.url
                     elapsed = _time.time() - _start
                     logger.info(f"[Artist] 第 {idx+1}/{total} 张配图完成 ({elapsed:.1f}s): {section_title}")
                     
@@ -1198,6 +1210,13 @@ class ArtistAgent:
                 if result:
                     results[result['idx']] = result
         
+        # 整组并发上传到 OSS，上传失败时保留源 URL
+        uploaded = [r for r in results if r and r.get('success')]
+        oss_urls = image_service.upload_images_to_oss([r['image_url'] for r in uploaded])
+        for result, oss_url in zip(uploaded, oss_urls):
+            if oss_url:
+                result['image_url'] = result['image_resource']['rendered_path'] = oss_url
+        
         # 按顺序组装结果
         for idx, result in enumerate(results):
             if result and result.get('success'):
@@ -1,21 +1,43 @@
 """
 FactCheck Agent - 事实核查
 
-从全文提取可验证 Claim，与 Researcher 搜索结果交叉验证。
+按章节提取可验证 Claim，与 Researcher 搜索结果交叉验证。
 位于 reviewer/revision 之后、humanizer 之前。
+
+每章先用规则挑出候选 Claim 句（数字、日期、归属、比较），以候选句为查询
+在搜索结果的 BM25 索引中检索相关证据，只把该章内容 + 相关证据送入一次核查调用；
+各章并行核查后合并报告。没有候选 Claim 的章节不调用 LLM。
 """
 
 import json
 import logging
 import os
-from typing import Dict, Any, List
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
 
 from ..prompts import get_prompt_manager
+from services.knowledge_index import ChunkIndex
 
 logger = logging.getLogger(__name__)
 
 VERDICT_MAP = {"S": "SUPPORTED", "C": "CONTRADICTED", "U": "UNVERIFIED"}
 
+MAX_WORKERS = int(os.getenv('FACTCHECK_MAX_WORKERS', '4'))
+EVIDENCE_TOP_K = int(os.getenv('FACTCHECK_EVIDENCE_TOP_K', '6'))
+
+# 候选 Claim：数字/百分比/年份、归属动词、比较词
+_CLAIM_PATTERN = re.compile(
+    r'\d|百分之|[一二三四五六七八九十百千万亿]+(?:倍|个|家|年|月|种|项)'
+    r'|发布|推出|提出|开发|创立|成立|收购|开源|宣布|根据|报告|研究表明|调查'
+    r'|超过|高于|低于|领先|落后|最早|首次|首个|唯一|最大|最快|最多'
+    r'|released|announced|according|percent|faster|slower|than',
+    re.I,
+)
+_SENTENCE_SPLIT = re.compile(r'(?<=[。！？!?；;])|\n+')
+# 单章最多取多少句候选 Claim 作为检索查询
+_MAX_CLAIM_QUERIES = 8
+
 
 def _extract_json(text: str) -> dict:
     """从 LLM 响应中提取 JSON"""
@@ -51,16 +73,80 @@ def _build_content(sections: List[dict]) -> str:
     return "\n".join(parts)
 
 
-def _build_evidence(search_results: List[dict]) -> str:
-    """拼接证据源（搜索结果）"""
-    if not search_results:
-        return "(无证据)"
-    parts = []
-    for i, sr in enumerate(search_results):
-        title = sr.get('title', '')
-        content = sr.get('content', '')[:300]
-        parts.append(f"[S{i+1}] {title}: {content}")
-    return "\n".join(parts)
+def extract_claim_candidates(content: str, limit: int = _MAX_CLAIM_QUERIES) -> List[str]:
+    """规则提取章节中的候选 Claim 句（用于检索证据，最终判定仍由 LLM 完成）"""
+    candidates = []
+    for sentence in _SENTENCE_SPLIT.split(content or ''):
+        sentence = sentence.strip()
+        # 跳过代码块、表格分隔行等
+        if len(sentence) < 6 or sentence.startswith(('```', '|--', '|:-')):
+            continue
+        if _CLAIM_PATTERN.search(sentence):
+            candidates.append(sentence[:200])
+            if len(candidates) >= limit:
+                break
+    return candidates
+
+
+class EvidenceIndex:
+    """搜索结果的 BM25 索引，按 Claim 检索相关证据（编号沿用全局 [S{i}]）"""
+
+    def __init__(self, search_results: List[dict]):
+        self.search_results = search_results or []
+        self._index = ChunkIndex.build(
+            [
+                {'id': i, 'title': sr.get('title', ''), 'content': (sr.get('content', '') or '')[:2000]}
+                for i, sr in enumerate(self.search_results)
+            ],
+            with_embeddings=False,
+        )
+
+    def select(self, claims: List[str], top_k: int = EVIDENCE_TOP_K) -> List[int]:
+        """按各 Claim 的原始 BM25 分数取最高值合并排序，返回证据序号"""
+        # 不用 search() 的按查询归一化分数：否则每条弱相关 Claim 的最佳命中都会被拉到 1.0
+        best: Dict[int, float] = {}
+        for claim in claims:
+            for i, score in zip(self._index.chunk_ids, self._index.bm25_scores(claim)):
+                if score > 0:
+                    best[i] = max(best.get(i, 0.0), score)
+        ranked = sorted(best, key=lambda i: -best[i])[:top_k]
+        return sorted(ranked)
+
+    def render(self, indices: List[int]) -> str:
+        """按全局编号拼接选中的证据"""
+        if not indices:
+            return "(无证据)"
+        parts = []
+        for i in indices:
+            sr = self.search_results[i]
+            parts.append(f"[S{i+1}] {sr.get('title', '')}: {sr.get('content', '')[:300]}")
+        return "\n".join(parts)
+
+
+def _merge_reports(reports: List[dict]) -> dict:
+    """
+    合并各章核查报告
+
+    Claim 重新编号、计数累加；总评分取各章最低分，
+    保证"总评分 >= 阈值跳过修复"的判断对每一章都成立。
+    """
+    claims, fixes, section_scores = [], [], {}
+    for report in reports:
+        for claim in report.get('claims', []):
+            claims.append(dict(claim, id=len(claims) + 1))
+        fixes.extend(report.get('fix_instructions', []))
+        if report.get('section_id') is not None:
+            section_scores[report['section_id']] = report.get('overall_score', 5)
+    return {
+        'overall_score': min(section_scores.values(), default=5),
+        'total_claims': len(claims),
+        'supported': sum(1 for c in claims if c['verdict'] == 'SUPPORTED'),
+        'contradicted': sum(1 for c in claims if c['verdict'] == 'CONTRADICTED'),
+        'unverified': sum(1 for c in claims if c['verdict'] not in ('SUPPORTED', 'CONTRADICTED')),
+        'claims': claims,
+        'fix_instructions': fixes,
+        'section_scores': section_scores,
+    }
 
 
 def _normalize_report(raw: dict) -> dict:
@@ -110,10 +196,11 @@ class FactCheckAgent:
     自动修复 CONTRADICTED Claim，标记 UNVERIFIED Claim。
     """
 
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, max_workers: Optional[int] = None):
         self.llm = llm_client
         self.skip_threshold = int(os.getenv('FACTCHECK_SKIP_THRESHOLD', '4'))
         self.auto_fix = os.getenv('FACTCHECK_AUTO_FIX', 'true').lower() == 'true'
+        self.max_workers = max_workers or MAX_WORKERS
 
     def check(self, all_content: str, all_evidence: str) -> Dict[str, Any]:
         """执行事实核查"""
@@ -131,6 +218,66 @@ class FactCheckAgent:
         raw = _extract_json(response)
         return _normalize_report(raw)
 
+    def _check_section(self, section: dict, evidence: EvidenceIndex) -> Optional[dict]:
+        """核查单章；无候选 Claim 时返回 None（不调用 LLM）"""
+        content = section.get('content', '') or ''
+        claims = extract_claim_candidates(content)
+        if not claims:
+            return None
+        sid = section.get('id', '')
+        report = self.check(
+            _build_content([section]),
+            evidence.render(evidence.select(claims)),
+        )
+        # 单章调用时 LLM 可能漏填 sid
+        for claim in report['claims']:
+            claim['section_id'] = claim['section_id'] or sid
+        for fix in report['fix_instructions']:
+            fix['section_id'] = fix['section_id'] or sid
+        report['section_id'] = sid
+        return report
+
+    def check_sections(self, sections: List[dict], search_results: List[dict]) -> Dict[str, Any]:
+        """
+        按章节并行核查并合并报告
+
+        单章失败只记入 errors；全部失败时抛出最后一个异常。
+        """
+        evidence = EvidenceIndex(search_results)
+        reports: Dict[int, dict] = {}
+        skipped = []
+        errors = []
+        last_error = None
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(sections)))) as executor:
+            futures = {
+                executor.submit(self._check_section, section, evidence): idx
+                for idx, section in enumerate(sections)
+            }
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:
+                    sid = sections[idx].get('id', '')
+                    logger.warning(f"[FactCheck] 章节 {sid} 核查失败: {e}")
+                    errors.append({'section_id': sid, 'error': str(e)})
+                    last_error = e
+                    continue
+                if report is not None:
+                    reports[idx] = report
+                else:
+                    skipped.append(idx)
+
+        if last_error is not None and not reports:
+            raise last_error
+        merged = _merge_reports([reports[idx] for idx in sorted(reports)])
+        merged['checked_sections'] = len(reports)
+        # 无候选 Claim、未送 LLM 的章节不在 section_scores 中，单独列出供调用方区分
+        merged['skipped_sections'] = [sections[idx].get('id', '') for idx in sorted(skipped)]
+        if errors:
+            merged['errors'] = errors
+        return merged
+
     def run(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """执行事实核查并写入 state"""
         if state.get('error'):
@@ -141,11 +288,9 @@ class FactCheckAgent:
             return state
 
         search_results = state.get('search_results', [])
-        all_content = _build_content(sections)
-        all_evidence = _build_evidence(search_results)
 
         try:
-            report = self.check(all_content, all_evidence)
+            report = self.check_sections(sections, search_results)
         except Exception as e:
             logger.error(f"[FactCheck] 核查异常: {e}")
             state['factcheck_report'] = {'error': str(e)}
@@ -159,7 +304,8 @@ class FactCheckAgent:
             f"Claim {report.get('total_claims', 0)} 条 "
             f"(支持 {report.get('supported', 0)}, "
             f"矛盾 {report.get('contradicted', 0)}, "
-            f"未验证 {report.get('unverified', 0)})"
+            f"未验证 {report.get('unverified', 0)}), "
+            f"核查章节 {report.get('checked_sections', 0)}/{len(sections)}"
         )
 
         if overall_score >= self.skip_threshold:
@@ -170,13 +316,14 @@ class FactCheckAgent:
             logger.info("[FactCheck] 自动修复已禁用")
             return state
 
-        # 自动修复
+        # 自动修复：只修评分低于阈值的章节
         section_map = {s.get('id', ''): s for s in sections}
+        section_scores = report.get('section_scores', {})
         fix_count = 0
         for fix in report.get('fix_instructions', []):
             sid = fix.get('section_id', '')
             section = section_map.get(sid)
-            if not section:
+            if not section or section_scores.get(sid, 0) >= self.skip_threshold:
                 continue
             original = fix.get('original', '')
             if not original or original not in section.get('content', ''):
@@ -93,10 +93,10 @@ class HumanizerAgent:
     def _score_section(self, content: str) -> Dict[str, Any]:
         """评分：检测 AI 写作痕迹（轻量调用）"""
         pm = get_prompt_manager()
-        prompt = pm.render_humanizer_score(section_content=content)
+        message = pm.render_cached_message('blog/humanizer_score', section_content=content)
 
         response = self.llm.chat(
-            messages=[{"role": "user", "content": prompt}],
+            messages=[message],
             response_format={"type": "json_object"},
         )
         if not response:
@@ -106,7 +106,8 @@ class HumanizerAgent:
     def _rewrite_section(self, content: str, audience_adaptation: str) -> Dict[str, Any]:
         """改写：输出 diff 替换列表（含重试）"""
         pm = get_prompt_manager()
-        prompt = pm.render_humanizer(
+        message = pm.render_cached_message(
+            'blog/humanizer',
             section_content=content,
             audience_adaptation=audience_adaptation,
         )
@@ -115,7 +116,7 @@ class HumanizerAgent:
         for attempt in range(self.max_retries + 1):
             try:
                 response = self.llm.chat(
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=[message],
                     response_format={"type": "json_object"},
                     caller="humanizer",
                 )
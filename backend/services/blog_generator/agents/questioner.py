@@ -75,7 +75,9 @@ class QuestionerAgent:
             检查结果
         """
         pm = get_prompt_manager()
-        prompt = pm.render_questioner(
+        # 检测规则为稳定前缀（各章节共享，可命中 prompt 缓存），章节内容在后
+        message = pm.render_cached_message(
+            'blog/questioner',
             section_content=section_content,
             section_outline=section_outline,
             depth_requirement=depth_requirement
@@ -83,7 +85,7 @@ class QuestionerAgent:
         
         try:
             response = self.llm.chat(
-                messages=[{"role": "user", "content": prompt}],
+                messages=[message],
                 response_format={"type": "json_object"},
                 caller="questioner",
             )
@@ -144,7 +146,8 @@ class QuestionerAgent:
             评估结果字典
         """
         pm = get_prompt_manager()
-        prompt = pm.render_section_evaluator(
+        message = pm.render_cached_message(
+            'blog/section_evaluator',
             section_content=section_content,
             section_title=section_title,
             prev_summary=prev_summary,
@@ -165,7 +168,7 @@ class QuestionerAgent:
 
         try:
             response = self.llm.chat(
-                messages=[{"role": "user", "content": prompt}],
+                messages=[message],
                 response_format={"type": "json_object"},
                 caller="questioner",
             )
@@ -322,6 +322,13 @@ class ResearcherAgent:
             if result.get('success'):
                 sources_used = result.get('sources_used', [])
                 logger.info(f"🧠 智能搜索完成，使用搜索源: {sources_used}")
+                # 推送 credibility_scored 事件（缓存命中 / LLM 评估占比）
+                credibility = result.get('credibility')
+                if credibility and self.task_manager and self.task_id:
+                    self.task_manager.send_event(self.task_id, 'result', {
+                        'type': 'credibility_scored',
+                        'data': credibility,
+                    })
                 search_results = result.get('results', [])[:max_results]
 
                 # 保存到缓存
@@ -698,23 +705,37 @@ class ResearcherAgent:
             # ✅ 有文档 → 走知识融合逻辑
             logger.info("使用知识融合模式")
             
-            # 将文档知识转换为 KnowledgeItem
-            doc_items = self.knowledge_service.prepare_document_knowledge(
-                [{'filename': d.get('file_name', ''), 'markdown_content': d.get('content', '')} 
-                 for d in document_knowledge]
-            )
-            
             # 将搜索结果转换为 KnowledgeItem
             web_items = self.knowledge_service.convert_search_results(search_results)
             
-            # 融合知识
-            merged_knowledge = self.knowledge_service.get_merged_knowledge(
-                document_knowledge=doc_items,
-                web_knowledge=web_items
-            )
-            
-            # 整理为 Prompt 可用格式
-            summary = self.knowledge_service.summarize_for_prompt(merged_knowledge)
+            chunk_retriever = self.knowledge_service.load_chunk_retriever(state.get('document_ids', []))
+            if chunk_retriever is not None:
+                # 已分块的文档：按主题检索相关分块作为全文共享背景，
+                # 各章节的 top-k 片段由 Writer 按章节查询另行检索
+                merged_knowledge = self.knowledge_service.get_merged_knowledge_v2(
+                    documents=chunk_retriever.documents,
+                    chunks=chunk_retriever.chunks,
+                    images=[],
+                    web_knowledge=web_items,
+                    query=topic,
+                    chunk_index=chunk_retriever.chunk_index
+                )
+                summary = self.knowledge_service.summarize_for_prompt_v2(merged_knowledge)
+            else:
+                # 将文档知识转换为 KnowledgeItem
+                doc_items = self.knowledge_service.prepare_document_knowledge(
+                    [{'filename': d.get('file_name', ''), 'markdown_content': d.get('content', '')} 
+                     for d in document_knowledge]
+                )
+                
+                # 融合知识
+                merged_knowledge = self.knowledge_service.get_merged_knowledge(
+                    document_knowledge=doc_items,
+                    web_knowledge=web_items
+                )
+                
+                # 整理为 Prompt 可用格式
+                summary = self.knowledge_service.summarize_for_prompt(merged_knowledge)
             
             # 记录知识来源统计
             state['knowledge_source_stats'] = {
@@ -8,7 +8,7 @@ import os
 from typing import Dict, Any, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from ..prompts import get_prompt_manager
+from ..prompts import get_prompt_manager, cached_prompt_message
 
 # 从环境变量读取并行配置，默认为 3
 MAX_WORKERS = int(os.environ.get('BLOG_GENERATOR_MAX_WORKERS', '3'))
@@ -104,6 +104,22 @@ class WriterAgent:
             style=style,
         )
     
+    @staticmethod
+    def _shared_prefix(background_knowledge: str, kwargs: dict) -> str:
+        """
+        各章节共享的 prompt 前缀：角色（41.10）+ 写作技能（102.06）+ 全文大纲 + 背景知识
+
+        只放对所有章节逐字相同的内容，章节相关内容（文档片段等）放在缓存断点之后。
+        """
+        parts = [
+            kwargs.get('_persona_prompt', ''),
+            kwargs.get('_writing_skill_prompt', ''),
+            kwargs.get('_article_outline', ''),
+        ]
+        if background_knowledge:
+            parts.append(f"## 📚 全文背景知识（各章节共享）\n\n{background_knowledge}")
+        return "\n\n".join(p for p in parts if p)
+
     @observe(name="writer.write_section", as_type="generation")
     def write_section(
         self,
@@ -113,6 +129,7 @@ class WriterAgent:
         background_knowledge: str = "",
         audience_adaptation: str = "technical-beginner",
         search_results: List[Dict[str, Any]] = None,
+        section_knowledge: str = "",
         verbatim_data: List[Dict[str, Any]] = None,
         learning_objectives: List[Dict[str, Any]] = None,
         narrative_mode: str = "",
@@ -127,9 +144,10 @@ class WriterAgent:
             section_outline: 章节大纲
             previous_section_summary: 前一章节摘要
             next_section_preview: 后续章节预告
-            background_knowledge: 背景知识
+            background_knowledge: 全文背景知识（放入各章节共享前缀）
             audience_adaptation: 受众适配类型
             search_results: 原始搜索结果（用于准确引用）
+            section_knowledge: 本章相关的文档片段（放在缓存断点之后）
             verbatim_data: 需要原样保留的数据
             learning_objectives: 学习目标列表（用于约束内容）
             narrative_mode: 叙事模式（如 what-why-how, tutorial, catalog）
@@ -198,7 +216,7 @@ class WriterAgent:
             section_outline=section_outline,
             previous_section_summary=previous_section_summary,
             next_section_preview=next_section_preview,
-            background_knowledge=background_knowledge,
+            background_knowledge=section_knowledge,  # 全文背景知识放入共享前缀，这里只放本章片段
             audience_adaptation=audience_adaptation,
             search_results=filtered_results,
             verbatim_data=verbatim_data or [],
@@ -211,15 +229,9 @@ class WriterAgent:
         # 37.13 写作模板 + 风格注入
         prompt = self._apply_template_and_style(prompt, "writer", kwargs)
 
-        # 102.06: 写作方法论技能注入
-        writing_skill_prompt = kwargs.get('_writing_skill_prompt', '')
-        if writing_skill_prompt:
-            prompt = writing_skill_prompt + "\n\n" + prompt
-
-        # 41.10: 动态 Agent 角色注入
-        persona_prompt = kwargs.get('_persona_prompt', '')
-        if persona_prompt:
-            prompt = persona_prompt + "\n\n" + prompt
+        # 全文共享部分（角色 / 写作技能 / 大纲 / 背景知识）作为稳定前缀，各章节请求可命中 prompt 缓存
+        message = cached_prompt_message(self._shared_prefix(background_knowledge, kwargs), prompt)
+        prompt = message["content"]
         
         # 输出完整的 Writer Prompt 到日志（用于诊断）
         logger.info(f"[Writer] ========== 章节 Prompt ({len(prompt)} 字): {section_outline.get('title', 'Unknown')} ==========")
@@ -249,13 +261,13 @@ class WriterAgent:
                     })
 
                 response = self.llm.chat_stream(
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=[message],
                     on_chunk=on_writing_chunk,
                     caller="writer",
                 )
             else:
                 response = self.llm.chat(
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=[message],
                     caller="writer",
                 )
 
@@ -434,6 +446,28 @@ class WriterAgent:
             logger.error(f"精准修改失败: {e}")
             return original_content
 
+    def _prefix_cached(self) -> bool:
+        """LLM 提供方是否缓存重复的 prompt 前缀"""
+        caches_prompt_prefix = getattr(self.llm, 'caches_prompt_prefix', None)
+        return bool(caches_prompt_prefix()) if callable(caches_prompt_prefix) else False
+
+    @staticmethod
+    def _outline_overview(outline: Dict[str, Any]) -> str:
+        """全文大纲概览（各章节共享，帮助章节之间衔接）"""
+        lines = [f"## 🗺️ 全文大纲：{outline.get('title', '')}", ""]
+        for i, section in enumerate(outline.get('sections', []) or [], 1):
+            concept = section.get('key_concept', '')
+            lines.append(f"{i}. {section.get('title', '')}" + (f"：{concept}" if concept else ""))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _section_query(section_outline: Dict[str, Any]) -> str:
+        """由章节大纲拼出文档分块检索查询"""
+        parts = [section_outline.get('title', ''), section_outline.get('key_concept', '')]
+        for point in section_outline.get('key_points', []) or []:
+            parts.append(point if isinstance(point, str) else json.dumps(point, ensure_ascii=False))
+        return ' '.join(p for p in parts if p)
+    
     @observe(name="writer.run")
     def run(self, state: Dict[str, Any], max_workers: int = None) -> Dict[str, Any]:
         """
@@ -471,6 +505,13 @@ class WriterAgent:
             state['sections'] = []
             return state
         
+        # 上传文档的分块检索器：每个章节只注入与本章相关的 top-k 分块
+        from services.knowledge_service import get_knowledge_service
+        chunk_retriever = get_knowledge_service().load_chunk_retriever(state.get('document_ids', []))
+        # 提供方缓存前缀时各章节共享完整前缀（只计费一次）；否则重复发送会按全价计费，沿用首章完整、其余截断
+        prefix_cached = self._prefix_cached()
+        article_outline = self._outline_overview(outline) if prefix_cached else ''
+        
         # 第一步：收集所有章节撰写任务，预先分配顺序索引
         tasks = []
         for i, section_outline in enumerate(sections_outline):
@@ -485,12 +526,21 @@ class WriterAgent:
                 next_section = sections_outline[i + 1]
                 next_preview = f"下一章节《{next_section.get('title', '')}》将介绍 {next_section.get('key_concept', '')}"
             
+            # 全文背景知识各章节相同（进入共享前缀，只计费一次），文档片段按章节检索
+            section_background = background_knowledge
+            if not prefix_cached and i > 0 and len(background_knowledge) > 100:
+                section_background = background_knowledge[:100] + '...'
+            doc_excerpts = ""
+            if chunk_retriever:
+                doc_excerpts = chunk_retriever.format_for_prompt(self._section_query(section_outline))
+            
             tasks.append({
                 'order_idx': i,
                 'section_outline': section_outline,
                 'prev_summary': prev_summary,
                 'next_preview': next_preview,
-                'background_knowledge': background_knowledge if i == 0 else (background_knowledge[:100] + '...' if len(background_knowledge) > 100 else background_knowledge),
+                'background_knowledge': section_background,
+                'section_knowledge': doc_excerpts,
                 'audience_adaptation': state.get('audience_adaptation', 'technical-beginner'),
                 'search_results': [] if section_outline.get('assigned_materials') else search_results,
                 'distilled_sources': distilled_sources,
@@ -502,6 +552,7 @@ class WriterAgent:
                 'style': state.get('writing_style'),  # 37.13
                 '_writing_skill_prompt': state.get('_writing_skill_prompt', ''),  # 102.06
                 '_persona_prompt': state.get('_persona_prompt', ''),  # 41.10
+                '_article_outline': article_outline,
             })
         
         # 使用环境变量配置或传入的参数
@@ -535,9 +586,12 @@ class WriterAgent:
                     narrative_mode=task.get('narrative_mode', ''),
                     narrative_flow=task.get('narrative_flow', {}),
                     distilled_sources=task.get('distilled_sources', []),
+                    section_knowledge=task.get('section_knowledge', ''),
                     template=task.get('template'),  # 37.13
                     style=task.get('style'),  # 37.13
                     _writing_skill_prompt=task.get('_writing_skill_prompt', ''),  # 102.06
+                    _persona_prompt=task.get('_persona_prompt', ''),  # 41.10
+                    _article_outline=task.get('_article_outline', ''),
                 )
                 return {
                     'success': True,
@@ -581,8 +635,12 @@ class WriterAgent:
                         narrative_mode=task.get('narrative_mode', ''),
                         narrative_flow=task.get('narrative_flow', {}),
                         distilled_sources=task.get('distilled_sources', []),
+                        section_knowledge=task.get('section_knowledge', ''),
                         template=task.get('template'),  # 37.13
                         style=task.get('style'),  # 37.13
+                        _writing_skill_prompt=task.get('_writing_skill_prompt', ''),  # 102.06
+                        _persona_prompt=task.get('_persona_prompt', ''),  # 41.10
+                        _article_outline=task.get('_article_outline', ''),
                     )
                     results[task['order_idx']] = {
                         'success': True,
@@ -5,6 +5,7 @@
 import logging
 import threading
 import os
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable
 from queue import Queue
@@ -12,9 +13,9 @@ from contextvars import copy_context
 
 from logging_config import task_id_context
 
+from utils.lazy import LazyResource
+
 from .queue_bridge import update_queue_status, update_queue_progress
-from .generator import BlogGenerator
-from .schemas.state import create_initial_state
 from .services.search_service import SearchService, init_search_service, get_search_service
 from .post_processors.markdown_formatter import MarkdownFormatter
 from ..image_service import get_image_service, AspectRatio, ImageSize
@@ -33,6 +34,9 @@ class BlogService:
     博客生成服务 - 与 vibe-blog 任务管理系统集成
     """
     
+    # BlogGenerator 依赖 langgraph 且需编译工作流，首次使用时才创建，避免拖慢应用冷启动
+    generator = LazyResource(factory=lambda self: self._create_generator())
+
     def __init__(self, llm_client, search_service=None, knowledge_service=None):
         """
         初始化博客生成服务
@@ -42,16 +46,26 @@ class BlogService:
             search_service: 搜索服务 (可选)
             knowledge_service: 知识服务 (可选，用于文档知识融合)
         """
+        self.llm_client = llm_client
+        self.search_service = search_service
         self.knowledge_service = knowledge_service
-        self.generator = BlogGenerator(
-            llm_client=llm_client,
-            search_service=search_service,
-            knowledge_service=knowledge_service
-        )
-        self.generator.compile()
 
         # 101.113: 记录正在等待大纲确认的任务（用于 resume 时查找 config）
         self._interrupted_tasks: Dict[str, Dict] = {}  # task_id -> {config, task_manager, ...}
+        # 共享存储模式下执行跨 worker 恢复指令的后台线程
+        self._resume_watcher: Optional[threading.Thread] = None
+        self._resume_watcher_lock = threading.Lock()
+
+    def _create_generator(self):
+        from .generator import BlogGenerator
+
+        generator = BlogGenerator(
+            llm_client=self.llm_client,
+            search_service=self.search_service,
+            knowledge_service=self.knowledge_service
+        )
+        generator.compile()
+        return generator
 
     def _get_token_usage(self) -> Optional[Dict]:
         """获取当前 token 用量摘要（用于注入 SSE 事件）"""
@@ -145,10 +159,54 @@ class BlogService:
             是否成功启动恢复
         """
         task_info = self._interrupted_tasks.get(task_id)
-        if not task_info:
+        store = self._shared_task_store(task_info)
+        if store is not None:
+            # 多 worker：中断图状态只存在于发起生成的进程，先原子认领，避免重复恢复
+            if not store.claim_interrupt(task_id):
+                logger.warning(f"resume_generation: 任务 {task_id} 不在中断列表中")
+                return False
+            if not task_info:
+                store.post_command(task_id, {'type': 'resume', 'action': action, 'outline': outline})
+                logger.info(f"resume_generation: 任务 {task_id} 由其它 worker 持有，已转发恢复指令")
+                return True
+        elif not task_info:
             logger.warning(f"resume_generation: 任务 {task_id} 不在中断列表中")
             return False
+        return self._start_resume(task_id, task_info, action, outline)
+
+    @staticmethod
+    def _shared_task_store(task_info: Optional[Dict] = None):
+        """多进程共享的任务状态存储（TASK_STATE_BACKEND=sqlite），进程内模式返回 None"""
+        task_manager = (task_info or {}).get('task_manager')
+        if task_manager is None:
+            from services.task_service import get_task_manager
+            task_manager = get_task_manager()
+        return getattr(task_manager, 'store', None)
+
+    def _watch_resume_commands(self, store):
+        """启动后台线程，执行其它 worker 转发来的、属于本进程中断任务的恢复指令（每进程一个）"""
+        with self._resume_watcher_lock:
+            if self._resume_watcher is not None:
+                return
+            from services.task_store import COMMAND_POLL_INTERVAL
 
+            def watch():
+                while True:
+                    time.sleep(COMMAND_POLL_INTERVAL)
+                    try:
+                        for task_id, command in store.take_commands(list(self._interrupted_tasks)):
+                            task_info = self._interrupted_tasks.get(task_id)
+                            if task_info and command.get('type') == 'resume':
+                                self._start_resume(task_id, task_info, command.get('action', 'accept'),
+                                                   command.get('outline'))
+                    except Exception as e:
+                        logger.warning(f"读取恢复指令失败: {e}")
+
+            self._resume_watcher = threading.Thread(target=watch, name='resume-commands', daemon=True)
+            self._resume_watcher.start()
+
+    def _start_resume(self, task_id: str, task_info: Dict, action: str, outline: dict = None) -> bool:
+        """在后台线程中恢复本进程持有的中断任务"""
         # 构建 resume 值
         if action == 'edit' and outline:
             resume_value = {"action": "edit", "outline": outline}
@@ -604,6 +662,7 @@ class BlogService:
                         f"words={article_config['target_word_count']}")
             
             # 创建初始状态（支持文档知识、图片风格、文章长度配置和宽高比）
+            from .schemas.state import create_initial_state
             initial_state = create_initial_state(
                 topic=topic,
                 article_type=article_type,
@@ -1031,6 +1090,11 @@ class BlogService:
                     'sse_handler': sse_handler,
                     'sse_logger_names': sse_logger_names,
                 }
+                store = getattr(task_manager, 'store', None)
+                if store is not None:
+                    # 登记到共享存储，确认请求落到其它 worker 时转发到本进程执行
+                    store.register_interrupt(task_id)
+                    self._watch_resume_commands(store)
                 # 不清理日志处理器，resume 时还需要
                 _interrupted = True
                 return
@@ -2096,77 +2160,26 @@ Duration: 6-8 seconds. Professional educational style."""
     
     def _merge_videos(self, video_urls: list, oss_service) -> Optional[str]:
         """
-        使用 FFmpeg 合并多个视频
+        合并多个视频（并发下载，编码一致时流拷贝，合并结果直传 OSS）
         
         Args:
             video_urls: 视频 URL 列表
             oss_service: OSS 服务
             
         Returns:
-            合并后的视频 URL 或 None
+            合并后的视频 URL（OSS 不可用时为本地静态路径）或 None
         """
-        import tempfile
-        import subprocess
-        import uuid
-        import os
-        import requests
+        from services.media_pipeline import merge_videos
         
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 下载所有视频
-                local_videos = []
-                for i, url in enumerate(video_urls):
-                    local_path = os.path.join(temp_dir, f"segment_{i}.mp4")
-                    logger.info(f"下载视频片段 {i+1}: {url[:80]}...")
-                    
-                    response = requests.get(url, timeout=120, stream=True)
-                    response.raise_for_status()
-                    with open(local_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    
-                    local_videos.append(local_path)
-                    logger.info(f"视频片段 {i+1} 下载完成")
-                
-                # 创建 FFmpeg concat 文件
-                concat_file = os.path.join(temp_dir, "concat.txt")
-                with open(concat_file, 'w') as f:
-                    for video_path in local_videos:
-                        f.write(f"file '{video_path}'\n")
-                
-                # 合并视频
-                output_path = os.path.join(temp_dir, f"merged_{uuid.uuid4().hex[:8]}.mp4")
-                
-                cmd = [
-                    'ffmpeg', '-y',
-                    '-f', 'concat',
-                    '-safe', '0',
-                    '-i', concat_file,
-                    '-c', 'copy',
-                    output_path
-                ]
-                
-                logger.info(f"执行 FFmpeg 合并: {' '.join(cmd)}")
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-                
-                if result.returncode != 0:
-                    logger.error(f"FFmpeg 合并失败: {result.stderr}")
-                    return None
-                
-                # 上传到 OSS
-                if oss_service and os.path.exists(output_path):
-                    oss_key = f"videos/merged_{uuid.uuid4().hex[:8]}.mp4"
-                    oss_url = oss_service.upload_file(output_path, oss_key)
-                    if oss_url:
-                        logger.info(f"合并视频已上传到 OSS: {oss_url}")
-                        return oss_url
-                
-                # 如果 OSS 上传失败，返回本地路径
-                return output_path
-                
-        except Exception as e:
-            logger.error(f"视频合并失败: {e}", exc_info=True)
+        result = merge_videos(video_urls, oss_service)
+        if not result.get('success'):
+            logger.error(f"视频合并失败: {result.get('error')}")
             return None
+        
+        logger.info(f"视频合并完成: mode={result['mode']}, 片段={result['segments']}, 耗时={result['timings']}")
+        if result.get('url'):
+            return result['url']
+        return f"/static/videos/{os.path.basename(result['local_path'])}"
     
     def _save_markdown(
         self,
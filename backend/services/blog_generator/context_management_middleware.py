@@ -87,13 +87,13 @@ class ContextManagementMiddleware:
     # ---- Usage estimation ----
 
     def _estimate_usage(self, state: Dict[str, Any]) -> float:
-        total_text = ""
+        # 逐字段估算：未变化的字段直接命中 token 计数缓存
+        tokens = 0
         for key in ("research_data", "sections", "outline",
                      "review_history", "search_results", "distilled_sources"):
             val = state.get(key)
             if val:
-                total_text += str(val)
-        tokens = estimate_tokens(total_text)
+                tokens += estimate_tokens(str(val))
         limit = self.guard.safe_input_limit
         return tokens / limit if limit > 0 else 0.0
 
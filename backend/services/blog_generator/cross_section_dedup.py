@@ -3,27 +3,182 @@
 
 在 Writer 完成后、Reviewer 之前运行：
 1. 将每个章节按段落切分
-2. 用 embedding 计算段落间相似度
-3. 相似度超过阈值的段落标记为重复
+2. 对段落字符 shingle 计算 MinHash 签名，LSH 分桶生成候选重复对
+3. 只对候选对计算 embedding 相似度，超过阈值的段落标记为重复
 4. 保留首次出现的段落，后续重复段落由 LLM 改写或删除
 
+两两比较是 O(n²)，书籍级输入（数千段落）不可行；LSH 只让字面相近的段落进入精确比较。
+字符 shingle 不依赖分词，对中文同样有效。段落签名与段落对相似度按段落内容哈希缓存在进程内，
+修订循环后再次去重时，未改动的段落不再重新计算。
+
 环境变量：
 - CROSS_SECTION_DEDUP_ENABLED: 是否启用（默认 false）
 - DEDUP_SIMILARITY_THRESHOLD: 相似度阈值（默认 0.85）
 - DEDUP_MIN_PARAGRAPH_LENGTH: 最小段落长度（默认 50 字符）
+- DEDUP_LSH_BANDS: LSH 分段数（默认 16，64 维签名每段 4 维，候选 Jaccard 约 0.5 以上）
+- DEDUP_FINGERPRINT_CACHE_SIZE: 段落签名 / 段落对相似度缓存条数上限（默认 50000）
 """
+import hashlib
 import logging
 import os
-from typing import Dict, Any, List, Tuple
+import re
+import threading
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# MinHash 签名维度（单次哈希分桶，见 minhash_signature）
+NUM_BINS = 64
+SHINGLE_SIZE = 4
+_MASK64 = (1 << 64) - 1
+# 旋转填充时每跨一个桶加的偏移，保证借来的值与原桶值区分开
+_ROTATION_OFFSET = 1 << 57
+
+
+def _normalize(text: str) -> str:
+    """NFKC、小写、去空白"""
+    return re.sub(r'\s+', '', unicodedata.normalize('NFKC', text)).lower()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """字符 shingle 集合（中文无需分词）"""
+    norm = _normalize(text)
+    if len(norm) <= size:
+        return {norm}
+    return {norm[i:i + size] for i in range(len(norm) - size + 1)}
+
+
+def minhash_signature(text: str, num_bins: int = NUM_BINS) -> Tuple[int, ...]:
+    """
+    MinHash 签名（one-permutation hashing + 旋转填充）
+
+    每个 shingle 只哈希一次，按哈希值分到 num_bins 个桶，桶内取最小值；
+    空桶借用右侧最近的非空桶（加距离偏移）。与 num_bins 次独立哈希的经典 MinHash
+    同样估计 Jaccard，但计算量与 shingle 数成正比。
+    哈希使用进程内的 hash()，签名只在本进程缓存中复用。
+    """
+    bins: List[Optional[int]] = [None] * num_bins
+    for shingle in shingles(text):
+        h = hash(shingle) & _MASK64
+        b = h % num_bins
+        v = h // num_bins
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+    if None not in bins:
+        return tuple(bins)
+    if all(v is None for v in bins):
+        return (0,) * num_bins
+    filled = list(bins)
+    for i in range(num_bins):
+        if bins[i] is None:
+            d = 1
+            while bins[(i + d) % num_bins] is None:
+                d += 1
+            filled[i] = bins[(i + d) % num_bins] + d * _ROTATION_OFFSET
+    return tuple(filled)
+
+
+def lsh_candidates(
+    signatures: List[Tuple[int, ...]], groups: List[int], bands: int,
+) -> Set[Tuple[int, int]]:
+    """
+    LSH 分桶：任一段签名完全相同的两条即为候选
+
+    Args:
+        signatures: 段落签名
+        groups: 段落所属章节，同章节的段落不成对
+        bands: 分段数（签名维度需能整除）
+
+    Returns:
+        候选对 {(i, j)}，i < j
+    """
+    if not signatures:
+        return set()
+    rows = len(signatures[0]) // bands
+    buckets: Dict[Tuple, List[int]] = defaultdict(list)
+    for idx, sig in enumerate(signatures):
+        for band in range(bands):
+            buckets[(band, sig[band * rows:(band + 1) * rows])].append(idx)
+
+    candidates = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for a, i in enumerate(members):
+            for j in members[a + 1:]:
+                if groups[i] != groups[j]:
+                    candidates.add((i, j))
+    return candidates
+
+
+class FingerprintCache:
+    """段落签名与段落对相似度的进程内 LRU 缓存（按段落内容哈希）"""
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or int(os.environ.get('DEDUP_FINGERPRINT_CACHE_SIZE', '50000'))
+        self._signatures: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._similarities: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _touch(store: OrderedDict, key, value, limit: int):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > limit:
+            store.popitem(last=False)
+
+    def signature(self, key: str, text: str) -> Tuple[Tuple[int, ...], bool]:
+        """返回 (签名, 是否命中缓存)"""
+        with self._lock:
+            sig = self._signatures.get(key)
+            if sig is not None:
+                self._signatures.move_to_end(key)
+                return sig, True
+        sig = minhash_signature(text)
+        with self._lock:
+            self._touch(self._signatures, key, sig, self.max_entries)
+        return sig, False
+
+    def get_similarity(self, provider: str, key_a: str, key_b: str) -> Optional[float]:
+        pair = (provider, *sorted((key_a, key_b)))
+        with self._lock:
+            sim = self._similarities.get(pair)
+            if sim is not None:
+                self._similarities.move_to_end(pair)
+            return sim
+
+    def set_similarity(self, provider: str, key_a: str, key_b: str, sim: float):
+        pair = (provider, *sorted((key_a, key_b)))
+        with self._lock:
+            self._touch(self._similarities, pair, sim, self.max_entries)
+
+
+_fingerprint_cache: Optional[FingerprintCache] = None
+_fingerprint_cache_lock = threading.Lock()
+
+
+def get_fingerprint_cache() -> FingerprintCache:
+    """获取进程内共享的段落指纹缓存（每次去重节点新建 Deduplicator 也能复用）"""
+    global _fingerprint_cache
+    if _fingerprint_cache is None:
+        with _fingerprint_cache_lock:
+            if _fingerprint_cache is None:
+                _fingerprint_cache = FingerprintCache()
+    return _fingerprint_cache
+
 
 class CrossSectionDeduplicator:
     """跨章节语义去重器"""
 
     def __init__(self, llm_client=None, threshold: float = None,
-                 min_paragraph_len: int = None):
+                 min_paragraph_len: int = None, bands: int = None,
+                 fingerprints: FingerprintCache = None):
         self.llm = llm_client
         self.threshold = threshold or float(
             os.environ.get('DEDUP_SIMILARITY_THRESHOLD', '0.85')
@@ -31,6 +186,11 @@ class CrossSectionDeduplicator:
         self.min_paragraph_len = min_paragraph_len or int(
             os.environ.get('DEDUP_MIN_PARAGRAPH_LENGTH', '50')
         )
+        self.bands = bands or int(os.environ.get('DEDUP_LSH_BANDS', '16'))
+        if NUM_BINS % self.bands:
+            raise ValueError(f"DEDUP_LSH_BANDS 必须整除 {NUM_BINS}: {self.bands}")
+        self.fingerprints = fingerprints if fingerprints is not None else get_fingerprint_cache()
+        self.stats: Dict[str, int] = {}
 
     def _split_paragraphs(self, content: str) -> List[str]:
         """将内容按段落切分（跳过代码块和短段落）"""
@@ -81,38 +241,69 @@ class CrossSectionDeduplicator:
             for para in self._split_paragraphs(content):
                 all_paragraphs.append((idx, para))
 
+        self.stats = {'paragraphs': len(all_paragraphs), 'signatures_reused': 0,
+                      'candidates': 0, 'similarities_reused': 0, 'embedded': 0}
         if len(all_paragraphs) < 2:
             return []
 
-        # 生成 embedding
-        try:
-            provider = EmbeddingProvider()
-            texts = [p[1] for p in all_paragraphs]
-            embeddings = provider.embed(texts)
-        except Exception as e:
-            logger.warning(f"[Dedup] Embedding 生成失败: {e}")
+        # MinHash 签名（未改动的段落直接复用缓存）
+        keys = [self.fingerprints.key(p[1]) for p in all_paragraphs]
+        signatures = []
+        for key, (_, para) in zip(keys, all_paragraphs):
+            sig, reused = self.fingerprints.signature(key, para)
+            signatures.append(sig)
+            self.stats['signatures_reused'] += reused
+
+        # LSH 候选对（只比较不同章节的段落）
+        candidates = sorted(lsh_candidates(signatures, [p[0] for p in all_paragraphs], self.bands))
+        self.stats['candidates'] = len(candidates)
+        if not candidates:
+            logger.info(f"[Dedup] {len(all_paragraphs)} 个段落无候选重复对")
             return []
 
-        # 两两比较（只比较不同章节的段落）
-        duplicates = []
-        for i in range(len(all_paragraphs)):
-            for j in range(i + 1, len(all_paragraphs)):
-                sec_i, _ = all_paragraphs[i]
-                sec_j, _ = all_paragraphs[j]
-                if sec_i == sec_j:
-                    continue  # 同章节内不去重
+        # 只为相似度未缓存的候选对生成 embedding
+        provider_name = os.environ.get('EMBEDDING_PROVIDER', 'local')
+        similarities: Dict[Tuple[int, int], float] = {}
+        pending: List[Tuple[int, int]] = []
+        for i, j in candidates:
+            sim = self.fingerprints.get_similarity(provider_name, keys[i], keys[j])
+            if sim is None:
+                pending.append((i, j))
+            else:
+                similarities[(i, j)] = sim
+        self.stats['similarities_reused'] = len(similarities)
 
+        if pending:
+            needed = sorted({i for pair in pending for i in pair})
+            try:
+                provider = EmbeddingProvider()
+                embeddings = dict(zip(needed, provider.embed([all_paragraphs[i][1] for i in needed])))
+            except Exception as e:
+                logger.warning(f"[Dedup] Embedding 生成失败: {e}")
+                return []
+            self.stats['embedded'] = len(needed)
+            for i, j in pending:
                 sim = _cosine_similarity(embeddings[i], embeddings[j])
-                if sim >= self.threshold:
-                    duplicates.append({
-                        'section_a': sec_i,
-                        'para_a': all_paragraphs[i][1],
-                        'section_b': sec_j,
-                        'para_b': all_paragraphs[j][1],
-                        'similarity': round(sim, 4),
-                    })
-
-        logger.info(f"[Dedup] 检测到 {len(duplicates)} 对跨章节重复段落")
+                self.fingerprints.set_similarity(provider_name, keys[i], keys[j], sim)
+                similarities[(i, j)] = sim
+
+        duplicates = []
+        for i, j in candidates:
+            sim = similarities[(i, j)]
+            if sim >= self.threshold:
+                duplicates.append({
+                    'section_a': all_paragraphs[i][0],
+                    'para_a': all_paragraphs[i][1],
+                    'section_b': all_paragraphs[j][0],
+                    'para_b': all_paragraphs[j][1],
+                    'similarity': round(sim, 4),
+                })
+
+        logger.info(
+            f"[Dedup] 检测到 {len(duplicates)} 对跨章节重复段落 "
+            f"(段落 {self.stats['paragraphs']}, 候选 {self.stats['candidates']}, "
+            f"复用签名 {self.stats['signatures_reused']}, 复用相似度 {self.stats['similarities_reused']})"
+        )
         return duplicates
 
     def deduplicate(self, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -147,7 +338,6 @@ class CrossSectionDeduplicator:
                     content = content.replace(para, '')
                     removed_count += 1
             # 清理多余空行
-            import re
             content = re.sub(r'\n{3,}', '\n\n', content)
             sections[sec_idx]['content'] = content.strip()
 
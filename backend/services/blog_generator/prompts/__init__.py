@@ -4,9 +4,10 @@ Prompt 模板模块 - 从统一的 infrastructure.prompts 导入
 模板文件已迁移到 infrastructure/prompts/blog/ 目录下
 """
 
-from infrastructure.prompts import PromptManager, get_prompt_manager
+from infrastructure.prompts import PromptManager, get_prompt_manager, cached_prompt_message
 
 __all__ = [
     'PromptManager',
     'get_prompt_manager',
+    'cached_prompt_message',
 ]
@@ -41,6 +41,8 @@ class BaseRetriever(ABC):
     """检索器抽象基类"""
 
     name: str = "base"
+    # 是否由 RetrieverRegistry.search_all 缓存结果；委托 SmartSearchService._search_* 的检索器已在下层缓存
+    cacheable: bool = True
 
     @abstractmethod
     def search(self, query: str, max_results: int = 10) -> List[SearchItem]:
@@ -114,7 +116,7 @@ class RetrieverRegistry:
 
         for retriever in retrievers:
             try:
-                results = retriever.search(query, max_results=max_results)
+                results = cls._search_one(retriever, query, max_results)
                 for item in results:
                     if item.href and item.href not in seen_urls:
                         seen_urls.add(item.href)
@@ -125,6 +127,26 @@ class RetrieverRegistry:
 
         return all_results[:max_results]
 
+    @staticmethod
+    def _search_one(retriever: BaseRetriever, query: str, max_results: int) -> List[SearchItem]:
+        """单个检索器搜索，经搜索结果缓存（空结果按失败负缓存）"""
+        if not retriever.cacheable:
+            return retriever.search(query, max_results=max_results)
+        from services.blog_generator.services.search_result_cache import cached_search
+
+        def fetch():
+            items = retriever.search(query, max_results=max_results)
+            return {'success': bool(items), 'results': [
+                {**item.to_dict(), 'relevance_score': item.relevance_score} for item in items
+            ]}
+
+        result = cached_search(retriever.name, query, max_results, fetch)
+        return [
+            SearchItem(href=r.get('url', ''), title=r.get('title', ''), body=r.get('content', ''),
+                       source=r.get('source', ''), relevance_score=r.get('relevance_score', 0.0))
+            for r in result.get('results', [])
+        ]
+
     @classmethod
     def _reset(cls):
         """重置（测试用）"""
@@ -136,6 +158,7 @@ class RetrieverRegistry:
 class SerperRetriever(BaseRetriever):
     """Serper Google 搜索适配器"""
     name = "serper"
+    cacheable = False
 
     def is_available(self) -> bool:
         return bool(os.environ.get('SERPER_API_KEY'))
@@ -159,6 +182,7 @@ class SerperRetriever(BaseRetriever):
 class SogouRetriever(BaseRetriever):
     """搜狗搜索适配器"""
     name = "sogou"
+    cacheable = False
 
     def is_available(self) -> bool:
         return bool(os.environ.get('SOGOU_API_KEY') or os.environ.get('TENCENT_SECRET_ID'))
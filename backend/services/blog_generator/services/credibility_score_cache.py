@@ -0,0 +1,164 @@
+"""
+源可信度评分缓存 — 跨生成任务复用 LLM 评分
+
+官方文档、热门 arXiv 论文等 URL 在大量生成任务中反复出现，评分一次后按
+(规范化 URL, 内容指纹) 缓存，TTL 内直接复用，不再送入 LLM。
+
+只缓存与查询无关的维度（authority / freshness / depth / reason）；
+relevance 随研究主题变化，命中缓存时由调用方按当前查询重新计算。
+
+- 存储：SQLite 文件（WAL），多进程共享；读取时校验 TTL，启动时清理过期条目
+
+环境变量：
+- SOURCE_CREDIBILITY_CACHE_ENABLED: 是否启用（默认 true）
+- SOURCE_CREDIBILITY_CACHE_PATH: SQLite 文件路径（默认 data/credibility_cache.db）
+- SOURCE_CREDIBILITY_CACHE_TTL_HOURS: 过期时间（小时，默认 168）
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'data', 'credibility_cache.db',
+)
+# 参与指纹的内容长度，与评估 Prompt 中的内容摘要一致
+FINGERPRINT_CHARS = 500
+# 规范化 URL 时丢弃的跟踪参数
+_TRACKING_PARAMS = {'ref', 'spm', 'from', 'source', 'fbclid', 'gclid', 'share_token'}
+# 单条 SQL 的最大参数数（SQLite 默认上限 999）
+_MAX_SQL_PARAMS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS credibility_scores (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    authority REAL NOT NULL,
+    freshness REAL NOT NULL,
+    depth REAL NOT NULL,
+    reason TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL
+);
+"""
+
+SCORE_FIELDS = ('authority', 'freshness', 'depth')
+
+
+def canonical_url(url: str) -> str:
+    """规范化 URL：小写协议与域名、去掉 www. / 片段 / 跟踪参数 / 末尾斜杠，查询参数排序"""
+    url = (url or '').strip()
+    if not url:
+        return ''
+    parts = urlsplit(url if '://' in url else f'https://{url}')
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f'{host}:{parts.port}'
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or ''
+    return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme,
+                       host, path, urlencode(query), ''))
+
+
+def content_fingerprint(result: Dict) -> str:
+    """标题 + 内容摘要（空白归一化）的指纹，内容变化后评分失效"""
+    content = (result.get('content', '') or '')[:FINGERPRINT_CHARS]
+    text = re.sub(r'\s+', ' ', f"{result.get('title', '')}\n{content}").strip().lower()
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def score_key(result: Dict) -> str:
+    """缓存键：规范化 URL + 内容指纹；无 URL 的结果不缓存"""
+    url = canonical_url(result.get('url', ''))
+    return f'{url}#{content_fingerprint(result)}' if url else ''
+
+
+class CredibilityScoreCache:
+    """SQLite 持久化的可信度评分缓存（线程安全：每个线程一个连接）"""
+
+    def __init__(self, path: str = None, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+        self.purge_expired()
+
+    @classmethod
+    def from_env(cls) -> Optional['CredibilityScoreCache']:
+        """按环境变量构造；未启用或初始化失败时返回 None"""
+        if os.getenv('SOURCE_CREDIBILITY_CACHE_ENABLED', 'true').lower() != 'true':
+            return None
+        try:
+            return cls(
+                path=os.getenv('SOURCE_CREDIBILITY_CACHE_PATH') or None,
+                ttl_seconds=float(os.getenv('SOURCE_CREDIBILITY_CACHE_TTL_HOURS', '168')) * 3600,
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"可信度评分缓存初始化失败，不使用缓存: {e}")
+            return None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """批量读取未过期的评分，返回 {key: {authority, freshness, depth, reason}}"""
+        keys = list({k for k in keys if k})
+        found = {}
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+        for i in range(0, len(keys), _MAX_SQL_PARAMS):
+            chunk = keys[i:i + _MAX_SQL_PARAMS]
+            rows = self._conn().execute(
+                f"SELECT * FROM credibility_scores WHERE created_at >= ? "
+                f"AND key IN ({', '.join('?' * len(chunk))})",
+                [cutoff, *chunk],
+            ).fetchall()
+            for row in rows:
+                found[row['key']] = {name: row[name] for name in (*SCORE_FIELDS, 'reason')}
+        return found
+
+    def set_many(self, scores: Dict[str, Dict]) -> None:
+        """批量写入评分 {key: {authority, freshness, depth, reason}}"""
+        now = time.time()
+        rows = [
+            (key, key.split('#', 1)[0], *(float(s.get(name, 0) or 0) for name in SCORE_FIELDS),
+             str(s.get('reason', '') or ''), now)
+            for key, s in scores.items() if key
+        ]
+        if rows:
+            self._conn().executemany(
+                'INSERT OR REPLACE INTO credibility_scores '
+                '(key, url, authority, freshness, depth, reason, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+
+    def purge_expired(self) -> int:
+        """删除过期条目，返回删除条数"""
+        if not self.ttl_seconds:
+            return 0
+        cursor = self._conn().execute(
+            'DELETE FROM credibility_scores WHERE created_at < ?', (time.time() - self.ttl_seconds,)
+        )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM credibility_scores').fetchone()[0]
@@ -12,15 +12,55 @@
 - DEEP_RESEARCH_ENABLED: 是否启用（默认 false）
 - DEEP_RESEARCH_MAX_ROUNDS: 最大迭代轮数（默认 3）
 - DEEP_RESEARCH_GAP_THRESHOLD: 缺口数量阈值，低于此值停止（默认 2）
+- DEEP_RESEARCH_COVERAGE_TARGET: 覆盖度达到此值提前停止（默认 85）
+- DEEP_RESEARCH_ROUND_TIMEOUT: 每轮补充搜索的截止时间（秒，默认 30）
+
+每轮的补充查询并发执行，只剩最慢的一个查询在途时即开始下一轮的缺口分析，
+单轮耗时约为 max(搜索延迟) 而非 查询数 × 搜索延迟。
 """
 import json
 import logging
 import os
-from typing import Dict, Any, List
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
 
+# 每轮最多补充的查询数
+QUERIES_PER_ROUND = 3
+# 知识摘要取前 N 条结果，每条截取前 M 字
+DIGEST_MAX_RESULTS = 15
+DIGEST_SNIPPET_CHARS = 300
+
+
+class _KnowledgeDigest:
+    """
+    增量知识摘要：结果只追加不重排，前 N 条一旦填满就不再变化，
+    新结果到达时只需追加片段，无需每轮从全部结果重建。
+    """
+
+    def __init__(self, max_results: int = DIGEST_MAX_RESULTS,
+                 snippet_chars: int = DIGEST_SNIPPET_CHARS):
+        self.max_results = max_results
+        self.snippet_chars = snippet_chars
+        self._parts: List[str] = []
+        self._text: Optional[str] = ""
+
+    def add(self, result: Dict) -> None:
+        if len(self._parts) >= self.max_results:
+            return
+        self._parts.append((result.get('content', '') or result.get('snippet', ''))[:self.snippet_chars])
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "\n".join(self._parts)
+        return self._text
+
+
 class DeepResearchEngine:
     """多轮迭代深度研究引擎"""
 
@@ -29,6 +69,8 @@ class DeepResearchEngine:
         self.search_service = search_service
         self.max_rounds = int(os.environ.get('DEEP_RESEARCH_MAX_ROUNDS', '3'))
         self.gap_threshold = int(os.environ.get('DEEP_RESEARCH_GAP_THRESHOLD', '2'))
+        self.coverage_target = int(os.environ.get('DEEP_RESEARCH_COVERAGE_TARGET', '85'))
+        self.round_timeout = float(os.environ.get('DEEP_RESEARCH_ROUND_TIMEOUT', '30'))
 
     def _analyze_gaps(self, topic: str, current_knowledge: str,
                       search_results: List[Dict]) -> List[Dict]:
@@ -71,6 +113,17 @@ class DeepResearchEngine:
             logger.warning(f"[DeepResearch] 缺口分析失败: {e}")
             return [], 80
 
+    def _search(self, query: str) -> List[Dict]:
+        """单个补充查询（在线程池中执行）"""
+        try:
+            result = self.search_service.search(query, max_results=5)
+        except Exception as e:
+            logger.warning(f"[DeepResearch] 补充搜索失败 [{query}]: {e}")
+            return []
+        if result.get('success') and result.get('results'):
+            return result['results']
+        return []
+
     def run(self, topic: str, target_audience: str = "",
             initial_results: List[Dict] = None) -> Dict[str, Any]:
         """
@@ -85,55 +138,106 @@ class DeepResearchEngine:
             {'results': List[Dict], 'rounds': int, 'total_queries': int,
              'coverage_score': int, 'gaps_found': int}
         """
-        all_results = list(initial_results or [])
-        seen_urls = {r.get('url', '') for r in all_results if r.get('url')}
-        current_knowledge = ""
+        all_results: List[Dict] = []
+        seen_urls = set()
+        digest = _KnowledgeDigest()
+
+        def add(r: Dict) -> None:
+            all_results.append(r)
+            digest.add(r)
+
+        def merge(results: List[Dict]) -> None:
+            """合并补充搜索结果（按 URL 去重，无 URL 的结果丢弃）"""
+            for r in results:
+                url = r.get('url', '')
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    add(r)
+
+        for r in initial_results or []:
+            if r.get('url'):
+                seen_urls.add(r['url'])
+            add(r)
         total_queries = 0
-
-        for round_num in range(1, self.max_rounds + 1):
-            logger.info(f"[DeepResearch] 第 {round_num}/{self.max_rounds} 轮")
-
-            # 分析缺口
-            gaps, coverage = self._analyze_gaps(topic, current_knowledge, all_results)
-            logger.info(
-                f"[DeepResearch] 覆盖度: {coverage}%, 缺口: {len(gaps)} 个"
-            )
-
-            # 停止条件
-            if len(gaps) < self.gap_threshold:
-                logger.info(f"[DeepResearch] 缺口数 < {self.gap_threshold}，停止迭代")
-                break
-            if coverage >= 85:
-                logger.info("[DeepResearch] 覆盖度 >= 85%，停止迭代")
-                break
-
-            # 补充搜索
-            for gap in gaps[:3]:  # 每轮最多补充 3 个查询
-                query = gap.get('search_query', gap.get('topic', ''))
-                if not query:
-                    continue
-                total_queries += 1
-                try:
-                    result = self.search_service.search(query, max_results=5)
-                    if result.get('success') and result.get('results'):
-                        for r in result['results']:
-                            url = r.get('url', '')
-                            if url and url not in seen_urls:
-                                seen_urls.add(url)
-                                all_results.append(r)
-                except Exception as e:
-                    logger.warning(f"[DeepResearch] 补充搜索失败 [{query}]: {e}")
-
-            # 更新知识摘要
-            current_knowledge = "\n".join(
-                (r.get('content', '') or r.get('snippet', ''))[:300]
-                for r in all_results[:15]
-            )
+        round_num, coverage, gaps = 0, 0, []
+        # 上一轮截止时仍未返回的查询：到达后在下一轮开始前 / 结束时合并
+        stragglers: set = set()
+        # 与上一轮最慢查询重叠执行的缺口分析
+        next_gaps: Optional[Any] = None
+
+        pool = ThreadPoolExecutor(
+            max_workers=QUERIES_PER_ROUND + 1, thread_name_prefix='deep-research',
+        )
+        try:
+            for round_num in range(1, self.max_rounds + 1):
+                logger.info(f"[DeepResearch] 第 {round_num}/{self.max_rounds} 轮")
+                stragglers = self._harvest(stragglers, merge)
+
+                # 分析缺口
+                if next_gaps is not None:
+                    gaps, coverage = next_gaps.result()
+                    next_gaps = None
+                else:
+                    gaps, coverage = self._analyze_gaps(topic, digest.text, all_results)
+                logger.info(
+                    f"[DeepResearch] 覆盖度: {coverage}%, 缺口: {len(gaps)} 个"
+                )
+
+                # 停止条件
+                if len(gaps) < self.gap_threshold:
+                    logger.info(f"[DeepResearch] 缺口数 < {self.gap_threshold}，停止迭代")
+                    break
+                if coverage >= self.coverage_target:
+                    logger.info(f"[DeepResearch] 覆盖度 >= {self.coverage_target}%，停止迭代")
+                    break
+
+                # 并发补充搜索
+                queries = [
+                    q for q in (g.get('search_query', g.get('topic', '')) for g in gaps[:QUERIES_PER_ROUND])
+                    if q
+                ]
+                total_queries += len(queries)
+                pending = {pool.submit(self._search, q) for q in queries}
+                deadline = time.monotonic() + self.round_timeout
+                overlap = round_num < self.max_rounds
+
+                while pending:
+                    # 只剩最慢的查询在途：先用已有素材开始下一轮缺口分析
+                    if overlap and next_gaps is None and 0 < len(pending) <= 1 < len(queries):
+                        next_gaps = pool.submit(
+                            self._analyze_gaps, topic, digest.text, list(all_results),
+                        )
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.warning(
+                            f"[DeepResearch] 第 {round_num} 轮超过截止时间 {self.round_timeout}s，"
+                            f"{len(pending)} 个查询转入后台"
+                        )
+                        break
+                    done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+                stragglers |= pending
+
+            self._harvest(stragglers, merge)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
         return {
             'results': all_results,
-            'rounds': round_num if 'round_num' in dir() else 1,
+            'rounds': max(round_num, 1),
             'total_queries': total_queries,
-            'coverage_score': coverage if 'coverage' in dir() else 0,
-            'gaps_found': len(gaps) if 'gaps' in dir() else 0,
+            'coverage_score': coverage,
+            'gaps_found': len(gaps),
         }
+
+    @staticmethod
+    def _harvest(futures: set, merge) -> set:
+        """合并已完成的后台查询，返回仍未完成的部分"""
+        still_pending = set()
+        for future in futures:
+            if future.done():
+                merge(future.result())
+            else:
+                still_pending.add(future)
+        return still_pending
@@ -0,0 +1,303 @@
+"""
+搜索结果缓存 — 按 (搜索源, 归一化查询) 缓存单源搜索结果
+
+Researcher 层的 CacheManager 以 topic + audience 为键，子查询、深度研究缺口查询、
+细化搜索都无法命中；主题相近的两篇文章也会对同一查询重复请求 Serper / 搜狗 / arXiv。
+本缓存位于单个搜索源调用之下，任何路径发出的相同查询都能复用：
+
+- 按源 TTL：arXiv / Scholar 论文变化慢（默认 7 天），新闻类查询（含"最新""news"等）短（默认 30 分钟）
+- stale-while-revalidate：过期后的宽限期内先返回旧结果，后台单飞刷新；刷新失败保留旧结果
+- 失败负缓存：失败 / 异常在 SEARCH_RESULT_CACHE_NEGATIVE_TTL 内直接返回失败，不再打到上游
+- 同一键并发未命中只请求一次上游（单飞）；对冲请求（hedged_attempt）不排队，直接请求上游
+- 存储：SQLite 文件（WAL），多进程共享
+
+命中缓存的结果带 from_cache=True，调用方据此跳过源延迟 / 健康统计。
+
+环境变量：
+- SEARCH_RESULT_CACHE_ENABLED: 是否启用（默认 false）
+- SEARCH_RESULT_CACHE_PATH: SQLite 文件路径（默认 data/search_result_cache.db）
+- SEARCH_RESULT_CACHE_TTL_SECONDS: 默认 TTL（秒，默认 21600）
+- SEARCH_RESULT_CACHE_TTLS: 按源覆盖 TTL，如 arxiv=604800,scholar=604800,news=1800
+- SEARCH_RESULT_CACHE_STALE_SECONDS: 过期后仍可返回旧结果的宽限期（秒，默认 86400，不超过该源 TTL）
+- SEARCH_RESULT_CACHE_NEGATIVE_TTL: 失败结果缓存时间（秒，默认 60）
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'data', 'search_result_cache.db',
+)
+DEFAULT_TTL = 6 * 3600
+DEFAULT_SOURCE_TTLS = {
+    'arxiv': 7 * 24 * 3600,
+    'scholar': 7 * 24 * 3600,
+    'news': 30 * 60,
+}
+DEFAULT_STALE_SECONDS = 24 * 3600
+DEFAULT_NEGATIVE_TTL = 60
+# 新闻 / 时效类查询，使用 news TTL
+NEWS_PATTERN = re.compile(r'最新|新闻|今日|今天|本周|近期|动态|发布会|latest|news|today|this week|breaking', re.I)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_results (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    query TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    result_count INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+_hedge_local = threading.local()
+
+
+@contextmanager
+def hedged_attempt():
+    """
+    对冲请求上下文：本线程内的缓存未命中不等待同一键的单飞锁，直接请求上游
+
+    原请求持有单飞锁时，对冲请求若排队等待只会拿到原请求的结果，对冲失去意义。
+    """
+    _hedge_local.active = True
+    try:
+        yield
+    finally:
+        _hedge_local.active = False
+
+
+def normalize_query(query: str) -> str:
+    """归一化查询：NFKC（全角转半角）、小写、合并空白"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', query or '')).strip().lower()
+
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """解析 'arxiv=604800,news=1800' 形式的按源 TTL"""
+    ttls = {}
+    for part in (spec or '').split(','):
+        name, _, value = part.partition('=')
+        if name.strip() and value.strip():
+            ttls[name.strip()] = float(value)
+    return ttls
+
+
+class SearchResultCache:
+    """按源 / 查询的搜索结果缓存（线程安全：每个线程一个连接）"""
+
+    def __init__(
+        self,
+        path: str = None,
+        default_ttl: float = DEFAULT_TTL,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        refresh_workers: int = 2,
+    ):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.default_ttl = default_ttl
+        self.ttls = {**DEFAULT_SOURCE_TTLS, **(ttls or {})}
+        self.stale_seconds = stale_seconds
+        self.negative_ttl = negative_ttl
+        self.stats = {'hits': 0, 'stale_hits': 0, 'negative_hits': 0, 'misses': 0,
+                      'refreshes': 0, 'refresh_failures': 0}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._key_locks = weakref.WeakValueDictionary()
+        self._key_locks_lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='search-cache')
+        self._conn().executescript(_SCHEMA)
+        self.purge_expired()
+
+    @classmethod
+    def from_env(cls) -> 'SearchResultCache':
+        return cls(
+            path=os.getenv('SEARCH_RESULT_CACHE_PATH') or None,
+            default_ttl=float(os.getenv('SEARCH_RESULT_CACHE_TTL_SECONDS', DEFAULT_TTL)),
+            ttls=parse_ttls(os.getenv('SEARCH_RESULT_CACHE_TTLS', '')),
+            stale_seconds=float(os.getenv('SEARCH_RESULT_CACHE_STALE_SECONDS', DEFAULT_STALE_SECONDS)),
+            negative_ttl=float(os.getenv('SEARCH_RESULT_CACHE_NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL)),
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._key_locks_lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def ttl_for(self, source: str, query: str) -> float:
+        """源 TTL；新闻类查询取 news TTL 与源 TTL 的较小值"""
+        ttl = self.ttls.get(source, self.default_ttl)
+        if 'news' in self.ttls and NEWS_PATTERN.search(query or ''):
+            ttl = min(ttl, self.ttls['news'])
+        return ttl
+
+    # ========== 读写 ==========
+
+    def fetch(
+        self, source: str, query: str, max_results: int, fetch_fn: Callable[[], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        读取缓存，未命中 / 已过期时调用 fetch_fn 并写回
+
+        fetch_fn 返回 {'success', 'results', ...}；抛出的异常写入负缓存后继续抛出。
+        """
+        key = f'{source}|{normalize_query(query)}'
+        state, row = self._lookup(key, source, query, max_results)
+        if state == 'fresh':
+            self._count('negative_hits' if not row['ok'] else 'hits')
+            return self._decode(row, max_results)
+        if state == 'stale':
+            self._count('stale_hits')
+            self._schedule_refresh(key, source, query, max_results, fetch_fn)
+            return self._decode(row, max_results)
+
+        if getattr(_hedge_local, 'active', False):
+            return self._fetch_and_store(key, source, query, max_results, fetch_fn)
+
+        with self._key_lock(key):
+            # 单飞：等待期间其他线程可能已写入
+            state, row = self._lookup(key, source, query, max_results)
+            if state == 'fresh':
+                self._count('negative_hits' if not row['ok'] else 'hits')
+                return self._decode(row, max_results)
+            return self._fetch_and_store(key, source, query, max_results, fetch_fn)
+
+    def _fetch_and_store(self, key, source, query, max_results, fetch_fn) -> Dict[str, Any]:
+        self._count('misses')
+        try:
+            result = fetch_fn()
+        except Exception as e:
+            self._store(key, source, query, max_results, {'success': False, 'results': [], 'error': str(e)})
+            raise
+        self._store(key, source, query, max_results, result)
+        return result
+
+    def _lookup(self, key: str, source: str, query: str, max_results: int):
+        """返回 (fresh | stale | miss, row)"""
+        row = self._conn().execute('SELECT * FROM search_results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return 'miss', None
+        age = time.time() - row['created_at']
+        if not row['ok']:
+            return ('fresh' if age < self.negative_ttl else 'miss'), row
+        # 缓存条数不足以覆盖本次请求（且上游当时并未返回完）时视为未命中
+        if row['max_results'] < max_results and row['result_count'] >= row['max_results']:
+            return 'miss', row
+        ttl = self.ttl_for(source, query)
+        if age < ttl:
+            return 'fresh', row
+        if age < ttl + min(self.stale_seconds, ttl):
+            return 'stale', row
+        return 'miss', row
+
+    @staticmethod
+    def _decode(row: sqlite3.Row, max_results: int) -> Dict[str, Any]:
+        result = json.loads(row['payload'])
+        result['results'] = (result.get('results') or [])[:max_results]
+        result['from_cache'] = True
+        return result
+
+    def _store(self, key: str, source: str, query: str, max_results: int, result: Dict[str, Any]):
+        ok = bool(result.get('success'))
+        payload = {k: v for k, v in result.items() if k != 'from_cache'}
+        self._conn().execute(
+            'INSERT OR REPLACE INTO search_results '
+            '(key, source, query, max_results, result_count, ok, payload, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, source, query, max_results, len(result.get('results') or []), int(ok),
+             json.dumps(payload, ensure_ascii=False, default=str), time.time()),
+        )
+
+    def _schedule_refresh(self, key, source, query, max_results, fetch_fn):
+        with self._key_locks_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresh_pool.submit(self._refresh, key, source, query, max_results, fetch_fn)
+
+    def _refresh(self, key, source, query, max_results, fetch_fn):
+        """后台刷新：成功才覆盖；失败保留旧结果继续在宽限期内返回"""
+        try:
+            with self._key_lock(key):
+                result = fetch_fn()
+                if result.get('success'):
+                    self._store(key, source, query, max_results, result)
+                    self._count('refreshes')
+                else:
+                    self._count('refresh_failures')
+        except Exception as e:
+            self._count('refresh_failures')
+            logger.warning(f"搜索缓存后台刷新失败 [{key}]: {e}")
+        finally:
+            with self._key_locks_lock:
+                self._refreshing.discard(key)
+
+    def purge_expired(self) -> int:
+        """删除超过最长 TTL + 宽限期的条目"""
+        max_age = max([self.default_ttl, *self.ttls.values()]) + self.stale_seconds
+        cursor = self._conn().execute(
+            'DELETE FROM search_results WHERE created_at < ?', (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+
+_search_result_cache: Optional[SearchResultCache] = None
+_search_result_cache_lock = threading.Lock()
+
+
+def get_search_result_cache() -> Optional[SearchResultCache]:
+    """获取全局搜索结果缓存；未启用或初始化失败时返回 None"""
+    global _search_result_cache
+    if os.getenv('SEARCH_RESULT_CACHE_ENABLED', 'false').lower() != 'true':
+        return None
+    if _search_result_cache is None:
+        with _search_result_cache_lock:
+            if _search_result_cache is None:
+                try:
+                    _search_result_cache = SearchResultCache.from_env()
+                    logger.info(f"搜索结果缓存已启用: {_search_result_cache.path}")
+                except (sqlite3.Error, OSError) as e:
+                    logger.warning(f"搜索结果缓存初始化失败，不使用缓存: {e}")
+                    return None
+    return _search_result_cache
+
+
+def cached_search(source: str, query: str, max_results: int, fetch_fn: Callable[[], Dict[str, Any]]):
+    """经全局缓存执行单源搜索；缓存未启用时直接调用 fetch_fn"""
+    cache = get_search_result_cache()
+    if cache is None:
+        return fetch_fn()
+    return cache.fetch(source, query, max_results, fetch_fn)
@@ -9,6 +9,8 @@ import logging
 import requests
 from typing import Dict, Any, List, Optional
 
+from .search_result_cache import cached_search
+
 logger = logging.getLogger(__name__)
 
 # 全局搜索服务实例
@@ -35,13 +37,14 @@ class SearchService:
         """检查服务是否可用"""
         return bool(self.api_key)
     
-    def search(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+    def search(self, query: str, max_results: int = 5, rate_limit_domain: Optional[str] = None) -> Dict[str, Any]:
         """
         搜索背景知识
         
         Args:
             query: 搜索关键词
             max_results: 最大结果数
+            rate_limit_domain: 全局限流域名（仅在缓存未命中、真正请求上游时等待）
             
         Returns:
             {
@@ -62,7 +65,13 @@ class SearchService:
         
         try:
             logger.info(f"使用智谱 Web Search 搜索: {query}")
-            return self._search_zai(query, max_results)
+            # 子查询 / 深度研究 / 细化搜索 / 智能搜索的通用源都经由此处，按归一化查询缓存
+            def fetch():
+                if rate_limit_domain:
+                    from utils.rate_limiter import get_global_rate_limiter
+                    get_global_rate_limiter().wait_sync(domain=rate_limit_domain)
+                return self._search_zai(query, max_results)
+            return cached_search('general', query, max_results, fetch)
             
         except Exception as e:
             logger.error(f"搜索失败: {e}", exc_info=True)
@@ -6,11 +6,15 @@ import json
 import logging
 import os
 import re
+import time
 from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from utils.lazy import LazyResource
 
 from .search_service import get_search_service
 from .arxiv_service import get_arxiv_service
+from .search_result_cache import cached_search, hedged_attempt
 
 logger = logging.getLogger(__name__)
 
@@ -160,6 +164,14 @@ class SmartSearchService:
     """
     智能搜索服务 - 根据主题智能选择搜索源
     """
+
+    # 对冲请求线程池（首次对冲时创建）
+    _hedge_pool = LazyResource(
+        factory=lambda self: ThreadPoolExecutor(
+            max_workers=self.max_workers * 2, thread_name_prefix='search-hedge',
+        ),
+        cleanup=lambda pool: pool.shutdown(wait=False),
+    )
     
     def __init__(self, llm_client=None):
         """
@@ -174,8 +186,9 @@ class SmartSearchService:
         from utils.query_deduplicator import QueryDeduplicator
         self.deduplicator = QueryDeduplicator()
         # 71: SourceCurator 源质量评估与健康检查
-        from .source_curator import SourceCurator
-        self.curator = SourceCurator()
+        from .source_curator import SourceCurator, default_stats_path
+        self.curator = SourceCurator(stats_path=default_stats_path())
+        self.hedge_enabled = os.environ.get('SEARCH_HEDGE_ENABLED', 'true').lower() == 'true'
         # 41.02: 源可信度筛选（与 SourceCurator 并列，形成两级过滤管线）
         self._credibility_filter = None
         if os.environ.get('SOURCE_CREDIBILITY_ENABLED', 'false').lower() == 'true' and llm_client:
@@ -231,67 +244,65 @@ class SmartSearchService:
 
         # 第二步：并行执行搜索
         all_results = []
-        search_tasks = []
-        
+        search_tasks = []  # (source_id, 搜索函数, 参数)
+
         # 准备搜索任务
         if 'arxiv' in sources:
-            search_tasks.append(('arxiv', arxiv_query))
-        
+            search_tasks.append(('arxiv', self._search_arxiv, (arxiv_query, max_results_per_source)))
+
         # 专业博客搜索
         for source in sources:
             if source in PROFESSIONAL_BLOGS:
-                search_tasks.append(('blog', source, blog_query))
-        
+                search_tasks.append((source, self._search_blog, (source, blog_query, max_results_per_source)))
+
         # 通用搜索（始终包含）
         if 'general' in sources or not search_tasks:
-            search_tasks.append(('general', blog_query))
+            search_tasks.append(('general', self._search_general, (blog_query, max_results_per_source)))
 
         # Google 搜索（75.02 Serper）
         if 'google' in sources:
-            search_tasks.append(('google', blog_query))
+            search_tasks.append(('google', self._search_google, (blog_query, max_results_per_source)))
 
         # 搜狗搜索（75.07 腾讯云 SearchPro）
         if 'sogou' in sources:
-            search_tasks.append(('sogou', blog_query))
-        
+            search_tasks.append(('sogou', self._search_sogou, (blog_query, max_results_per_source)))
+
+        # 延迟感知：跳过慢源（通用搜索除外），按预期产出速度排序后提交
+        skipped = [t[0] for t in search_tasks if t[0] != 'general' and self.curator.is_slow(t[0])]
+        if skipped:
+            logger.info(f"🐢 跳过慢源: {skipped}")
+            search_tasks = [t for t in search_tasks if t[0] not in skipped]
+        order = {source_id: i for i, source_id in enumerate(
+            self.curator.prioritize([t[0] for t in search_tasks])
+        )}
+        search_tasks.sort(key=lambda t: order[t[0]])
+
         # 并行执行
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {}
-            
-            for task in search_tasks:
-                if task[0] == 'arxiv':
-                    future = executor.submit(self._search_arxiv, task[1], max_results_per_source)
-                    futures[future] = 'arxiv'
-                elif task[0] == 'blog':
-                    future = executor.submit(self._search_blog, task[1], task[2], max_results_per_source)
-                    futures[future] = f'blog:{task[1]}'
-                elif task[0] == 'general':
-                    future = executor.submit(self._search_general, task[1], max_results_per_source)
-                    futures[future] = 'general'
-                elif task[0] == 'google':
-                    future = executor.submit(self._search_google, task[1], max_results_per_source)
-                    futures[future] = 'google'
-                elif task[0] == 'sogou':
-                    future = executor.submit(self._search_sogou, task[1], max_results_per_source)
-                    futures[future] = 'sogou'
-            
+            futures = {
+                executor.submit(self._timed_search, source_id, fn, args): source_id
+                for source_id, fn, args in search_tasks
+            }
+
             for future in as_completed(futures):
                 source_name = futures[future]
                 try:
                     result = future.result()
                     if result.get('success') and result.get('results'):
                         all_results.extend(result['results'])
-                        logger.info(f"✅ {source_name} 搜索完成: {len(result['results'])} 条结果")
-                        # 71: 记录成功
-                        self.curator.record_success(source_name.replace('blog:', ''))
-                    elif not result.get('success'):
+                        logger.info(f"✅ {source_name} 搜索完成: {len(result['results'])} 条结果"
+                                    f"{'（缓存）' if result.get('from_cache') else ''}")
+                        # 71: 记录成功（缓存命中不计入源健康统计）
+                        if not result.get('from_cache'):
+                            self.curator.record_success(source_name)
+                    elif not result.get('success') and not result.get('from_cache'):
                         # 71: 记录失败
-                        self.curator.record_failure(source_name.replace('blog:', ''))
+                        self.curator.record_failure(source_name)
                 except Exception as e:
                     logger.error(f"❌ {source_name} 搜索失败: {e}")
                     # 71: 记录失败
-                    self.curator.record_failure(source_name.replace('blog:', ''))
-        
+                    self.curator.record_failure(source_name)
+
         # 第三步：合并去重
         merged_results = self._merge_and_dedupe(all_results)
 
@@ -304,22 +315,79 @@ class SmartSearchService:
             if item.get('content'):
                 item['content'] = re.sub(r'<[^>]+>', '', item['content'])
 
-        # 第四步：41.02 源可信度筛选（LLM 四维评估）
+        # 第四步：41.02 源可信度筛选（评分缓存 + 规则预筛 + 分批 LLM 评估）
+        credibility_stats = None
         if self._credibility_filter and merged_results:
-            merged_results = self._credibility_filter.curate(
+            merged_results, credibility_stats = self._credibility_filter.curate_with_stats(
                 query=topic, search_results=merged_results,
             )
 
         logger.info(f"🧠 智能搜索完成: 共 {len(merged_results)} 条结果")
         
-        return {
+        response = {
             'success': True,
             'results': merged_results,
             'summary': self._generate_summary(merged_results),
             'sources_used': sources,
             'error': None
         }
+        if credibility_stats:
+            response['credibility'] = credibility_stats
+        return response
     
+    def _timed_search(self, source_id: str, fn, args: tuple) -> Dict[str, Any]:
+        """执行单个源的搜索并记录延迟统计；超过该源 p95 仍未返回时发起对冲请求"""
+        delay = self.curator.hedge_delay(source_id) if self.hedge_enabled else None
+        start = time.monotonic()
+        try:
+            result = fn(*args) if delay is None else self._hedged_call(source_id, fn, args, delay)
+        except Exception:
+            self.curator.record_latency(source_id, time.monotonic() - start, success=False)
+            raise
+        if result.get('from_cache'):
+            # 缓存命中不反映源的真实延迟
+            return result
+        self.curator.record_latency(
+            source_id, time.monotonic() - start,
+            success=bool(result.get('success')),
+            result_count=len(result.get('results') or []),
+        )
+        return result
+
+    def _hedged_call(self, source_id: str, fn, args: tuple, delay: float) -> Dict[str, Any]:
+        """对冲请求：原请求超过 delay 秒未返回则再发一次，取先成功的结果"""
+        primary = self._hedge_pool.submit(fn, *args)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        logger.info(f"⏱️ {source_id} 超过 p95 ({delay:.1f}s) 未返回，发起对冲请求")
+        backup = self._hedge_pool.submit(self._backup_call, fn, args)
+        pending = {primary, backup}
+        fallback, error = None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if result.get('success'):
+                    self.curator.record_hedge(source_id, won=future is backup)
+                    return result
+                fallback = fallback or result
+        self.curator.record_hedge(source_id, won=False)
+        if fallback is not None:
+            return fallback
+        raise error
+
+    @staticmethod
+    def _backup_call(fn, args: tuple) -> Dict[str, Any]:
+        """对冲请求：绕过搜索结果缓存的单飞锁，不等待仍在进行的原请求"""
+        with hedged_attempt():
+            return fn(*args)
+
     def _route_search_sources(self, topic: str) -> Dict[str, Any]:
         """使用 LLM 判断需要哪些搜索源"""
         if not self.llm:
@@ -441,12 +509,15 @@ class SmartSearchService:
 
     def _search_arxiv(self, query: str, max_results: int) -> Dict[str, Any]:
         """搜索 arXiv"""
-        from utils.rate_limiter import get_global_rate_limiter
-        get_global_rate_limiter().wait_sync(domain='search_arxiv')
         arxiv_service = get_arxiv_service()
-        if arxiv_service:
+        if not arxiv_service:
+            return {'success': False, 'results': [], 'error': 'arXiv 服务不可用'}
+
+        def fetch():
+            from utils.rate_limiter import get_global_rate_limiter
+            get_global_rate_limiter().wait_sync(domain='search_arxiv')
             return arxiv_service.search(query, max_results)
-        return {'success': False, 'results': [], 'error': 'arXiv 服务不可用'}
+        return cached_search('arxiv', query, max_results, fetch)
     
     def _search_blog(self, blog_id: str, query: str, max_results: int) -> Dict[str, Any]:
         """搜索专业博客（使用 site: 限定）"""
@@ -472,12 +543,10 @@ class SmartSearchService:
         return result
     
     def _search_general(self, query: str, max_results: int) -> Dict[str, Any]:
-        """通用搜索"""
-        from utils.rate_limiter import get_global_rate_limiter
-        get_global_rate_limiter().wait_sync(domain='search_general')
+        """通用搜索（结果缓存在 SearchService.search 内，限流只在缓存未命中时等待）"""
         search_service = get_search_service()
         if search_service and search_service.is_available():
-            result = search_service.search(query, max_results)
+            result = search_service.search(query, max_results, rate_limit_domain='search_general')
             # 标记来源 + 清洗 HTML
             if result.get('results'):
                 for item in result['results']:
@@ -493,23 +562,29 @@ class SmartSearchService:
     
     def _search_google(self, query: str, max_results: int) -> Dict[str, Any]:
         """Google 搜索（通过 Serper API，75.02）"""
-        from utils.rate_limiter import get_global_rate_limiter
-        get_global_rate_limiter().wait_sync(domain='search_serper')
         from .serper_search_service import get_serper_service
         serper = get_serper_service()
         if not serper or not serper.is_available():
             return {'success': False, 'results': [], 'error': 'Serper 服务不可用'}
-        return serper.search(query, max_results)
+
+        def fetch():
+            from utils.rate_limiter import get_global_rate_limiter
+            get_global_rate_limiter().wait_sync(domain='search_serper')
+            return serper.search(query, max_results)
+        return cached_search('google', query, max_results, fetch)
 
     def _search_sogou(self, query: str, max_results: int) -> Dict[str, Any]:
         """搜狗搜索（通过腾讯云 SearchPro API，75.07）"""
-        from utils.rate_limiter import get_global_rate_limiter
-        get_global_rate_limiter().wait_sync(domain='search_sogou')
         from .sogou_search_service import get_sogou_service
         sogou = get_sogou_service()
         if not sogou or not sogou.is_available():
             return {'success': False, 'results': [], 'error': '搜狗搜索服务不可用'}
-        return sogou.search(query, max_results)
+
+        def fetch():
+            from utils.rate_limiter import get_global_rate_limiter
+            get_global_rate_limiter().wait_sync(domain='search_sogou')
+            return sogou.search(query, max_results)
+        return cached_search('sogou', query, max_results, fetch)
 
     def _merge_and_dedupe(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """合并去重搜索结果，并按源质量排序"""
@@ -3,12 +3,23 @@
 
 在 SmartSearchService 搜索结果合并去重之后，按权威性/时效性/相关性/深度
 四维评分，筛选高质量结果。失败时降级返回原始结果。
+
+评估管线：
+1. 评分缓存：按 (规范化 URL, 内容指纹) 命中的结果直接复用历史评分，relevance 按当前查询规则计算
+2. 规则预评分：域名 / 发布日期 / 内容长度 / 关键词覆盖，只保留排名靠前的未命中结果
+3. 分批 LLM 评估：仅未命中的候选按 SOURCE_CREDIBILITY_BATCH_SIZE 分批并行评估，结果写回缓存
 """
 
 import json
 import logging
 import os
-from typing import Dict, List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .credibility_score_cache import CredibilityScoreCache, score_key
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +35,89 @@ DEFAULT_MAX_RESULTS = 10
 DEFAULT_MIN_SCORE = 5.0
 # 搜索结果 <= 此数量时跳过评估（数据量太少，筛选意义不大）
 SKIP_THRESHOLD = 5
+# 每次 LLM 调用评估的结果数
+DEFAULT_BATCH_SIZE = 8
+# 送入 LLM 的候选数上限 = max_results * 此系数（按规则预评分截取）
+DEFAULT_PRESCREEN_FACTOR = 2
+# 并行评估的批次数上限
+MAX_PARALLEL_BATCHES = 4
+
+# 规则预评分：高权威来源
+HIGH_AUTHORITY_DOMAINS = {
+    'arxiv.org', 'github.com', 'docs.python.org', 'developer.mozilla.org', 'learn.microsoft.com',
+    'cloud.google.com', 'aws.amazon.com', 'kubernetes.io', 'pytorch.org', 'tensorflow.org',
+    'huggingface.co', 'openai.com', 'anthropic.com', 'ieee.org', 'acm.org', 'nature.com',
+    'stackoverflow.com', 'w3.org', 'rust-lang.org', 'go.dev',
+}
+HIGH_AUTHORITY_SUFFIXES = ('.gov', '.edu', '.gov.cn', '.edu.cn', '.ac.cn', '.readthedocs.io')
+HIGH_AUTHORITY_PREFIXES = ('docs.', 'developer.', 'developers.')
+
+_CODE_MARKERS = ('```', 'def ', 'function ', 'class ', 'import ', '#include', 'SELECT ')
+
+
+def _weighted_total(scores: Dict) -> float:
+    return round(sum(float(scores.get(k, 0) or 0) * w for k, w in WEIGHTS.items()), 2)
+
+
+def _query_terms(query: str) -> set:
+    """查询词：英文单词 + 中文二字组"""
+    terms = {w for w in re.findall(r'[a-z0-9][a-z0-9+#.\-]*', query.lower()) if len(w) >= 2}
+    for run in re.findall(r'[一-鿿]+', query):
+        terms.update(run[i:i + 2] for i in range(max(len(run) - 1, 1)))
+    return terms
+
+
+def rule_relevance(query: str, result: Dict) -> float:
+    """关键词覆盖率映射到 1-10"""
+    terms = _query_terms(query)
+    if not terms:
+        return 5.0
+    text = f"{result.get('title', '')} {result.get('content', '') or ''}".lower()
+    hit = sum(1 for t in terms if t in text)
+    return round(1 + 9 * hit / len(terms), 1)
+
+
+def rule_scores(query: str, result: Dict) -> Dict:
+    """不调用 LLM 的四维规则评分（1-10），用于预筛选与 LLM 失败时的兜底"""
+    host = (urlsplit(result.get('url', '') or '').hostname or '').lower()
+    host = host[4:] if host.startswith('www.') else host
+    if host in HIGH_AUTHORITY_DOMAINS or host.endswith(HIGH_AUTHORITY_SUFFIXES) \
+            or host.startswith(HIGH_AUTHORITY_PREFIXES):
+        authority = 8.0
+    else:
+        authority = 5.0 if host else 3.0
+
+    freshness = 5.0
+    match = re.search(r'(20\d{2})', str(result.get('publish_date', '') or ''))
+    if match:
+        age = datetime.now().year - int(match.group(1))
+        freshness = 9.0 if age <= 0 else 8.0 if age == 1 else 6.0 if age == 2 else 4.0
+
+    content = result.get('content', '') or ''
+    depth = min(3.0 + len(content) / 200, 8.0) + (2.0 if any(m in content for m in _CODE_MARKERS) else 0.0)
+
+    scores = {
+        'authority': authority,
+        'freshness': freshness,
+        'relevance': rule_relevance(query, result),
+        'depth': round(min(depth, 10.0), 1),
+    }
+    scores['total_score'] = _weighted_total(scores)
+    return scores
 
 
 class SourceCredibilityFilter:
     """LLM 驱动的源可信度筛选器"""
 
-    def __init__(self, llm_client, max_results: int = None, min_score: float = None):
+    def __init__(
+        self,
+        llm_client,
+        max_results: int = None,
+        min_score: float = None,
+        cache: Optional[CredibilityScoreCache] = None,
+        batch_size: int = None,
+        prescreen_factor: int = None,
+    ):
         self.llm = llm_client
         self.max_results = max_results or int(
             os.environ.get('SOURCE_CREDIBILITY_MAX_RESULTS', DEFAULT_MAX_RESULTS)
@@ -37,6 +125,13 @@ class SourceCredibilityFilter:
         self.min_score = min_score or float(
             os.environ.get('SOURCE_CREDIBILITY_MIN_SCORE', DEFAULT_MIN_SCORE)
         )
+        self.cache = cache if cache is not None else CredibilityScoreCache.from_env()
+        self.batch_size = batch_size or int(
+            os.environ.get('SOURCE_CREDIBILITY_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        )
+        self.prescreen_factor = prescreen_factor or int(
+            os.environ.get('SOURCE_CREDIBILITY_PRESCREEN_FACTOR', DEFAULT_PRESCREEN_FACTOR)
+        )
 
     def curate(
         self,
@@ -45,55 +140,144 @@ class SourceCredibilityFilter:
         max_results: Optional[int] = None,
     ) -> List[Dict]:
         """执行 LLM 可信度评估，返回筛选后的结果列表"""
+        return self.curate_with_stats(query, search_results, max_results)[0]
+
+    def curate_with_stats(
+        self,
+        query: str,
+        search_results: List[Dict],
+        max_results: Optional[int] = None,
+    ) -> Tuple[List[Dict], Dict]:
+        """
+        执行可信度评估，返回 (筛选后的结果, 统计)
+
+        统计字段：total / cached / llm_scored / rule_scored / prescreened_out / llm_batches / kept /
+        cache_hit_ratio（缓存命中占全部结果的比例）
+        """
+        stats = {'total': len(search_results), 'cached': 0, 'llm_scored': 0, 'rule_scored': 0,
+                 'prescreened_out': 0, 'llm_batches': 0, 'kept': len(search_results),
+                 'cache_hit_ratio': 0.0}
         if not search_results:
-            return []
+            return [], stats
 
         # 短路：数据量太少时跳过评估
         if len(search_results) <= SKIP_THRESHOLD:
             logger.info(f"搜索结果仅 {len(search_results)} 条，跳过可信度评估")
-            return search_results
+            return search_results, stats
 
         effective_max = max_results or self.max_results
 
         try:
-            prompt = self._build_prompt(query, search_results, effective_max)
-            response = self.llm.chat(
-                messages=[{"role": "user", "content": prompt}],
-                caller="source_credibility_filter",
-            )
-            if not response:
-                logger.warning("可信度评估返回空响应，降级返回原始列表")
-                return search_results
+            keys = [score_key(r) for r in search_results]
+            cached = self.cache.get_many(keys) if self.cache is not None else {}
+            scored: List[Tuple[Dict, Dict]] = []
+            unseen = []
+            for key, result in zip(keys, search_results):
+                hit = cached.get(key)
+                if hit:
+                    scores = dict(hit, relevance=rule_relevance(query, result))
+                    scores['total_score'] = _weighted_total(scores)
+                    scored.append((result, scores))
+                else:
+                    unseen.append((key, result, rule_scores(query, result)))
+            stats['cached'] = len(scored)
+            stats['cache_hit_ratio'] = round(len(scored) / len(search_results), 2)
+
+            # 规则预评分截取候选：缓存中的合格结果已足够时可能完全不调用 LLM
+            passing = sum(1 for _, s in scored if s['total_score'] >= self.min_score)
+            budget = max(effective_max * self.prescreen_factor - passing, 0)
+            unseen.sort(key=lambda item: item[2]['total_score'], reverse=True)
+            candidates = unseen[:budget]
+            stats['prescreened_out'] = len(unseen) - len(candidates)
+
+            llm_scores = self._score_batches(query, [r for _, r, _ in candidates], stats)
+            if candidates and not llm_scores and not scored:
+                logger.warning("可信度评估无有效结果，降级返回原始列表")
+                stats['kept'] = len(search_results)
+                return search_results, stats
 
-            scores = self._parse_response(response)
-            if not scores:
-                logger.warning("可信度评估解析失败，降级返回原始列表")
-                return search_results
+            fresh = {}
+            for i, (key, result, prescore) in enumerate(candidates):
+                item = llm_scores.get(i)
+                if item is None:
+                    scored.append((result, prescore))
+                    stats['rule_scored'] += 1
+                    continue
+                scores = {k: item.get(k, 0) for k in WEIGHTS}
+                scores['reason'] = item.get('reason', '')
+                scores['total_score'] = item.get('total_score') or _weighted_total(scores)
+                scored.append((result, scores))
+                stats['llm_scored'] += 1
+                if key:
+                    fresh[key] = scores
+            if fresh and self.cache is not None:
+                self.cache.set_many(fresh)
 
             # 按 total_score 降序排列，过滤低分，截断
             filtered = []
-            for item in scores:
-                idx = item.get('index', 0) - 1  # 1-based → 0-based
-                if 0 <= idx < len(search_results) and item.get('total_score', 0) >= self.min_score:
-                    result = search_results[idx].copy()
-                    result['credibility_score'] = item.get('total_score', 0)
+            for result, scores in scored:
+                if scores.get('total_score', 0) >= self.min_score:
+                    result = result.copy()
+                    result['credibility_score'] = scores.get('total_score', 0)
                     result['credibility_detail'] = {
-                        'authority': item.get('authority', 0),
-                        'freshness': item.get('freshness', 0),
-                        'relevance': item.get('relevance', 0),
-                        'depth': item.get('depth', 0),
-                        'reason': item.get('reason', ''),
+                        'authority': scores.get('authority', 0),
+                        'freshness': scores.get('freshness', 0),
+                        'relevance': scores.get('relevance', 0),
+                        'depth': scores.get('depth', 0),
+                        'reason': scores.get('reason', ''),
                     }
                     filtered.append(result)
 
             filtered.sort(key=lambda x: x.get('credibility_score', 0), reverse=True)
             result = filtered[:effective_max]
-            logger.info(f"可信度筛选: {len(search_results)} → {len(result)} 条")
-            return result
+            stats['kept'] = len(result)
+            logger.info(
+                f"可信度筛选: {len(search_results)} → {len(result)} 条"
+                f"（缓存 {stats['cached']}，LLM {stats['llm_scored']}，预筛除 {stats['prescreened_out']}）"
+            )
+            return result, stats
 
         except Exception as e:
             logger.error(f"源可信度筛选失败: {e}，降级返回原始结果")
-            return search_results
+            stats['kept'] = len(search_results)
+            return search_results, stats
+
+    def _score_batches(self, query: str, results: List[Dict], stats: Dict) -> Dict[int, Dict]:
+        """分批并行调用 LLM，返回 {results 下标: 评分}；失败批次缺席"""
+        batches = [
+            list(range(i, min(i + self.batch_size, len(results))))
+            for i in range(0, len(results), self.batch_size)
+        ]
+        stats['llm_batches'] = len(batches)
+        if not batches:
+            return {}
+
+        def score(indices: List[int]) -> Dict[int, Dict]:
+            batch = [results[i] for i in indices]
+            try:
+                response = self.llm.chat(
+                    messages=[{"role": "user", "content": self._build_prompt(query, batch, len(batch))}],
+                    caller="source_credibility_filter",
+                )
+                items = self._parse_response(response) if response else []
+            except Exception as e:
+                logger.warning(f"可信度评估批次失败（{len(batch)} 条），改用规则评分: {e}")
+                return {}
+            scores = {}
+            for item in items:
+                idx = (item.get('index') or 0) - 1  # 1-based → 0-based
+                if 0 <= idx < len(indices):
+                    scores[indices[idx]] = item
+            return scores
+
+        merged = {}
+        if len(batches) == 1:
+            merged.update(score(batches[0]))
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(batches), MAX_PARALLEL_BATCHES)) as executor:
+                for part in executor.map(score, batches):
+                    merged.update(part)
+        return merged
 
     def _build_prompt(self, query: str, results: List[Dict], max_results: int) -> str:
         """构建评估 Prompt"""
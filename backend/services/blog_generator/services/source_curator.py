@@ -5,10 +5,17 @@
 1. rank(results) — 按源质量权重排序
 2. 健康检查 — 连续 3 次失败自动禁用，30 分钟后重新检查
 3. get_healthy_sources() — 过滤不健康的源
+4. 延迟感知 — 每个源的延迟直方图（p50/p95）、成功率、结果产出，持久化到 JSON，
+   供 SmartSearchService 排序 / 跳过慢源，以及超过 p95 时发起对冲请求
 """
+import atexit
+import bisect
+import json
 import logging
+import os
+import threading
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,120 @@ HEALTH_COOLDOWN = 30 * 60
 # 连续失败阈值
 MAX_CONSECUTIVE_FAILURES = 3
 
+# 延迟直方图桶上界（秒），最后一个桶为 +inf
+LATENCY_BUCKETS = (0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0)
+# 样本数少于此值时不做延迟判断（不跳过、不对冲）
+MIN_LATENCY_SAMPLES = int(os.environ.get('SOURCE_STATS_MIN_SAMPLES', '10'))
+# 每个源的统计窗口：调用数超过后所有计数减半，让近期表现占主导
+STATS_WINDOW = int(os.environ.get('SOURCE_STATS_WINDOW', '500'))
+# p50 超过此值（秒）视为慢源，跳过
+SLOW_SOURCE_SECONDS = float(os.environ.get('SOURCE_SLOW_THRESHOLD', '10'))
+# 慢源每隔多久（秒）放行一次探测请求，以便统计恢复
+SLOW_SOURCE_PROBE_INTERVAL = float(os.environ.get('SOURCE_SLOW_PROBE_INTERVAL', '300'))
+# 统计落盘的最小间隔（秒）
+STATS_FLUSH_INTERVAL = float(os.environ.get('SOURCE_STATS_FLUSH_INTERVAL', '30'))
+
+
+def default_stats_path() -> str:
+    """源统计持久化路径（SOURCE_STATS_PATH，空字符串表示仅内存）"""
+    return os.environ.get('SOURCE_STATS_PATH', os.path.join(
+        os.path.dirname(__file__), '..', '..', '..', 'data', 'source_stats.json',
+    ))
+
+
+class SourceStats:
+    """单个搜索源的延迟直方图与产出统计"""
+
+    __slots__ = ('calls', 'successes', 'failures', 'results', 'hedged', 'hedge_wins',
+                 'buckets', 'max_latency', 'last_attempt')
+
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.results = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.max_latency = 0.0
+        self.last_attempt = 0.0
+
+    def record(self, latency: float, success: bool, result_count: int) -> None:
+        self.calls += 1
+        if success:
+            self.successes += 1
+            self.results += result_count
+        else:
+            self.failures += 1
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.max_latency = max(self.max_latency, latency)
+        self.last_attempt = time.time()
+        if self.calls > STATS_WINDOW:
+            self._decay()
+
+    def _decay(self) -> None:
+        self.calls //= 2
+        self.successes //= 2
+        self.failures //= 2
+        self.results //= 2
+        self.hedged //= 2
+        self.hedge_wins //= 2
+        self.buckets = [c // 2 for c in self.buckets]
+
+    @property
+    def samples(self) -> int:
+        return sum(self.buckets)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """按直方图估算分位数（桶内线性插值），无样本返回 None"""
+        total = self.samples
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(self.buckets):
+            if count and cumulative + count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else max(self.max_latency, lower)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.max_latency
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.calls if self.calls else 1.0
+
+    @property
+    def avg_yield(self) -> float:
+        return self.results / self.successes if self.successes else 0.0
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SourceStats':
+        stats = cls()
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(stats, slot, data[slot])
+        if len(stats.buckets) != len(LATENCY_BUCKETS) + 1:
+            stats.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        return stats
+
+    def summary(self) -> Dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            'calls': self.calls,
+            'success_rate': round(self.success_rate, 3),
+            'avg_results': round(self.avg_yield, 2),
+            'p50_seconds': round(p50, 3) if p50 is not None else None,
+            'p95_seconds': round(p95, 3) if p95 is not None else None,
+            'max_seconds': round(self.max_latency, 3),
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'last_attempt': self.last_attempt,
+        }
+
 
 class SourceCurator:
     """搜索源质量评估与健康管理"""
@@ -55,11 +176,21 @@ class SourceCurator:
 
     DEFAULT_WEIGHT = 0.50
 
-    def __init__(self):
+    def __init__(self, stats_path: Optional[str] = None):
         # 连续失败计数 {source_id: count}
         self._failure_counts: Dict[str, int] = {}
         # 禁用时间戳 {source_id: timestamp}
         self._disabled_sources: Dict[str, float] = {}
+        # 延迟 / 产出统计 {source_id: SourceStats}，stats_path 为空时仅保存在内存
+        self._stats: Dict[str, SourceStats] = {}
+        self._stats_lock = threading.Lock()
+        self._stats_path = stats_path
+        self._stats_dirty = False
+        self._last_flush = time.monotonic()
+        self._load_stats()
+        if stats_path:
+            # 统计按 STATS_FLUSH_INTERVAL 节流落盘，进程退出时补写最后一段
+            atexit.register(self.flush_stats)
 
     # ========== 排序 ==========
 
@@ -116,3 +247,95 @@ class SourceCurator:
     def get_healthy_sources(self, source_ids: List[str]) -> List[str]:
         """过滤出健康的源列表"""
         return [s for s in source_ids if self.check_health(s)]
+
+    # ========== 延迟感知 ==========
+
+    def record_latency(self, source_id: str, latency: float, success: bool,
+                       result_count: int = 0) -> None:
+        """记录一次调用的延迟、成败与结果条数"""
+        with self._stats_lock:
+            self._stats.setdefault(source_id, SourceStats()).record(latency, success, result_count)
+            self._stats_dirty = True
+        self._maybe_flush()
+
+    def record_hedge(self, source_id: str, won: bool) -> None:
+        """记录一次对冲请求（won: 对冲请求先于原请求返回）"""
+        with self._stats_lock:
+            stats = self._stats.setdefault(source_id, SourceStats())
+            stats.hedged += 1
+            stats.hedge_wins += int(won)
+            self._stats_dirty = True
+
+    def latency_percentile(self, source_id: str, q: float) -> Optional[float]:
+        """源的延迟分位数（秒）；样本不足时返回 None"""
+        with self._stats_lock:
+            stats = self._stats.get(source_id)
+            if not stats or stats.samples < MIN_LATENCY_SAMPLES:
+                return None
+            return stats.percentile(q)
+
+    def hedge_delay(self, source_id: str) -> Optional[float]:
+        """对冲等待时间：超过该源 p95 仍未返回时发起重复请求；样本不足时不对冲"""
+        return self.latency_percentile(source_id, 0.95)
+
+    def is_slow(self, source_id: str) -> bool:
+        """p50 超过慢源阈值，且距上次探测不足探测间隔"""
+        p50 = self.latency_percentile(source_id, 0.5)
+        if p50 is None or p50 <= SLOW_SOURCE_SECONDS:
+            return False
+        with self._stats_lock:
+            last_attempt = self._stats[source_id].last_attempt
+        return time.time() - last_attempt < SLOW_SOURCE_PROBE_INTERVAL
+
+    def prioritize(self, source_ids: List[str]) -> List[str]:
+        """
+        按预期"每秒产出"降序排列源：成功率 × 平均结果数 / p50。
+        样本不足的源排在最前（尽快积累统计），相同得分保持原顺序。
+        """
+        def score(source_id: str) -> float:
+            p50 = self.latency_percentile(source_id, 0.5)
+            if p50 is None:
+                return float('inf')
+            with self._stats_lock:
+                stats = self._stats[source_id]
+                return stats.success_rate * stats.avg_yield / max(p50, 0.01)
+
+        return sorted(source_ids, key=score, reverse=True)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """全部源的统计摘要（管理接口用）"""
+        with self._stats_lock:
+            return {
+                source_id: dict(stats.summary(), healthy=source_id not in self._disabled_sources)
+                for source_id, stats in sorted(self._stats.items())
+            }
+
+    def flush_stats(self) -> None:
+        """立即持久化统计（无新数据时跳过）"""
+        if not self._stats_path or not self._stats_dirty:
+            return
+        from utils.atomic_write import atomic_write
+
+        with self._stats_lock:
+            data = {source_id: stats.to_dict() for source_id, stats in self._stats.items()}
+            self._stats_dirty = False
+            self._last_flush = time.monotonic()
+        try:
+            atomic_write(self._stats_path, json.dumps(data, ensure_ascii=False))
+        except OSError as e:
+            logger.warning(f"源统计持久化失败: {e}")
+
+    def _maybe_flush(self) -> None:
+        if self._stats_dirty and time.monotonic() - self._last_flush >= STATS_FLUSH_INTERVAL:
+            self.flush_stats()
+
+    def _load_stats(self) -> None:
+        if not self._stats_path or not os.path.exists(self._stats_path):
+            return
+        try:
+            with open(self._stats_path, encoding='utf-8') as f:
+                data = json.load(f)
+            self._stats = {source_id: SourceStats.from_dict(d) for source_id, d in data.items()}
+            logger.info(f"已加载 {len(self._stats)} 个搜索源的历史统计")
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"源统计加载失败，重新统计: {e}")
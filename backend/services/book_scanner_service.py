@@ -2,9 +2,11 @@
 书籍扫描服务 - 自动扫描博客库，聚合成教程书籍
 """
 import json
+import re
 import uuid
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, List, Optional
 
 from services.database_service import DatabaseService
@@ -12,6 +14,14 @@ from services.blog_generator.prompts import get_prompt_manager
 
 logger = logging.getLogger(__name__)
 
+# 并发与分批配置
+SUMMARY_MAX_WORKERS = int(os.environ.get('BOOK_SUMMARY_MAX_WORKERS', '4'))
+SUMMARY_WRITE_BATCH = int(os.environ.get('BOOK_SUMMARY_WRITE_BATCH', '20'))
+CLASSIFY_BATCH_SIZE = int(os.environ.get('BOOK_CLASSIFY_BATCH_SIZE', '40'))
+CLASSIFY_BATCH_CHARS = int(os.environ.get('BOOK_CLASSIFY_BATCH_CHARS', '12000'))
+CLASSIFY_MAX_WORKERS = int(os.environ.get('BOOK_CLASSIFY_MAX_WORKERS', '3'))
+OUTLINE_MAX_WORKERS = int(os.environ.get('BOOK_OUTLINE_MAX_WORKERS', '3'))
+
 # 主题到图标的映射
 THEME_ICONS = {
     'ai': '🤖',
@@ -137,21 +147,29 @@ class BookScannerService:
         total_books = len(books_to_update)
         logger.info(f"【第二步】开始生成书籍大纲，共 {total_books} 本书籍待处理...")
         
-        outlines_generated = 0
+        def generate_outline(idx, book_id):
+            # 查找是否有相似的旧书籍大纲可参考
+            book = self.db.get_book(book_id)
+            book_title = book.get('title', book_id) if book else book_id
+            old_outline_ref = self._find_similar_old_outline(book, old_books_info) if book else None
+            
+            logger.info(f"📚 开始生成书籍大纲: [{idx}/{total_books}]: {book_title}")
+            self._generate_book_outline(book_id, old_outline_ref)
+            logger.info(f"📚 生成书籍大纲完成: [{idx}/{total_books}]: {book_title}")
         
-        for idx, book_id in enumerate(books_to_update, 1):
-            try:
-                # 查找是否有相似的旧书籍大纲可参考
-                book = self.db.get_book(book_id)
-                book_title = book.get('title', book_id) if book else book_id
-                old_outline_ref = self._find_similar_old_outline(book, old_books_info) if book else None
-                
-                logger.info(f"📚 开始生成书籍大纲: [{idx}/{total_books}]: {book_title}")
-                self._generate_book_outline(book_id, old_outline_ref)
-                outlines_generated += 1
-                logger.info(f"📚 生成书籍大纲完成: [{idx}/{total_books}]: {book_title}")
-            except Exception as e:
-                logger.warning(f"📚 生成书籍大纲失败: {book_id}, {e}")
+        outlines_generated = 0
+        if books_to_update:
+            with ThreadPoolExecutor(max_workers=min(OUTLINE_MAX_WORKERS, total_books)) as executor:
+                futures = {
+                    executor.submit(generate_outline, idx, book_id): book_id
+                    for idx, book_id in enumerate(books_to_update, 1)
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        outlines_generated += 1
+                    except Exception as e:
+                        logger.warning(f"📚 生成书籍大纲失败: {futures[future]}, {e}")
         
         result = {
             "status": "success",
@@ -246,32 +264,135 @@ class BookScannerService:
                 )
             reference_books_info = "\n".join(reference_items)
         
-        prompt_manager = get_prompt_manager()
-        prompt = prompt_manager.render_book_classifier(
+        return self._classify_in_batches(
+            blogs,
+            blogs_info,
             existing_books_info="暂无现有书籍（重新生成模式）",
-            blogs_info="\n---\n".join(blogs_info),
-            reference_books_info=reference_books_info
+            reference_books_info=reference_books_info,
         )
+    
+    # ========== 分批分类 ==========
+    
+    @staticmethod
+    def _split_classify_batches(blogs_info: List[str]) -> List[List[int]]:
+        """按条数与字符数上限将博客信息切分为多个批次（返回下标列表）"""
+        batches = []
+        current = []
+        current_chars = 0
+        for idx, info in enumerate(blogs_info):
+            if current and (len(current) >= CLASSIFY_BATCH_SIZE
+                            or current_chars + len(info) > CLASSIFY_BATCH_CHARS):
+                batches.append(current)
+                current = []
+                current_chars = 0
+            current.append(idx)
+            current_chars += len(info)
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _classify_batch(
+        self,
+        blogs_info: List[str],
+        existing_books_info: str,
+        reference_books_info: str = ""
+    ) -> Dict[str, Any]:
+        """调用 LLM 对单个批次分类，解析失败时抛出异常"""
+        prompt_manager = get_prompt_manager()
+        render_kwargs = {
+            'existing_books_info': existing_books_info,
+            'blogs_info': "\n---\n".join(blogs_info),
+        }
+        if reference_books_info:
+            render_kwargs['reference_books_info'] = reference_books_info
+        prompt = prompt_manager.render_book_classifier(**render_kwargs)
+        
+        response = self.llm.chat(messages=[{"role": "user", "content": prompt}])
+        response_text = response if isinstance(response, str) else (response or {}).get('content', '')
+        
+        # 提取 JSON
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+        if json_start >= 0 and json_end > json_start:
+            return json.loads(response_text[json_start:json_end])
+        raise json.JSONDecodeError("No JSON found", response_text, 0)
+    
+    @staticmethod
+    def _normalize_book_title(title: str) -> str:
+        return re.sub(r'[\s《》]', '', title or '').lower()
+    
+    def _merge_batch_classifications(self, batch_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        合并各批次分类结果
         
-        try:
-            response = self.llm.chat(messages=[{"role": "user", "content": prompt}])
-            response_text = response if isinstance(response, str) else response.get('content', '')
-            
-            # 提取 JSON
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                classification = json.loads(response_text[json_start:json_end])
-            else:
-                raise json.JSONDecodeError("No JSON found", response_text, 0)
-            
-            logger.info(f"LLM 分类完成: {len(classification.get('classifications', []))} 条分类, "
-                       f"{len(classification.get('new_books', []))} 本新书")
-            return classification
+        各批次的 new_book_N 临时 ID 会冲突，这里重新编号；
+        不同批次创建的同名书籍合并为同一本。
+        """
+        merged = {"classifications": [], "new_books": []}
+        title_to_temp_id = {}
+        
+        for batch in batch_results:
+            id_map = {}
+            for new_book in batch.get('new_books', []):
+                old_id = new_book.get('temp_id', '')
+                key = self._normalize_book_title(new_book.get('title', old_id))
+                if key in title_to_temp_id:
+                    id_map[old_id] = title_to_temp_id[key]
+                    continue
+                temp_id = f"new_book_{len(merged['new_books']) + 1}"
+                title_to_temp_id[key] = temp_id
+                id_map[old_id] = temp_id
+                merged['new_books'].append({**new_book, 'temp_id': temp_id})
             
-        except Exception as e:
-            logger.error(f"LLM 分类失败: {e}")
-            return self._default_classification(blogs)
+            for item in batch.get('classifications', []):
+                target = item.get('target_book', '')
+                if target in id_map:
+                    item = {**item, 'target_book': id_map[target]}
+                merged['classifications'].append(item)
+        
+        return merged
+    
+    def _classify_in_batches(
+        self,
+        blogs: List[Dict[str, Any]],
+        blogs_info: List[str],
+        existing_books_info: str,
+        reference_books_info: str = "",
+        existing_books: List[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        分层分类：将博客切分为有界批次并发分类，再合并书籍分配
+        
+        单批失败时仅该批降级为默认分类，不影响其他批次。
+        """
+        batches = self._split_classify_batches(blogs_info)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batches)
+        
+        def run_batch(batch_idx: int) -> Dict[str, Any]:
+            indices = batches[batch_idx]
+            try:
+                return self._classify_batch(
+                    [blogs_info[i] for i in indices],
+                    existing_books_info,
+                    reference_books_info,
+                )
+            except Exception as e:
+                logger.error(f"LLM 分类失败 (批次 {batch_idx + 1}/{len(batches)}): {e}")
+                return self._default_classification([blogs[i] for i in indices], existing_books)
+        
+        if len(batches) == 1:
+            results[0] = run_batch(0)
+        else:
+            logger.info(f"博客分批分类: {len(blogs)} 篇, {len(batches)} 个批次")
+            with ThreadPoolExecutor(max_workers=min(CLASSIFY_MAX_WORKERS, len(batches))) as executor:
+                futures = {executor.submit(run_batch, idx): idx for idx in range(len(batches))}
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        
+        classification = self._merge_batch_classifications(results)
+        logger.info(f"LLM 分类完成: {len(classification.get('classifications', []))} 条分类, "
+                   f"{len(classification.get('new_books', []))} 本新书")
+        return classification
     
     def _refresh_existing_books(self, books: List[Dict[str, Any]]) -> int:
         """
@@ -339,7 +460,10 @@ class BookScannerService:
     
     def _ensure_blog_summaries(self, blogs: List[Dict[str, Any]]) -> int:
         """
-        确保所有博客都有摘要，如果没有则生成
+        确保所有博客都有摘要，如果没有则并发生成
+        
+        并发度由 BOOK_SUMMARY_MAX_WORKERS 控制，LLM 调用本身经过全局限流器；
+        生成的摘要按批写回数据库。
         
         Args:
             blogs: 博客列表
@@ -350,47 +474,62 @@ class BookScannerService:
         if not self.llm:
             return 0
         
+        pending = [blog for blog in blogs if not blog.get('summary')]
+        if not pending:
+            return 0
+        
         from services.blog_generator.blog_service import extract_article_summary
         
+        def summarize(blog):
+            content = blog.get('markdown_content', '') or ''
+            # 移除代码块，只保留文本内容用于摘要生成
+            content_without_code = self._remove_code_blocks(content)
+            return extract_article_summary(
+                llm_client=self.llm,
+                title=blog.get('topic', ''),
+                content=content_without_code,
+                max_length=500
+            )
+        
         count = 0
-        for blog in blogs:
-            # 检查是否已有摘要
-            if blog.get('summary'):
-                continue
-            
-            # 生成摘要
-            try:
-                content = blog.get('markdown_content', '') or ''
-                
-                # 移除代码块，只保留文本内容用于摘要生成
-                content_without_code = self._remove_code_blocks(content)
-                
-                summary = extract_article_summary(
-                    llm_client=self.llm,
-                    title=blog.get('topic', ''),
-                    content=content_without_code,
-                    max_length=500
-                )
-                
-                if summary:
-                    self.db.update_history_summary(blog['id'], summary)
-                    blog['summary'] = summary  # 更新内存中的数据
-                    count += 1
-                    logger.info(f"生成博客摘要: {blog['id']} - {blog.get('topic', '')[:30]}")
-            except Exception as e:
-                logger.warning(f"生成博客摘要失败: {blog['id']}, {e}")
+        buffer = {}
+        logger.info(f"并发生成博客摘要: {len(pending)} 篇, 并发度 {SUMMARY_MAX_WORKERS}")
+        with ThreadPoolExecutor(max_workers=min(SUMMARY_MAX_WORKERS, len(pending))) as executor:
+            futures = {executor.submit(summarize, blog): blog for blog in pending}
+            for future in as_completed(futures):
+                blog = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    logger.warning(f"生成博客摘要失败: {blog['id']}, {e}")
+                    continue
+                if not summary:
+                    continue
+                blog['summary'] = summary  # 更新内存中的数据
+                buffer[blog['id']] = summary
+                count += 1
+                logger.info(f"生成博客摘要: {blog['id']} - {blog.get('topic', '')[:30]}")
+                if len(buffer) >= SUMMARY_WRITE_BATCH:
+                    self.db.update_history_summaries(buffer)
+                    buffer = {}
+        
+        if buffer:
+            self.db.update_history_summaries(buffer)
         
         return count
     
     def _get_existing_books_with_details(self) -> List[Dict[str, Any]]:
-        """获取现有书籍及其详细信息"""
+        """获取现有书籍及其详细信息（章节与博客各一次批量查询）"""
         books = self.db.list_books(status='active')
+        book_ids = [book['id'] for book in books]
+        chapters_by_book = self.db.get_chapters_by_books(book_ids)
+        blogs_by_book = self.db.get_blogs_by_books(book_ids)
         
         for book in books:
             # 获取章节信息
-            book['chapters'] = self.db.get_book_chapters(book['id'])
+            book['chapters'] = chapters_by_book.get(book['id'], [])
             # 获取关联的博客
-            book['related_blogs'] = self.db.get_blogs_by_book(book['id'])
+            book['related_blogs'] = blogs_by_book.get(book['id'], [])
             # 解析大纲
             if book.get('outline'):
                 try:
@@ -432,36 +571,17 @@ class BookScannerService:
         for book in existing_books:
             books_info.append(f"书籍ID: {book['id']}\n标题: {book['title']}\n主题: {book.get('theme', 'general')}\n描述: {book.get('description', '无')}")
         
-        prompt_manager = get_prompt_manager()
-        prompt = prompt_manager.render_book_classifier(
+        return self._classify_in_batches(
+            unassigned_blogs,
+            blogs_info,
             existing_books_info="\n---\n".join(books_info) if books_info else "暂无现有书籍",
-            blogs_info="\n---\n".join(blogs_info)
+            existing_books=existing_books,
         )
-        
-        try:
-            response = self.llm.chat(messages=[{"role": "user", "content": prompt}])
-            response_text = response if isinstance(response, str) else response.get('content', '')
-            
-            # 提取 JSON
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                classification = json.loads(response_text[json_start:json_end])
-            else:
-                raise json.JSONDecodeError("No JSON found", response_text, 0)
-                
-            logger.info(f"LLM 分类完成: {len(classification.get('classifications', []))} 篇博客, "
-                       f"{len(classification.get('new_books', []))} 本新书")
-            return classification
-            
-        except Exception as e:
-            logger.error(f"LLM 分类失败: {e}")
-            return self._default_classification(unassigned_blogs, existing_books)
     
     def _default_classification(
         self,
         unassigned_blogs: List[Dict[str, Any]],
-        existing_books: List[Dict[str, Any]]
+        existing_books: List[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """默认分类策略（无 LLM 时使用）"""
         if not unassigned_blogs:
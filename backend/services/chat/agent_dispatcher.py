@@ -192,17 +192,10 @@ class AgentDispatcher:
         return {"review": result}
 
     def factcheck(self, session: WritingSession) -> dict:
-        """事实核查 — 调用 FactCheckAgent.check()"""
-        all_content = "\n\n".join(
-            s.get("content", "") for s in (session.sections or [])
-        )
-        all_evidence = "\n\n".join(
-            f"[{r.get('title', '')}] {r.get('content', '')[:300]}"
-            for r in (session.search_results or [])
-        )
-        result = self.factcheck_agent.check(
-            all_content=all_content,
-            all_evidence=all_evidence or "(无证据)",
+        """事实核查 — 调用 FactCheckAgent.check_sections()（按章节并行）"""
+        result = self.factcheck_agent.check_sections(
+            session.sections or [],
+            session.search_results or [],
         )
         return {"factcheck": result}
 
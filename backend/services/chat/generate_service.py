@@ -100,18 +100,8 @@ def run_chat_generate(
                 if 'error' in write_result:
                     logger.warning('写作章节 %s 失败: %s', sid, write_result['error'])
                     continue
-                # 更新 session sections
-                section_data = write_result.get('section', {})
-                sections = list(session.sections or [])
-                updated = False
-                for i, s in enumerate(sections):
-                    if s.get('id') == sid:
-                        sections[i] = section_data
-                        updated = True
-                        break
-                if not updated:
-                    sections.append(section_data)
-                session_mgr.update(session_id, sections=sections, status='writing')
+                # 只写入该章节，不重写整篇 sections
+                session_mgr.update_section(session_id, sid, write_result.get('section', {}), status='writing')
                 session = session_mgr.get(session_id)
 
             # 4. 审核
@@ -1,14 +1,37 @@
 """
 WritingSession 数据模型 + WritingSessionManager SQLite 持久化
 对话式写作会话管理
+
+存储结构：
+- writing_sessions: 会话元数据（outline 等小字段以 JSON 存储）
+- writing_session_sections: 每个章节一行，编辑单个章节只写这一行，不重写整篇文档
+
+文件库使用 WAL（每个线程一个连接，读写互不阻塞）；同一会话的写操作由会话级锁串行化，
+热会话保存在进程内 LRU 中，读取时无需反序列化整篇文档。
+LRU 以本进程写入为准，同一数据库文件只应由一个进程的 WritingSessionManager 写入。
+
+环境变量：
+- WRITING_SESSION_DB: 会话库路径（默认 backend/data/writing_sessions.db）
+- WRITING_SESSION_CACHE_SIZE: 内存中保留的热会话数（默认 256，0 关闭）
 """
+import contextlib
+import copy
 import json
+import os
+import threading
 import uuid
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 from typing import Optional, List
 import sqlite3
 
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data', 'writing_sessions.db',
+)
+
 
 @dataclass
 class WritingSession:
@@ -30,8 +53,8 @@ class WritingSession:
     updated_at: str = ""
 
 
-# JSON 序列化的字段列表
-_JSON_FIELDS = {"outline", "sections", "search_results", "key_concepts", "code_blocks", "images"}
+# JSON 序列化的字段列表（sections 单独存表）
+_JSON_FIELDS = {"outline", "search_results", "key_concepts", "code_blocks", "images"}
 
 # 所有可更新的字段
 _ALL_FIELDS = {
@@ -40,124 +63,306 @@ _ALL_FIELDS = {
     "key_concepts", "code_blocks", "images", "status",
 }
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS writing_sessions (
+    session_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    user_id TEXT DEFAULT '',
+    article_type TEXT DEFAULT 'problem-solution',
+    target_audience TEXT DEFAULT 'beginner',
+    target_length TEXT DEFAULT 'medium',
+    outline TEXT,
+    sections TEXT,
+    search_results TEXT,
+    research_summary TEXT,
+    key_concepts TEXT,
+    code_blocks TEXT,
+    images TEXT,
+    status TEXT DEFAULT 'created',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS writing_session_sections (
+    session_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    section_id TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, position)
+) WITHOUT ROWID;
+"""
+
+_SECTION_UPSERT = (
+    "INSERT OR REPLACE INTO writing_session_sections (session_id, position, section_id, data) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _encode(name: str, value):
+    return json.dumps(value, ensure_ascii=False) if name in _JSON_FIELDS and value is not None else value
+
+
+def _section_row(session_id: str, position: int, section) -> tuple:
+    section_id = section.get("id") if isinstance(section, dict) else None
+    return session_id, position, section_id, json.dumps(section, ensure_ascii=False)
+
 
 class WritingSessionManager:
-    def __init__(self, db_path: str = ":memory:"):
-        self._conn = sqlite3.connect(db_path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row
+    def __init__(self, db_path: str = None, cache_size: int = None):
+        self.db_path = db_path or os.getenv("WRITING_SESSION_DB") or DEFAULT_DB_PATH
+        self.cache_size = cache_size if cache_size is not None else int(
+            os.getenv("WRITING_SESSION_CACHE_SIZE", "256"))
+        if self.db_path == ":memory:":
+            # 内存库无法跨连接共享：单连接 + 全局锁
+            self._shared = self._connect()
+            self._db_lock = threading.RLock()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._shared = None
+            self._db_lock = contextlib.nullcontext()
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, WritingSession]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # 会话锁无人持有时自动回收
+        self._session_locks = weakref.WeakValueDictionary()
+        self._session_locks_lock = threading.Lock()
         self._create_table()
 
+    # ========== 连接 ==========
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._db_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._db_lock:
+            return self._conn().execute(sql, params).fetchall()
+
     def _create_table(self):
-        self._conn.execute("""
-            CREATE TABLE IF NOT EXISTS writing_sessions (
-                session_id TEXT PRIMARY KEY,
-                topic TEXT NOT NULL,
-                user_id TEXT DEFAULT '',
-                article_type TEXT DEFAULT 'problem-solution',
-                target_audience TEXT DEFAULT 'beginner',
-                target_length TEXT DEFAULT 'medium',
-                outline TEXT,
-                sections TEXT,
-                search_results TEXT,
-                research_summary TEXT,
-                key_concepts TEXT,
-                code_blocks TEXT,
-                images TEXT,
-                status TEXT DEFAULT 'created',
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-        """)
-        self._conn.commit()
+        with self._db_lock:
+            self._conn().executescript(_SCHEMA)
         self._migrate()
 
     def _migrate(self):
-        cursor = self._conn.execute("PRAGMA table_info(writing_sessions)")
-        columns = {row[1] for row in cursor.fetchall()}
+        columns = {row[1] for row in self._query("PRAGMA table_info(writing_sessions)")}
         if "user_id" not in columns:
-            self._conn.execute("ALTER TABLE writing_sessions ADD COLUMN user_id TEXT DEFAULT ''")
-            self._conn.commit()
+            with self._transaction() as conn:
+                conn.execute("ALTER TABLE writing_sessions ADD COLUMN user_id TEXT DEFAULT ''")
+        # 旧版本整篇 sections JSON 拆分为逐章节行
+        legacy = self._query("SELECT session_id, sections FROM writing_sessions WHERE sections IS NOT NULL")
+        if legacy:
+            with self._transaction() as conn:
+                for row in legacy:
+                    conn.executemany(_SECTION_UPSERT, [
+                        _section_row(row["session_id"], i, s)
+                        for i, s in enumerate(json.loads(row["sections"]) or [])
+                    ])
+                conn.execute("UPDATE writing_sessions SET sections = NULL WHERE sections IS NOT NULL")
+
+    # ========== 锁与缓存 ==========
+
+    def _session_lock(self, session_id: str) -> threading.RLock:
+        with self._session_locks_lock:
+            lock = self._session_locks.get(session_id)
+            if lock is None:
+                lock = self._session_locks[session_id] = threading.RLock()
+            return lock
+
+    def _cache_get(self, session_id: str) -> Optional[WritingSession]:
+        with self._cache_lock:
+            session = self._cache.get(session_id)
+            if session is not None:
+                self._cache.move_to_end(session_id)
+            return session
 
-    def _row_to_session(self, row: sqlite3.Row) -> WritingSession:
+    def _cache_put(self, session: WritingSession):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[session.session_id] = session
+            self._cache.move_to_end(session.session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _current(self, session_id: str) -> Optional[WritingSession]:
+        """缓存中的会话对象（未命中则从库加载），调用方须持有会话锁且不得外泄"""
+        session = self._cache_get(session_id)
+        if session is None:
+            session = self._load(session_id)
+            if session is not None:
+                self._cache_put(session)
+        return session
+
+    # ========== 读写 ==========
+
+    def _row_to_session(self, row: sqlite3.Row, sections: List[dict]) -> WritingSession:
         d = dict(row)
         for f in _JSON_FIELDS:
             if d.get(f) is not None:
                 d[f] = json.loads(d[f])
-            elif f in ("sections", "search_results", "key_concepts", "code_blocks", "images"):
+            elif f != "outline":
                 d[f] = []
+        d["sections"] = sections
         return WritingSession(**d)
 
+    def _load_sections(self, session_ids: List[str]) -> dict:
+        result = {sid: [] for sid in session_ids}
+        if not session_ids:
+            return result
+        rows = self._query(
+            f"SELECT session_id, data FROM writing_session_sections "
+            f"WHERE session_id IN ({', '.join('?' * len(session_ids))}) ORDER BY session_id, position",
+            session_ids,
+        )
+        for row in rows:
+            result[row["session_id"]].append(json.loads(row["data"]))
+        return result
+
+    def _load(self, session_id: str) -> Optional[WritingSession]:
+        rows = self._query("SELECT * FROM writing_sessions WHERE session_id = ?", (session_id,))
+        if not rows:
+            return None
+        return self._row_to_session(rows[0], self._load_sections([session_id])[session_id])
+
     def create(self, topic: str, user_id: str = "", **kwargs) -> WritingSession:
-        now = datetime.now(timezone.utc).isoformat()
+        now = _now()
         session = WritingSession(
             session_id=f"ws_{uuid.uuid4().hex[:12]}",
             topic=topic,
             user_id=user_id,
             created_at=now,
             updated_at=now,
-            **{k: v for k, v in kwargs.items() if k in _ALL_FIELDS},
-        )
-        cols = asdict(session)
-        for f in _JSON_FIELDS:
-            if cols[f] is not None:
-                cols[f] = json.dumps(cols[f], ensure_ascii=False)
-        placeholders = ", ".join(["?"] * len(cols))
-        col_names = ", ".join(cols.keys())
-        self._conn.execute(
-            f"INSERT INTO writing_sessions ({col_names}) VALUES ({placeholders})",
-            list(cols.values()),
+            **copy.deepcopy({k: v for k, v in kwargs.items() if k in _ALL_FIELDS}),
         )
-        self._conn.commit()
-        return session
+        cols = {k: _encode(k, v) for k, v in asdict(session).items() if k != "sections"}
+        with self._transaction() as conn:
+            conn.execute(
+                f"INSERT INTO writing_sessions ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                list(cols.values()),
+            )
+            conn.executemany(_SECTION_UPSERT, [
+                _section_row(session.session_id, i, s) for i, s in enumerate(session.sections)
+            ])
+        self._cache_put(session)
+        return copy.deepcopy(session)
 
     def get(self, session_id: str, user_id: str = None) -> Optional[WritingSession]:
-        if user_id:
-            row = self._conn.execute(
-                "SELECT * FROM writing_sessions WHERE session_id = ? AND user_id = ?",
-                (session_id, user_id),
-            ).fetchone()
-        else:
-            row = self._conn.execute(
-                "SELECT * FROM writing_sessions WHERE session_id = ?", (session_id,)
-            ).fetchone()
-        if row is None:
-            return None
-        return self._row_to_session(row)
+        with self._session_lock(session_id):
+            session = self._current(session_id)
+            if session is None or (user_id and session.user_id != user_id):
+                return None
+            return copy.deepcopy(session)
 
     def update(self, session_id: str, **kwargs) -> Optional[WritingSession]:
-        updates = {k: v for k, v in kwargs.items() if k in _ALL_FIELDS}
-        if not updates:
-            return self.get(session_id)
-        updates["updated_at"] = datetime.now(timezone.utc).isoformat()
-        set_parts = []
-        values = []
-        for k, v in updates.items():
-            set_parts.append(f"{k} = ?")
-            values.append(json.dumps(v, ensure_ascii=False) if k in _JSON_FIELDS and v is not None else v)
-        values.append(session_id)
-        self._conn.execute(
-            f"UPDATE writing_sessions SET {', '.join(set_parts)} WHERE session_id = ?",
-            values,
-        )
-        self._conn.commit()
-        return self.get(session_id)
+        """更新字段；传入 sections 时只写入与当前内容不同的章节行"""
+        updates = copy.deepcopy({k: v for k, v in kwargs.items() if k in _ALL_FIELDS})
+        with self._session_lock(session_id):
+            session = self._current(session_id)
+            if session is None:
+                return None
+            if not updates:
+                return copy.deepcopy(session)
+            updates["updated_at"] = _now()
+            if "sections" in updates:
+                updates["sections"] = updates["sections"] or []
+            columns = [k for k in updates if k != "sections"]
+            with self._transaction() as conn:
+                conn.execute(
+                    f"UPDATE writing_sessions SET {', '.join(f'{k} = ?' for k in columns)} WHERE session_id = ?",
+                    [*(_encode(k, updates[k]) for k in columns), session_id],
+                )
+                if "sections" in updates:
+                    self._write_sections(conn, session_id, session.sections, updates["sections"])
+            for k, v in updates.items():
+                setattr(session, k, v)
+            return copy.deepcopy(session)
+
+    def _write_sections(self, conn: sqlite3.Connection, session_id: str, old: List[dict], new: List[dict]):
+        conn.executemany(_SECTION_UPSERT, [
+            _section_row(session_id, i, s)
+            for i, s in enumerate(new) if i >= len(old) or old[i] != s
+        ])
+        if len(new) < len(old):
+            conn.execute(
+                "DELETE FROM writing_session_sections WHERE session_id = ? AND position >= ?",
+                (session_id, len(new)),
+            )
+
+    def update_section(self, session_id: str, section_id: str, section: dict, status: str = None) -> bool:
+        """替换 id 为 section_id 的章节（不存在则追加），只写该章节一行；会话不存在返回 False"""
+        section = copy.deepcopy(section)
+        with self._session_lock(session_id):
+            session = self._current(session_id)
+            if session is None:
+                return False
+            position = next(
+                (i for i, s in enumerate(session.sections) if s.get("id") == section_id),
+                len(session.sections),
+            )
+            now = _now()
+            with self._transaction() as conn:
+                if status is None:
+                    conn.execute("UPDATE writing_sessions SET updated_at = ? WHERE session_id = ?",
+                                 (now, session_id))
+                else:
+                    conn.execute("UPDATE writing_sessions SET status = ?, updated_at = ? WHERE session_id = ?",
+                                 (status, now, session_id))
+                conn.execute(_SECTION_UPSERT, _section_row(session_id, position, section))
+            sections = list(session.sections)
+            sections[position:position + 1] = [section]
+            session.sections = sections
+            session.updated_at = now
+            if status is not None:
+                session.status = status
+            return True
 
     def list(self, limit: int = 20, offset: int = 0, user_id: str = None) -> List[WritingSession]:
         if user_id:
-            rows = self._conn.execute(
+            rows = self._query(
                 "SELECT * FROM writing_sessions WHERE user_id = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
                 (user_id, limit, offset),
-            ).fetchall()
+            )
         else:
-            rows = self._conn.execute(
+            rows = self._query(
                 "SELECT * FROM writing_sessions ORDER BY created_at DESC LIMIT ? OFFSET ?",
                 (limit, offset),
-            ).fetchall()
-        return [self._row_to_session(r) for r in rows]
+            )
+        sections = self._load_sections([r["session_id"] for r in rows])
+        return [self._row_to_session(r, sections[r["session_id"]]) for r in rows]
 
     def delete(self, session_id: str) -> bool:
-        cursor = self._conn.execute(
-            "DELETE FROM writing_sessions WHERE session_id = ?", (session_id,)
-        )
-        self._conn.commit()
+        with self._session_lock(session_id):
+            with self._transaction() as conn:
+                cursor = conn.execute("DELETE FROM writing_sessions WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM writing_session_sections WHERE session_id = ?", (session_id,))
+            with self._cache_lock:
+                self._cache.pop(session_id, None)
         return cursor.rowcount > 0
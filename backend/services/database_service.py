@@ -2,12 +2,13 @@
 数据库服务 - 管理文档元数据和知识块
 使用 SQLite 存储
 """
+import json
 import sqlite3
 import uuid
 import os
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 from datetime import datetime
 import logging
 
@@ -94,6 +95,15 @@ class DatabaseService:
                     FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
                 );
                 
+                -- 分块检索索引表：BM25（+ 可选 embedding）索引，随分块一起重建
+                CREATE TABLE IF NOT EXISTS knowledge_chunk_indexes (
+                    document_id TEXT PRIMARY KEY,
+                    index_data TEXT NOT NULL,
+                    chunks_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+                );
+                
                 -- 文档图片表：存储 PDF 中提取的图片及摘要（二期新增）
                 CREATE TABLE IF NOT EXISTS document_images (
                     id TEXT PRIMARY KEY,
@@ -442,35 +452,142 @@ class DatabaseService:
     
     def save_chunks(self, doc_id: str, chunks: List[Dict[str, Any]]):
         """
-        保存文档的知识分块
+        保存文档的知识分块，并同步重建该文档的检索索引
         
         Args:
             doc_id: 文档 ID
             chunks: 分块列表，每个分块包含 {chunk_type, title, content, start_pos, end_pos}
         """
+        count = self.save_chunks_stream(doc_id, chunks)
+        logger.info(f"保存知识分块: {doc_id}, 共 {count} 块")
+    
+    def save_chunks_stream(
+        self,
+        doc_id: str,
+        chunks: Iterable[Dict[str, Any]],
+        batch_size: int = 200
+    ) -> int:
+        """
+        流式保存知识分块：边消费分块迭代器边按批写入，内存中只保留一批分块
+        
+        检索索引与分块同步增量构建，全部写入后保存。删除旧分块、全部插入与索引保存
+        在同一事务中完成：迭代器或写入中途失败时整体回滚，旧分块保持不变。
+        
+        Args:
+            doc_id: 文档 ID
+            chunks: 分块迭代器（可为生成器）
+            batch_size: 每批写入条数
+        
+        Returns:
+            写入的分块总数
+        """
+        from services.knowledge_index import ChunkIndex, embeddings_enabled
+        
+        index = ChunkIndex()
+        with_embeddings = embeddings_enabled()
+        count = 0
+        batch = []
+        
         with self.get_connection() as conn:
-            # 先删除旧分块
+            # 先删除旧分块（与后续插入同一事务，失败时回滚）
             conn.execute('DELETE FROM knowledge_chunks WHERE document_id = ?', (doc_id,))
             
-            # 插入新分块
-            for idx, chunk in enumerate(chunks):
-                chunk_id = f"chunk_{doc_id}_{idx}"
-                conn.execute('''
-                    INSERT INTO knowledge_chunks 
-                    (id, document_id, chunk_index, chunk_type, title, content, start_pos, end_pos)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    chunk_id,
-                    doc_id,
-                    idx,
-                    chunk.get('chunk_type', 'text'),
-                    chunk.get('title', ''),
-                    chunk.get('content', ''),
-                    chunk.get('start_pos', 0),
-                    chunk.get('end_pos', 0)
-                ))
+            for chunk in chunks:
+                row = {
+                    'id': f"chunk_{doc_id}_{count}",
+                    'chunk_index': count,
+                    'chunk_type': chunk.get('chunk_type', 'text'),
+                    'title': chunk.get('title', ''),
+                    'content': chunk.get('content', ''),
+                    'start_pos': chunk.get('start_pos', 0),
+                    'end_pos': chunk.get('end_pos', 0),
+                }
+                batch.append(row)
+                index.add(row)
+                count += 1
+                if len(batch) >= batch_size:
+                    self._insert_chunk_batch(conn, doc_id, batch, index if with_embeddings else None)
+                    batch = []
+            
+            if batch:
+                self._insert_chunk_batch(conn, doc_id, batch, index if with_embeddings else None)
+            
+            self._save_chunk_index(conn, doc_id, index.finalize(), count)
         
-        logger.info(f"保存知识分块: {doc_id}, 共 {len(chunks)} 块")
+        return count
+    
+    @staticmethod
+    def _insert_chunk_batch(conn, doc_id: str, rows: List[Dict[str, Any]], index=None):
+        """批量插入分块；传入 index 时同时计算该批 embedding"""
+        conn.executemany('''
+            INSERT INTO knowledge_chunks 
+            (id, document_id, chunk_index, chunk_type, title, content, start_pos, end_pos)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (r['id'], doc_id, r['chunk_index'], r['chunk_type'], r['title'],
+             r['content'], r['start_pos'], r['end_pos'])
+            for r in rows
+        ])
+        if index is not None:
+            index.add_embeddings(rows)
+    
+    def _save_chunk_index(self, conn, doc_id: str, index, chunks_count: int):
+        """保存文档分块的检索索引（失败不影响分块保存）"""
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO knowledge_chunk_indexes
+                (document_id, index_data, chunks_count, created_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (doc_id, json.dumps(index.to_dict(), ensure_ascii=False), chunks_count))
+        except Exception as e:
+            logger.warning(f"保存分块索引失败: {doc_id}, {e}")
+    
+    def get_chunk_indexes(self, doc_ids: List[str]) -> Dict[str, Any]:
+        """
+        批量获取文档分块检索索引
+        
+        缺失或版本过期的索引会根据已保存的分块即时重建并回写。
+        
+        Args:
+            doc_ids: 文档 ID 列表
+        
+        Returns:
+            {document_id: ChunkIndex}
+        """
+        if not doc_ids:
+            return {}
+        
+        from services.knowledge_index import ChunkIndex
+        
+        placeholders = ','.join(['?' for _ in doc_ids])
+        indexes = {}
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f'SELECT document_id, index_data FROM knowledge_chunk_indexes WHERE document_id IN ({placeholders})',
+                doc_ids
+            )
+            for row in cursor.fetchall():
+                try:
+                    index = ChunkIndex.from_dict(json.loads(row['index_data']))
+                except (ValueError, TypeError):
+                    index = None
+                if index is not None:
+                    indexes[row['document_id']] = index
+            
+            for doc_id in doc_ids:
+                if doc_id in indexes:
+                    continue
+                rows = [dict(r) for r in conn.execute(
+                    'SELECT * FROM knowledge_chunks WHERE document_id = ? ORDER BY chunk_index',
+                    (doc_id,)
+                ).fetchall()]
+                if not rows:
+                    continue
+                logger.info(f"重建分块索引: {doc_id}, 共 {len(rows)} 块")
+                indexes[doc_id] = ChunkIndex.build(rows)
+                self._save_chunk_index(conn, doc_id, indexes[doc_id], len(rows))
+        
+        return indexes
     
     def get_chunks_by_document(self, doc_id: str) -> List[Dict[str, Any]]:
         """
@@ -863,6 +980,27 @@ class DatabaseService:
             logger.info(f"更新博客摘要: {history_id}")
         return updated
     
+    def update_history_summaries(self, summaries: Dict[str, str]) -> int:
+        """
+        批量更新博客摘要（单个事务）
+        
+        Args:
+            summaries: {history_id: summary}
+        
+        Returns:
+            更新的记录数
+        """
+        if not summaries:
+            return 0
+        with self.get_connection() as conn:
+            cursor = conn.executemany(
+                'UPDATE history_records SET summary = ? WHERE id = ?',
+                [(summary, history_id) for history_id, summary in summaries.items()]
+            )
+            updated = cursor.rowcount
+        logger.info(f"批量更新博客摘要: {updated} 条")
+        return updated
+    
     def update_history_book_id(self, history_id: str, book_id: str) -> bool:
         """
         更新博客所属书籍
@@ -1112,6 +1250,28 @@ class DatabaseService:
             )
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_chapters_by_books(self, book_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量获取多本书籍的章节（单次查询）
+        
+        Returns:
+            {book_id: [章节, ...]}，无章节的书籍映射为空列表
+        """
+        result = {book_id: [] for book_id in book_ids}
+        if not book_ids:
+            return result
+        
+        placeholders = ','.join(['?' for _ in book_ids])
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f'SELECT * FROM book_chapters WHERE book_id IN ({placeholders}) '
+                f'ORDER BY book_id, chapter_index, section_index',
+                book_ids
+            )
+            for row in cursor.fetchall():
+                result[row['book_id']].append(dict(row))
+        return result
+    
     def get_chapter_with_content(self, book_id: str, chapter_id: str) -> Optional[Dict[str, Any]]:
         """获取章节及其关联的博客内容"""
         with self.get_connection() as conn:
@@ -1137,6 +1297,30 @@ class DatabaseService:
             ''', (book_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    def get_blogs_by_books(self, book_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        批量获取多本书籍关联的博客（单次查询）
+        
+        Returns:
+            {book_id: [博客, ...]}，无博客的书籍映射为空列表
+        """
+        result = {book_id: [] for book_id in book_ids}
+        if not book_ids:
+            return result
+        
+        placeholders = ','.join(['?' for _ in book_ids])
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                SELECT hr.*, bc.book_id AS chapter_book_id FROM history_records hr
+                INNER JOIN book_chapters bc ON hr.id = bc.blog_id
+                WHERE bc.book_id IN ({placeholders})
+                ORDER BY bc.book_id, bc.chapter_index, bc.section_index
+            ''', book_ids)
+            for row in cursor.fetchall():
+                blog = dict(row)
+                result[blog.pop('chapter_book_id')].append(blog)
+        return result
+    
     def get_unassigned_blogs(self) -> List[Dict[str, Any]]:
         """获取未分配到任何书籍的博客"""
         with self.get_connection() as conn:
@@ -0,0 +1,152 @@
+"""
+飞书开放平台 HTTP 客户端
+
+所有飞书 API 调用共用一个 requests.Session（连接池复用 TLS 连接），
+tenant_access_token 进程内缓存，失效错误码时自动作废重取。
+
+环境变量：
+- FEISHU_APP_ID / FEISHU_APP_SECRET: 企业自建应用凭证
+- FEISHU_HTTP_POOL_SIZE: 连接池大小（默认 8）
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+FEISHU_API_BASE = 'https://open.feishu.cn/open-apis'
+
+# 飞书限频错误码（请求频率超过 API 配额）
+RATE_LIMITED_CODE = 99991400
+# token 无效 / 过期
+TOKEN_INVALID_CODES = {99991661, 99991663, 99991668}
+
+
+class FeishuClient:
+    """飞书 API 客户端（线程安全）"""
+
+    def __init__(
+        self,
+        app_id: Optional[str] = None,
+        app_secret: Optional[str] = None,
+        base_url: str = FEISHU_API_BASE,
+        pool_size: Optional[int] = None,
+        timeout: float = 10,
+    ):
+        self.app_id = app_id if app_id is not None else os.getenv('FEISHU_APP_ID', '')
+        self.app_secret = app_secret if app_secret is not None else os.getenv('FEISHU_APP_SECRET', '')
+        self.base_url = base_url
+        self.timeout = timeout
+        pool_size = pool_size or int(os.getenv('FEISHU_HTTP_POOL_SIZE', '8'))
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self._token = ''
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+
+    # ========== Token ==========
+
+    def tenant_access_token(self) -> str:
+        """获取 tenant_access_token（带缓存，提前 60 秒刷新）"""
+        with self._token_lock:
+            now = time.time()
+            if self._token and self._token_expires_at > now + 60:
+                return self._token
+            try:
+                resp = self.session.post(
+                    f'{self.base_url}/auth/v3/tenant_access_token/internal',
+                    json={'app_id': self.app_id, 'app_secret': self.app_secret},
+                    timeout=self.timeout,
+                )
+                data = resp.json()
+            except (requests.RequestException, ValueError) as e:
+                logger.error('获取飞书 token 失败: %s', e)
+                return ''
+            if data.get('code') != 0:
+                logger.error('获取飞书 token 失败: %s', data)
+                return ''
+            self._token = data['tenant_access_token']
+            self._token_expires_at = now + data.get('expire', 7200)
+            return self._token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = ''
+            self._token_expires_at = 0.0
+
+    # ========== 消息 ==========
+
+    def send_message(
+        self, receive_id: str, msg_type: str, content: Any, receive_id_type: str = 'chat_id',
+    ) -> Dict[str, Any]:
+        """发送消息；content 为 dict 时序列化为 JSON 字符串"""
+        return self._post('/im/v1/messages', {
+            'receive_id': receive_id,
+            'msg_type': msg_type,
+            'content': content if isinstance(content, str) else json.dumps(content),
+        }, params={'receive_id_type': receive_id_type})
+
+    def reply_message(self, message_id: str, msg_type: str, content: Any) -> Dict[str, Any]:
+        """引用回复消息"""
+        return self._post(f'/im/v1/messages/{message_id}/reply', {
+            'msg_type': msg_type,
+            'content': content if isinstance(content, str) else json.dumps(content),
+        })
+
+    def _post(self, path: str, body: dict, params: Optional[dict] = None) -> Dict[str, Any]:
+        """POST 并返回飞书响应体；网络 / 解析异常返回 code=-1"""
+        token = self.tenant_access_token()
+        if not token:
+            return {'code': -1, 'msg': 'token 为空'}
+        try:
+            resp = self.session.post(
+                f'{self.base_url}{path}',
+                params=params,
+                headers={
+                    'Authorization': f'Bearer {token}',
+                    'Content-Type': 'application/json; charset=utf-8',
+                },
+                json=body,
+                timeout=self.timeout,
+            )
+            if resp.status_code == 429:
+                return {'code': RATE_LIMITED_CODE, 'msg': 'HTTP 429',
+                        'retry_after': _retry_after(resp)}
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            return {'code': -1, 'msg': str(e)}
+        if data.get('code') in TOKEN_INVALID_CODES:
+            self.invalidate_token()
+        elif data.get('code') == RATE_LIMITED_CODE:
+            data['retry_after'] = _retry_after(resp)
+        return data
+
+
+def _retry_after(resp) -> Optional[float]:
+    """飞书限频响应头 x-ogw-ratelimit-reset（秒）"""
+    value = resp.headers.get('x-ogw-ratelimit-reset') or resp.headers.get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+_feishu_client: Optional[FeishuClient] = None
+_feishu_client_lock = threading.Lock()
+
+
+def get_feishu_client() -> FeishuClient:
+    """获取全局飞书客户端"""
+    global _feishu_client
+    if _feishu_client is None:
+        with _feishu_client_lock:
+            if _feishu_client is None:
+                _feishu_client = FeishuClient()
+    return _feishu_client
@@ -0,0 +1,372 @@
+"""
+飞书任务进度通知 - 事件驱动，单线程调度
+
+原实现为每个任务启动一个线程，每 5 秒轮询 TaskManager.get_task 最长 30 分钟；
+聊天触发的任务一多就是上百个空转线程。这里改为：
+
+- 订阅 TaskManager 事件监听器，任务有事件时才读取其状态（阶段 / 完成 / 失败 / 取消）
+- 一个调度线程处理全部任务；HTTP 发送交给小线程池，同一会话的消息保持顺序
+- 同一会话的进度卡片至少间隔 FEISHU_PROGRESS_MIN_INTERVAL 秒，期间的多次阶段变化
+  合并为一张（只发送最新阶段）；完成 / 失败 / 取消通知不合并、不延迟
+- 令牌桶限流：应用级 FEISHU_RATE_LIMIT_PER_SECOND、单会话 FEISHU_CHAT_RATE_LIMIT_PER_SECOND；
+  飞书返回限频错误码时按 x-ogw-ratelimit-reset 延后重发
+- TaskManager 使用共享存储（TASK_STATE_BACKEND=sqlite）时，其他进程的事件不会触发本进程
+  的监听器，改为每 STORE_POLL_INTERVAL 秒检查一次被关注的任务
+
+环境变量：
+- FEISHU_PROGRESS_MIN_INTERVAL: 同一会话进度卡片最小间隔秒数（默认 5）
+- FEISHU_PROGRESS_TIMEOUT: 任务最长关注时间秒数，超时发送提醒（默认 1800）
+- FEISHU_RATE_LIMIT_PER_SECOND: 应用级发送限速（默认 50）
+- FEISHU_CHAT_RATE_LIMIT_PER_SECOND: 单会话发送限速（默认 5）
+- FEISHU_NOTIFY_WORKERS: HTTP 发送线程数（默认 4）
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from services.feishu_client import RATE_LIMITED_CODE, get_feishu_client
+
+logger = logging.getLogger(__name__)
+
+STORE_POLL_INTERVAL = 1.0
+RATE_LIMIT_BACKOFF = 1.0  # 限频响应未带重置时间时的退避秒数
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+# render(kind, task) -> 消息体 {'msg_type': ..., 'content': ...}，返回 None 表示不发送
+# kind: progress / completed / failed / cancelled / timeout（timeout 时 task 为 None）
+RenderFn = Callable[[str, Any], Optional[dict]]
+
+
+class TokenBucket:
+    """令牌桶（调用方负责加锁）"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """距下一个令牌可用的秒数（0 表示可立即取用）"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+@dataclass
+class _Watch:
+    task_id: str
+    chat_id: str
+    render: RenderFn
+    on_finish: Optional[Callable[[str], None]]
+    deadline: float
+    last_stage: str = ''
+
+
+@dataclass
+class _Chat:
+    bucket: TokenBucket
+    outbox: deque = field(default_factory=deque)  # [(task_id, kind, message)]
+    next_progress_at: float = 0.0
+    retry_at: float = 0.0
+    sending: bool = False
+
+
+class FeishuNotifier:
+    """飞书任务进度通知服务（线程安全）"""
+
+    def __init__(
+        self,
+        send: Optional[Callable[[str, dict], dict]] = None,
+        task_manager=None,
+        min_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        rate: Optional[float] = None,
+        chat_rate: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
+        self._send = send or _send_via_client
+        self._task_manager = task_manager
+        self.min_interval = min_interval if min_interval is not None else float(
+            os.getenv('FEISHU_PROGRESS_MIN_INTERVAL', '5'))
+        self.timeout = timeout or float(os.getenv('FEISHU_PROGRESS_TIMEOUT', '1800'))
+        self.chat_rate = chat_rate or float(os.getenv('FEISHU_CHAT_RATE_LIMIT_PER_SECOND', '5'))
+        self._bucket = TokenBucket(rate or float(os.getenv('FEISHU_RATE_LIMIT_PER_SECOND', '50')))
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or int(os.getenv('FEISHU_NOTIFY_WORKERS', '4')),
+            thread_name_prefix='feishu-send',
+        )
+
+        self._cond = threading.Condition()
+        self._watches: Dict[str, _Watch] = {}
+        self._chats: Dict[str, _Chat] = {}
+        self._dirty: set = set()
+        self._pending: set = set()  # 阶段已变化、进度卡片尚未入队的任务
+        self._next_expiry = float('inf')
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self._processing = False
+        self.stats = {'sent': 0, 'failed': 0, 'coalesced': 0, 'rate_limited': 0}
+
+    @property
+    def task_manager(self):
+        if self._task_manager is None:
+            from services.task_service import get_task_manager
+            self._task_manager = get_task_manager()
+        return self._task_manager
+
+    # ========== 对外接口 ==========
+
+    def watch(
+        self,
+        task_id: str,
+        chat_id: str,
+        render: RenderFn,
+        on_finish: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        关注任务进度，阶段变化 / 结束时向 chat_id 推送 render 生成的消息。
+        on_finish(kind) 在任务结束（完成 / 失败 / 取消 / 超时）时于调度线程中调用。
+        """
+        self._ensure_started()
+        with self._cond:
+            watch = self._watches[task_id] = _Watch(
+                task_id=task_id, chat_id=chat_id, render=render, on_finish=on_finish,
+                deadline=time.monotonic() + self.timeout,
+            )
+            self._next_expiry = min(self._next_expiry, watch.deadline)
+            self._dirty.add(task_id)
+            self._cond.notify_all()
+
+    def stop(self, wait: bool = True):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None and wait:
+            self._thread.join(timeout=5)
+        self.task_manager.remove_event_listener(self._on_task_event)
+        self._pool.shutdown(wait=wait)
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """等待所有待发消息发送完毕（测试 / 优雅退出用）"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._dirty or self._processing
+                   or any(c.outbox or c.sending for c in self._chats.values())):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    # ========== 事件监听 ==========
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self.task_manager.add_event_listener(self._on_task_event)
+                self._thread = threading.Thread(target=self._run, name='feishu-notifier', daemon=True)
+                self._thread.start()
+
+    def _on_task_event(self, task_id: str):
+        """TaskManager 发送线程回调：只标记被关注的任务，须快速返回"""
+        if task_id not in self._watches or task_id in self._dirty:
+            return
+        with self._cond:
+            self._dirty.add(task_id)
+            self._cond.notify_all()
+
+    # ========== 调度线程 ==========
+
+    def _run(self):
+        next_poll = time.monotonic() + STORE_POLL_INTERVAL
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                dirty, self._dirty = self._dirty, set()
+                self._processing = True
+                now = time.monotonic()
+                if self.task_manager.store is not None and now >= next_poll:
+                    dirty |= set(self._watches)
+                    next_poll = now + STORE_POLL_INTERVAL
+
+            for task_id in dirty:
+                try:
+                    self._refresh(task_id)
+                except Exception as e:
+                    logger.warning(f"飞书进度通知处理失败 [{task_id}]: {e}")
+
+            with self._cond:
+                now = time.monotonic()
+                if now >= self._next_expiry:
+                    self._expire_watches(now)
+                wake_at = min(self._next_expiry, self._enqueue_progress(now), self._pump(now))
+                if self.task_manager.store is not None and self._watches:
+                    wake_at = min(wake_at, next_poll)
+                # 唤醒 wait_idle
+                self._processing = False
+                self._cond.notify_all()
+                if not self._dirty and not self._stopped:
+                    timeout = None if wake_at == float('inf') else max(wake_at - now, 0.01)
+                    self._cond.wait(timeout)
+
+    def _refresh(self, task_id: str):
+        """读取任务最新状态：结束则立即入队结束通知，阶段变化则标记待推送"""
+        watch = self._watches.get(task_id)
+        if watch is None:
+            return
+        task = self.task_manager.get_task(task_id)
+        if task is None:
+            logger.info(f"飞书进度通知: 任务已不存在，停止关注 [{task_id}]")
+            with self._cond:
+                self._watches.pop(task_id, None)
+                self._pending.discard(task_id)
+            return
+
+        if task.status in TERMINAL_STATUSES:
+            self._finish(watch, task.status, task)
+        elif task.current_stage and task.current_stage != watch.last_stage:
+            with self._cond:
+                if task_id in self._pending:
+                    self.stats['coalesced'] += 1
+                watch.last_stage = task.current_stage
+                self._pending.add(task_id)
+
+    @staticmethod
+    def _render(watch: _Watch, kind: str, task) -> Optional[dict]:
+        try:
+            return watch.render(kind, task)
+        except Exception as e:
+            logger.warning(f"飞书进度通知渲染失败 [{watch.task_id}/{kind}]: {e}")
+            return None
+
+    def _finish(self, watch: _Watch, kind: str, task):
+        message = self._render(watch, kind, task)
+        with self._cond:
+            self._watches.pop(watch.task_id, None)
+            self._pending.discard(watch.task_id)
+            chat = self._chat(watch.chat_id)
+            # 尚未发出的进度卡片已无意义
+            before = len(chat.outbox)
+            chat.outbox = deque(m for m in chat.outbox if m[0] != watch.task_id or m[1] != 'progress')
+            self.stats['coalesced'] += before - len(chat.outbox)
+            if message:
+                chat.outbox.append((watch.task_id, kind, message))
+        if watch.on_finish:
+            try:
+                watch.on_finish(kind)
+            except Exception as e:
+                logger.warning(f"飞书进度通知回调失败 [{watch.task_id}]: {e}")
+
+    def _expire_watches(self, now: float):
+        """（持锁）超时的任务发送提醒，并更新最近的超时时间"""
+        for watch in [w for w in self._watches.values() if w.deadline <= now]:
+            self._finish(watch, 'timeout', None)
+        self._next_expiry = min((w.deadline for w in self._watches.values()), default=float('inf'))
+
+    def _enqueue_progress(self, now: float) -> float:
+        """（持锁）会话进度间隔已到的任务渲染最新进度；返回下一次可入队时间"""
+        wake_at = float('inf')
+        for task_id in list(self._pending):
+            watch = self._watches[task_id]
+            chat = self._chat(watch.chat_id)
+            if chat.next_progress_at > now:
+                wake_at = min(wake_at, chat.next_progress_at)
+                continue
+            self._pending.discard(task_id)
+            task = self.task_manager.get_task(task_id)
+            message = self._render(watch, 'progress', task) if task else None
+            if message is None:
+                continue
+            # 发送队列中同一任务尚未发出的进度卡片直接替换为最新的
+            for i, (task_id, kind, _) in enumerate(chat.outbox):
+                if task_id == watch.task_id and kind == 'progress':
+                    chat.outbox[i] = (task_id, kind, message)
+                    self.stats['coalesced'] += 1
+                    break
+            else:
+                chat.outbox.append((watch.task_id, 'progress', message))
+            chat.next_progress_at = now + self.min_interval
+        return wake_at
+
+    def _pump(self, now: float) -> float:
+        """（持锁）按限流与会话内顺序提交发送；返回下一次可发送时间"""
+        wake_at = float('inf')
+        for chat_id, chat in list(self._chats.items()):
+            if chat.sending:
+                continue
+            if not chat.outbox:
+                # 空闲、已过进度间隔且令牌已补满的会话不再保留（删除不影响限流）
+                chat.bucket.wait_time(now)
+                if chat.next_progress_at <= now and chat.bucket.tokens >= chat.bucket.capacity:
+                    del self._chats[chat_id]
+                continue
+            if chat.retry_at > now:
+                wake_at = min(wake_at, chat.retry_at)
+                continue
+            wait = max(chat.bucket.wait_time(now), self._bucket.wait_time(now))
+            if wait > 0:
+                wake_at = min(wake_at, now + wait)
+                continue
+            chat.bucket.take()
+            self._bucket.take()
+            chat.sending = True
+            self._pool.submit(self._deliver, chat_id, chat, chat.outbox.popleft())
+        return wake_at
+
+    def _deliver(self, chat_id: str, chat: _Chat, item: tuple):
+        """（发送线程）发送一条消息；限频时放回队首稍后重发"""
+        task_id, kind, message = item
+        try:
+            result = self._send(chat_id, message) or {}
+        except Exception as e:
+            result = {'code': -1, 'msg': str(e)}
+
+        with self._cond:
+            chat.sending = False
+            code = result.get('code')
+            if code == RATE_LIMITED_CODE:
+                self.stats['rate_limited'] += 1
+                chat.outbox.appendleft(item)
+                chat.retry_at = time.monotonic() + (result.get('retry_after') or RATE_LIMIT_BACKOFF)
+            elif code == 0:
+                self.stats['sent'] += 1
+            else:
+                self.stats['failed'] += 1
+                logger.error(f"飞书进度通知发送失败 [{task_id}/{kind}]: {result}")
+            self._cond.notify_all()
+
+    def _chat(self, chat_id: str) -> _Chat:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat(bucket=TokenBucket(self.chat_rate))
+        return chat
+
+
+def _send_via_client(chat_id: str, message: dict) -> dict:
+    return get_feishu_client().send_message(chat_id, message['msg_type'], message['content'])
+
+
+_feishu_notifier: Optional[FeishuNotifier] = None
+_feishu_notifier_lock = threading.Lock()
+
+
+def get_feishu_notifier() -> FeishuNotifier:
+    """获取全局飞书进度通知服务"""
+    global _feishu_notifier
+    if _feishu_notifier is None:
+        with _feishu_notifier_lock:
+            if _feishu_notifier is None:
+                _feishu_notifier = FeishuNotifier()
+    return _feishu_notifier
@@ -4,6 +4,9 @@
 二期新增：
 - 知识分块功能
 - 图片摘要生成（多模态模型）
+
+三期新增：
+- 流式分块（逐行读取解析结果文件，按 token 控制分块大小）
 """
 import os
 import re
@@ -14,13 +17,18 @@ import logging
 import zipfile
 import io
 from pathlib import Path
-from typing import Optional, List, Tuple, Callable, Dict, Any
+from typing import Optional, List, Tuple, Callable, Dict, Any, Iterable, Iterator
 
 import requests
 from jinja2 import Environment, FileSystemLoader
 
 logger = logging.getLogger(__name__)
 
+# 解析后（已替换图片路径）的 Markdown 文件名，位于 MinerU 结果目录下
+PARSED_MARKDOWN_NAME = 'vibe_blog_parsed.md'
+
+_HEADER_PATTERN = re.compile(r'^(#{2,3})\s+(.+)$')
+
 # 初始化 Jinja2 模板环境
 _templates_dir = Path(__file__).parent.parent / 'infrastructure' / 'prompts' / 'shared'
 _jinja_env = Environment(loader=FileSystemLoader(str(_templates_dir)))
@@ -144,12 +152,14 @@ class FileParserService:
         """解析纯文本文件"""
         try:
             # 尝试 UTF-8 编码
+            encoding = 'utf-8'
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
+                with open(file_path, 'r', encoding=encoding) as f:
                     content = f.read()
             except UnicodeDecodeError:
                 # 尝试 GBK 编码
-                with open(file_path, 'r', encoding='gbk') as f:
+                encoding = 'gbk'
+                with open(file_path, 'r', encoding=encoding) as f:
                     content = f.read()
             
             logger.info(f"文本文件读取成功: {len(content)} 字符")
@@ -158,6 +168,8 @@ class FileParserService:
                 'success': True,
                 'batch_id': None,
                 'markdown': content,
+                'markdown_path': file_path,
+                'markdown_encoding': encoding,
                 'images': [],
                 'mineru_folder': None,
                 'error': None
@@ -227,10 +239,13 @@ class FileParserService:
                 'error': error
             }
         
+        parsed_path = os.path.join(mineru_folder, PARSED_MARKDOWN_NAME)
         return {
             'success': True,
             'batch_id': batch_id,
             'markdown': markdown,
+            'markdown_path': parsed_path if os.path.exists(parsed_path) else None,
+            'markdown_encoding': 'utf-8',
             'images': images,
             'mineru_folder': mineru_folder,
             'error': None
@@ -404,6 +419,10 @@ class FileParserService:
             # 替换 Markdown 中的图片路径
             markdown_content = self._replace_image_paths(markdown_content, extract_id)
             
+            # 落盘替换后的 Markdown，供流式分块逐行读取
+            with open(storage_dir / PARSED_MARKDOWN_NAME, 'w', encoding='utf-8') as f:
+                f.write(markdown_content)
+            
             return markdown_content, images, str(storage_dir), None
             
         except requests.RequestException as e:
@@ -629,6 +648,142 @@ class FileParserService:
         
         return chunks
     
+    # ========== 三期新增：流式分块 ==========
+    
+    def iter_markdown_chunks_from_file(
+        self,
+        markdown_path: str,
+        chunk_tokens: int = 1000,
+        chunk_overlap_tokens: int = 100,
+        encoding: str = 'utf-8'
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        从解析结果文件流式分块（逐行读取，不加载整个文件）
+        
+        Args:
+            markdown_path: Markdown 文件路径
+            chunk_tokens: 目标分块大小（token）
+            chunk_overlap_tokens: 分块重叠大小（token，按段落粒度）
+            encoding: 文件编码
+        
+        Yields:
+            分块 {chunk_type, title, content, start_pos, end_pos, token_count}
+        """
+        with open(markdown_path, 'r', encoding=encoding, newline='') as f:
+            yield from self.iter_markdown_chunks(f, chunk_tokens, chunk_overlap_tokens)
+    
+    def iter_markdown_chunks(
+        self,
+        lines: Iterable[str],
+        chunk_tokens: int = 1000,
+        chunk_overlap_tokens: int = 100
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式 Markdown 分块（生成器）
+        
+        策略与 chunk_markdown 一致：按 ## / ### 标题切分章节，章节过长时按段落切分，
+        但分块大小按 context_guard.estimate_tokens 计算，且任意时刻只保留当前分块的段落。
+        代码块内的标题与空行不参与切分。
+        
+        Args:
+            lines: 行迭代器（保留行尾换行符，如文件对象或 io.StringIO）
+            chunk_tokens: 目标分块大小（token）
+            chunk_overlap_tokens: 分块重叠大小（token，按段落粒度）
+        
+        Yields:
+            分块 {chunk_type, title, content, start_pos, end_pos, token_count}，
+            start_pos/end_pos 为字符偏移
+        """
+        from utils.context_guard import estimate_tokens
+        
+        state = {'title': '', 'part': 0}
+        paragraphs: List[Tuple[str, int, int]] = []  # (text, start_pos, tokens)
+        para_lines: List[str] = []
+        para_start = 0
+        pos = 0
+        in_code = False
+        
+        def make_chunk(parts, final):
+            content = '\n\n'.join(p[0] for p in parts).strip()
+            start = parts[0][1]
+            last_text, last_start, _ = parts[-1]
+            title = state['title']
+            if final and state['part'] == 0:
+                chunk_type = 'section'
+            else:
+                chunk_type = 'paragraph'
+                state['part'] += 1
+                label = f"Part {state['part']}"
+                title = f"{title} ({label})" if title else label
+            return {
+                'chunk_type': chunk_type,
+                'title': title,
+                'content': content,
+                'start_pos': start,
+                'end_pos': last_start + len(last_text),
+                'token_count': sum(p[2] for p in parts),
+            }
+        
+        def add_paragraph(text, start):
+            """加入段落，超出预算时产出分块并保留重叠段落"""
+            tokens = estimate_tokens(text)
+            if tokens > chunk_tokens:
+                # 超长段落（如大表格）按比例硬切
+                step = max(1, int(len(text) * chunk_tokens / tokens))
+                for offset in range(0, len(text), step):
+                    yield from add_paragraph(text[offset:offset + step], start + offset)
+                return
+            
+            used = sum(p[2] for p in paragraphs)
+            if paragraphs and used + tokens > chunk_tokens:
+                yield make_chunk(paragraphs, final=False)
+                overlap = []
+                overlap_tokens = 0
+                for p in reversed(paragraphs):
+                    if overlap_tokens + p[2] > chunk_overlap_tokens:
+                        break
+                    overlap.insert(0, p)
+                    overlap_tokens += p[2]
+                paragraphs[:] = overlap
+            paragraphs.append((text, start, tokens))
+        
+        def flush_paragraph():
+            if para_lines:
+                text = ''.join(para_lines).strip('\n')
+                if text.strip():
+                    yield from add_paragraph(text, para_start)
+                para_lines.clear()
+        
+        def flush_section():
+            yield from flush_paragraph()
+            if paragraphs:
+                yield make_chunk(paragraphs, final=True)
+                paragraphs.clear()
+        
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith('```'):
+                in_code = not in_code
+            
+            header = None if in_code else _HEADER_PATTERN.match(line.rstrip('\r\n'))
+            if header:
+                yield from flush_section()
+                state['title'] = header.group(2).strip()
+                state['part'] = 0
+                para_lines.append(line)
+                para_start = pos
+                yield from flush_paragraph()
+            elif not stripped and not in_code:
+                yield from flush_paragraph()
+            else:
+                if not para_lines:
+                    para_start = pos
+                para_lines.append(line)
+            
+            pos += len(line)
+        
+        yield from flush_section()
+    
     # ========== 二期新增：图片摘要 ==========
     
     def generate_image_captions(
@@ -222,9 +222,15 @@ class NanoBananaService:
                 aspect_ratio=aspect_ratio,
                 image_size=image_size,
                 style_prefix=style_prefix,
-                download=download
+                download=False
             )
             results.append(result)
+        
+        # 生成完成后整组并发上传，而不是逐张上传
+        if download:
+            uploaded = [r for r in results if r]
+            for result, oss_url in zip(uploaded, self.upload_images_to_oss([r.url for r in uploaded])):
+                result.oss_url = oss_url
         return results
 
     def _draw(
@@ -309,6 +315,26 @@ class NanoBananaService:
 
             time.sleep(poll_interval)
 
+    def upload_images_to_oss(self, image_urls: List[str]) -> List[Optional[str]]:
+        """
+        将一组图片 URL 并发上传到 OSS（配图组以 download=False 生成后整组上传）
+        
+        Returns:
+            与 image_urls 顺序一致的 OSS URL，OSS 不可用或上传失败的位置为 None
+        """
+        if not image_urls:
+            return []
+        from .oss_service import get_oss_service
+        oss_service = get_oss_service()
+        if not oss_service or not oss_service.is_available:
+            return [None] * len(image_urls)
+        
+        results = oss_service.upload_from_urls(list(image_urls))
+        for image_url, result in zip(image_urls, results):
+            if not result.get('success'):
+                logger.warning(f"图片上传 OSS 失败: {image_url}, {result.get('error')}")
+        return [r.get('url') if r.get('success') else None for r in results]
+
     def _upload_to_oss(self, image_url: str) -> dict:
         """
         直接将图片 URL 上传到 OSS（不经过本地文件）
@@ -0,0 +1,233 @@
+"""
+知识分块索引 - 为上传文档的分块建立 BM25（+ 可选 embedding）检索索引
+
+DatabaseService.save_chunks 保存分块时同步构建索引并持久化，
+写作阶段按章节检索 top-k 相关分块，避免大文档按原始顺序截断进入 Prompt。
+
+环境变量：
+- KNOWLEDGE_CHUNK_EMBEDDINGS_ENABLED: 是否同时保存分块 embedding（默认 false）
+- KNOWLEDGE_CHUNK_EMBEDDING_WEIGHT: 混合检索中 embedding 分数权重（默认 0.5）
+
+注意：本地 TF-IDF embedding 的词表随输入变化，不同调用之间的向量不可比，
+因此仅在 EMBEDDING_PROVIDER 为非 local 时才会保存 embedding。
+"""
+import math
+import os
+import re
+import logging
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# 英文/数字词 + 连续中文片段
+_TOKEN_PATTERN = re.compile(r'[a-z0-9_]+|[\u4e00-\u9fff]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    检索分词：英文按词切分，中文按字符二元组切分（单字片段保留单字）
+
+    二元组对中文 BM25 足够有效，且无需加载分词词典。
+    """
+    tokens = []
+    for piece in _TOKEN_PATTERN.findall((text or '').lower()):
+        if piece.isascii():
+            tokens.append(piece)
+        elif len(piece) == 1:
+            tokens.append(piece)
+        else:
+            tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+    return tokens
+
+
+def embeddings_enabled() -> bool:
+    """是否为分块索引计算 embedding"""
+    if os.getenv('KNOWLEDGE_CHUNK_EMBEDDINGS_ENABLED', 'false').lower() != 'true':
+        return False
+    return os.getenv('EMBEDDING_PROVIDER', 'local') != 'local'
+
+
+class ChunkIndex:
+    """
+    分块检索索引（BM25 + 可选 embedding 混合打分）
+
+    索引以纯 dict 形式序列化，随分块一起存入 SQLite。
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunk_ids: List[str] = []
+        self.term_freqs: List[Dict[str, int]] = []
+        self.doc_lengths: List[int] = []
+        self.avg_length: float = 0.0
+        self.embeddings: Optional[List[List[float]]] = None
+        # 倒排表：term -> [(分块序号, 词频)]，由 _finalize 生成
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+
+    def _finalize(self):
+        """根据 term_freqs 重建倒排表与平均长度"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for i, tf_map in enumerate(self.term_freqs):
+            for term, tf in tf_map.items():
+                postings.setdefault(term, []).append((i, tf))
+        self._postings = postings
+        if self.doc_lengths:
+            self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths)
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @staticmethod
+    def _chunk_text(chunk: Dict[str, Any]) -> str:
+        """参与索引的文本：标题权重加倍"""
+        title = chunk.get('title', '') or ''
+        return f"{title}\n{title}\n{chunk.get('content', '') or ''}"
+
+    def add(self, chunk: Dict[str, Any]):
+        """追加一个分块（流式构建；检索前需调用 finalize）"""
+        tf = Counter(tokenize(self._chunk_text(chunk)))
+        self.chunk_ids.append(chunk.get('id', ''))
+        self.term_freqs.append(dict(tf))
+        self.doc_lengths.append(sum(tf.values()))
+
+    def add_embeddings(self, chunks: List[Dict[str, Any]]):
+        """为最近追加的一批分块计算 embedding；任一批失败则整体退化为纯 BM25"""
+        expected = len(self.chunk_ids) - len(chunks)
+        if len(self.embeddings or []) != expected:
+            self.embeddings = None
+            return
+        vectors = self._embed([self._chunk_text(c)[:2000] for c in chunks])
+        if vectors is None:
+            self.embeddings = None
+            return
+        self.embeddings = (self.embeddings or []) + vectors
+
+    def finalize(self) -> 'ChunkIndex':
+        """完成流式构建"""
+        self._finalize()
+        return self
+
+    @classmethod
+    def build(
+        cls,
+        chunks: List[Dict[str, Any]],
+        with_embeddings: Optional[bool] = None,
+    ) -> 'ChunkIndex':
+        """
+        从分块列表构建索引
+
+        Args:
+            chunks: 分块列表，每个分块需包含 {id, title, content}
+            with_embeddings: 是否计算 embedding，默认读取环境变量
+        """
+        index = cls()
+        for chunk in chunks:
+            index.add(chunk)
+
+        if with_embeddings is None:
+            with_embeddings = embeddings_enabled()
+        if with_embeddings and chunks:
+            index.add_embeddings(chunks)
+
+        return index.finalize()
+
+    @staticmethod
+    def _embed(texts: List[str]) -> Optional[List[List[float]]]:
+        try:
+            from services.blog_generator.services.semantic_compressor import EmbeddingProvider
+            return EmbeddingProvider().embed(texts)
+        except Exception as e:
+            logger.warning(f"分块 embedding 生成失败，仅使用 BM25: {e}")
+            return None
+
+    def bm25_scores(self, query: str) -> List[float]:
+        """计算 query 对所有分块的 BM25 分数"""
+        n = len(self.chunk_ids)
+        scores = [0.0] * n
+        if not n:
+            return scores
+
+        avg_len = self.avg_length or 1.0
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / avg_len)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        检索与 query 最相关的分块
+
+        Returns:
+            [(chunk_id, score), ...]，按分数降序，仅包含分数 > 0 的分块
+        """
+        scores = self.bm25_scores(query)
+        top = max(scores) if scores else 0.0
+        if top > 0:
+            scores = [s / top for s in scores]
+
+        if self.embeddings:
+            query_emb = self._embed([query])
+            if query_emb:
+                from services.blog_generator.services.semantic_compressor import _cosine_similarity
+                weight = float(os.getenv('KNOWLEDGE_CHUNK_EMBEDDING_WEIGHT', '0.5'))
+                scores = [
+                    (1 - weight) * s + weight * max(_cosine_similarity(query_emb[0], emb), 0.0)
+                    for s, emb in zip(scores, self.embeddings)
+                ]
+
+        ranked = sorted(
+            ((cid, s) for cid, s in zip(self.chunk_ids, scores) if s > 0),
+            key=lambda x: -x[1],
+        )
+        return ranked[:top_k]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为 dict（用于持久化）"""
+        return {
+            'version': INDEX_VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'chunk_ids': self.chunk_ids,
+            'term_freqs': self.term_freqs,
+            'doc_lengths': self.doc_lengths,
+            'embeddings': self.embeddings,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional['ChunkIndex']:
+        """从 dict 反序列化，版本不匹配时返回 None（由调用方重建）"""
+        if not data or data.get('version') != INDEX_VERSION:
+            return None
+        index = cls(k1=data.get('k1', 1.5), b=data.get('b', 0.75))
+        index.chunk_ids = data.get('chunk_ids', [])
+        index.term_freqs = data.get('term_freqs', [])
+        index.doc_lengths = data.get('doc_lengths', [])
+        index.embeddings = data.get('embeddings')
+        index._finalize()
+        return index
+
+    @classmethod
+    def merge(cls, indexes: List['ChunkIndex']) -> 'ChunkIndex':
+        """合并多个文档的索引（跨文档检索时使用，按合并后的集合重新计算 df）"""
+        merged = cls()
+        has_embeddings = bool(indexes) and all(idx.embeddings for idx in indexes)
+        embeddings = []
+        for idx in indexes:
+            merged.chunk_ids.extend(idx.chunk_ids)
+            merged.term_freqs.extend(idx.term_freqs)
+            merged.doc_lengths.extend(idx.doc_lengths)
+            if has_embeddings:
+                embeddings.extend(idx.embeddings)
+        merged._finalize()
+        merged.embeddings = embeddings if has_embeddings else None
+        return merged
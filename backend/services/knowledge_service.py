@@ -10,6 +10,9 @@
 - 支持知识分块
 - 两级结构：文档摘要 + 分块内容
 - 图片摘要整合
+
+三期增强：
+- 分块 BM25（+ 可选 embedding）检索索引，按章节检索 top-k 分块
 """
 import os
 import re
@@ -64,14 +67,23 @@ class KnowledgeService:
     - 简单去重
     """
     
-    def __init__(self, max_content_length: int = 8000):
+    def __init__(
+        self,
+        max_content_length: int = 8000,
+        section_top_k: int = 4,
+        section_retrieval_enabled: bool = True
+    ):
         """
         初始化知识服务
         
         Args:
             max_content_length: 单条知识最大长度（超过则截断）
+            section_top_k: 每章节检索的文档分块数（KNOWLEDGE_SECTION_TOP_K）
+            section_retrieval_enabled: 是否按章节检索文档分块（KNOWLEDGE_SECTION_RETRIEVAL_ENABLED）
         """
         self.max_content_length = max_content_length
+        self.section_top_k = section_top_k
+        self.section_retrieval_enabled = section_retrieval_enabled
         logger.info(f"KnowledgeService 初始化完成, max_content_length={max_content_length}")
     
     def prepare_document_knowledge(
@@ -407,14 +419,16 @@ class KnowledgeService:
         chunks: List[Dict[str, Any]],
         images: List[Dict[str, Any]],
         web_knowledge: List[KnowledgeItem],
-        max_items: int = 30
+        max_items: int = 30,
+        query: str = None,
+        chunk_index=None
     ) -> List[KnowledgeItem]:
         """
         融合分块知识和网络搜索知识（二期）
         
         策略：
         1. 文档摘要优先
-        2. 相关分块补充
+        2. 相关分块补充（提供 query 时按检索得分排序，而非原始顺序）
         3. 网络知识填充
         
         Args:
@@ -423,17 +437,22 @@ class KnowledgeService:
             images: 图片列表
             web_knowledge: 网络搜索知识
             max_items: 最大返回条目数
+            query: 检索查询（可选）
+            chunk_index: 分块检索索引 ChunkIndex（可选，未提供时按需即时构建）
         
         Returns:
             融合后的知识列表
         """
+        if query and chunks:
+            chunks = self._rank_chunks(query, chunks, chunk_index)
+        
         # 准备分块知识
         doc_knowledge = self.prepare_chunked_knowledge(documents, chunks, images)
         
         result = []
         max_doc_items = int(os.getenv('KNOWLEDGE_MAX_DOC_ITEMS', '10'))
         
-        # 1. 添加文档知识（按相关性排序）
+        # 1. 添加文档知识（按相关性排序，稳定排序保留检索顺序）
         doc_knowledge.sort(key=lambda x: x.relevance_score, reverse=True)
         doc_count = min(len(doc_knowledge), max_doc_items)
         result.extend(doc_knowledge[:doc_count])
@@ -454,6 +473,106 @@ class KnowledgeService:
         
         return result
     
+    def _rank_chunks(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        chunk_index=None
+    ) -> List[Dict[str, Any]]:
+        """按检索得分对分块重新排序，只保留命中的分块；全部未命中时保持文档原顺序"""
+        from services.knowledge_index import ChunkIndex
+        
+        if chunk_index is None:
+            chunk_index = ChunkIndex.build(chunks)
+        ranked = chunk_index.search(query, top_k=len(chunks))
+        chunk_map = {c.get('id'): c for c in chunks}
+        result = [chunk_map[cid] for cid, _ in ranked if cid in chunk_map]
+        return result or chunks
+    
+    def retrieve_chunks(
+        self,
+        query: str,
+        chunks: List[Dict[str, Any]],
+        chunk_index=None,
+        top_k: int = None,
+        documents: List[Dict[str, Any]] = None
+    ) -> List[KnowledgeItem]:
+        """
+        检索与 query 最相关的 top-k 分块（三期）
+        
+        Args:
+            query: 检索查询（通常为章节标题 + 核心概念 + 要点）
+            chunks: 候选分块列表，包含 {id, document_id, title, content}
+            chunk_index: 分块检索索引（可选，未提供时即时构建）
+            top_k: 返回条目数，默认使用 section_top_k
+            documents: 文档列表（用于补充文件名）
+        
+        Returns:
+            知识条目列表，relevance_score 为归一化检索得分
+        """
+        from services.knowledge_index import ChunkIndex
+        
+        if not query or not chunks:
+            return []
+        if top_k is None:
+            top_k = self.section_top_k
+        if chunk_index is None:
+            chunk_index = ChunkIndex.build(chunks)
+        
+        filenames = {d.get('id'): d.get('filename', '') for d in (documents or [])}
+        chunk_map = {c.get('id'): c for c in chunks}
+        items = []
+        for chunk_id, score in chunk_index.search(query, top_k=top_k):
+            chunk = chunk_map.get(chunk_id)
+            if not chunk or not chunk.get('content'):
+                continue
+            filename = filenames.get(chunk.get('document_id'), '')
+            chunk_title = chunk.get('title', '')
+            title = ' - '.join(p for p in (filename, chunk_title) if p) or chunk_id
+            items.append(KnowledgeItem(
+                source_type='document',
+                title=title,
+                content=self._truncate_content(chunk['content']),
+                file_name=filename or None,
+                relevance_score=round(score, 4)
+            ))
+        return items
+    
+    def load_chunk_retriever(self, document_ids: List[str], db_service=None) -> Optional['ChunkRetriever']:
+        """
+        加载文档分块及其持久化索引，返回可重复检索的 ChunkRetriever
+        
+        Args:
+            document_ids: 文档 ID 列表
+            db_service: 数据库服务（默认使用全局单例）
+        
+        Returns:
+            ChunkRetriever，未启用按章节检索、无可用分块或加载失败时返回 None
+        """
+        if not document_ids or not self.section_retrieval_enabled:
+            return None
+        from services.knowledge_index import ChunkIndex
+        
+        try:
+            if db_service is None:
+                from services.database_service import get_db_service
+                db_service = get_db_service()
+            
+            chunks = db_service.get_chunks_by_documents(document_ids)
+            if not chunks:
+                return None
+            documents = db_service.get_documents_by_ids(document_ids)
+            indexes = db_service.get_chunk_indexes(document_ids)
+            index = ChunkIndex.merge([indexes[d] for d in document_ids if d in indexes])
+            if len(index) != len(chunks):
+                index = ChunkIndex.build(chunks)
+        except Exception as e:
+            logger.warning(f"加载文档分块检索器失败，跳过按章节检索: {e}")
+            return None
+        
+        logger.info(f"加载分块检索器: {len(document_ids)} 个文档, {len(chunks)} 个分块")
+        return ChunkRetriever(self, chunks, index, documents)
+    
     def summarize_for_prompt_v2(
         self,
         knowledge_items: List[KnowledgeItem],
@@ -539,6 +658,40 @@ class KnowledgeService:
         }
 
 
+class ChunkRetriever:
+    """绑定一组文档分块与索引的检索器（写作阶段按章节复用）"""
+    
+    def __init__(self, knowledge_service: KnowledgeService, chunks: List[Dict[str, Any]],
+                 chunk_index, documents: List[Dict[str, Any]] = None):
+        self.knowledge_service = knowledge_service
+        self.chunks = chunks
+        self.chunk_index = chunk_index
+        self.documents = documents or []
+    
+    def retrieve(self, query: str, top_k: int = None) -> List[KnowledgeItem]:
+        """检索 top-k 相关分块"""
+        return self.knowledge_service.retrieve_chunks(
+            query, self.chunks, self.chunk_index, top_k=top_k, documents=self.documents
+        )
+    
+    def format_for_prompt(self, query: str, top_k: int = None, max_total_length: int = 6000) -> str:
+        """检索并格式化为 Prompt 片段，无命中时返回空字符串"""
+        items = self.retrieve(query, top_k=top_k)
+        if not items:
+            return ""
+        parts = []
+        total_length = 0
+        for item in items:
+            if total_length + len(item.content) > max_total_length:
+                remaining = max_total_length - total_length
+                if remaining > 500:
+                    parts.append(f"### {item.title}\n\n{item.content[:remaining]}\n...(内容已截断)")
+                break
+            parts.append(f"### {item.title}\n\n{item.content}")
+            total_length += len(item.content)
+        return "## 📚 文档相关片段\n\n" + "\n\n".join(parts)
+
+
 # 全局单例
 _knowledge_service: Optional[KnowledgeService] = None
 
@@ -551,8 +704,16 @@ def get_knowledge_service() -> KnowledgeService:
     return _knowledge_service
 
 
-def init_knowledge_service(max_content_length: int = 8000) -> KnowledgeService:
+def init_knowledge_service(
+    max_content_length: int = 8000,
+    section_top_k: int = 4,
+    section_retrieval_enabled: bool = True
+) -> KnowledgeService:
     """初始化知识服务"""
     global _knowledge_service
-    _knowledge_service = KnowledgeService(max_content_length=max_content_length)
+    _knowledge_service = KnowledgeService(
+        max_content_length=max_content_length,
+        section_top_k=section_top_k,
+        section_retrieval_enabled=section_retrieval_enabled
+    )
     return _knowledge_service
@@ -2,7 +2,8 @@
 多提供商 LLM 客户端工厂
 
 根据 provider 配置自动创建对应的 LangChain ChatModel 实例。
-支持 OpenAI / Anthropic / 通义千问 / DeepSeek / 智谱。
+支持 OpenAI / Anthropic / 通义千问 / DeepSeek / 智谱，
+以及用于离线基准的 offline 替身（services.offline_providers）。
 
 来源：37.29 多提供商 LLM 客户端工厂方案
 """
@@ -61,6 +62,11 @@ PROVIDER_CONFIGS: Dict[str, Dict[str, Any]] = {
         'type': 'openai',
         'base_url': 'https://open.bigmodel.cn/api/paas/v4',
     },
+    # 离线替身：确定性响应 + 可配置延迟 / 429，无需 API Key
+    'offline': {
+        'env_key': '',
+        'type': 'offline',
+    },
 }
 
 # ============ 模型白名单 ============
@@ -124,6 +130,13 @@ def create_llm_client(
 
     cfg = PROVIDER_CONFIGS[provider]
 
+    if cfg['type'] == 'offline':
+        from services.offline_providers import OfflineChatModel
+        return OfflineChatModel(
+            model_name=model_name,
+            max_tokens=max_tokens or int(os.environ.get('LLM_MAX_TOKENS', '8192')),
+        )
+
     # 自动获取 API Key
     if not api_key:
         api_key = os.environ.get(cfg['env_key'], '')
@@ -32,6 +32,12 @@ _request_lock = threading.Lock()
 _last_request_time = 0.0
 _MIN_REQUEST_INTERVAL = float(__import__('os').environ.get('LLM_MIN_REQUEST_INTERVAL', '1.0'))  # 秒
 
+# 对相同前缀自动缓存的 OpenAI 兼容服务（API 地址包含其一即视为支持前缀缓存）
+AUTO_PREFIX_CACHE_HOSTS = [
+    h.strip() for h in os.environ.get('LLM_PREFIX_CACHE_HOSTS', 'api.openai.com,api.deepseek.com').split(',')
+    if h.strip()
+]
+
 
 def _rate_limit():
     """全局 LLM 限流（向后兼容接口，内部委托 GlobalRateLimiter）"""
@@ -198,6 +204,8 @@ class LLMService:
             return bool(self._google_api_key)
         if self.provider_format == 'anthropic':
             return bool(os.environ.get('ANTHROPIC_API_KEY', ''))
+        if self.provider_format == 'offline':
+            return True
         return bool(self._openai_api_key)
 
     @staticmethod
@@ -301,14 +309,53 @@ class LLMService:
         content, _ = resilient_chat(model=model, messages=langchain_messages, caller=caller)
         return content
 
+    def _use_cache_breakpoints(self) -> bool:
+        """是否为消息的 cache_prefix 插入显式缓存断点
+
+        Anthropic 需要 cache_control 断点才会缓存前缀；OpenAI 兼容接口对相同前缀自动缓存，
+        只需保证稳定内容在前（cached_prompt_message 已按此构造）。
+        """
+        return (
+            self.provider_format == 'anthropic'
+            and os.environ.get('LLM_PROMPT_CACHE_ENABLED', 'true').lower() != 'false'
+        )
+
+    def caches_prompt_prefix(self) -> bool:
+        """提供方是否缓存重复的 prompt 前缀
+
+        Anthropic 依赖显式断点；OpenAI 兼容接口只有部分服务端自动缓存前缀，按 API 地址识别。
+        不缓存时各章节重复发送完整共享前缀会按全价计费，调用方应改用精简的上下文。
+        """
+        if self._use_cache_breakpoints():
+            return True
+        if os.environ.get('LLM_PROMPT_CACHE_ENABLED', 'true').lower() == 'false':
+            return False
+        api_base = self._openai_api_base or 'https://api.openai.com'
+        return self.provider_format == 'openai' and any(
+            host in api_base for host in AUTO_PREFIX_CACHE_HOSTS
+        )
+
     @staticmethod
-    def _convert_messages(messages: List[Dict[str, Any]]) -> list:
-        """将 dict 格式消息转换为 LangChain 消息对象"""
+    def _convert_messages(messages: List[Dict[str, Any]], cache_breakpoints: bool = False) -> list:
+        """将 dict 格式消息转换为 LangChain 消息对象
+
+        Args:
+            messages: dict 格式消息；可带 cache_prefix（content 的稳定前缀）
+            cache_breakpoints: 为 cache_prefix 拆分内容块并在前缀末尾加 cache_control 断点
+        """
         from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
         langchain_messages = []
         for msg in messages:
             role = msg.get("role", "user")
             content = msg.get("content", "")
+            prefix = msg.get("cache_prefix") if cache_breakpoints else None
+            if prefix and isinstance(content, str) and content.startswith(prefix):
+                suffix = content[len(prefix):].lstrip("\n")
+                if suffix:
+                    content = [
+                        {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                        {"type": "text", "text": suffix},
+                    ]
             if role == "system":
                 langchain_messages.append(SystemMessage(content=content))
             elif role == "assistant":
@@ -317,6 +364,48 @@ class LLMService:
                 langchain_messages.append(HumanMessage(content=content))
         return langchain_messages
     
+    def _cache_lookup(
+        self,
+        messages: List[Dict[str, Any]],
+        model_name: str,
+        tier: str,
+        temperature: float,
+        response_format: Optional[Dict[str, Any]],
+        caller: str,
+    ):
+        """查询 LLM 响应缓存，返回 (cache, key, 缓存文本)；未启用或不在缓存范围时 cache 为 None"""
+        from utils.llm_response_cache import get_llm_response_cache, make_cache_key
+
+        agent = _resolve_caller(caller)
+        # 缓存库损坏 / 消息无法序列化等异常一律降级为不走缓存
+        try:
+            cache = get_llm_response_cache()
+            if cache is None or not cache.enabled_for(agent):
+                return None, None, None
+            key = make_cache_key(
+                messages, model=model_name, tier=tier,
+                temperature=temperature, response_format=response_format,
+            )
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"读取 LLM 响应缓存失败: {e}")
+            return None, None, None
+        if self.token_tracker:
+            self.token_tracker.record_cache_lookup(agent, cached is not None)
+        if cached is not None:
+            logger.info(f"[{agent}] 命中 LLM 响应缓存")
+        return cache, key, cached
+
+    @staticmethod
+    def _cache_store(cache, key: str, content: Optional[str], caller: str, model_name: str):
+        """写入 LLM 响应缓存（失败不影响主流程）"""
+        if cache is None or not content:
+            return
+        try:
+            cache.set(key, content, caller=_resolve_caller(caller), model=model_name)
+        except Exception as e:
+            logger.warning(f"写入 LLM 响应缓存失败: {e}")
+
     def chat(
         self,
         messages: List[Dict[str, Any]],
@@ -350,10 +439,16 @@ class LLMService:
             logger.error("模型不可用")
             return None
 
+        # 响应缓存（Thinking 模式输出不稳定，不参与缓存）
+        cache, cache_key, cached = (None, None, None) if thinking else self._cache_lookup(
+            messages, model_name, tier, temperature, response_format, caller,
+        )
+
         try:
-            # 上下文长度预警（不阻断调用）
-            guard = ContextGuard(model_name, max_output_tokens=max_tokens)
-            check = guard.check(messages)
+            # 上下文长度预警（不阻断调用；命中缓存时跳过）
+            check = {"is_safe": True} if cached is not None else ContextGuard(
+                model_name, max_output_tokens=max_tokens
+            ).check(messages)
             if not check["is_safe"]:
                 logger.warning(
                     f"[{caller}] prompt 超限 {check['overflow_tokens']:,} tokens，"
@@ -370,7 +465,9 @@ class LLMService:
                         logger.warning(f"模型不支持 response_format 绑定: {bind_err}")
 
             # 转换消息格式
-            langchain_messages = self._convert_messages(messages)
+            langchain_messages = self._convert_messages(
+                messages, cache_breakpoints=self._use_cache_breakpoints()
+            )
 
             # SSE: 发送 llm_start 事件
             _send_llm = (
@@ -385,8 +482,10 @@ class LLMService:
                     'thinking': thinking,
                 })
 
+            if cached is not None:
+                content, metadata = cached, {"attempts": 0, "cached": True}
             # Thinking 模式分支
-            if thinking and self._supports_thinking(model_name):
+            elif thinking and self._supports_thinking(model_name):
                 content = self._chat_with_thinking(
                     langchain_messages, thinking_budget, caller=caller,
                     model_name_override=model_name,
@@ -412,6 +511,7 @@ class LLMService:
                     'truncated': metadata.get('truncated', False),
                     'attempts': metadata.get('attempts', 1),
                     'thinking': thinking,
+                    'cached': metadata.get('cached', False),
                 })
 
             if metadata.get("truncated"):
@@ -453,6 +553,9 @@ class LLMService:
                     model=model_name,
                 )
 
+            # 截断的响应不缓存，否则会在整个 TTL 内被重放
+            if cached is None and not metadata.get("truncated"):
+                self._cache_store(cache, cache_key, content, caller, model_name)
             return content
 
         except ContextLengthExceeded as e:
@@ -496,6 +599,19 @@ class LLMService:
             logger.error("模型不可用")
             return None
 
+        cache, cache_key, cached = self._cache_lookup(
+            messages, model_name, tier, temperature, response_format, caller,
+        )
+        if cached is not None:
+            # 回放：按块推给 on_chunk，与真实流式调用的回调形态一致
+            if on_chunk:
+                from utils.llm_response_cache import replay_chunks
+                accumulated = ""
+                for delta in replay_chunks(cached):
+                    accumulated += delta
+                    on_chunk(delta, accumulated)
+            return cached
+
         try:
             if response_format and response_format.get("type") == "json_object":
                 if self.provider_format == 'anthropic':
@@ -506,7 +622,9 @@ class LLMService:
                     except Exception as bind_err:
                         logger.warning(f"模型不支持 response_format 绑定: {bind_err}")
 
-            langchain_messages = self._convert_messages(messages)
+            langchain_messages = self._convert_messages(
+                messages, cache_breakpoints=self._use_cache_breakpoints()
+            )
             label = f"[{caller}] " if caller else ""
 
             for attempt in range(DEFAULT_MAX_RETRIES):
@@ -532,6 +650,15 @@ class LLMService:
                             )
                             if token_usage.input_tokens or token_usage.output_tokens:
                                 self.token_tracker.record(token_usage, agent=_resolve_caller(caller))
+                                if getattr(self, '_cost_tracker', None):
+                                    self._cost_tracker.record_call(
+                                        input_tokens=token_usage.input_tokens,
+                                        output_tokens=token_usage.output_tokens,
+                                        cache_read_tokens=token_usage.cache_read_tokens,
+                                        cache_write_tokens=token_usage.cache_write_tokens,
+                                        model=model_name,
+                                        agent=_resolve_caller(caller),
+                                    )
                         except Exception:
                             pass
 
@@ -549,6 +676,10 @@ class LLMService:
                             model=model_name,
                         )
 
+                    if last_chunk is not None and is_truncated(last_chunk):
+                        logger.warning(f"{label}流式响应被截断，内容可能不完整，不写入响应缓存")
+                    else:
+                        self._cache_store(cache, cache_key, full_content.strip(), caller, model_name)
                     return full_content.strip()
 
                 except LLMCallTimeout:
@@ -644,6 +775,8 @@ def get_llm_service() -> Optional[LLMService]:
 def _infer_provider_format(config: dict) -> str:
     """根据实际配置自动推断 provider_format，无需手动设置 AI_PROVIDER_FORMAT"""
     explicit = config.get('AI_PROVIDER_FORMAT', '').strip()
+    if explicit.lower() == 'offline':
+        return 'offline'
 
     # 如果有 Anthropic API Key 且未被注释，且 base_url 不是 OpenAI 兼容的
     anthropic_key = os.environ.get('ANTHROPIC_API_KEY', '')
@@ -0,0 +1,344 @@
+"""
+媒体处理流水线 - 视频片段并发下载、编码探测与合并上传
+
+合并流程：
+1. 并发下载所有片段（大缓冲区，本地路径直接复用）
+2. ffprobe 探测各片段的流参数，参数一致时 concat 直接流拷贝（-c copy），
+   不一致或流拷贝失败时才重新编码
+3. OSS 可用时 FFmpeg 输出分片 MP4 到管道，边合并边分片上传，不落盘；
+   管道上传失败时降级为输出文件后再上传
+
+环境变量：
+- FFMPEG_PATH / FFPROBE_PATH: 可执行文件路径（默认 ffmpeg / ffprobe）
+- VIDEO_DOWNLOAD_WORKERS: 片段并发下载数（默认 4）
+- VIDEO_DOWNLOAD_CHUNK_SIZE: 下载缓冲区大小，字节（默认 1MB）
+- VIDEO_MERGE_STREAM_UPLOAD: 是否通过管道直接上传合并结果（默认 true）
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')
+FFPROBE_PATH = os.getenv('FFPROBE_PATH', 'ffprobe')
+DOWNLOAD_WORKERS = int(os.getenv('VIDEO_DOWNLOAD_WORKERS', '4'))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('VIDEO_DOWNLOAD_CHUNK_SIZE', str(1024 * 1024)))
+STREAM_UPLOAD = os.getenv('VIDEO_MERGE_STREAM_UPLOAD', 'true').lower() == 'true'
+
+# 合并后视频的本地持久目录（通过 /static/videos/ 访问）
+DEFAULT_OUTPUT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'static', 'videos')
+)
+
+# 决定能否流拷贝的流参数：任一不同都需要重新编码
+_PROBE_KEYS = (
+    'codec_type', 'codec_name', 'profile', 'width', 'height', 'pix_fmt',
+    'sample_rate', 'channels', 'channel_layout', 'time_base',
+)
+
+_REENCODE_ARGS = [
+    '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
+    '-c:a', 'aac', '-b:a', '128k',
+]
+
+
+def download_segments(
+    urls: List[str],
+    dest_dir: str,
+    max_workers: int = None,
+    chunk_size: int = None,
+    timeout: int = 120
+) -> List[Optional[str]]:
+    """
+    并发下载视频片段
+
+    Args:
+        urls: 片段 URL 列表（本地已存在的文件路径直接复用）
+        dest_dir: 下载目录
+        max_workers: 并发数，默认 VIDEO_DOWNLOAD_WORKERS
+        chunk_size: 读写缓冲区大小，默认 VIDEO_DOWNLOAD_CHUNK_SIZE
+
+    Returns:
+        与 urls 顺序一致的本地路径列表，下载失败的位置为 None
+    """
+    import requests
+
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+
+    def fetch(item: Tuple[int, str]) -> Optional[str]:
+        idx, url = item
+        if os.path.isfile(url):
+            return url
+        local_path = os.path.join(dest_dir, f"segment_{idx}.mp4")
+        try:
+            with requests.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                with open(local_path, 'wb', buffering=chunk_size) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+            logger.info(f"视频片段 {idx + 1} 下载完成: {url[:80]}")
+            return local_path
+        except Exception as e:
+            logger.error(f"下载视频片段 {idx + 1} 失败: {url[:80]}, 错误: {e}")
+            return None
+
+    if not urls:
+        return []
+    workers = min(max_workers or DOWNLOAD_WORKERS, len(urls))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch, enumerate(urls)))
+
+
+def probe_signature(path: str, ffprobe_path: str = None) -> Optional[tuple]:
+    """
+    用 ffprobe 提取片段的流参数签名
+
+    Returns:
+        各条流参数组成的元组，探测失败返回 None
+    """
+    cmd = [
+        ffprobe_path or FFPROBE_PATH, '-v', 'error',
+        '-show_entries', 'stream=' + ','.join(_PROBE_KEYS),
+        '-of', 'json', path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        if result.returncode != 0:
+            logger.warning(f"ffprobe 探测失败: {path}, {result.stderr.strip()[:200]}")
+            return None
+        streams = json.loads(result.stdout or '{}').get('streams', [])
+    except Exception as e:
+        logger.warning(f"ffprobe 探测异常: {path}, {e}")
+        return None
+    if not streams:
+        return None
+    return tuple(tuple(stream.get(key) for key in _PROBE_KEYS) for stream in streams)
+
+
+def can_stream_copy(paths: List[str], ffprobe_path: str = None) -> bool:
+    """所有片段流参数一致时才能用 concat 流拷贝"""
+    if not paths:
+        return False
+    with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(paths))) as executor:
+        signatures = list(executor.map(lambda p: probe_signature(p, ffprobe_path), paths))
+    return signatures[0] is not None and all(sig == signatures[0] for sig in signatures)
+
+
+def write_concat_file(paths: List[str], concat_file: str):
+    """生成 concat demuxer 列表文件（转义路径中的单引号）"""
+    with open(concat_file, 'w', encoding='utf-8') as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def build_concat_command(
+    concat_file: str,
+    output: str,
+    stream_copy: bool,
+    ffmpeg_path: str = None
+) -> List[str]:
+    """
+    构建 concat 命令
+
+    output 为 '-' 时输出分片 MP4 到 stdout（用于管道上传），
+    否则输出普通文件并将 moov 前置，便于网页边下边播。
+    """
+    cmd = [ffmpeg_path or FFMPEG_PATH, '-y', '-f', 'concat', '-safe', '0', '-i', concat_file]
+    cmd += ['-c', 'copy'] if stream_copy else _REENCODE_ARGS
+    if output == '-':
+        cmd += ['-movflags', 'frag_keyframe+empty_moov', '-f', 'mp4', 'pipe:1']
+    else:
+        cmd += ['-movflags', '+faststart', output]
+    return cmd
+
+
+def concat_videos(
+    paths: List[str],
+    output_path: str,
+    force_reencode: bool = False,
+    ffmpeg_path: str = None,
+    ffprobe_path: str = None,
+    timeout: int = 600
+) -> str:
+    """
+    合并视频到文件：编码一致时流拷贝，否则重新编码
+
+    Returns:
+        实际使用的模式：'copy' 或 'reencode'
+
+    Raises:
+        RuntimeError: FFmpeg 执行失败
+    """
+    concat_file = f"{output_path}.concat.txt"
+    write_concat_file(paths, concat_file)
+    try:
+        stream_copy = not force_reencode and can_stream_copy(paths, ffprobe_path)
+        modes = ['copy', 'reencode'] if stream_copy else ['reencode']
+        stderr = ''
+        for mode in modes:
+            cmd = build_concat_command(concat_file, output_path, mode == 'copy', ffmpeg_path)
+            logger.info(f"执行 FFmpeg 合并 ({mode}): {' '.join(cmd)}")
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            if result.returncode == 0:
+                return mode
+            stderr = result.stderr
+            logger.warning(f"FFmpeg 合并失败 ({mode}): {stderr[-500:]}")
+        raise RuntimeError(f"FFmpeg 执行失败: {stderr[-500:]}")
+    finally:
+        if os.path.exists(concat_file):
+            os.remove(concat_file)
+
+
+def concat_to_oss(
+    paths: List[str],
+    oss_service,
+    remote_path: str,
+    force_reencode: bool = False,
+    ffmpeg_path: str = None,
+    ffprobe_path: str = None
+) -> Dict[str, Any]:
+    """
+    合并视频并通过管道直接分片上传到 OSS（不生成本地合并文件）
+
+    Returns:
+        OSSService.upload_stream 的结果，附加 'mode' 字段
+    """
+    stream_copy = not force_reencode and can_stream_copy(paths, ffprobe_path)
+    mode = 'copy' if stream_copy else 'reencode'
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        concat_file = os.path.join(temp_dir, 'concat.txt')
+        write_concat_file(paths, concat_file)
+        cmd = build_concat_command(concat_file, '-', stream_copy, ffmpeg_path)
+        logger.info(f"执行 FFmpeg 管道合并 ({mode}): {' '.join(cmd)}")
+
+        # stderr 写临时文件，避免管道写满导致 FFmpeg 阻塞
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+            try:
+                result = oss_service.upload_stream(process.stdout, remote_path, content_type='video/mp4')
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+            stderr_file.seek(0)
+            stderr = stderr_file.read().decode('utf-8', errors='replace')
+
+    if returncode != 0:
+        logger.error(f"FFmpeg 管道合并失败: {stderr[-500:]}")
+        if result.get('success'):
+            oss_service.delete_file(remote_path)
+        return {'success': False, 'error': f'FFmpeg 执行失败: {stderr[-500:]}', 'mode': mode}
+
+    result['mode'] = mode
+    return result
+
+
+def merge_videos(
+    urls: List[str],
+    oss_service=None,
+    output_dir: str = None,
+    remote_path: str = None,
+    force_reencode: bool = False,
+    stream_upload: bool = None,
+    ffmpeg_path: str = None
+) -> Dict[str, Any]:
+    """
+    下载并合并视频片段，结果上传 OSS（可用时）或保存到本地目录
+
+    Args:
+        urls: 片段 URL 列表（按播放顺序）
+        oss_service: OSS 服务（可选）
+        output_dir: 本地输出目录，默认 static/videos
+        remote_path: OSS 路径，默认 vibe-blog/videos/{日期}/merged_xxx.mp4
+        force_reencode: 跳过探测，强制重新编码
+        stream_upload: 是否管道直传 OSS，默认 VIDEO_MERGE_STREAM_UPLOAD
+        ffmpeg_path: FFmpeg 可执行文件路径，默认 FFMPEG_PATH
+
+    Returns:
+        {
+            'success': bool,
+            'url': OSS URL（未上传时为 None）,
+            'local_path': 本地文件路径（已上传 OSS 时为 None）,
+            'mode': 'single' / 'copy' / 'reencode',
+            'segments': 成功下载的片段数,
+            'timings': {'download': 秒, 'merge': 秒}
+        }
+    """
+    output_dir = output_dir or DEFAULT_OUTPUT_DIR
+    stream_upload = STREAM_UPLOAD if stream_upload is None else stream_upload
+    oss_available = bool(oss_service and oss_service.is_available)
+    filename = f"merged_{uuid.uuid4().hex[:8]}.mp4"
+    if not remote_path:
+        remote_path = f"vibe-blog/videos/{datetime.now().strftime('%Y%m%d')}/{filename}"
+    timings = {}
+
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            started = time.perf_counter()
+            local_videos = [p for p in download_segments(urls, temp_dir) if p]
+            timings['download'] = round(time.perf_counter() - started, 3)
+
+            if not local_videos:
+                return {'success': False, 'error': '没有成功下载的视频片段', 'timings': timings}
+            if len(local_videos) < len(urls):
+                logger.warning(f"{len(urls) - len(local_videos)} 个视频片段下载失败，已跳过")
+
+            started = time.perf_counter()
+            if oss_available and stream_upload and len(local_videos) > 1:
+                result = concat_to_oss(local_videos, oss_service, remote_path, force_reencode, ffmpeg_path)
+                if result.get('success'):
+                    timings['merge'] = round(time.perf_counter() - started, 3)
+                    logger.info(f"合并视频已直传 OSS ({result['mode']}): {result['url']}")
+                    return {
+                        'success': True,
+                        'url': result['url'],
+                        'local_path': None,
+                        'mode': result['mode'],
+                        'segments': len(local_videos),
+                        'timings': timings,
+                    }
+                logger.warning(f"管道直传失败，降级为本地合并后上传: {result.get('error')}")
+
+            os.makedirs(output_dir, exist_ok=True)
+            output_path = os.path.join(output_dir, filename)
+            if len(local_videos) == 1:
+                shutil.copy(local_videos[0], output_path)
+                mode = 'single'
+            else:
+                mode = concat_videos(local_videos, output_path, force_reencode, ffmpeg_path)
+            timings['merge'] = round(time.perf_counter() - started, 3)
+
+        url = None
+        if oss_available:
+            upload = oss_service.upload_file(output_path, remote_path, content_type='video/mp4')
+            if upload.get('success'):
+                url = upload['url']
+                logger.info(f"合并视频已上传到 OSS: {url}")
+                # 已上传 OSS，本地合并文件不再需要
+                os.remove(output_path)
+                output_path = None
+            else:
+                logger.error(f"OSS 上传失败: {upload}")
+
+        return {
+            'success': True,
+            'url': url,
+            'local_path': output_path,
+            'mode': mode,
+            'segments': len(local_videos),
+            'timings': timings,
+        }
+
+    except Exception as e:
+        logger.error(f"视频合并失败: {e}", exc_info=True)
+        return {'success': False, 'error': str(e), 'timings': timings}
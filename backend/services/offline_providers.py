@@ -0,0 +1,646 @@
+"""
+离线替身提供商 - 无需外部 API 即可跑通完整生成流程
+
+用于性能分析与离线基准：LLM / 搜索 / 图片 / OSS 全部在本地以确定性方式响应，
+可配置调用延迟、输出速度、token 数与 429 比例，从而在不消耗额度的情况下
+复现真实调用的耗时结构。
+
+- OfflineChatModel: LangChain ChatModel，经 llm_factory.create_llm_client(provider='offline') 创建
+- OfflineSearchService: 与 SmartSearchService.search 返回结构一致
+- OfflineImageService: NanoBananaService 子类，替换 HTTP 会话，保留原有提交 / 轮询流程
+- OSS 使用 LocalBucket（services.oss_local_bucket）
+
+响应来源优先级：录制文件（OFFLINE_RECORDINGS，JSONL，按消息哈希匹配）> 按节点合成。
+
+环境变量：
+- OFFLINE_LLM_LATENCY: 每次 LLM 调用的首字延迟秒数（默认 0）
+- OFFLINE_LLM_JITTER: 延迟抖动比例 0~1（默认 0.2）
+- OFFLINE_LLM_TOKENS_PER_SEC: 输出速度，0 表示不模拟（默认 0）
+- OFFLINE_LLM_429_RATE: 返回 429 的概率（默认 0）
+- OFFLINE_SEARCH_LATENCY / OFFLINE_IMAGE_LATENCY: 搜索 / 图片生成延迟秒数（默认 0）
+- OFFLINE_SEED: 随机种子（默认 42）
+- OFFLINE_RECORDINGS: 录制响应文件路径（可选）
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from services.image_service import NanoBananaService
+from utils.context_guard import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OfflineProfile:
+    """离线提供商的延迟 / 速率 / 故障配置"""
+    llm_latency: float = 0.0
+    jitter: float = 0.2
+    tokens_per_sec: float = 0.0
+    rate_limit_ratio: float = 0.0
+    search_latency: float = 0.0
+    image_latency: float = 0.0
+    seed: int = 42
+    recordings: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> 'OfflineProfile':
+        return cls(
+            llm_latency=float(os.getenv('OFFLINE_LLM_LATENCY', '0')),
+            jitter=float(os.getenv('OFFLINE_LLM_JITTER', '0.2')),
+            tokens_per_sec=float(os.getenv('OFFLINE_LLM_TOKENS_PER_SEC', '0')),
+            rate_limit_ratio=float(os.getenv('OFFLINE_LLM_429_RATE', '0')),
+            search_latency=float(os.getenv('OFFLINE_SEARCH_LATENCY', '0')),
+            image_latency=float(os.getenv('OFFLINE_IMAGE_LATENCY', '0')),
+            seed=int(os.getenv('OFFLINE_SEED', '42')),
+            recordings=os.getenv('OFFLINE_RECORDINGS') or None,
+        )
+
+
+@dataclass
+class OfflineStats:
+    """离线调用统计（线程安全）"""
+    calls: Dict[str, int] = field(default_factory=dict)
+    service_calls: Dict[str, int] = field(default_factory=dict)
+    rate_limited: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, kind: str, input_tokens: int, output_tokens: int):
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+
+    def record_service(self, name: str):
+        with self._lock:
+            self.service_calls[name] = self.service_calls.get(name, 0) + 1
+
+    def record_rate_limit(self):
+        with self._lock:
+            self.rate_limited += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'total_calls': sum(self.calls.values()),
+                'service_calls': dict(self.service_calls),
+                'rate_limited': self.rate_limited,
+                'input_tokens': self.input_tokens,
+                'output_tokens': self.output_tokens,
+            }
+
+
+_stats = OfflineStats()
+
+
+def get_offline_stats() -> OfflineStats:
+    """进程内共享的离线调用统计（各 tier 的模型实例、搜索、图片共用）"""
+    return _stats
+
+
+def messages_key(messages: List[Dict[str, str]]) -> str:
+    """录制 / 回放使用的消息哈希"""
+    payload = json.dumps(
+        [{'role': m.get('role', 'user'), 'content': m.get('content', '')} for m in messages],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# ========== 响应合成 ==========
+
+
+class OfflineResponder:
+    """根据录制文件或 prompt 模板生成确定性响应"""
+
+    def __init__(self, profile: OfflineProfile = None):
+        self.profile = profile or OfflineProfile.from_env()
+        self._recordings: Dict[str, str] = {}
+        # 每条消息的调用次数：同一 prompt 重试时抽到不同的 429 / 延迟，且可按种子复现
+        self._attempts: Dict[str, int] = {}
+        self._attempts_lock = threading.Lock()
+        if self.profile.recordings and os.path.exists(self.profile.recordings):
+            with open(self.profile.recordings, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self._recordings[item['key']] = item['response']
+            logger.info(f"离线回放已加载 {len(self._recordings)} 条录制响应")
+
+    def respond(self, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """返回 (响应类别, 响应文本)"""
+        key = messages_key(messages)
+        recorded = self._recordings.get(key)
+        if recorded is not None:
+            return 'recorded', recorded
+        prompt = '\n'.join(m.get('content', '') for m in messages)
+        return synthesize(prompt, random.Random(f"{self.profile.seed}:{key}"))
+
+    def call_rng(self, messages: List[Dict[str, str]]) -> random.Random:
+        """第 N 次调用同一消息时的随机源（种子 + 消息哈希 + 调用序号），与线程交错无关"""
+        key = messages_key(messages)
+        with self._attempts_lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        return random.Random(f"{self.profile.seed}:call:{key}:{attempt}")
+
+
+def synthesize(prompt: str, rng: random.Random) -> Tuple[str, str]:
+    """按 prompt 模板特征合成响应；无法识别时按是否要求 JSON 返回通用结果"""
+    for kind, marker, builder in _SYNTHESIZERS:
+        if marker in prompt:
+            return kind, builder(prompt, rng)
+    if 'json' in prompt.lower():
+        return 'generic_json', '{}'
+    return 'generic', _paragraphs(rng, 2)
+
+
+_SENTENCES = [
+    '这一机制的核心在于把复杂问题拆解为可以独立验证的小步骤。',
+    '在实际工程中，我们通常先建立最小可运行的版本，再逐步引入优化。',
+    '性能瓶颈往往出现在 I/O 等待和重复计算上，而不是算法本身。',
+    '通过缓存中间结果，可以显著降低端到端延迟。',
+    '下面用一个具体的例子说明这一过程。',
+    '需要注意的是，并发度并非越高越好，过高的并发会触发服务端限流。',
+    '监控指标应当覆盖吞吐、延迟分位数和错误率三个维度。',
+    '这种设计让各个模块之间保持松耦合，便于独立演进。',
+]
+_CN_NUMBERS = '一二三四五六七八九十'
+_MERMAID = 'flowchart TD\n    A[输入] --> B[处理]\n    B --> C[缓存]\n    C --> D[输出]'
+
+
+def _paragraphs(rng: random.Random, count: int, sentences: int = 4) -> str:
+    return '\n\n'.join(
+        ''.join(rng.choice(_SENTENCES) for _ in range(sentences)) for _ in range(count)
+    )
+
+
+def _text_of_length(rng: random.Random, words: int) -> str:
+    """生成约 words 个汉字的正文（每段 4 句，约 100 字）"""
+    return _paragraphs(rng, max(1, words // 100))
+
+
+def _field(prompt: str, pattern: str, default: str = '') -> str:
+    match = re.search(pattern, prompt)
+    return match.group(1).strip() if match else default
+
+
+def _int_field(prompt: str, pattern: str, default: int) -> int:
+    value = _field(prompt, pattern)
+    return int(value) if value.isdigit() else default
+
+
+def _json_block(prompt: str) -> Dict[str, Any]:
+    """取 prompt 中第一个可解析的 ```json 代码块"""
+    for block in re.findall(r'```json\s*(\{.*?\})\s*```', prompt, re.S):
+        try:
+            return json.loads(block)
+        except ValueError:
+            continue
+    return {}
+
+
+def _topic(prompt: str) -> str:
+    for pattern in (r'(?:技术主题|用户主题)[:：]\s*(.+)', r'##\s*(?:技术)?主题\s*\n(.+)'):
+        topic = _field(prompt, pattern)
+        if topic:
+            return topic
+    return '技术主题'
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _planner(prompt: str, rng: random.Random) -> str:
+    topic = _topic(prompt)
+    sections = _int_field(prompt, r'目标章节数\**[:：]\s*(\d+)', 4)
+    images = _int_field(prompt, r'目标配图数\**[:：]\s*(\d+)', 2)
+    code_blocks = _int_field(prompt, r'目标代码块数\**[:：]\s*(\d+)', 1)
+    words = _int_field(prompt, r'目标字数\**[:：]\s*约\s*(\d+)', 3000)
+    article_type = _field(prompt, r'"article_type":\s*"([^"]+)"', 'tutorial')
+    return _dumps({
+        'title': f'{topic}：从原理到实践',
+        'subtitle': f'{topic} - 原理 / 实践 / 优化',
+        'reading_time': max(3, words // 400),
+        'article_type': article_type,
+        'narrative_mode': 'what-why-how',
+        'narrative_flow': {
+            'reader_start': f'听说过 {topic}，但不了解细节',
+            'reader_end': f'能够在项目中落地 {topic}',
+            'logic_chain': ['是什么', '为什么', '怎么做', '如何优化'],
+        },
+        'introduction': _paragraphs(rng, 1),
+        'core_value': f'一文讲清 {topic} 的关键设计',
+        'table_of_contents': [f'{_CN_NUMBERS[i]}、章节{i + 1}' for i in range(sections)],
+        'sections': [{
+            'id': f'section_{i + 1}',
+            'title': f'{_CN_NUMBERS[i % 10]}、{topic} 的第 {i + 1} 个关键点',
+            'narrative_role': 'how',
+            'core_question': f'{topic} 的第 {i + 1} 个问题是什么？',
+            'target_words': max(200, words // sections),
+            'key_concept': f'概念{i + 1}',
+            'content_outline': ['要点一', '要点二', '要点三'],
+            'subsections': [{'id': f'{i + 1}.1', 'title': f'{i + 1}.1 基本原理'}],
+            'assigned_materials': [],
+            'image_type': 'flowchart' if i < images else 'none',
+            'illustration_type': 'flowchart',
+            'image_description': f'{topic} 第 {i + 1} 部分流程图',
+            'code_blocks': 1 if i < code_blocks else 0,
+            'has_output_block': False,
+            'key_quote': rng.choice(_SENTENCES),
+            'cognitive_load': 'medium',
+        } for i in range(sections)],
+        'conclusion': {'summary_points': ['要点一', '要点二'], 'next_steps': '阅读官方文档'},
+        'reference_links': ['https://example.com/docs'],
+    })
+
+
+def _writer(prompt: str, rng: random.Random) -> str:
+    outline = _json_block(prompt)
+    title = outline.get('title') or _field(prompt, r'章节标题[:：]\s*(.+)', '章节')
+    words = int(outline.get('target_words') or 600)
+    parts = [f'## {title}', '', '### 基本原理', '', _text_of_length(rng, words // 2)]
+    if outline.get('image_type', 'none') != 'none':
+        parts += ['', f"[IMAGE: {outline.get('image_type')} - {outline.get('image_description', title)}]"]
+    if outline.get('code_blocks'):
+        parts += ['', f"[CODE: code_{outline.get('id', 'x')}_1 - 示例代码]"]
+    parts += ['', '### 实践要点', '', _text_of_length(rng, words // 2)]
+    return '\n'.join(parts)
+
+
+def _section_rewrite(prompt: str, rng: random.Random) -> str:
+    title = _field(prompt, r'章节标题[:：]\s*(.+)', '章节')
+    return f'## {title}\n\n{_text_of_length(rng, 600)}'
+
+
+def _questioner(prompt: str, rng: random.Random) -> str:
+    detailed = rng.random() > 0.3
+    return _dumps({
+        'is_detailed_enough': detailed,
+        'depth_score': 82 if detailed else 62,
+        'vague_points': [] if detailed else [
+            {'location': '基本原理', 'question': '能否给出具体数据？', 'suggestion': '数据'},
+        ],
+    })
+
+
+def _reviewer(prompt: str, rng: random.Random) -> str:
+    score = rng.choice([72, 84, 88, 91])
+    return _dumps({
+        'score': score,
+        'approved': score >= 80,
+        'issues': [] if score >= 80 else [{
+            'section_id': 'section_1', 'issue_type': 'completeness', 'severity': 'medium',
+            'description': '缺少性能数据', 'suggestion': '补充基准测试结果',
+        }],
+        'summary': '结构完整，逻辑清晰。',
+    })
+
+
+def _scores(names: List[str], rng: random.Random) -> Dict[str, Any]:
+    scores = {name: rng.choice([7, 8, 9]) for name in names}
+    return {
+        'scores': scores,
+        'overall_quality': round(sum(scores.values()) / len(scores), 1),
+        'specific_issues': [],
+        'improvement_suggestions': [],
+    }
+
+
+_SYNTHESIZERS: List[Tuple[str, str, Callable[[str, random.Random], str]]] = [
+    ('planner', '你是一个专业的技术博客大纲规划师', _planner),
+    ('writer_enhance', '你的任务是根据追问反馈，深化和补充章节内容', _section_rewrite),
+    ('writer_correct', '你的任务是**更正**章节中的错误', _section_rewrite),
+    ('writer_improve', '请根据以下评估反馈，精准修改章节内容', _section_rewrite),
+    ('writer_enhance_knowledge', '负责根据新获取的知识补充和增强文章内容', _section_rewrite),
+    ('writer', '🚨🚨🚨 输出规则（必须遵守）', _writer),
+    ('questioner', '你是一个专业的内容深度审核师', _questioner),
+    ('section_evaluator', '你是一个严格的内容质量评估师', lambda p, r: _dumps(_scores(
+        ['information_density', 'logical_coherence', 'professional_depth', 'expression_quality'], r))),
+    ('reviewer', '你是一个专业的技术内容质量审核师', _reviewer),
+    ('coder', '你是一个专业的代码示例撰写师', lambda p, r: _dumps({
+        'code_block': 'import asyncio\n\nasync def main():\n    # 并发执行两个任务\n'
+                      '    await asyncio.gather(asyncio.sleep(0.1), asyncio.sleep(0.1))\n\nasyncio.run(main())',
+        'output_block': '',
+        'explanation': r.choice(_SENTENCES),
+    })),
+    ('artist', '你是一个专业的技术配图设计师', lambda p, r: _dumps({
+        'render_method': 'mermaid',
+        'content': _MERMAID,
+        'caption': _field(p, r'文章标题[:：]\s*(.+)', '流程图'),
+        'style_description': '蓝色系节点，实线箭头，自上而下布局',
+    })),
+    ('image_evaluator', '你是一个专业的技术图表质量评审员', lambda p, r: _dumps(_scores(
+        ['structural_accuracy', 'visual_clarity', 'content_fidelity', 'syntax_correctness'], r))),
+    ('image_improve', '你是一个专业的技术图表优化师', lambda p, r: _MERMAID),
+    ('missing_diagram_detector', '检测需要补充图表的位置', lambda p, r: _dumps({'needs_diagrams': []})),
+    ('thread_check', '你是一个严格的叙事一致性检查专家', lambda p, r: _dumps({
+        'overall_coherence': 5, 'issues': [], 'summary': '叙事连贯。',
+    })),
+    ('voice_check', '你是一个严格的语气一致性检查专家', lambda p, r: _dumps({
+        'voice_profile': {'target_tone': '专业', 'target_formality': '中等', 'target_person': '我们'},
+        'chapter_voice_map': [], 'issues': [], 'summary': '语气统一。',
+    })),
+    ('search_router', '你是一个搜索源路由器', lambda p, r: _dumps({
+        'sources': ['general'], 'arxiv_query': 'topic', 'blog_query': _topic(p),
+    })),
+    ('search_query', '你是一个搜索查询优化专家', lambda p, r: _dumps([
+        f'{_topic(p)} {suffix}' for suffix in ('原理', '教程', '最佳实践')
+    ])),
+    ('researcher', '你是一个专业的技术资料收集专家', lambda p, r: _dumps({
+        'background_knowledge': _paragraphs(r, 3),
+        'key_concepts': [{'name': f'概念{i}', 'description': r.choice(_SENTENCES)} for i in range(1, 4)],
+        'top_references': [{'title': '官方文档', 'url': 'https://example.com/docs', 'relevance': '高'}],
+        'instructional_analysis': {
+            'learning_objectives': [{'type': 'primary', 'objective': '读者将理解核心原理'}],
+            'audience': {'knowledge_level': 'intermediate', 'reading_purpose': '学习新技术',
+                         'expected_outcome': '实操指南'},
+            'content_type': 'tutorial',
+            'verbatim_data': [],
+        },
+    })),
+    ('distill_sources', '请对以下搜索结果进行深度提炼', lambda p, r: _dumps({
+        'sources': [{
+            'title': f'资料{i}', 'url': f'https://example.com/{i}', 'core_insight': r.choice(_SENTENCES),
+            'key_data': [], 'unique_perspective': '', 'content_type': 'concept',
+            'credibility': 'high', 'relevance_score': 4,
+        } for i in range(1, 4)],
+        'common_themes': ['性能', '并发'],
+        'contradictions': [],
+        'material_by_type': {'concepts': ['概念1'], 'cases': [], 'data': [], 'comparisons': []},
+    })),
+    ('analyze_gaps', '找出内容缺口和独特写作角度', lambda p, r: _dumps({
+        'content_gaps': ['缺少基准数据'],
+        'unique_angles': [{'angle': '从工程实践出发', 'reason': '读者更关心落地'}],
+        'writing_recommendations': {
+            'recommended_structure': 'tutorial', 'must_cover': ['核心原理'],
+            'can_skip': [], 'differentiation': '结合真实案例',
+        },
+    })),
+    ('knowledge_gap_detector', '负责检测文章中的知识空白点', lambda p, r: _dumps({'has_gaps': False, 'gaps': []})),
+    ('search_summarizer', '提取与知识空白相关的关键信息', lambda p, r: _paragraphs(r, 1)),
+    ('factcheck', '你是事实核查编辑', lambda p, r: _dumps({
+        'score': 4,
+        'claims': [{'id': 1, 'text': r.choice(_SENTENCES)[:30], 'sid': 'section_1', 'v': 'S'}],
+        'fixes': [],
+    })),
+    ('humanizer_score', '基于以下 AI 写作痕迹检测规则', lambda p, r: _dumps({
+        'score': {'directness': 8, 'rhythm': 8, 'trust': 8, 'authenticity': 8, 'conciseness': 8, 'total': 40},
+        'issues_summary': '整体自然。',
+    })),
+    ('humanizer', '专门识别和去除 AI 生成文本的痕迹', lambda p, r: _dumps({'replacements': []})),
+    ('summary_generator', '请根据以下完整博客文章，生成四种摘要', lambda p, r: _dumps({
+        'tldr': r.choice(_SENTENCES),
+        'seo_keywords': ['性能优化', '并发', 'Python'],
+        'social_summary': _paragraphs(r, 1, 2),
+        'meta_description': r.choice(_SENTENCES),
+    })),
+]
+
+
+# ========== LangChain ChatModel ==========
+
+
+def _to_dicts(messages) -> List[Dict[str, str]]:
+    roles = {'system': 'system', 'ai': 'assistant', 'human': 'user'}
+    return [{'role': roles.get(getattr(m, 'type', 'human'), 'user'), 'content': str(m.content)} for m in messages]
+
+
+try:
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+except ImportError:  # pragma: no cover - langchain 为必选依赖
+    BaseChatModel = object
+
+
+class OfflineChatModel(BaseChatModel):
+    """离线 ChatModel：确定性响应 + 可配置延迟 / 速率 / 429"""
+
+    model_name: str = 'offline'
+    max_tokens: int = 8192
+    profile: Any = None
+    responder: Any = None
+    stats: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.profile is None:
+            self.profile = OfflineProfile.from_env()
+        if self.responder is None:
+            self.responder = OfflineResponder(self.profile)
+        if self.stats is None:
+            self.stats = _stats
+
+    @property
+    def _llm_type(self) -> str:
+        return 'offline'
+
+    def _prepare(self, messages):
+        """模拟首字延迟与 429，返回 (响应类别, 响应文本, 输入 token, 输出 token)"""
+        dict_messages = _to_dicts(messages)
+        profile = self.profile
+        rng = self.responder.call_rng(dict_messages)
+        if profile.rate_limit_ratio and rng.random() < profile.rate_limit_ratio:
+            self.stats.record_rate_limit()
+            raise RuntimeError('Error code: 429 - rate limit exceeded (offline)')
+        if profile.llm_latency:
+            time.sleep(profile.llm_latency * (1 + profile.jitter * (rng.random() * 2 - 1)))
+        kind, text = self.responder.respond(dict_messages)
+        input_tokens = sum(estimate_tokens(m['content']) for m in dict_messages)
+        output_tokens = estimate_tokens(text)
+        self.stats.record(kind, input_tokens, output_tokens)
+        return kind, text, input_tokens, output_tokens
+
+    @staticmethod
+    def _usage(input_tokens: int, output_tokens: int) -> Dict[str, int]:
+        return {
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': input_tokens + output_tokens,
+        }
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> 'ChatResult':
+        _, text, input_tokens, output_tokens = self._prepare(messages)
+        if self.profile.tokens_per_sec:
+            time.sleep(output_tokens / self.profile.tokens_per_sec)
+        message = AIMessage(
+            content=text,
+            usage_metadata=self._usage(input_tokens, output_tokens),
+            response_metadata={'finish_reason': 'stop', 'model_name': self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator['ChatGenerationChunk']:
+        _, text, input_tokens, output_tokens = self._prepare(messages)
+        chunks = [text[i:i + 40] for i in range(0, len(text), 40)] or ['']
+        delay = output_tokens / self.profile.tokens_per_sec / len(chunks) if self.profile.tokens_per_sec else 0
+        for i, piece in enumerate(chunks):
+            if delay:
+                time.sleep(delay)
+            last = i == len(chunks) - 1
+            chunk = AIMessageChunk(
+                content=piece,
+                usage_metadata=self._usage(input_tokens, output_tokens) if last else None,
+                response_metadata={'finish_reason': 'stop'} if last else {},
+            )
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+
+# ========== 搜索 ==========
+
+
+def _sleep(latency: float, jitter: float):
+    if latency:
+        time.sleep(latency * (1 + jitter * (random.random() * 2 - 1)))
+
+
+class OfflineSearchService:
+    """离线搜索：兼容 SearchService.search(query, max_results) 与 SmartSearchService.search(topic, ...)"""
+
+    def __init__(self, profile: OfflineProfile = None):
+        self.profile = profile or OfflineProfile.from_env()
+        self.api_key = 'offline'
+
+    def is_available(self) -> bool:
+        return True
+
+    def search(self, topic: str = '', article_type: str = '', max_results_per_source: int = 5,
+               max_results: int = None, **kwargs) -> Dict[str, Any]:
+        _stats.record_service('search')
+        _sleep(self.profile.search_latency, self.profile.jitter)
+        rng = random.Random(f"{self.profile.seed}:search:{topic}")
+        count = max(1, max_results or max_results_per_source)
+        results = [{
+            'title': f'{topic} 实践笔记 {i + 1}',
+            'url': f'https://example.com/{hashlib.md5(topic.encode()).hexdigest()[:8]}/{i + 1}',
+            'content': _paragraphs(rng, 2),
+            'source': 'offline',
+            'publish_date': '2026-01-01',
+        } for i in range(count)]
+        return {
+            'success': True,
+            'results': results,
+            'summary': '\n\n'.join(r['content'][:200] for r in results),
+            'sources_used': ['general'],
+            'error': None,
+        }
+
+
+# ========== 图片 ==========
+
+# 1x1 透明 PNG
+_PNG_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+
+class _OfflineResponse:
+    def __init__(self, payload: Dict[str, Any]):
+        self._payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+
+class _OfflineImageSession:
+    """模拟 Nano Banana 的提交 / 查询接口"""
+
+    def __init__(self, profile: OfflineProfile):
+        self.profile = profile
+        self.headers: Dict[str, str] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def post(self, url: str, json: Dict[str, Any] = None, timeout: float = None):
+        if url.endswith('/v1/draw/result'):
+            task_id = json['id']
+            return _OfflineResponse({'code': 0, 'data': {
+                'id': task_id, 'status': 'succeeded', 'progress': 100,
+                'results': [{'url': f'https://offline.invalid/images/{task_id}.png'}],
+            }})
+        _stats.record_service('image')
+        _sleep(self.profile.image_latency, self.profile.jitter)
+        with self._lock:
+            self._counter += 1
+            task_id = f'offline_{self._counter:06d}'
+        return _OfflineResponse({'code': 0, 'data': {'id': task_id}})
+
+
+class OfflineImageService(NanoBananaService):
+    """图片生成替身：沿用 NanoBananaService 的提交 / 轮询流程，HTTP 会话与 OSS 中转在本地完成"""
+
+    def __init__(self, output_folder: str, profile: OfflineProfile = None):
+        super().__init__(api_key='offline', output_folder=output_folder)
+        self.session = _OfflineImageSession(profile or OfflineProfile.from_env())
+
+    def _upload_to_oss(self, image_url: str) -> dict:
+        from services.oss_service import get_oss_service
+        oss_service = get_oss_service()
+        if oss_service and oss_service.is_available:
+            name = image_url.rsplit('/', 1)[-1]
+            result = oss_service.upload_bytes(_PNG_BYTES, f'images/{name}')
+            if result.get('success'):
+                return {'oss_url': result.get('url')}
+        return {'oss_url': None}
+
+    def upload_images_to_oss(self, image_urls: List[str]) -> List[Optional[str]]:
+        return [self._upload_to_oss(url).get('oss_url') for url in image_urls]
+
+
+# ========== 安装 ==========
+
+
+def install_offline_providers(output_dir: str, profile: OfflineProfile = None) -> Dict[str, Any]:
+    """
+    将 LLM / 搜索 / 图片 / OSS 的全局实例替换为离线替身
+
+    Args:
+        output_dir: 离线产物目录（图片、LocalBucket）
+        profile: 延迟 / 故障配置，默认从环境变量读取
+
+    Returns:
+        {'llm': LLMService, 'search': OfflineSearchService, 'image': ..., 'oss': OSSService}
+    """
+    from services import image_service, llm_service, oss_service
+    from services.blog_generator.services import search_service, smart_search_service
+    from services.oss_local_bucket import LocalBucket
+
+    profile = profile or OfflineProfile.from_env()
+    llm = llm_service.LLMService(provider_format='offline', openai_api_key='offline', text_model='offline')
+    # 预先放入各 tier 的模型实例，使传入的 profile 生效（懒创建时只读环境变量）
+    responder = OfflineResponder(profile)
+    llm._text_chat_model = OfflineChatModel(profile=profile, responder=responder)
+    for tier, config in llm._model_config.items():
+        config['instance'] = OfflineChatModel(
+            model_name=f'offline-{tier}', max_tokens=config['max_tokens'],
+            profile=profile, responder=responder,
+        )
+    search = OfflineSearchService(profile)
+    images = OfflineImageService(os.path.join(output_dir, 'images'), profile)
+    oss = oss_service.OSSService(bucket=LocalBucket(os.path.join(output_dir, 'oss')))
+
+    llm_service._llm_service = llm
+    search_service._search_service = search
+    smart_search_service._smart_search_service = search
+    image_service._image_service = images
+    oss_service._oss_service = oss
+    logger.info(f"离线提供商已启用: {output_dir}")
+    return {'llm': llm, 'search': search, 'image': images, 'oss': oss}
@@ -0,0 +1,88 @@
+"""
+本地目录 Bucket - 以文件系统模拟 oss2.Bucket 的常用接口
+
+用于测试与离线运行：OSSService(bucket=LocalBucket(root)) 即可在不访问阿里云的情况下
+走完整的普通上传 / 分片上传 / 断点续传流程。只实现 OSSService 用到的方法。
+"""
+import os
+import shutil
+import threading
+import uuid
+from types import SimpleNamespace
+
+
+class LocalBucket:
+    """文件系统 Bucket（线程安全）"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._uploads_dir = os.path.join(root, '.multipart')
+        self._lock = threading.Lock()
+        # 调用计数，便于测试断言
+        self.upload_part_calls = 0
+        os.makedirs(self._uploads_dir, exist_ok=True)
+
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+    def _upload_dir(self, upload_id: str) -> str:
+        return os.path.join(self._uploads_dir, upload_id)
+
+    @staticmethod
+    def _read_data(data) -> bytes:
+        if hasattr(data, 'read'):
+            return data.read()
+        return bytes(data)
+
+    def object_exists(self, key: str) -> bool:
+        return os.path.isfile(self._object_path(key))
+
+    def get_object_bytes(self, key: str) -> bytes:
+        with open(self._object_path(key), 'rb') as f:
+            return f.read()
+
+    def put_object(self, key: str, data, headers=None):
+        path = self._object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(self._read_data(data))
+        return SimpleNamespace(status=200)
+
+    def delete_object(self, key: str):
+        path = self._object_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+        return SimpleNamespace(status=204)
+
+    def init_multipart_upload(self, key: str, headers=None):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._upload_dir(upload_id))
+        return SimpleNamespace(upload_id=upload_id)
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data, **kwargs):
+        upload_dir = self._upload_dir(upload_id)
+        if not os.path.isdir(upload_dir):
+            raise KeyError(f'NoSuchUpload: {upload_id}')
+        payload = self._read_data(data)
+        with open(os.path.join(upload_dir, f'{part_number:05d}'), 'wb') as f:
+            f.write(payload)
+        with self._lock:
+            self.upload_part_calls += 1
+        return SimpleNamespace(status=200, etag=f'{upload_id}-{part_number}-{len(payload)}')
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts, headers=None):
+        upload_dir = self._upload_dir(upload_id)
+        if not os.path.isdir(upload_dir):
+            raise KeyError(f'NoSuchUpload: {upload_id}')
+        path = self._object_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as out:
+            for part in sorted(parts, key=lambda p: p.part_number):
+                with open(os.path.join(upload_dir, f'{part.part_number:05d}'), 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        shutil.rmtree(upload_dir)
+        return SimpleNamespace(status=200)
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+        return SimpleNamespace(status=204)
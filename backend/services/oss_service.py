@@ -3,15 +3,49 @@
 
 Veo3 视频生成 API 需要公网可访问的图片 URL，
 本服务将本地图片上传到 OSS 并返回公网 URL。
+
+大文件（合并视频、封面动画）走分片上传：
+- 本地文件：多线程并发上传分片，断点信息写入 OSS_CHECKPOINT_DIR，失败后再次调用可续传
+- 可读流 / 源 URL：边读边传，不落盘，同时保持有限个分片并发上传
 """
 import os
+import json
 import uuid
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from types import SimpleNamespace
+from typing import Dict, Any, Optional, List, Union, Tuple
 from datetime import datetime
 
+from utils.atomic_write import atomic_write
+
 logger = logging.getLogger(__name__)
 
+# 分片上传：单片大小 / 超过该大小的文件自动走分片上传
+MULTIPART_PART_SIZE = int(os.getenv('OSS_MULTIPART_PART_SIZE', str(8 * 1024 * 1024)))
+MULTIPART_THRESHOLD = int(os.getenv('OSS_MULTIPART_THRESHOLD', str(32 * 1024 * 1024)))
+# 分片并发数 / 批量上传并发数
+MULTIPART_THREADS = int(os.getenv('OSS_MULTIPART_THREADS', '4'))
+BATCH_UPLOAD_WORKERS = int(os.getenv('OSS_BATCH_UPLOAD_WORKERS', '8'))
+# 断点续传记录目录
+CHECKPOINT_DIR = os.getenv('OSS_CHECKPOINT_DIR') or os.path.join(
+    tempfile.gettempdir(), 'vibe-blog-oss-checkpoints'
+)
+
+_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.mov': 'video/quicktime',
+}
+
 
 class OSSService:
     """阿里云 OSS 服务"""
@@ -21,7 +55,8 @@ class OSSService:
         access_key_id: str = None,
         access_key_secret: str = None,
         bucket_name: str = None,
-        endpoint: str = None
+        endpoint: str = None,
+        bucket=None
     ):
         """
         初始化 OSS 服务
@@ -31,6 +66,7 @@ class OSSService:
             access_key_secret: 阿里云 AccessKey Secret
             bucket_name: OSS Bucket 名称
             endpoint: OSS Endpoint (如 oss-cn-hangzhou.aliyuncs.com)
+            bucket: 直接注入 Bucket 对象（如 LocalBucket，用于测试/离线运行）
         """
         self.access_key_id = access_key_id or os.getenv('OSS_ACCESS_KEY_ID')
         self.access_key_secret = access_key_secret or os.getenv('OSS_ACCESS_KEY_SECRET')
@@ -40,7 +76,11 @@ class OSSService:
         self._bucket = None
         self._initialized = False
         
-        if not all([self.access_key_id, self.access_key_secret, self.bucket_name]):
+        if bucket is not None:
+            self.bucket_name = self.bucket_name or 'local'
+            self._bucket = bucket
+            self._initialized = True
+        elif not all([self.access_key_id, self.access_key_secret, self.bucket_name]):
             logger.warning("OSS 配置不完整，上传功能将不可用")
         else:
             self._init_client()
@@ -118,8 +158,6 @@ class OSSService:
             return {'success': False, 'error': f'文件不存在: {local_path}'}
         
         try:
-            import oss2
-            
             # 生成远程路径
             if not remote_path:
                 ext = os.path.splitext(local_path)[1]
@@ -141,22 +179,16 @@ class OSSService:
             
             # 设置 Content-Type
             headers = {}
+            content_type = content_type or _CONTENT_TYPES.get(os.path.splitext(local_path)[1].lower())
             if content_type:
                 headers['Content-Type'] = content_type
-            elif local_path.lower().endswith('.png'):
-                headers['Content-Type'] = 'image/png'
-            elif local_path.lower().endswith(('.jpg', '.jpeg')):
-                headers['Content-Type'] = 'image/jpeg'
-            elif local_path.lower().endswith('.gif'):
-                headers['Content-Type'] = 'image/gif'
-            elif local_path.lower().endswith('.webp'):
-                headers['Content-Type'] = 'image/webp'
-            elif local_path.lower().endswith('.mp4'):
-                headers['Content-Type'] = 'video/mp4'
-            elif local_path.lower().endswith('.webm'):
-                headers['Content-Type'] = 'video/webm'
-            elif local_path.lower().endswith('.mov'):
-                headers['Content-Type'] = 'video/quicktime'
+            
+            # 大文件走并发、可续传的分片上传
+            if os.path.getsize(local_path) > MULTIPART_THRESHOLD:
+                result = self.upload_file_multipart(local_path, remote_path, content_type=content_type)
+                if result.get('success'):
+                    result['skipped'] = False
+                return result
             
             # 上传文件
             with open(local_path, 'rb') as f:
@@ -218,6 +250,271 @@ class OSSService:
             logger.error(f"数据上传失败: {e}", exc_info=True)
             return {'success': False, 'error': str(e)}
     
+    def upload_stream(
+        self,
+        stream,
+        remote_path: str,
+        content_type: str = None,
+        part_size: int = None,
+        num_threads: int = None
+    ) -> Dict[str, Any]:
+        """
+        从可读流分片上传到 OSS（无需预知总大小，也无需落盘）
+        
+        适用于边生成边上传的场景（FFmpeg 输出管道、源 URL 响应流）。
+        顺序读取分片、最多 num_threads 个分片同时上传，内存占用上限约为
+        part_size * num_threads。流无法重放，失败时中止分片上传。
+        
+        Args:
+            stream: 任意支持 read(n) 的二进制流
+            remote_path: OSS 上的路径
+            content_type: 文件 MIME 类型
+            part_size: 单片大小（字节），默认 OSS_MULTIPART_PART_SIZE
+            num_threads: 分片并发数，默认 OSS_MULTIPART_THREADS
+            
+        Returns:
+            {'success': True, 'url': '...', 'remote_path': '...', 'size': 总字节数, 'parts': 分片数}
+        """
+        if not self.is_available:
+            return {'success': False, 'error': 'OSS 服务不可用'}
+        
+        part_size = part_size or MULTIPART_PART_SIZE
+        num_threads = num_threads or MULTIPART_THREADS
+        upload_id = None
+        
+        try:
+            headers = {'Content-Type': content_type} if content_type else None
+            upload_id = self._bucket.init_multipart_upload(remote_path, headers=headers).upload_id
+            
+            parts = []
+            total = 0
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                pending = set()
+                part_number = 0
+                while True:
+                    data = _read_exactly(stream, part_size)
+                    if not data and part_number:
+                        break
+                    part_number += 1
+                    total += len(data)
+                    pending.add(executor.submit(self._upload_part, remote_path, upload_id, part_number, data))
+                    if len(pending) >= num_threads:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        parts.extend(f.result() for f in done)
+                    if len(data) < part_size:
+                        break
+                parts.extend(f.result() for f in pending)
+            
+            parts.sort(key=lambda p: p.part_number)
+            self._bucket.complete_multipart_upload(remote_path, upload_id, parts)
+            
+            url = self.get_public_url(remote_path)
+            logger.info(f"分片上传成功: {url} ({total} 字节, {len(parts)} 片)")
+            return {
+                'success': True,
+                'url': url,
+                'remote_path': remote_path,
+                'size': total,
+                'parts': len(parts)
+            }
+            
+        except Exception as e:
+            logger.error(f"分片上传失败: {e}", exc_info=True)
+            if upload_id:
+                try:
+                    self._bucket.abort_multipart_upload(remote_path, upload_id)
+                except Exception as abort_error:
+                    logger.warning(f"中止分片上传失败: {abort_error}")
+            return {'success': False, 'error': str(e)}
+    
+    def upload_file_multipart(
+        self,
+        local_path: str,
+        remote_path: str,
+        content_type: str = None,
+        part_size: int = None,
+        num_threads: int = None
+    ) -> Dict[str, Any]:
+        """
+        并发、可断点续传的本地文件分片上传
+        
+        每完成一个分片即写入断点记录（upload_id + 已完成分片）；上传中断后
+        以相同参数再次调用，只补传缺失分片。文件大小/修改时间变化或
+        upload_id 已失效时自动重新开始。
+        
+        Args:
+            local_path: 本地文件路径
+            remote_path: OSS 上的路径
+            content_type: 文件 MIME 类型
+            part_size: 单片大小（字节），默认 OSS_MULTIPART_PART_SIZE
+            num_threads: 分片并发数，默认 OSS_MULTIPART_THREADS
+            
+        Returns:
+            {'success': True, 'url': '...', 'remote_path': '...', 'size': ..., 'parts': ..., 'resumed_parts': ...}
+        """
+        if not self.is_available:
+            return {'success': False, 'error': 'OSS 服务不可用'}
+        
+        part_size = part_size or MULTIPART_PART_SIZE
+        num_threads = num_threads or MULTIPART_THREADS
+        stat = os.stat(local_path)
+        checkpoint_path = self._checkpoint_path(local_path, remote_path)
+        fingerprint = {
+            'remote_path': remote_path,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'part_size': part_size,
+        }
+        
+        checkpoint = self._load_checkpoint(checkpoint_path, fingerprint)
+        for attempt in range(2):
+            try:
+                return self._upload_file_parts(
+                    local_path, remote_path, content_type, num_threads,
+                    checkpoint, checkpoint_path, fingerprint
+                )
+            except Exception as e:
+                if attempt == 0 and checkpoint and _is_no_such_upload(e):
+                    logger.warning(f"断点记录已失效，重新开始分片上传: {remote_path}")
+                    self._remove_checkpoint(checkpoint_path)
+                    checkpoint = None
+                    continue
+                logger.error(f"分片上传失败（可重试续传）: {e}", exc_info=True)
+                return {'success': False, 'error': str(e), 'resumable': True}
+    
+    def _upload_file_parts(
+        self,
+        local_path: str,
+        remote_path: str,
+        content_type: Optional[str],
+        num_threads: int,
+        checkpoint: Optional[Dict[str, Any]],
+        checkpoint_path: str,
+        fingerprint: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        size = fingerprint['size']
+        part_size = fingerprint['part_size']
+        total_parts = max(1, -(-size // part_size))
+        
+        if checkpoint:
+            upload_id = checkpoint['upload_id']
+            done = {int(n): p for n, p in checkpoint['parts'].items()}
+            logger.info(f"续传分片上传: {remote_path}, 已完成 {len(done)}/{total_parts} 片")
+        else:
+            headers = {'Content-Type': content_type} if content_type else None
+            upload_id = self._bucket.init_multipart_upload(remote_path, headers=headers).upload_id
+            done = {}
+        resumed = len(done)
+        
+        lock = threading.Lock()
+        
+        def save_progress():
+            atomic_write(checkpoint_path, json.dumps({
+                **fingerprint,
+                'upload_id': upload_id,
+                'parts': {str(n): p for n, p in done.items()},
+            }))
+        
+        def upload_one(part_number: int):
+            with open(local_path, 'rb') as f:
+                f.seek((part_number - 1) * part_size)
+                data = f.read(part_size)
+            part = self._upload_part(remote_path, upload_id, part_number, data)
+            with lock:
+                done[part_number] = {'etag': part.etag, 'size': len(data)}
+                save_progress()
+        
+        with lock:
+            save_progress()
+        missing = [n for n in range(1, total_parts + 1) if n not in done]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(num_threads, len(missing))) as executor:
+                for future in [executor.submit(upload_one, n) for n in missing]:
+                    future.result()
+        
+        parts = [_part_info(n, done[n]['etag'], done[n]['size']) for n in sorted(done)]
+        self._bucket.complete_multipart_upload(remote_path, upload_id, parts)
+        self._remove_checkpoint(checkpoint_path)
+        
+        url = self.get_public_url(remote_path)
+        logger.info(f"分片上传成功: {url} ({size} 字节, {total_parts} 片, 续传 {resumed} 片)")
+        return {
+            'success': True,
+            'url': url,
+            'remote_path': remote_path,
+            'size': size,
+            'parts': total_parts,
+            'resumed_parts': resumed
+        }
+    
+    def _upload_part(self, remote_path: str, upload_id: str, part_number: int, data: bytes):
+        result = self._bucket.upload_part(remote_path, upload_id, part_number, data)
+        return _part_info(part_number, result.etag, len(data))
+    
+    def _checkpoint_path(self, local_path: str, remote_path: str) -> str:
+        key = f"{self.bucket_name}|{remote_path}|{os.path.abspath(local_path)}"
+        return os.path.join(CHECKPOINT_DIR, hashlib.md5(key.encode('utf-8')).hexdigest() + '.json')
+    
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: str, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """读取断点记录，与当前文件不匹配时丢弃"""
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if any(checkpoint.get(k) != v for k, v in fingerprint.items()) or not checkpoint.get('upload_id'):
+            OSSService._remove_checkpoint(checkpoint_path)
+            return None
+        return checkpoint
+    
+    @staticmethod
+    def _remove_checkpoint(checkpoint_path: str):
+        try:
+            os.remove(checkpoint_path)
+        except OSError:
+            pass
+    
+    def upload_from_urls(
+        self,
+        items: List[Union[str, Tuple[str, str]]],
+        max_workers: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量并发从 URL 上传（如 AI 生成的配图组）
+        
+        Args:
+            items: 源 URL（自动生成图片路径），或 (源 URL, OSS 路径) 元组
+            max_workers: 并发数，默认 OSS_BATCH_UPLOAD_WORKERS
+            
+        Returns:
+            与 items 顺序一致的上传结果列表
+        """
+        def upload(item):
+            if isinstance(item, tuple):
+                return self.upload_from_url(*item)
+            return self.upload_image_from_url(item)
+        
+        return self._run_batch(upload, items, max_workers)
+    
+    @staticmethod
+    def _run_batch(func, items: list, max_workers: int = None) -> List[Dict[str, Any]]:
+        if not items:
+            return []
+        
+        def safe(item):
+            try:
+                return func(item)
+            except Exception as e:
+                logger.error(f"批量上传失败: {item}, {e}")
+                return {'success': False, 'error': str(e)}
+        
+        workers = min(max_workers or BATCH_UPLOAD_WORKERS, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(safe, items))
+        logger.info(f"批量上传完成: {sum(1 for r in results if r.get('success'))}/{len(items)} 成功")
+        return results
+    
     def delete_file(self, remote_path: str) -> bool:
         """
         删除 OSS 上的文件
@@ -258,7 +555,9 @@ class OSSService:
         content_type: str = None
     ) -> Dict[str, Any]:
         """
-        从 URL 直接上传到 OSS（服务端拷贝，不经过本地）
+        从 URL 直接上传到 OSS（流式中转，不落盘）
+        
+        小文件单次上传；大文件或长度未知时响应流直接进入分片上传。
         
         Args:
             source_url: 源文件 URL（必须公网可访问）
@@ -274,18 +573,24 @@ class OSSService:
         try:
             import requests
             
-            # 下载文件内容到内存
-            response = requests.get(source_url, timeout=60, stream=True)
-            response.raise_for_status()
-            
-            # 自动检测 Content-Type
-            if not content_type:
-                content_type = response.headers.get('Content-Type', 'application/octet-stream')
-            
-            headers = {'Content-Type': content_type}
-            
-            # 直接上传到 OSS（从内存，不写本地文件）
-            self._bucket.put_object(remote_path, response.content, headers=headers)
+            with requests.get(source_url, timeout=60, stream=True) as response:
+                response.raise_for_status()
+                
+                # 自动检测 Content-Type
+                if not content_type:
+                    content_type = response.headers.get('Content-Type', 'application/octet-stream')
+                
+                length = int(response.headers.get('Content-Length') or 0)
+                if 0 < length <= MULTIPART_THRESHOLD:
+                    # 小文件：读入内存后单次上传
+                    headers = {'Content-Type': content_type}
+                    self._bucket.put_object(remote_path, response.content, headers=headers)
+                else:
+                    # 大文件或未知长度：响应流直接分片上传，不落盘也不整体读入内存
+                    response.raw.decode_content = True
+                    result = self.upload_stream(response.raw, remote_path, content_type=content_type)
+                    if not result.get('success'):
+                        return result
             
             public_url = self.get_public_url(remote_path)
             logger.info(f"URL 直接上传 OSS 成功: {source_url[:50]}... -> {public_url}")
@@ -415,6 +720,33 @@ class OSSService:
         return f"{oss_url}{separator}x-oss-process={process_str}"
 
 
+def _part_info(part_number: int, etag: str, size: int):
+    """构造分片信息（oss2 未安装时退化为同字段的简单对象，供 LocalBucket 使用）"""
+    try:
+        import oss2
+        return oss2.models.PartInfo(part_number, etag, size=size)
+    except ImportError:
+        return SimpleNamespace(part_number=part_number, etag=etag, size=size)
+
+
+def _is_no_such_upload(error: Exception) -> bool:
+    """upload_id 已失效（被中止或过期）"""
+    return 'NoSuchUpload' in type(error).__name__ or 'NoSuchUpload' in str(error)
+
+
+def _read_exactly(stream, size: int) -> bytes:
+    """从流中读取 size 字节（管道可能短读），仅在 EOF 时返回不足 size 的数据"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
 # 全局服务实例
 _oss_service: Optional[OSSService] = None
 
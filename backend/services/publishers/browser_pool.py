@@ -0,0 +1,299 @@
+"""
+Playwright 浏览器池 - 常驻 Chromium + 按平台复用的持久上下文
+
+每次发布都启动一个新 Chromium 需要数秒；这里在后台线程的独立事件循环中常驻浏览器，
+每个平台（同一套 Cookie）复用一个 BrowserContext，Cookie 只在创建时注入；
+换账号 / 重新登录时重建上下文，localStorage / IndexedDB 等站点数据不会跨账号残留。
+
+- 跨平台并发受信号量约束（PUBLISH_MAX_CONCURRENCY）
+- 同一平台的发布串行执行（同一上下文、同一账号）
+- 上下文使用次数 / JS 堆超过阈值时回收重建；浏览器空闲超时后关闭
+- Playwright 对象绑定在创建它的事件循环上，而路由每次请求都会新建事件循环，
+  所以浏览器相关协程统一提交到池内事件循环执行，调用方通过 run() 等待结果
+
+环境变量：
+- PUBLISH_BROWSER_POOL_ENABLED: 是否常驻复用（默认 true；false 时每次发布后关闭浏览器）
+- PUBLISH_MAX_CONCURRENCY: 跨平台最大并发发布数（默认 2）
+- PUBLISH_CONTEXT_MAX_USES: 单个上下文最多复用次数（默认 20）
+- PUBLISH_CONTEXT_MAX_HEAP_MB: 页面 JS 堆超过该值（MB）时回收上下文（默认 512）
+- PUBLISH_BROWSER_IDLE_SECONDS: 浏览器空闲多久后关闭（默认 600）
+"""
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ["--no-sandbox", "--disable-setuid-sandbox"]
+VIEWPORT = {"width": 1920, "height": 1080}
+
+
+def cookie_fingerprint(cookies: list[dict]) -> str:
+    """Cookie 指纹：内容变化（换账号 / 重新登录）时重新注入"""
+    payload = json.dumps(
+        sorted((c.get("name", ""), c.get("value", ""), c.get("domain", "")) for c in cookies),
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _ContextEntry:
+    """一个平台的持久上下文"""
+    context: Any
+    headless: bool
+    fingerprint: str = ""
+    uses: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class BrowserPool:
+    """常驻浏览器池（线程安全；所有 Playwright 操作在池内事件循环执行）"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_context_uses: Optional[int] = None,
+        max_heap_mb: Optional[float] = None,
+        idle_seconds: Optional[float] = None,
+        keep_alive: Optional[bool] = None,
+    ):
+        self.max_concurrency = max_concurrency or int(os.environ.get('PUBLISH_MAX_CONCURRENCY', '2'))
+        self.max_context_uses = max_context_uses or int(os.environ.get('PUBLISH_CONTEXT_MAX_USES', '20'))
+        self.max_heap_mb = max_heap_mb or float(os.environ.get('PUBLISH_CONTEXT_MAX_HEAP_MB', '512'))
+        self.idle_seconds = idle_seconds or float(os.environ.get('PUBLISH_BROWSER_IDLE_SECONDS', '600'))
+        if keep_alive is None:
+            keep_alive = os.environ.get('PUBLISH_BROWSER_POOL_ENABLED', 'true').lower() == 'true'
+        self.keep_alive = keep_alive
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # 以下状态只在池内事件循环中访问
+        self._playwright = None
+        self._browsers: dict[bool, Any] = {}
+        self._contexts: dict[tuple[str, bool], _ContextEntry] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._acquire_lock: Optional[asyncio.Lock] = None
+        self._active = 0
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {"browser_launches": 0, "context_creates": 0, "context_reuses": 0, "recycles": 0}
+
+    # ========== 事件循环 ==========
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def runner():
+                    asyncio.set_event_loop(loop)
+                    self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                    self._acquire_lock = asyncio.Lock()
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=runner, name='browser-pool', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    async def run(
+        self,
+        platform_id: str,
+        cookies: list[dict],
+        headless: bool,
+        fn: Callable[[Any], Awaitable[Any]],
+    ) -> Any:
+        """
+        在平台的持久上下文中打开新页面执行 fn(page)，可在任意事件循环中 await。
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self._with_page(platform_id, cookies, headless, fn), loop,
+        )
+        return await asyncio.wrap_future(future)
+
+    def close(self, timeout: float = 30) -> None:
+        """关闭所有上下文、浏览器与事件循环"""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"浏览器池关闭失败: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop = None
+
+    # ========== 池内协程 ==========
+
+    async def _with_page(self, platform_id, cookies, headless, fn):
+        async with self._semaphore:
+            self._active += 1
+            self._cancel_idle_timer()
+            try:
+                fingerprint = cookie_fingerprint(cookies)
+                while True:
+                    entry = await self._acquire_context(platform_id, headless)
+                    await entry.lock.acquire()
+                    # 等锁期间上下文可能已被回收，换新的重试
+                    if self._contexts.get((platform_id, headless)) is not entry:
+                        entry.lock.release()
+                        continue
+                    if entry.fingerprint and entry.fingerprint != fingerprint:
+                        # Cookie 变更：旧上下文的站点存储属于上一个账号，整体丢弃后重建
+                        await self._discard_context(platform_id, entry, "Cookie 变更")
+                        entry.lock.release()
+                        continue
+                    break
+                try:
+                    await self._apply_cookies(entry, cookies, fingerprint)
+                    page = await entry.context.new_page()
+                    try:
+                        return await fn(page)
+                    finally:
+                        heap_mb = await self._page_heap_mb(page)
+                        await self._safe_close(page)
+                        entry.uses += 1
+                        await self._maybe_recycle(platform_id, entry, heap_mb)
+                finally:
+                    entry.lock.release()
+            finally:
+                self._active -= 1
+                if not self.keep_alive and self._active == 0:
+                    await self._shutdown()
+                elif self._active == 0:
+                    self._schedule_idle_timer()
+
+    async def _get_browser(self, headless: bool):
+        browser = self._browsers.get(headless)
+        if browser is not None and browser.is_connected():
+            return browser
+        if browser is not None:
+            # 浏览器崩溃 / 被关闭：丢弃其上下文
+            logger.warning("浏览器连接已断开，重新启动")
+            for key in [k for k, e in self._contexts.items() if e.headless == headless]:
+                self._contexts.pop(key, None)
+
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+
+        started = time.monotonic()
+        browser = await self._playwright.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+        self._browsers[headless] = browser
+        self.stats["browser_launches"] += 1
+        logger.info(f"浏览器已启动 (headless={headless}, {time.monotonic() - started:.1f}s)")
+        return browser
+
+    async def _acquire_context(self, platform_id: str, headless: bool) -> _ContextEntry:
+        # 串行化启动浏览器 / 创建上下文，避免并发的首次发布重复启动
+        async with self._acquire_lock:
+            browser = await self._get_browser(headless)
+            key = (platform_id, headless)
+            entry = self._contexts.get(key)
+            if entry is None:
+                context = await browser.new_context(viewport=VIEWPORT)
+                entry = self._contexts[key] = _ContextEntry(context=context, headless=headless)
+                self.stats["context_creates"] += 1
+            else:
+                self.stats["context_reuses"] += 1
+            return entry
+
+    @staticmethod
+    async def _apply_cookies(entry: _ContextEntry, cookies: list[dict], fingerprint: str) -> None:
+        """Cookie 只在上下文创建后注入一次（变更时上下文已重建）"""
+        if entry.fingerprint == fingerprint:
+            return
+        await entry.context.add_cookies(cookies)
+        entry.fingerprint = fingerprint
+
+    async def _maybe_recycle(self, platform_id: str, entry: _ContextEntry, heap_mb: Optional[float]) -> None:
+        reason = None
+        if entry.uses >= self.max_context_uses:
+            reason = f"已复用 {entry.uses} 次"
+        elif heap_mb is not None and heap_mb > self.max_heap_mb:
+            reason = f"JS 堆 {heap_mb:.0f}MB"
+        if reason:
+            await self._discard_context(platform_id, entry, reason)
+
+    async def _discard_context(self, platform_id: str, entry: _ContextEntry, reason: str) -> None:
+        logger.info(f"[{platform_id}] 回收浏览器上下文（{reason}）")
+        self._contexts.pop((platform_id, entry.headless), None)
+        self.stats["recycles"] += 1
+        await self._safe_close(entry.context)
+
+    @staticmethod
+    async def _page_heap_mb(page) -> Optional[float]:
+        """Chromium 专有的 performance.memory；页面已关闭或不支持时返回 None"""
+        try:
+            used = await page.evaluate(
+                "() => (performance.memory && performance.memory.usedJSHeapSize) || null"
+            )
+            return used / 1024 / 1024 if used else None
+        except Exception:
+            return None
+
+    @staticmethod
+    async def _safe_close(obj) -> None:
+        try:
+            await obj.close()
+        except Exception:
+            pass
+
+    def _schedule_idle_timer(self) -> None:
+        self._idle_handle = asyncio.get_running_loop().call_later(
+            self.idle_seconds, lambda: asyncio.ensure_future(self._close_if_idle()),
+        )
+
+    def _cancel_idle_timer(self) -> None:
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    async def _close_if_idle(self) -> None:
+        if self._active == 0 and self._browsers:
+            logger.info(f"浏览器空闲超过 {self.idle_seconds:.0f}s，关闭以释放内存")
+            await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        self._cancel_idle_timer()
+        for entry in list(self._contexts.values()):
+            await self._safe_close(entry.context)
+        self._contexts.clear()
+        for browser in list(self._browsers.values()):
+            await self._safe_close(browser)
+        self._browsers.clear()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+_browser_pool: Optional[BrowserPool] = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """获取全局浏览器池（首次调用时创建，进程退出时关闭）"""
+    global _browser_pool
+    if _browser_pool is None:
+        with _browser_pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool()
+                atexit.register(_browser_pool.close)
+    return _browser_pool
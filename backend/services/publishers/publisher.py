@@ -2,9 +2,10 @@
 通用发布器 - 配置驱动的多平台文章发布
 """
 
-from playwright.async_api import async_playwright
 from typing import Optional
+from .browser_pool import BrowserPool, get_browser_pool
 from .workflow_engine import WorkflowEngine, PublishContext
+import asyncio
 import logging
 import re
 
@@ -30,11 +31,38 @@ def extract_tags_from_content(content: str) -> list[str]:
     return []
 
 
+def normalize_cookies(cookies: list, cookie_domain: str) -> list[dict]:
+    """确保每个 Cookie 都有必要的字段（支持字典格式和 "name=value" 字符串格式）"""
+    normalized_cookies = []
+    for cookie in cookies:
+        if isinstance(cookie, dict):
+            c = {
+                "name": cookie.get("name", ""),
+                "value": cookie.get("value", ""),
+                "domain": cookie.get("domain", cookie_domain),
+                "path": cookie.get("path", "/"),
+            }
+        elif isinstance(cookie, str) and '=' in cookie:
+            # 解析 "name=value" 格式
+            eq_idx = cookie.index('=')
+            c = {
+                "name": cookie[:eq_idx].strip(),
+                "value": cookie[eq_idx+1:].strip(),
+                "domain": cookie_domain,
+                "path": "/",
+            }
+        else:
+            continue
+        normalized_cookies.append(c)
+    return normalized_cookies
+
+
 class Publisher:
     """通用发布器（配置驱动）"""
     
-    def __init__(self, config_dir: str = None):
+    def __init__(self, config_dir: str = None, pool: Optional[BrowserPool] = None):
         self.engine = WorkflowEngine(config_dir)
+        self.pool = pool or get_browser_pool()
     
     def get_supported_platforms(self) -> list[str]:
         """获取支持的平台列表"""
@@ -122,106 +150,70 @@ class Publisher:
             images=images or []
         )
         
-        async with async_playwright() as p:
-            try:
-                browser = await p.chromium.launch(
-                    headless=headless,
-                    args=["--no-sandbox", "--disable-setuid-sandbox"]
-                )
-                ctx = await browser.new_context(
-                    viewport={"width": 1920, "height": 1080}
-                )
-                
-                # 确保每个 Cookie 都有必要的字段
-                normalized_cookies = []
-                cookie_domain = config['platform'].get('cookie_domain', '.csdn.net')
-                for cookie in cookies:
-                    # 支持字典格式和字符串格式
-                    if isinstance(cookie, dict):
-                        c = {
-                            "name": cookie.get("name", ""),
-                            "value": cookie.get("value", ""),
-                            "domain": cookie.get("domain", cookie_domain),
-                            "path": cookie.get("path", "/"),
-                        }
-                    elif isinstance(cookie, str) and '=' in cookie:
-                        # 解析 "name=value" 格式
-                        eq_idx = cookie.index('=')
-                        c = {
-                            "name": cookie[:eq_idx].strip(),
-                            "value": cookie[eq_idx+1:].strip(),
-                            "domain": cookie_domain,
-                            "path": "/",
-                        }
-                    else:
-                        continue
-                    normalized_cookies.append(c)
-                
-                await ctx.add_cookies(normalized_cookies)
-                page = await ctx.new_page()
-                
-                logger.info(f"[{platform_name}] 导航到: {editor_url}")
-                await page.goto(editor_url, timeout=60000)
-                await page.wait_for_timeout(3000)
-                
-                login_check = config.get('login_check', {})
-                if login_check.get('type') == 'url_not_contains':
-                    if login_check['value'] in page.url.lower():
-                        await browser.close()
-                        return {
-                            "success": False,
-                            "url": None,
-                            "message": f"Cookie 已过期，请重新登录 {platform_name}",
-                            "platform": platform_name
-                        }
-                
-                logger.info(f"[{platform_name}] 上传内容...")
-                result = await self.engine.upload_content(page, config, context)
-                if not result.success:
-                    await browser.close()
-                    return {
-                        "success": False,
-                        "url": None,
-                        "message": f"内容上传失败: {result.message}",
-                        "platform": platform_name
-                    }
-                
-                logger.info(f"[{platform_name}] 执行发布工作流...")
-                result = await self.engine.execute_workflow(page, config, context)
-                if not result.success:
-                    await browser.close()
+        cookie_domain = config['platform'].get('cookie_domain', '.csdn.net')
+        normalized_cookies = normalize_cookies(cookies, cookie_domain)
+
+        async def publish_on_page(page) -> dict:
+            logger.info(f"[{platform_name}] 导航到: {editor_url}")
+            await page.goto(editor_url, timeout=60000)
+            await page.wait_for_timeout(config['platform'].get('settle_ms', 3000))
+
+            login_check = config.get('login_check', {})
+            if login_check.get('type') == 'url_not_contains':
+                if login_check['value'] in page.url.lower():
                     return {
                         "success": False,
                         "url": None,
-                        "message": f"发布流程失败: {result.message}",
+                        "message": f"Cookie 已过期，请重新登录 {platform_name}",
                         "platform": platform_name
                     }
-                
-                article_url = await self.engine.get_result_url(page, config)
-                
-                await browser.close()
-                
-                if article_url:
-                    logger.info(f"[{platform_name}] 发布成功: {article_url}")
-                else:
-                    logger.info(f"[{platform_name}] 发布完成，但未获取到文章 URL")
-                
+
+            logger.info(f"[{platform_name}] 上传内容...")
+            result = await self.engine.upload_content(page, config, context)
+            if not result.success:
                 return {
-                    "success": True,
-                    "url": article_url,
-                    "message": "发布成功" if article_url else "发布完成（请到平台查看）",
+                    "success": False,
+                    "url": None,
+                    "message": f"内容上传失败: {result.message}",
                     "platform": platform_name
                 }
-                    
-            except Exception as e:
-                logger.error(f"[{platform_name}] 发布失败: {e}")
+
+            logger.info(f"[{platform_name}] 执行发布工作流...")
+            result = await self.engine.execute_workflow(page, config, context)
+            if not result.success:
                 return {
                     "success": False,
                     "url": None,
-                    "message": f"发布失败: {str(e)}",
+                    "message": f"发布流程失败: {result.message}",
                     "platform": platform_name
                 }
-    
+
+            article_url = await self.engine.get_result_url(page, config)
+
+            if article_url:
+                logger.info(f"[{platform_name}] 发布成功: {article_url}")
+            else:
+                logger.info(f"[{platform_name}] 发布完成，但未获取到文章 URL")
+
+            return {
+                "success": True,
+                "url": article_url,
+                "message": "发布成功" if article_url else "发布完成（请到平台查看）",
+                "platform": platform_name
+            }
+
+        # 浏览器与平台上下文由常驻浏览器池复用，避免每次发布都冷启动 Chromium
+        try:
+            return await self.pool.run(platform_id, normalized_cookies, headless, publish_on_page)
+        except Exception as e:
+            logger.error(f"[{platform_name}] 发布失败: {e}")
+            return {
+                "success": False,
+                "url": None,
+                "message": f"发布失败: {str(e)}",
+                "platform": platform_name
+            }
+
     async def publish_to_multiple(
         self,
         platforms: list[str],
@@ -230,6 +222,7 @@ class Publisher:
         content: str,
         tags: Optional[list[str]] = None,
         category: Optional[str] = None,
+        headless: bool = True,
     ) -> list[dict]:
         """
         一键发布到多个平台
@@ -241,30 +234,29 @@ class Publisher:
             content: 文章内容
             tags: 标签列表
             category: 分类
+            headless: 是否无头模式运行浏览器
             
         Returns:
             list[dict]: 每个平台的发布结果
         """
-        results = []
-        for platform_id in platforms:
+        async def publish_one(platform_id: str) -> dict:
             cookies = cookies_map.get(platform_id, [])
             if not cookies:
-                results.append({
+                return {
                     "success": False,
                     "url": None,
                     "message": f"未配置 {platform_id} 的登录信息",
                     "platform": platform_id
-                })
-                continue
-            
-            result = await self.publish(
+                }
+            return await self.publish(
                 platform_id=platform_id,
                 cookies=cookies,
                 title=title,
                 content=content,
                 tags=tags,
-                category=category
+                category=category,
+                headless=headless,
             )
-            results.append(result)
-        
-        return results
+
+        # 各平台并发发布（并发上限由浏览器池控制），结果顺序与 platforms 一致
+        return list(await asyncio.gather(*(publish_one(p) for p in platforms)))
@@ -1,10 +1,10 @@
 """
 工作流引擎 - 配置驱动的浏览器自动化
 """
+from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Optional
-from playwright.async_api import Page
+from typing import TYPE_CHECKING, Any, Optional
 import yaml
 import tempfile
 import os
@@ -12,6 +12,9 @@ import re
 import logging
 import httpx
 
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
 logger = logging.getLogger(__name__)
 
 
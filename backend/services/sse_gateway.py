@@ -0,0 +1,371 @@
+"""
+SSE 网关 - 基于 asyncio 事件循环的任务进度推送
+
+Flask 的 SSE 端点每个连接独占一个 gunicorn 线程（gthread 仅 4 个），
+打开几个进度页就会占满全部线程、阻塞其他 API。网关在同一进程内的一个
+后台线程中运行 asyncio 事件循环，所有订阅者共享这一个线程：
+
+- TaskManager.send_event 入队后通过事件监听器唤醒事件循环（call_soon_threadsafe），无轮询
+- 每个任务的事件由网关从 TaskManager 队列取出后广播给该任务的全部订阅者
+- 仅依赖标准库 asyncio streams；部署时由 nginx 将 SSE 路径转发到网关端口
+- TaskManager 使用共享存储（TASK_STATE_BACKEND=sqlite）时，其他进程产生的事件
+  无法触发本进程的监听器，网关改为按 TASK_EVENT_POLL_INTERVAL 轮询有订阅者的任务
+
+支持的路径（与 Flask 端点格式一致，可互相替换）：
+- GET /api/tasks/<task_id>/stream
+- GET /api/xhs/stream/<task_id>
+- GET /health
+
+环境变量：
+- SSE_GATEWAY_ENABLED: 是否随应用启动网关（默认 false）
+- SSE_GATEWAY_HOST / SSE_GATEWAY_PORT: 监听地址（默认 0.0.0.0:5002）
+- SSE_HEARTBEAT_INTERVAL: 心跳间隔秒数（默认 30）
+- SSE_SUBSCRIBER_BUFFER: 单个订阅者最多积压事件数，超出后断开慢客户端（默认 1000）
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from queue import Empty
+from typing import Dict, Any, Optional, Set
+from urllib.parse import urlsplit
+
+from services.task_service import TaskManager, get_task_manager
+
+logger = logging.getLogger(__name__)
+
+_ROUTES = [
+    (re.compile(r'^/api/tasks/([^/]+)/stream$'), 'task'),
+    (re.compile(r'^/api/xhs/stream/([^/]+)$'), 'xhs'),
+]
+
+_CORS_HEADERS = (
+    'Access-Control-Allow-Origin: *\r\n'
+    'Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n'
+)
+
+
+def format_sse(message: Dict[str, Any], include_id: bool = True) -> str:
+    """将 TaskManager 队列消息格式化为 SSE 文本帧"""
+    event_type = message.get('event', 'progress')
+    data = message.get('data', {})
+    timestamp = message.get('timestamp')
+    if include_id and timestamp:
+        data['_ts'] = timestamp
+    lines = []
+    if include_id and message.get('id'):
+        lines.append(f"id: {message['id']}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "".join(line + "\n" for line in lines) + "\n"
+
+
+def is_terminal(message: Dict[str, Any]) -> bool:
+    """complete / cancelled / 不可恢复 error 之后关闭流"""
+    event_type = message.get('event')
+    if event_type in ('complete', 'cancelled'):
+        return True
+    return event_type == 'error' and not message.get('data', {}).get('recoverable')
+
+
+class _Subscriber:
+    """单个 SSE 连接的事件缓冲"""
+
+    __slots__ = ('messages', 'wakeup', 'overflow')
+
+    def __init__(self):
+        self.messages = deque()
+        self.wakeup = asyncio.Event()
+        self.overflow = False
+
+    def push(self, message: Dict[str, Any], limit: int):
+        if len(self.messages) >= limit:
+            self.overflow = True
+        else:
+            self.messages.append(message)
+        self.wakeup.set()
+
+
+class SSEGateway:
+    """
+    SSE 网关（单线程 asyncio 服务器）
+
+    用法：
+        gateway = SSEGateway(port=5002)
+        gateway.start()
+    """
+
+    def __init__(
+        self,
+        task_manager: TaskManager = None,
+        host: str = None,
+        port: int = None,
+        heartbeat_interval: float = None,
+        subscriber_buffer: int = None
+    ):
+        self.task_manager = task_manager or get_task_manager()
+        self.host = host or os.getenv('SSE_GATEWAY_HOST', '0.0.0.0')
+        self.port = int(port if port is not None else os.getenv('SSE_GATEWAY_PORT', '5002'))
+        self.heartbeat_interval = float(
+            heartbeat_interval or os.getenv('SSE_HEARTBEAT_INTERVAL', '30')
+        )
+        self.subscriber_buffer = int(subscriber_buffer or os.getenv('SSE_SUBSCRIBER_BUFFER', '1000'))
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._start_error: Optional[Exception] = None
+        self._subscribers: Dict[str, Set[_Subscriber]] = {}
+        # 每个有订阅者的任务一个事件队列（共享存储模式下为独立的读取游标）
+        self._task_queues: Dict[str, Any] = {}
+        self._finished_tasks: Set[str] = set()
+        self.stats = {'connections': 0, 'active': 0, 'events_sent': 0, 'slow_disconnects': 0}
+
+    # ========== 生命周期 ==========
+
+    @property
+    def is_running(self) -> bool:
+        return self._server is not None and self._loop is not None and self._loop.is_running()
+
+    def start(self, timeout: float = 5.0) -> bool:
+        """在后台线程中启动事件循环，返回是否监听成功"""
+        if self.is_running:
+            return True
+        self._ready.clear()
+        self._start_error = None
+        self._thread = threading.Thread(target=self._run, name='sse-gateway', daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self._start_error or not self._server:
+            logger.warning(f"SSE 网关启动失败: {self._start_error}")
+            return False
+        logger.info(f"SSE 网关已启动: {self.host}:{self.port}")
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """停止网关并断开所有订阅者"""
+        if not self._loop:
+            return
+        self.task_manager.remove_event_listener(self._on_task_event)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout)
+        self._server = None
+        self._loop = None
+        logger.info("SSE 网关已停止")
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port, backlog=2048)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._start_error = e
+            self._ready.set()
+            loop.close()
+            return
+
+        self.task_manager.add_event_listener(self._on_task_event)
+        if self.task_manager.store is not None:
+            loop.create_task(self._poll_shared_store())
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+
+    # ========== 事件分发 ==========
+
+    def _on_task_event(self, task_id: str):
+        """TaskManager 发送线程回调：仅在有订阅者时唤醒事件循环"""
+        loop = self._loop
+        if task_id in self._subscribers and loop is not None:
+            loop.call_soon_threadsafe(self._dispatch, task_id)
+
+    def _dispatch(self, task_id: str):
+        """（事件循环内）取出任务队列中的全部事件并广播给订阅者"""
+        subscribers = self._subscribers.get(task_id)
+        queue = self._task_queues.get(task_id)
+        if not subscribers or queue is None:
+            return
+        while True:
+            try:
+                message = queue.get_nowait()
+            except Empty:
+                break
+            for subscriber in subscribers:
+                subscriber.push(message, self.subscriber_buffer)
+
+    async def _poll_shared_store(self):
+        """（事件循环内）轮询共享存储中有订阅者的任务"""
+        from services.task_store import EVENT_POLL_INTERVAL
+
+        while True:
+            await asyncio.sleep(EVENT_POLL_INTERVAL)
+            for task_id in list(self._subscribers):
+                try:
+                    self._dispatch(task_id)
+                except Exception as e:
+                    logger.warning(f"SSE 网关读取共享事件失败 [{task_id}]: {e}")
+
+    # ========== HTTP 处理 ==========
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=10)
+            method, target = request.split(b'\r\n', 1)[0].decode('latin-1').split(' ')[:2]
+        except Exception:
+            writer.close()
+            return
+
+        path = urlsplit(target).path
+        try:
+            if method == 'OPTIONS':
+                await self._write_response(writer, '204 No Content', '')
+            elif path == '/health':
+                body = json.dumps({'status': 'ok', 'service': 'sse-gateway', **self.stats})
+                await self._write_response(writer, '200 OK', body, 'application/json')
+            elif method != 'GET':
+                await self._write_response(writer, '405 Method Not Allowed', '')
+            else:
+                for pattern, kind in _ROUTES:
+                    match = pattern.match(path)
+                    if match:
+                        await self._stream(writer, match.group(1), kind)
+                        break
+                else:
+                    await self._write_response(writer, '404 Not Found', '{"error": "not found"}', 'application/json')
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(f"SSE 网关处理请求失败: {e}", exc_info=True)
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write_response(writer, status: str, body: str, content_type: str = 'text/plain'):
+        payload = body.encode('utf-8')
+        writer.write((
+            f'HTTP/1.1 {status}\r\n'
+            f'Content-Type: {content_type}; charset=utf-8\r\n'
+            f'Content-Length: {len(payload)}\r\n'
+            f'{_CORS_HEADERS}'
+            'Connection: close\r\n\r\n'
+        ).encode('latin-1') + payload)
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter, task_id: str, kind: str):
+        """推送单个任务的进度流（与 Flask 端点行为一致）"""
+        if kind == 'xhs' and not self.task_manager.get_task(task_id):
+            body = json.dumps({'success': False, 'error': '任务不存在'}, ensure_ascii=False)
+            await self._write_response(writer, '404 Not Found', body, 'application/json')
+            return
+
+        writer.write((
+            'HTTP/1.1 200 OK\r\n'
+            'Content-Type: text/event-stream; charset=utf-8\r\n'
+            'Cache-Control: no-cache\r\n'
+            'X-Accel-Buffering: no\r\n'
+            f'{_CORS_HEADERS}'
+            'Connection: keep-alive\r\n\r\n'
+        ).encode('latin-1'))
+        include_id = kind == 'task'
+        if kind == 'task':
+            writer.write(
+                f"event: connected\ndata: {json.dumps({'task_id': task_id, 'status': 'connected'})}\n\n".encode()
+            )
+
+        queue = self._task_queues.get(task_id) or self.task_manager.get_queue(task_id)
+        if queue is None:
+            writer.write(
+                f"event: error\ndata: {json.dumps({'message': '任务不存在', 'recoverable': False}, ensure_ascii=False)}\n\n".encode()
+            )
+            await writer.drain()
+            return
+        await writer.drain()
+
+        subscriber = _Subscriber()
+        self._task_queues[task_id] = queue
+        self._subscribers.setdefault(task_id, set()).add(subscriber)
+        self.stats['connections'] += 1
+        self.stats['active'] += 1
+        finished = False
+        try:
+            # 连接前已入队的事件
+            self._dispatch(task_id)
+            while not finished:
+                if not subscriber.messages and not subscriber.overflow:
+                    subscriber.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(subscriber.wakeup.wait(), timeout=self.heartbeat_interval)
+                    except asyncio.TimeoutError:
+                        writer.write(f"event: heartbeat\ndata: {json.dumps({'timestamp': time.time()})}\n\n".encode())
+                        await writer.drain()
+                        continue
+                if subscriber.overflow:
+                    self.stats['slow_disconnects'] += 1
+                    logger.warning(f"SSE 订阅者积压过多，断开连接: {task_id}")
+                    break
+
+                frames = []
+                while subscriber.messages:
+                    message = subscriber.messages.popleft()
+                    frames.append(format_sse(dict(message, data=dict(message.get('data', {}))), include_id))
+                    if is_terminal(message):
+                        finished = True
+                        break
+                writer.write(''.join(frames).encode('utf-8'))
+                self.stats['events_sent'] += len(frames)
+                await writer.drain()
+        finally:
+            self.stats['active'] -= 1
+            if finished and task_id not in self._finished_tasks:
+                self._finished_tasks.add(task_id)
+                self.task_manager.cleanup_task(task_id)
+            subscribers = self._subscribers.get(task_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(task_id, None)
+                    self._task_queues.pop(task_id, None)
+                    # 只在仍有订阅者期间去重清理调度，避免长期运行的 worker 无限累积
+                    self._finished_tasks.discard(task_id)
+
+
+# 全局网关实例
+_sse_gateway: Optional[SSEGateway] = None
+
+
+def get_sse_gateway() -> Optional[SSEGateway]:
+    """获取全局 SSE 网关实例"""
+    return _sse_gateway
+
+
+def init_sse_gateway(**kwargs) -> Optional[SSEGateway]:
+    """
+    启动全局 SSE 网关（SSE_GATEWAY_ENABLED=true 时由 create_app 调用）
+
+    端口被占用（如开发模式 reloader 重复启动）时返回 None，
+    此时前端仍可使用 Flask 端点。
+    """
+    global _sse_gateway
+    if _sse_gateway and _sse_gateway.is_running:
+        return _sse_gateway
+    gateway = SSEGateway(**kwargs)
+    if not gateway.start():
+        return None
+    _sse_gateway = gateway
+    return _sse_gateway
@@ -6,10 +6,14 @@ CronScheduler — 纯 Python 自驱动调度器
 - croniter 解析 cron 表达式（替代 croner）
 - SQLite 持久化（替代 JSON 文件）
 - 指数退避 + 卡死检测 + 重启恢复
+- 到期任务走 next_run_at 部分索引查询；并发派发（上限 CRON_MAX_CONCURRENT_JOBS），
+  单个任务异常不影响其他任务，记录派发延迟（实际开始 - 计划时间）
 """
 import asyncio
 import logging
+import os
 import uuid
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -27,6 +31,7 @@ from .models import (
 logger = logging.getLogger(__name__)
 
 MAX_SCHEDULE_ERRORS = 3
+LAG_WINDOW = 1000  # 派发延迟统计保留最近 N 次
 
 
 def compute_next_run_at(
@@ -69,6 +74,42 @@ def compute_next_run_at(
     return None
 
 
+class DispatchMetrics:
+    """派发延迟统计：实际开始时间 - 计划时间（秒）"""
+
+    def __init__(self, window: int = LAG_WINDOW):
+        self._lags: deque[float] = deque(maxlen=window)
+        self.dispatched = 0
+        self.failed = 0
+        self.max_lag = 0.0
+        self.peak_running = 0
+
+    def record(self, lag_seconds: float, running: int):
+        lag_seconds = max(lag_seconds, 0.0)
+        self._lags.append(lag_seconds)
+        self.dispatched += 1
+        self.max_lag = max(self.max_lag, lag_seconds)
+        self.peak_running = max(self.peak_running, running)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._lags:
+            return None
+        lags = sorted(self._lags)
+        return lags[min(int(q * len(lags)), len(lags) - 1)]
+
+    def snapshot(self) -> dict:
+        def fmt(value):
+            return round(value, 3) if value is not None else None
+        return {
+            'dispatched': self.dispatched,
+            'failed': self.failed,
+            'peak_running': self.peak_running,
+            'lag_p50_seconds': fmt(self.percentile(0.5)),
+            'lag_p95_seconds': fmt(self.percentile(0.95)),
+            'lag_max_seconds': fmt(self.max_lag if self._lags else None),
+        }
+
+
 class CronScheduler:
     """
     自驱动调度器 — 对应 OpenClaw CronService
@@ -81,11 +122,21 @@ class CronScheduler:
         queue_manager,
         db_path: str = "data/task_queue.db",
         enabled: bool = True,
+        max_concurrent: Optional[int] = None,
     ):
         self.db = TaskDB(db_path)
         self.executor = CronExecutor(queue_manager)
         self._enabled = enabled
         self._lock = asyncio.Lock()
+        self.max_concurrent = max_concurrent or int(
+            os.environ.get('CRON_MAX_CONCURRENT_JOBS', '4')
+        )
+        # tick 最多等待本批任务这么久，之后未完成的任务在后台继续执行，不阻塞后续 tick
+        self.tick_wait_seconds = float(
+            os.environ.get('CRON_TICK_WAIT_SECONDS', '30')
+        )
+        self._running: dict[str, asyncio.Task] = {}
+        self.metrics = DispatchMetrics()
         self._timer = CronTimer(
             get_next_wake_at=self._get_next_wake_at,
             tick=self._tick,
@@ -189,14 +240,16 @@ class CronScheduler:
         return await self.db.get_cron_jobs(include_disabled=include_disabled)
 
     async def status(self) -> dict:
-        jobs = await self.db.get_cron_jobs()
-        enabled_jobs = [j for j in jobs if j.enabled]
-        next_wake = await self._get_next_wake_at()
+        total, enabled = await self.db.count_cron_jobs()
+        next_wake = await self.db.get_next_cron_run_at()
         return {
             'enabled': self._enabled,
-            'total_jobs': len(jobs),
-            'enabled_jobs': len(enabled_jobs),
+            'total_jobs': total,
+            'enabled_jobs': enabled,
             'next_wake_at': next_wake.isoformat() if next_wake else None,
+            'max_concurrent': self.max_concurrent,
+            'running_jobs': len(self._running),
+            'dispatch': self.metrics.snapshot(),
         }
 
     # ── 暂停 / 恢复 / 重试 / 手动触发 ──
@@ -257,29 +310,64 @@ class CronScheduler:
     # ── 定时器回调 ──
 
     async def _get_next_wake_at(self) -> Optional[datetime]:
-        jobs = await self.db.get_cron_jobs(include_disabled=False)
-        candidates = [
-            j.state.next_run_at for j in jobs
-            if j.state.next_run_at and not j.state.running_at
-        ]
-        return min(candidates) if candidates else None
+        if len(self._running) >= self.max_concurrent:
+            # 并发已满：不空转，等任务完成时再 arm
+            return None
+        return await self.db.get_next_cron_run_at()
 
     async def _tick(self):
         """
         定时器触发：找到到期任务并执行。
         对应 OpenClaw: src/cron/service/timer.ts onTimer()
         """
-        now = datetime.now()
-        jobs = await self.db.get_cron_jobs(include_disabled=False)
-        due_jobs = [
-            j for j in jobs
-            if j.state.next_run_at
-            and j.state.next_run_at <= now
-            and not j.state.running_at
-        ]
+        await self._dispatch_due(datetime.now())
+
+    async def _dispatch_due(self, now: datetime):
+        """
+        认领到期任务并并发执行（不超过 max_concurrent），
+        等待本批完成至多 tick_wait_seconds。
+        """
+        slots = self.max_concurrent - len(self._running)
+        if slots <= 0:
+            return
 
+        async with self._lock:
+            due_jobs = [
+                j for j in await self.db.get_due_cron_jobs(now, limit=slots)
+                if j.id not in self._running
+            ]
+            started_at = datetime.now()
+            claimed = await self.db.mark_cron_jobs_running(
+                [j.id for j in due_jobs], started_at
+            )
+            due_jobs = [j for j in due_jobs if j.id in claimed]
+
+        tasks = []
         for job in due_jobs:
-            await self._execute_job(job)
+            scheduled_at = job.state.next_run_at
+            job.state.running_at = started_at
+            task = asyncio.ensure_future(self._run_claimed(job))
+            self._running[job.id] = task
+            task.add_done_callback(
+                lambda _t, job_id=job.id: self._on_job_done(job_id)
+            )
+            self.metrics.record(
+                (started_at - scheduled_at).total_seconds(), len(self._running)
+            )
+            tasks.append(task)
+
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.tick_wait_seconds)
+            if pending:
+                logger.info(
+                    f"[CronScheduler] {len(pending)} 个任务仍在执行，转入后台"
+                )
+
+    def _on_job_done(self, job_id: str):
+        self._running.pop(job_id, None)
+        # tick 之外完成的任务：空出了并发槽，重新计算唤醒时间
+        if not self._timer.ticking:
+            asyncio.ensure_future(self._timer.arm())
 
     async def _execute_job(self, job: CronJob):
         """执行单个任务"""
@@ -287,24 +375,33 @@ class CronScheduler:
             job.state.running_at = datetime.now()
             await self.db.save_cron_job(job)
 
-        result = await self.executor.execute(job)
+        await self._run_claimed(job)
 
-        async with self._lock:
-            fresh_job = await self.db.get_cron_job(job.id)
-            if not fresh_job:
-                return
+    async def _run_claimed(self, job: CronJob):
+        """执行已认领（running_at 已写入）的任务；异常只影响本任务"""
+        try:
+            result = await self.executor.execute(job)
 
-            should_delete = self.executor.apply_result(
-                fresh_job, result, compute_next_run_at
-            )
+            async with self._lock:
+                fresh_job = await self.db.get_cron_job(job.id)
+                if not fresh_job:
+                    return
 
-            if should_delete:
-                await self.db.delete_cron_job(fresh_job.id)
-                logger.info(
-                    f"[CronScheduler] 一次性任务已删除: {fresh_job.id}"
+                should_delete = self.executor.apply_result(
+                    fresh_job, result, compute_next_run_at
                 )
-            else:
-                await self.db.save_cron_job(fresh_job)
+
+                if should_delete:
+                    await self.db.delete_cron_job(fresh_job.id)
+                    logger.info(
+                        f"[CronScheduler] 一次性任务已删除: {fresh_job.id}"
+                    )
+                else:
+                    await self.db.save_cron_job(fresh_job)
+        except Exception as e:
+            # running_at 未清除的任务由卡死检测兜底
+            self.metrics.failed += 1
+            logger.error(f"[CronScheduler] 任务执行异常: {job.id} - {e}")
 
     # ── 启动恢复 ──
 
@@ -314,34 +411,22 @@ class CronScheduler:
         对应 OpenClaw: src/cron/service/ops.ts start()
         """
         async with self._lock:
-            jobs = await self.db.get_cron_jobs()
+            jobs = await self.db.get_running_cron_jobs()
             for job in jobs:
-                if job.state.running_at:
-                    logger.warning(
-                        f"[CronScheduler] 清除残留 running_at: "
-                        f"{job.id} '{job.name}'"
-                    )
-                    job.state.running_at = None
-                    await self.db.save_cron_job(job)
+                logger.warning(
+                    f"[CronScheduler] 清除残留 running_at: "
+                    f"{job.id} '{job.name}'"
+                )
+                job.state.running_at = None
+            await self.db.save_cron_jobs(jobs)
 
         await self._run_missed_jobs()
 
     async def _run_missed_jobs(self):
-        """补执行错过的任务"""
-        now = datetime.now()
-        jobs = await self.db.get_cron_jobs(include_disabled=False)
-        missed = [
-            j for j in jobs
-            if j.state.next_run_at
-            and j.state.next_run_at < now
-            and not j.state.running_at
-        ]
-        for job in missed:
-            logger.info(
-                f"[CronScheduler] 补执行错过的任务: "
-                f"{job.id} '{job.name}'"
-            )
-            await self._execute_job(job)
+        """
+        补执行错过的任务（首批按并发上限派发，其余由后续 tick 接续）
+        """
+        await self._dispatch_due(datetime.now())
 
     # ── 卡死检测 ──
 
@@ -353,21 +438,17 @@ class CronScheduler:
         now = datetime.now()
         threshold = now - timedelta(seconds=STUCK_RUN_SECONDS)
         async with self._lock:
-            jobs = await self.db.get_cron_jobs()
+            jobs = await self.db.get_running_cron_jobs(started_before=threshold)
             for job in jobs:
-                if (
-                    job.state.running_at
-                    and job.state.running_at < threshold
-                ):
-                    logger.warning(
-                        f"[CronScheduler] 卡死任务已清除: "
-                        f"{job.id} (running since {job.state.running_at})"
-                    )
-                    job.state.running_at = None
-                    job.state.last_status = CronJobStatus.ERROR
-                    job.state.last_error = "stuck: 执行超过 2 小时"
-                    job.state.consecutive_errors += 1
-                    await self.db.save_cron_job(job)
+                logger.warning(
+                    f"[CronScheduler] 卡死任务已清除: "
+                    f"{job.id} (running since {job.state.running_at})"
+                )
+                job.state.running_at = None
+                job.state.last_status = CronJobStatus.ERROR
+                job.state.last_error = "stuck: 执行超过 2 小时"
+                job.state.consecutive_errors += 1
+            await self.db.save_cron_jobs(jobs)
 
     # ── 调度重算 ──
 
@@ -378,10 +459,8 @@ class CronScheduler:
         """
         now = datetime.now()
         async with self._lock:
-            jobs = await self.db.get_cron_jobs()
+            jobs = [j for j in await self.db.get_cron_jobs() if j.enabled]
             for job in jobs:
-                if not job.enabled:
-                    continue
                 try:
                     next_at = compute_next_run_at(job.schedule, now)
                     # cron/every 类型有表达式但返回 None → 视为调度计算失败
@@ -395,7 +474,6 @@ class CronScheduler:
                         )
                     job.state.next_run_at = next_at
                     job.state.schedule_error_count = 0
-                    await self.db.save_cron_job(job)
                 except Exception as e:
                     job.state.schedule_error_count += 1
                     logger.warning(
@@ -408,7 +486,7 @@ class CronScheduler:
                             f"[CronScheduler] 自动禁用: {job.id} "
                             f"(调度计算连续失败 {MAX_SCHEDULE_ERRORS} 次)"
                         )
-                    await self.db.save_cron_job(job)
+            await self.db.save_cron_jobs(jobs)
 
     # ── 内部工具 ──
 
@@ -36,6 +36,11 @@ class CronTimer:
         self._ticking = False
         self._loop: Optional[asyncio.AbstractEventLoop] = None
 
+    @property
+    def ticking(self) -> bool:
+        """是否正在执行 tick（tick 结束时会自行 arm）"""
+        return self._ticking
+
     def start(self):
         """启动定时器循环"""
         try:
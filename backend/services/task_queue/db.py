@@ -186,47 +186,70 @@ class TaskDB:
 
     # ── Cron Job CRUD ──
 
+    _CRON_JOB_UPSERT = """
+        INSERT OR REPLACE INTO cron_jobs
+        (id, name, description, enabled, delete_after_run,
+         schedule_kind, schedule_at, schedule_every_seconds,
+         schedule_anchor_at, schedule_expr, schedule_tz,
+         generation_config, publish_config, timeout_seconds,
+         next_run_at, running_at, last_run_at, last_status,
+         last_error, last_duration_ms, consecutive_errors,
+         schedule_error_count,
+         created_at, updated_at, tags, user_id)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+    """
+
+    # 到期条件须与 idx_cj_due 部分索引的 WHERE 一致；显式 INDEXED BY，
+    # 避免无统计信息时规划器选 idx_cj_enabled 后再排序
+    _CRON_DUE_FROM = (
+        "FROM cron_jobs INDEXED BY idx_cj_due "
+        "WHERE enabled = 1 AND running_at IS NULL AND next_run_at IS NOT NULL"
+    )
+
     async def save_cron_job(self, job: CronJob):
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO cron_jobs
-                (id, name, description, enabled, delete_after_run,
-                 schedule_kind, schedule_at, schedule_every_seconds,
-                 schedule_anchor_at, schedule_expr, schedule_tz,
-                 generation_config, publish_config, timeout_seconds,
-                 next_run_at, running_at, last_run_at, last_status,
-                 last_error, last_duration_ms, consecutive_errors,
-                 schedule_error_count,
-                 created_at, updated_at, tags, user_id)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """, (
-                job.id, job.name, job.description,
-                1 if job.enabled else 0,
-                1 if job.delete_after_run else 0,
-                job.schedule.kind.value,
-                job.schedule.at.isoformat() if job.schedule.at else None,
-                job.schedule.every_seconds,
-                job.schedule.anchor_at.isoformat() if job.schedule.anchor_at else None,
-                job.schedule.expr,
-                job.schedule.tz,
-                job.generation.model_dump_json(),
-                job.publish.model_dump_json(),
-                job.timeout_seconds,
-                job.state.next_run_at.isoformat() if job.state.next_run_at else None,
-                job.state.running_at.isoformat() if job.state.running_at else None,
-                job.state.last_run_at.isoformat() if job.state.last_run_at else None,
-                job.state.last_status.value if job.state.last_status else None,
-                job.state.last_error,
-                job.state.last_duration_ms,
-                job.state.consecutive_errors,
-                job.state.schedule_error_count,
-                job.created_at.isoformat(),
-                job.updated_at.isoformat(),
-                json.dumps(job.tags),
-                job.user_id,
-            ))
+            await db.execute(self._CRON_JOB_UPSERT, self._cron_job_params(job))
             await db.commit()
 
+    async def save_cron_jobs(self, jobs: list[CronJob]):
+        """批量保存（单连接、单事务）"""
+        if not jobs:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                self._CRON_JOB_UPSERT, [self._cron_job_params(j) for j in jobs]
+            )
+            await db.commit()
+
+    @staticmethod
+    def _cron_job_params(job: CronJob) -> tuple:
+        return (
+            job.id, job.name, job.description,
+            1 if job.enabled else 0,
+            1 if job.delete_after_run else 0,
+            job.schedule.kind.value,
+            job.schedule.at.isoformat() if job.schedule.at else None,
+            job.schedule.every_seconds,
+            job.schedule.anchor_at.isoformat() if job.schedule.anchor_at else None,
+            job.schedule.expr,
+            job.schedule.tz,
+            job.generation.model_dump_json(),
+            job.publish.model_dump_json(),
+            job.timeout_seconds,
+            job.state.next_run_at.isoformat() if job.state.next_run_at else None,
+            job.state.running_at.isoformat() if job.state.running_at else None,
+            job.state.last_run_at.isoformat() if job.state.last_run_at else None,
+            job.state.last_status.value if job.state.last_status else None,
+            job.state.last_error,
+            job.state.last_duration_ms,
+            job.state.consecutive_errors,
+            job.state.schedule_error_count,
+            job.created_at.isoformat(),
+            job.updated_at.isoformat(),
+            json.dumps(job.tags),
+            job.user_id,
+        )
+
     async def get_cron_job(self, job_id: str) -> Optional[CronJob]:
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
@@ -251,6 +274,70 @@ class TaskDB:
                 rows = await cursor.fetchall()
                 return [self._row_to_cron_job(dict(r)) for r in rows]
 
+    async def get_due_cron_jobs(self, now: datetime, limit: int) -> list[CronJob]:
+        """到期且未在运行的任务，按计划时间升序（走 idx_cj_due 索引）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                f"SELECT * {self._CRON_DUE_FROM} "
+                "AND next_run_at <= ? ORDER BY next_run_at LIMIT ?",
+                (now.isoformat(), limit),
+            ) as cursor:
+                rows = await cursor.fetchall()
+                return [self._row_to_cron_job(dict(r)) for r in rows]
+
+    async def get_next_cron_run_at(self) -> Optional[datetime]:
+        """最近一次待执行时间（索引最小值，不加载任务）"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                f"SELECT next_run_at {self._CRON_DUE_FROM} "
+                "ORDER BY next_run_at LIMIT 1"
+            ) as cursor:
+                row = await cursor.fetchone()
+                return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    async def get_running_cron_jobs(
+        self, started_before: Optional[datetime] = None
+    ) -> list[CronJob]:
+        """running_at 非空的任务；指定 started_before 时只返回在此之前开始的"""
+        sql = "SELECT * FROM cron_jobs WHERE running_at IS NOT NULL"
+        params: tuple = ()
+        if started_before is not None:
+            sql += " AND running_at < ?"
+            params = (started_before.isoformat(),)
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(sql, params) as cursor:
+                rows = await cursor.fetchall()
+                return [self._row_to_cron_job(dict(r)) for r in rows]
+
+    async def mark_cron_jobs_running(self, job_ids: list[str], running_at: datetime) -> set[str]:
+        """
+        认领到期任务：只更新 running_at 仍为空的行，返回实际认领到的任务 ID。
+        其它调度器在 SELECT 之后抢先认领的任务不会被重复派发。
+        """
+        if not job_ids:
+            return set()
+        placeholders = ', '.join('?' * len(job_ids))
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                f"UPDATE cron_jobs SET running_at = ? "
+                f"WHERE id IN ({placeholders}) AND running_at IS NULL RETURNING id",
+                (running_at.isoformat(), *job_ids),
+            ) as cursor:
+                claimed = {row[0] for row in await cursor.fetchall()}
+            await db.commit()
+            return claimed
+
+    async def count_cron_jobs(self) -> tuple[int, int]:
+        """返回 (总数, 启用数)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(enabled), 0) FROM cron_jobs"
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0], row[1]
+
     async def delete_cron_job(self, job_id: str) -> bool:
         async with aiosqlite.connect(self.db_path) as db:
             cursor = await db.execute(
@@ -0,0 +1,41 @@
+"""
+排队 / 定时调度的进程归属
+
+多 worker 部署（GUNICORN_WORKERS>1）时每个 worker 都会执行 create_app：
+残留任务清理会把其它 worker 正在执行的任务标记为失败，
+多个 CronScheduler 也会重复派发同一到期任务。
+这里用数据库旁的文件锁选出唯一的归属进程：持锁进程负责恢复与调度，
+其余 worker 只提供基于 SQLite 的查询 / 增删改接口。锁随进程退出自动释放。
+"""
+import logging
+import os
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 仅支持单进程部署
+    fcntl = None
+
+# 已持有的锁文件（保持打开，进程退出时由系统释放）
+_held: Dict[str, object] = {}
+
+
+def acquire_queue_ownership(db_path: str) -> bool:
+    """尝试成为 db_path 对应排队 / 调度系统的归属进程，已被其它进程持有时返回 False"""
+    lock_path = f"{os.path.abspath(db_path)}.owner.lock"
+    if lock_path in _held:
+        return True
+    if fcntl is None:
+        return True
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    lock_file = open(lock_path, 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        logger.info(f"排队 / 调度系统由其它 worker 负责 (pid={os.getpid()})")
+        return False
+    _held[lock_path] = lock_file
+    return True
@@ -112,3 +112,6 @@ CREATE INDEX IF NOT EXISTS idx_st_enabled ON scheduled_tasks(enabled);
 CREATE INDEX IF NOT EXISTS idx_cj_enabled ON cron_jobs(enabled);
 CREATE INDEX IF NOT EXISTS idx_cj_next_run ON cron_jobs(next_run_at);
 CREATE INDEX IF NOT EXISTS idx_cj_running ON cron_jobs(running_at);
+-- 到期查询 / 最近唤醒时间只扫描可调度的任务
+CREATE INDEX IF NOT EXISTS idx_cj_due ON cron_jobs(next_run_at)
+    WHERE enabled = 1 AND running_at IS NULL AND next_run_at IS NOT NULL;
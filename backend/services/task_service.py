@@ -1,14 +1,19 @@
 """
 SSE 任务管理服务 - 提供实时进度推送
 复用自 AI 绘本项目
+
+默认任务状态与消息队列保存在进程内；TASK_STATE_BACKEND=sqlite 时改用
+services.task_store 的共享存储，多个 gunicorn worker / 生成进程可共享
+任务进度、取消状态与 SSE 事件流。
 """
 import json
 import time
+import heapq
 import logging
 import uuid
 from queue import Queue, Empty
-from threading import Thread, Lock
-from typing import Dict, Any, Optional
+from threading import Thread, Lock, Condition
+from typing import Dict, Any, Optional, Callable, List, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
@@ -36,6 +41,11 @@ class TaskManager:
     
     _instance = None
     _lock = Lock()
+    # 事件监听器：send_event 入队后以 task_id 回调（供 SSE 网关唤醒事件循环）
+    # 采用写时复制的元组，发送线程遍历时无需加锁
+    _event_listeners: Tuple[Callable[[str], None], ...] = ()
+    # 共享存储（None 表示使用进程内的 tasks / queues 字典）
+    store = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -45,13 +55,21 @@ class TaskManager:
                     cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self):
+    def __init__(self, store=None):
         if self._initialized:
             return
         self._initialized = True
+        if store is None:
+            from services.task_store import create_task_store
+            store = create_task_store()
+        self.store = store
         self.tasks: Dict[str, TaskProgress] = {}
         self.queues: Dict[str, Queue] = {}
         self.task_lock = Lock()
+        # 延迟清理：(到期时间, task_id) 小顶堆，由单个后台线程处理
+        self._cleanup_heap: List[tuple] = []
+        self._cleanup_cond = Condition()
+        self._cleanup_thread: Optional[Thread] = None
         logger.info("TaskManager 初始化完成")
     
     def create_task(self, task_id: str = None, task_type: str = None) -> str:
@@ -65,33 +83,64 @@ class TaskManager:
             from datetime import datetime
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
             task_id = f"task_{ts}_{uuid.uuid4().hex[:8]}"
-        with self.task_lock:
-            self.tasks[task_id] = TaskProgress(
-                task_id=task_id,
-                status="pending"
-            )
-            self.queues[task_id] = Queue()
+        if self.store is not None:
+            self.store.create_task(TaskProgress(task_id=task_id, status="pending"))
+        else:
+            with self.task_lock:
+                self.tasks[task_id] = TaskProgress(
+                    task_id=task_id,
+                    status="pending"
+                )
+                self.queues[task_id] = Queue()
         logger.info(f"创建任务: {task_id}" + (f" (类型: {task_type})" if task_type else ""))
         return task_id
     
     def get_task(self, task_id: str) -> Optional[TaskProgress]:
-        """获取任务状态"""
+        """获取任务状态（共享存储模式下返回快照，修改后需经 _save 写回）"""
+        if self.store is not None:
+            return self.store.get_task(task_id)
         return self.tasks.get(task_id)
     
     def get_queue(self, task_id: str) -> Optional[Queue]:
-        """获取任务消息队列"""
+        """获取任务消息队列（共享存储模式下每次返回一个新的读取游标）"""
+        if self.store is not None:
+            return self.store.event_queue(task_id)
         return self.queues.get(task_id)
     
+    def _save(self, task: TaskProgress, *fields: str):
+        """共享存储模式下写回修改过的字段（进程内模式对象即存储本身）"""
+        if self.store is not None:
+            self.store.update_task(task.task_id, {name: getattr(task, name) for name in fields})
+    
+    def add_event_listener(self, listener: Callable[[str], None]):
+        """注册事件监听器（在发送线程中同步调用，须快速返回）"""
+        self._event_listeners = self._event_listeners + (listener,)
+    
+    def remove_event_listener(self, listener: Callable[[str], None]):
+        """移除事件监听器"""
+        self._event_listeners = tuple(l for l in self._event_listeners if l != listener)
+    
     def send_event(self, task_id: str, event: str, data: Dict[str, Any]):
         """发送 SSE 事件（带唯一 ID 和时间戳）"""
-        queue = self.queues.get(task_id)
-        if queue:
-            queue.put({
-                'event': event,
-                'id': uuid.uuid4().hex[:12],
-                'timestamp': time.time(),
-                'data': data,
-            })
+        message = {
+            'event': event,
+            'id': uuid.uuid4().hex[:12],
+            'timestamp': time.time(),
+            'data': data,
+        }
+        if self.store is not None:
+            delivered = self.store.append_event(task_id, message)
+        else:
+            queue = self.queues.get(task_id)
+            if queue:
+                queue.put(message)
+            delivered = queue is not None
+        if delivered:
+            for listener in self._event_listeners:
+                try:
+                    listener(task_id)
+                except Exception as e:
+                    logger.warning(f"事件监听器执行失败: {e}")
             if event not in ('writing_chunk', 'log', 'stream'):
                 logger.debug(f"SSE 事件已入队 [{task_id}]: {event}")
         else:
@@ -103,7 +152,7 @@ class TaskManager:
     
     def send_progress(self, task_id: str, stage: str, progress: int, message: str, **extra):
         """发送进度更新"""
-        task = self.tasks.get(task_id)
+        task = self.get_task(task_id)
         if task:
             task.current_stage = stage
             task.stage_progress = progress
@@ -124,6 +173,7 @@ class TaskManager:
             )
             current_weight = stage_weights.get(stage, 0) * progress / 100
             task.overall_progress = int(completed_weight + current_weight)
+            self._save(task, 'current_stage', 'stage_progress', 'message', 'overall_progress', 'updated_at')
         
         self.send_event(task_id, 'progress', {
             'stage': stage,
@@ -143,14 +193,17 @@ class TaskManager:
     
     def send_result(self, task_id: str, stage: str, result_type: str, data: Dict[str, Any]):
         """发送中间结果"""
-        task = self.tasks.get(task_id)
-        if task:
-            if stage not in task.results:
-                task.results[stage] = {}
-            task.results[stage]['completed'] = True
-            task.results[stage]['data'] = data
-            task.updated_at = datetime.utcnow()
-        
+        entry = {'completed': True, 'data': data}
+        if self.store is not None:
+            # 多个阶段可能并发上报结果，按阶段原子合并而非整列覆盖
+            self.store.merge_result(task_id, stage, entry, datetime.utcnow())
+        else:
+            with self.task_lock:
+                task = self.tasks.get(task_id)
+                if task:
+                    task.results.setdefault(stage, {}).update(entry)
+                    task.updated_at = datetime.utcnow()
+
         self.send_event(task_id, 'result', {
             'stage': stage,
             'type': result_type,
@@ -159,12 +212,13 @@ class TaskManager:
     
     def send_complete(self, task_id: str, outputs: Dict[str, Any]):
         """发送完成事件"""
-        task = self.tasks.get(task_id)
+        task = self.get_task(task_id)
         if task:
             task.status = "completed"
             task.overall_progress = 100
             task.outputs = outputs
             task.updated_at = datetime.utcnow()
+            self._save(task, 'status', 'overall_progress', 'outputs', 'updated_at')
         
         self.send_event(task_id, 'complete', {
             'task_id': task_id,
@@ -174,12 +228,13 @@ class TaskManager:
     
     def send_error(self, task_id: str, stage: str, message: str, recoverable: bool = False, **extra):
         """发送错误事件"""
-        task = self.tasks.get(task_id)
+        task = self.get_task(task_id)
         if task:
             if not recoverable:
                 task.status = "failed"
             task.error = message
             task.updated_at = datetime.utcnow()
+            self._save(task, 'error', 'updated_at', *(() if recoverable else ('status',)))
         
         self.send_event(task_id, 'error', {
             'stage': stage,
@@ -190,17 +245,24 @@ class TaskManager:
     
     def set_running(self, task_id: str):
         """设置任务为运行中"""
-        task = self.tasks.get(task_id)
+        task = self.get_task(task_id)
         if task:
             task.status = "running"
             task.updated_at = datetime.utcnow()
+            self._save(task, 'status', 'updated_at')
     
     def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
-        task = self.tasks.get(task_id)
-        if task and task.status in ("running", "pending"):
-            task.status = "cancelled"
-            task.updated_at = datetime.utcnow()
+        if self.store is not None:
+            # 条件更新保证多进程同时取消时只有一个成功
+            cancelled = self.store.cancel_task(task_id, datetime.utcnow())
+        else:
+            task = self.tasks.get(task_id)
+            cancelled = task is not None and task.status in ("running", "pending")
+            if cancelled:
+                task.status = "cancelled"
+                task.updated_at = datetime.utcnow()
+        if cancelled:
             self.send_event(task_id, 'cancelled', {'task_id': task_id, 'message': '任务已取消'})
             logger.info(f"任务已取消: {task_id}")
             return True
@@ -208,19 +270,34 @@ class TaskManager:
     
     def is_cancelled(self, task_id: str) -> bool:
         """检查任务是否已取消"""
+        if self.store is not None:
+            return self.store.get_status(task_id) == "cancelled"
         task = self.tasks.get(task_id)
         return task is not None and task.status == "cancelled"
     
     def cleanup_task(self, task_id: str, delay: int = 300):
-        """延迟清理任务 (默认 5 分钟后)"""
-        def _cleanup():
-            time.sleep(delay)
-            with self.task_lock:
-                self.tasks.pop(task_id, None)
-                self.queues.pop(task_id, None)
+        """延迟清理任务 (默认 5 分钟后)，所有任务共用一个清理线程"""
+        with self._cleanup_cond:
+            heapq.heappush(self._cleanup_heap, (time.time() + delay, task_id))
+            if self._cleanup_thread is None:
+                self._cleanup_thread = Thread(target=self._cleanup_loop, name='task-cleanup', daemon=True)
+                self._cleanup_thread.start()
+            self._cleanup_cond.notify()
+    
+    def _cleanup_loop(self):
+        while True:
+            with self._cleanup_cond:
+                while not self._cleanup_heap or self._cleanup_heap[0][0] > time.time():
+                    timeout = self._cleanup_heap[0][0] - time.time() if self._cleanup_heap else None
+                    self._cleanup_cond.wait(timeout)
+                _, task_id = heapq.heappop(self._cleanup_heap)
+            if self.store is not None:
+                self.store.delete_task(task_id)
+            else:
+                with self.task_lock:
+                    self.tasks.pop(task_id, None)
+                    self.queues.pop(task_id, None)
             logger.info(f"清理任务: {task_id}")
-        
-        Thread(target=_cleanup, daemon=True).start()
 
 
 # 全局任务管理器实例
@@ -0,0 +1,287 @@
+"""
+任务状态共享存储 - 多进程部署时替代 TaskManager 的进程内字典
+
+TaskManager 默认把任务状态和 SSE 消息队列保存在进程内，只能以 `--workers 1` 部署：
+创建任务、推送进度、订阅 SSE、取消任务的请求必须落在同一个进程。
+启用共享存储后，任务状态和事件写入同一个 SQLite（WAL 模式）文件：
+
+- tasks 表：任务状态行，按字段增量更新（取消与进度更新互不覆盖）
+- task_events 表：自增序号的事件日志，每个订阅者持有自己的读取游标
+- task_interrupts / task_commands 表：等待大纲确认的任务与跨 worker 转发的恢复指令
+  （LangGraph 中断状态保存在发起生成的进程内，其它 worker 收到确认请求时转发给它执行）
+- 任意 gunicorn worker / 独立生成进程都可以推送进度、取消任务、订阅事件流
+
+WAL 模式下读写互不阻塞，单行写入在 synchronous=NORMAL 下为微秒级，
+订阅端以短间隔轮询事件表（按 task_id + 序号走索引）。
+
+环境变量：
+- TASK_STATE_BACKEND: memory（默认，进程内）/ sqlite（多进程共享）
+- TASK_STATE_DB: SQLite 文件路径（默认 data/task_state.db）
+- TASK_EVENT_POLL_INTERVAL: 订阅端轮询间隔秒数（默认 0.05）
+- TASK_COMMAND_POLL_INTERVAL: 持有中断任务的进程轮询恢复指令的间隔秒数（默认 0.5）
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from queue import Empty
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'task_state.db')
+EVENT_POLL_INTERVAL = float(os.getenv('TASK_EVENT_POLL_INTERVAL', '0.05'))
+COMMAND_POLL_INTERVAL = float(os.getenv('TASK_COMMAND_POLL_INTERVAL', '0.5'))
+# 单次从事件表读取的最大行数
+EVENT_FETCH_LIMIT = 500
+# 超过该时长未更新的任务在存储初始化时清除
+STALE_TASK_SECONDS = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'pending',
+    current_stage TEXT NOT NULL DEFAULT '',
+    stage_progress INTEGER NOT NULL DEFAULT 0,
+    overall_progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    results TEXT NOT NULL DEFAULT '{}',
+    outputs TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_task_events_task ON task_events(task_id, seq);
+CREATE TABLE IF NOT EXISTS task_interrupts (
+    task_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS task_commands (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+_JSON_FIELDS = ('results', 'outputs')
+_DATETIME_FIELDS = ('created_at', 'updated_at')
+_TASK_FIELDS = (
+    'status', 'current_stage', 'stage_progress', 'overall_progress', 'message',
+    'results', 'outputs', 'error', 'created_at', 'updated_at',
+)
+
+
+def _encode(field_name: str, value):
+    if field_name in _JSON_FIELDS:
+        return json.dumps(value or {}, ensure_ascii=False, default=str)
+    if field_name in _DATETIME_FIELDS:
+        return value.isoformat() if isinstance(value, datetime) else value
+    return value
+
+
+class SQLiteEventQueue:
+    """
+    事件表上的读取游标，提供 queue.Queue 的 get / get_nowait 接口
+
+    每个订阅者（Flask SSE 端点、SSE 网关）各持有一个游标，
+    因此同一任务的多个订阅者都能收到完整事件（广播而非争抢）。
+    """
+
+    def __init__(self, store: 'SQLiteTaskStore', task_id: str, after_seq: int = 0):
+        self.store = store
+        self.task_id = task_id
+        self.last_seq = after_seq
+        self._buffer: deque = deque()
+
+    def get_nowait(self) -> Dict[str, Any]:
+        if not self._buffer:
+            rows = self.store.read_events(self.task_id, self.last_seq)
+            if not rows:
+                raise Empty
+            self.last_seq = rows[-1][0]
+            self._buffer.extend(message for _, message in rows)
+        return self._buffer.popleft()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self.get_nowait()
+            except Empty:
+                if not block or (deadline is not None and time.monotonic() >= deadline):
+                    raise
+            remaining = EVENT_POLL_INTERVAL if deadline is None else deadline - time.monotonic()
+            time.sleep(max(0.0, min(EVENT_POLL_INTERVAL, remaining)))
+
+
+class SQLiteTaskStore:
+    """SQLite WAL 任务状态存储（线程安全：每个线程一个连接）"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('TASK_STATE_DB') or DEFAULT_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        self.purge_stale()
+        logger.info(f"任务状态共享存储已启用: {self.db_path}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    # ========== 任务状态 ==========
+
+    def create_task(self, task) -> None:
+        values = [_encode(name, getattr(task, name)) for name in _TASK_FIELDS]
+        self._conn().execute(
+            f"INSERT OR REPLACE INTO tasks (task_id, {', '.join(_TASK_FIELDS)}) "
+            f"VALUES (?, {', '.join('?' * len(_TASK_FIELDS))})",
+            [task.task_id, *values],
+        )
+
+    def get_task(self, task_id: str):
+        from services.task_service import TaskProgress
+
+        row = self._conn().execute('SELECT * FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        if row is None:
+            return None
+        data = dict(row)
+        for name in _JSON_FIELDS:
+            data[name] = json.loads(data[name]) if data[name] else {}
+        for name in _DATETIME_FIELDS:
+            data[name] = datetime.fromisoformat(data[name])
+        return TaskProgress(**data)
+
+    def update_task(self, task_id: str, fields: Dict[str, Any]) -> None:
+        """只更新给定字段，避免并发进程间的整行覆盖"""
+        if not fields:
+            return
+        names = list(fields)
+        self._conn().execute(
+            f"UPDATE tasks SET {', '.join(f'{name} = ?' for name in names)} WHERE task_id = ?",
+            [*(_encode(name, fields[name]) for name in names), task_id],
+        )
+
+    def merge_result(self, task_id: str, stage: str, entry: Dict[str, Any], updated_at: datetime) -> None:
+        """在 SQL 内原子地合并单个阶段的结果，避免并发阶段整列读-改-写互相覆盖"""
+        keys = list(entry)
+        if not keys:
+            return
+        assignments = ', '.join(f"'$.' || json_quote(?), json(?)" for _ in keys)
+        params = [item for key in keys for item in (key, json.dumps(entry[key], ensure_ascii=False, default=str))]
+        self._conn().execute(
+            "UPDATE tasks SET results = json_set(results, '$.' || json_quote(?), "
+            f"json_set(COALESCE(json_extract(results, '$.' || json_quote(?)), '{{}}'), {assignments})), "
+            "updated_at = ? WHERE task_id = ?",
+            [stage, stage, *params, updated_at.isoformat(), task_id],
+        )
+
+    def cancel_task(self, task_id: str, updated_at: datetime) -> bool:
+        """原子地将 pending / running 任务置为 cancelled，返回是否成功"""
+        cursor = self._conn().execute(
+            "UPDATE tasks SET status = 'cancelled', updated_at = ? "
+            "WHERE task_id = ? AND status IN ('running', 'pending')",
+            (updated_at.isoformat(), task_id),
+        )
+        return cursor.rowcount > 0
+
+    def get_status(self, task_id: str) -> Optional[str]:
+        row = self._conn().execute('SELECT status FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete_task(self, task_id: str) -> None:
+        conn = self._conn()
+        conn.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+        conn.execute('DELETE FROM task_events WHERE task_id = ?', (task_id,))
+        conn.execute('DELETE FROM task_interrupts WHERE task_id = ?', (task_id,))
+        conn.execute('DELETE FROM task_commands WHERE task_id = ?', (task_id,))
+
+    def purge_stale(self, max_age: float = STALE_TASK_SECONDS) -> int:
+        """删除长时间未更新的任务及其事件（进程退出前未执行延迟清理时的兜底）"""
+        cutoff = datetime.utcfromtimestamp(time.time() - max_age).isoformat()
+        conn = self._conn()
+        stale = [row[0] for row in conn.execute('SELECT task_id FROM tasks WHERE updated_at < ?', (cutoff,))]
+        for task_id in stale:
+            self.delete_task(task_id)
+        if stale:
+            logger.info(f"清理过期任务状态: {len(stale)} 个")
+        return len(stale)
+
+    # ========== 中断与恢复指令 ==========
+
+    def register_interrupt(self, task_id: str) -> None:
+        """登记等待大纲确认的任务"""
+        self._conn().execute('INSERT OR IGNORE INTO task_interrupts (task_id) VALUES (?)', (task_id,))
+
+    def claim_interrupt(self, task_id: str) -> bool:
+        """原子地认领中断任务的恢复权，多个确认请求只有一个成功"""
+        cursor = self._conn().execute('DELETE FROM task_interrupts WHERE task_id = ?', (task_id,))
+        return cursor.rowcount > 0
+
+    def post_command(self, task_id: str, command: Dict[str, Any]) -> None:
+        self._conn().execute(
+            'INSERT INTO task_commands (task_id, payload) VALUES (?, ?)',
+            (task_id, json.dumps(command, ensure_ascii=False, default=str)),
+        )
+
+    def take_commands(self, task_ids: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """取出并删除给定任务的待执行指令（DELETE ... RETURNING，同一指令只会被取走一次）"""
+        if not task_ids:
+            return []
+        rows = self._conn().execute(
+            f"DELETE FROM task_commands WHERE task_id IN ({', '.join('?' * len(task_ids))}) "
+            "RETURNING seq, task_id, payload",
+            list(task_ids),
+        ).fetchall()
+        return [(row['task_id'], json.loads(row['payload'])) for row in sorted(rows, key=lambda row: row['seq'])]
+
+    # ========== 事件 ==========
+
+    def append_event(self, task_id: str, message: Dict[str, Any]) -> bool:
+        """追加事件，任务不存在时返回 False"""
+        cursor = self._conn().execute(
+            'INSERT INTO task_events (task_id, payload) '
+            'SELECT ?, ? WHERE EXISTS (SELECT 1 FROM tasks WHERE task_id = ?)',
+            (task_id, json.dumps(message, ensure_ascii=False, default=str), task_id),
+        )
+        return cursor.rowcount > 0
+
+    def read_events(self, task_id: str, after_seq: int):
+        rows = self._conn().execute(
+            'SELECT seq, payload FROM task_events WHERE task_id = ? AND seq > ? ORDER BY seq LIMIT ?',
+            (task_id, after_seq, EVENT_FETCH_LIMIT),
+        ).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def event_queue(self, task_id: str) -> Optional[SQLiteEventQueue]:
+        """返回任务的事件游标（从第一条事件开始），任务不存在时返回 None"""
+        if self.get_status(task_id) is None:
+            return None
+        return SQLiteEventQueue(self, task_id)
+
+
+def create_task_store() -> Optional[SQLiteTaskStore]:
+    """按 TASK_STATE_BACKEND 创建共享存储；memory 时返回 None（使用进程内字典）"""
+    backend = os.getenv('TASK_STATE_BACKEND', 'memory').strip().lower()
+    if backend in ('', 'memory'):
+        return None
+    if backend != 'sqlite':
+        logger.warning(f"未知的 TASK_STATE_BACKEND: {backend}，使用进程内存储")
+        return None
+    return SQLiteTaskStore()
@@ -13,9 +13,6 @@
 import asyncio
 import logging
 import os
-import subprocess
-import tempfile
-import uuid
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Any, Optional, Callable
@@ -101,8 +98,9 @@ class VideoSequenceOrchestrator:
         self.oss_service = oss_service
         self.video_model = video_model
         
-        # FFmpeg 路径
-        self.ffmpeg_path = "ffmpeg"
+        # FFmpeg 路径（默认取 FFMPEG_PATH 环境变量）
+        from services.media_pipeline import FFMPEG_PATH
+        self.ffmpeg_path = FFMPEG_PATH
         
         logger.info(f"VideoSequenceOrchestrator 初始化完成, 视频模型: {video_model}")
     
@@ -519,133 +517,29 @@ Animation requirements:
         
         logger.info(f"开始合成视频: {len(valid_slides)} 个片段")
         
-        # 创建持久输出目录
-        output_dir = os.path.join(os.path.dirname(__file__), '..', 'static', 'videos')
-        os.makedirs(output_dir, exist_ok=True)
-        output_dir = os.path.abspath(output_dir)
+        from services.media_pipeline import merge_videos
         
-        try:
-            # 创建临时目录用于下载
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 下载所有视频片段
-                local_videos = []
-                for i, slide in enumerate(valid_slides):
-                    local_path = os.path.join(temp_dir, f"segment_{i}.mp4")
-                    if await self._download_video(slide.video_url, local_path):
-                        local_videos.append(local_path)
-                    else:
-                        logger.warning(f"下载视频片段 {i} 失败，跳过")
-                
-                if not local_videos:
-                    logger.error("没有成功下载的视频片段")
-                    return None
-                
-                # 生成输出文件路径（保存到持久目录）
-                output_filename = f"merged_{uuid.uuid4().hex[:8]}.mp4"
-                output_path = os.path.join(output_dir, output_filename)
-                
-                # 使用 FFmpeg 合成
-                if len(local_videos) == 1:
-                    # 只有一个视频，直接复制
-                    import shutil
-                    shutil.copy(local_videos[0], output_path)
-                else:
-                    # 多个视频，使用 concat 合成
-                    await self._ffmpeg_concat(local_videos, output_path, timeline)
-                
-                logger.info(f"视频已保存到本地: {output_path}")
-                
-                # 上传到 OSS
-                logger.info(f"准备上传视频到 OSS, 文件路径: {output_path}")
-                logger.info(f"OSS 服务状态: oss_service={self.oss_service is not None}, is_available={getattr(self.oss_service, 'is_available', False) if self.oss_service else False}")
-                
-                if self.oss_service and self.oss_service.is_available:
-                    logger.info("开始上传视频到 OSS...")
-                    result = self.oss_service.upload_file(output_path)
-                    logger.info(f"OSS 上传结果: {result}")
-                    if result.get('success'):
-                        final_url = result.get('url')
-                        logger.info(f"视频已上传到 OSS: {final_url}")
-                        return final_url
-                    else:
-                        logger.error(f"OSS 上传失败: {result}")
-                
-                # OSS 不可用，返回本地静态文件路径
-                local_url = f"/static/videos/{output_filename}"
-                logger.info(f"OSS 不可用，返回本地路径: {local_url}")
-                return local_url
-                
-        except Exception as e:
-            logger.error(f"视频合成失败: {e}", exc_info=True)
-            return None
-    
-    async def _download_video(self, url: str, local_path: str) -> bool:
-        """下载视频到本地"""
-        import requests
-        
-        try:
-            response = requests.get(url, timeout=60, stream=True)
-            response.raise_for_status()
-            
-            with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            return True
-        except Exception as e:
-            logger.error(f"下载视频失败: {url}, 错误: {e}")
-            return False
-    
-    async def _ffmpeg_concat(
-        self,
-        video_paths: List[str],
-        output_path: str,
-        timeline: VideoTimeline
-    ):
-        """
-        使用 FFmpeg 拼接视频
-        
-        添加转场效果（crossfade）
-        """
-        # 创建 concat 文件列表
-        concat_file = output_path.replace('.mp4', '_concat.txt')
-        with open(concat_file, 'w') as f:
-            for path in video_paths:
-                f.write(f"file '{path}'\n")
-        
-        # 简单拼接（不带转场）
-        # 如果需要转场效果，可以使用 xfade 滤镜，但会更复杂
-        cmd = [
-            self.ffmpeg_path,
-            '-y',  # 覆盖输出
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', concat_file,
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '23',
-            '-c:a', 'aac',
-            '-b:a', '128k',
-            output_path
-        ]
-        
-        logger.info(f"执行 FFmpeg 命令: {' '.join(cmd)}")
-        
-        # 执行命令
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
+        # 并发下载片段、探测编码后合并（一致时流拷贝），OSS 可用时直传
+        result = await asyncio.get_event_loop().run_in_executor(
             None,
-            lambda: subprocess.run(cmd, capture_output=True, text=True)
+            lambda: merge_videos(
+                [s.video_url for s in valid_slides], self.oss_service, ffmpeg_path=self.ffmpeg_path
+            )
         )
         
-        if result.returncode != 0:
-            logger.error(f"FFmpeg 执行失败: {result.stderr}")
-            raise RuntimeError(f"FFmpeg 执行失败: {result.stderr}")
+        if not result.get('success'):
+            logger.error(f"视频合成失败: {result.get('error')}")
+            return None
         
-        logger.info("FFmpeg 拼接完成")
+        logger.info(f"视频合成完成: mode={result['mode']}, 片段={result['segments']}, 耗时={result['timings']}")
+        if result.get('url'):
+            logger.info(f"视频已上传到 OSS: {result['url']}")
+            return result['url']
         
-        # 清理临时文件
-        os.remove(concat_file)
+        # OSS 不可用，返回本地静态文件路径
+        local_url = f"/static/videos/{os.path.basename(result['local_path'])}"
+        logger.info(f"OSS 不可用，返回本地路径: {local_url}")
+        return local_url
 
 
 # 全局服务实例
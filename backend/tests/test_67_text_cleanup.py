@@ -111,3 +111,48 @@ class TestFullPipeline:
         # Clean text should have minimal changes
         assert "Docker" in result["text"]
         assert "容器引擎" in result["text"]
+
+
+class TestCodeMasking:
+    def test_fenced_code_untouched(self):
+        code = "```python\n# 此外，注释保持原样\nx  =  1   \n```"
+        text = f"此外，先看代码。\n\n{code}\n\n另外，这里非常简单。"
+        result = apply_full_cleanup(text)
+        assert code in result["text"]
+        assert "先看代码" in result["text"] and "此外，先看代码" not in result["text"]
+        assert result["stats"]["fillers"] == 2
+
+    def test_inline_code_untouched(self):
+        text = "调用 `非常  慢的函数()` 之后，它非常稳定。"
+        result = apply_full_cleanup(text)
+        assert "`非常  慢的函数()`" in result["text"]
+        assert result["stats"]["intensifiers"] == 1
+
+    def test_space_before_inline_code_kept(self):
+        text = "Use `pip install` and `npm i` to install."
+        result = apply_full_cleanup(text)
+        assert result["text"] == text
+        assert result["stats"]["markdown_fixes"] == 0
+
+    def test_trailing_space_stripped_at_real_line_end(self):
+        result = apply_full_cleanup("运行 `make`   \n然后部署 `app`  ")
+        assert result["text"] == "运行 `make`\n然后部署 `app`"
+
+    def test_unclosed_fence_runs_to_end(self):
+        text = "正文。\n\n```\n此外，未闭合的代码块"
+        assert apply_full_cleanup(text)["text"] == text
+
+
+class TestCompiledRules:
+    def test_dispatch_picks_matching_replacement(self):
+        text = "它是最好的，彻底改变了行业，也完美解决了问题。"
+        result = apply_full_cleanup(text)
+        assert result["text"] == "它是较为有效的，显著改变了行业，也有效地解决了问题。"
+        assert result["stats"]["claims"] == 3
+
+    def test_vocab_rotation_from_fourth_occurrence(self):
+        text = "实现A。实现B。实现C。实现D。实现E。"
+        result = apply_full_cleanup(text)
+        # 从第 4 次开始轮换，最后一次出现取第一个同义词
+        assert result["text"] == "实现A。实现B。实现C。完成D。达成E。"
+        assert result["stats"]["vocab_diversified"] == 2
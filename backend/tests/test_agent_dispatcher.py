@@ -192,11 +192,11 @@ class TestCodeAndQuality:
         dispatcher.reviewer.review.assert_called_once()
 
     def test_ad16_factcheck(self, dispatcher, session_with_outline):
-        """AD16: factcheck() 调用 FactCheckAgent"""
-        dispatcher.factcheck_agent.check.return_value = {"claims": [], "score": 90}
+        """AD16: factcheck() 调用 FactCheckAgent（按章节核查）"""
+        dispatcher.factcheck_agent.check_sections.return_value = {"claims": [], "overall_score": 5}
         result = dispatcher.factcheck(session_with_outline)
         assert "factcheck" in result
-        dispatcher.factcheck_agent.check.assert_called_once()
+        dispatcher.factcheck_agent.check_sections.assert_called_once()
 
     def test_ad17_humanize_single_section(self, dispatcher, session_with_outline):
         """AD17: humanize() 指定 section_id"""
@@ -10,6 +10,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from utils.context_guard import (
     estimate_tokens,
+    estimate_messages_tokens,
+    clear_token_cache,
+    get_token_cache_stats,
     _estimate_by_chars,
     get_context_limit,
     get_safe_input_limit,
@@ -59,6 +62,11 @@ class TestEstimateByChars:
     def test_pure_chinese(self):
         assert _estimate_by_chars("你" * 150) == 100
 
+    def test_matches_per_char_rule(self):
+        text = "缓存命中 cache hit，避免重复计算。䷿鿿ꀀ一" * 50
+        expected_zh = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
+        assert _estimate_by_chars(text) == int(expected_zh / 1.5 + (len(text) - expected_zh) / 4)
+
     def test_mixed(self):
         text = "你好" + "a" * 40  # 2 中文 + 40 英文
         tokens = _estimate_by_chars(text)
@@ -66,6 +74,46 @@ class TestEstimateByChars:
         assert tokens == expected
 
 
+# ============ token 计数缓存测试 ============
+
+class TestTokenCache:
+    def setup_method(self):
+        clear_token_cache()
+
+    def test_repeat_estimate_hits_cache(self):
+        text = "调研资料 research blob " * 500
+        first = estimate_tokens(text)
+        assert estimate_tokens(text) == first
+        assert estimate_tokens(str(text)) == first
+        stats = get_token_cache_stats()
+        assert stats["misses"] == 1 and stats["hits"] == 2
+
+    def test_messages_sum_per_message(self):
+        messages = [
+            {"role": "system", "content": "你是技术博客作者"},
+            {"role": "user", "content": [{"text": "调研资料"}, {"text": " more"}]},
+        ]
+        expected = sum(estimate_tokens(t) for t in ("你是技术博客作者", "调研资料", " more"))
+        assert estimate_messages_tokens(messages) == expected
+
+    def test_encoder_load_attempted_once(self):
+        saved = getattr(estimate_tokens, "_encoder", None)
+        had = hasattr(estimate_tokens, "_encoder")
+        broken = MagicMock()
+        broken.get_encoding.side_effect = RuntimeError("offline")
+        try:
+            if had:
+                delattr(estimate_tokens, "_encoder")
+            with patch.dict('sys.modules', {'tiktoken': broken}):
+                estimate_tokens("first text")
+                estimate_tokens("second text")
+            assert broken.get_encoding.call_count == 2  # o200k_base + cl100k_base
+        finally:
+            estimate_tokens._encoder = saved
+            if not had:
+                delattr(estimate_tokens, "_encoder")
+
+
 # ============ get_context_limit 测试 ============
 
 class TestGetContextLimit:
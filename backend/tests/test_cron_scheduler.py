@@ -297,3 +297,140 @@ class TestTick:
         await scheduler._tick()
         loaded = await scheduler.db.get_cron_job(job.id)
         assert loaded is None  # 已删除
+
+
+# ── 并发派发 ──
+
+async def _add_due(scheduler, name, seconds_ago=1):
+    job = await scheduler.add({
+        'name': name,
+        'trigger': {'type': 'cron', 'cron_expression': '0 8 * * *'},
+        'generation': {'topic': name},
+    })
+    job.state.next_run_at = datetime.now() - timedelta(seconds=seconds_ago)
+    await scheduler.db.save_cron_job(job)
+    return job
+
+
+def _slow_enqueue(scheduler, seconds):
+    async def enqueue(task):
+        await asyncio.sleep(seconds)
+        return task.id
+    scheduler.executor.queue_manager.enqueue = AsyncMock(side_effect=enqueue)
+
+
+@pytest.mark.asyncio
+class TestConcurrentDispatch:
+    async def test_due_query_ordered_and_limited(self, scheduler):
+        """到期查询按计划时间升序，跳过运行中 / 未到期任务"""
+        old = await _add_due(scheduler, 'old', seconds_ago=60)
+        new = await _add_due(scheduler, 'new', seconds_ago=5)
+        running = await _add_due(scheduler, 'running', seconds_ago=120)
+        await scheduler.db.mark_cron_jobs_running([running.id], datetime.now())
+        await scheduler.add({
+            'name': 'future',
+            'trigger': {'type': 'cron', 'cron_expression': '0 8 * * *'},
+            'generation': {'topic': 'AI'},
+        })
+
+        due = await scheduler.db.get_due_cron_jobs(datetime.now(), limit=10)
+        assert [j.id for j in due] == [old.id, new.id]
+        assert len(await scheduler.db.get_due_cron_jobs(datetime.now(), limit=1)) == 1
+        assert await scheduler.db.get_next_cron_run_at() == old.state.next_run_at
+
+    async def test_due_jobs_run_concurrently(self, scheduler):
+        """到期任务并发执行，而非逐个等待"""
+        for i in range(3):
+            await _add_due(scheduler, f'job{i}')
+        active, peak = 0, 0
+        all_started = asyncio.Event()
+
+        async def enqueue(task):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            if active == 3:
+                all_started.set()
+            try:
+                # 逐个执行时等不到其余任务，超时后返回
+                await asyncio.wait_for(all_started.wait(), 1)
+            except asyncio.TimeoutError:
+                pass
+            active -= 1
+            return task.id
+
+        scheduler.executor.queue_manager.enqueue = AsyncMock(side_effect=enqueue)
+        await scheduler._tick()
+        assert peak == 3
+        assert scheduler.executor.queue_manager.enqueue.await_count == 3
+        assert scheduler.metrics.peak_running == 3
+
+    async def test_job_claimed_elsewhere_not_dispatched(self, scheduler):
+        """查询之后被其它调度器抢先认领的任务不重复派发"""
+        job = await _add_due(scheduler, 'contended')
+        now = datetime.now()
+        stale = await scheduler.db.get_due_cron_jobs(now, limit=10)
+        assert await scheduler.db.mark_cron_jobs_running([job.id], now) == {job.id}
+        assert await scheduler.db.mark_cron_jobs_running([job.id], now) == set()
+
+        scheduler.db.get_due_cron_jobs = AsyncMock(return_value=stale)
+        await scheduler._dispatch_due(now)
+        scheduler.executor.queue_manager.enqueue.assert_not_awaited()
+
+    async def test_concurrency_cap(self, scheduler):
+        """每次只认领空闲槽位数量的任务，其余留给下一次 tick"""
+        scheduler.max_concurrent = 2
+        for i in range(3):
+            await _add_due(scheduler, f'job{i}')
+
+        await scheduler._tick()
+        assert scheduler.executor.queue_manager.enqueue.await_count == 2
+        await scheduler._tick()
+        assert scheduler.executor.queue_manager.enqueue.await_count == 3
+
+    async def test_long_job_does_not_block_tick(self, scheduler):
+        """超过 tick 等待时间的任务转入后台，并发满时不空转唤醒"""
+        scheduler.max_concurrent = 1
+        scheduler.tick_wait_seconds = 0.05
+        job = await _add_due(scheduler, 'long')
+        await _add_due(scheduler, 'waiting')
+        _slow_enqueue(scheduler, 0.3)
+
+        await scheduler._tick()
+        assert job.id in scheduler._running
+        assert await scheduler._get_next_wake_at() is None
+
+        await asyncio.sleep(0.4)
+        assert not scheduler._running
+        loaded = await scheduler.db.get_cron_job(job.id)
+        assert loaded.state.running_at is None
+        assert loaded.state.last_status == CronJobStatus.OK
+        assert await scheduler._get_next_wake_at() is not None
+
+    async def test_job_failure_isolated(self, scheduler):
+        """单个任务异常不影响同批其他任务"""
+        bad = await _add_due(scheduler, 'bad')
+        good = await _add_due(scheduler, 'good')
+        apply_result = scheduler.executor.apply_result
+
+        def flaky_apply(job, result, compute):
+            if job.id == bad.id:
+                raise RuntimeError('boom')
+            return apply_result(job, result, compute)
+
+        scheduler.executor.apply_result = flaky_apply
+        await scheduler._tick()
+
+        assert scheduler.metrics.failed == 1
+        loaded = await scheduler.db.get_cron_job(good.id)
+        assert loaded.state.last_status == CronJobStatus.OK
+        assert loaded.state.running_at is None
+
+    async def test_dispatch_lag_reported(self, scheduler):
+        """status 返回派发延迟统计"""
+        await _add_due(scheduler, 'late', seconds_ago=30)
+        await scheduler._tick()
+
+        dispatch = (await scheduler.status())['dispatch']
+        assert dispatch['dispatched'] == 1
+        assert 29 <= dispatch['lag_max_seconds'] < 60
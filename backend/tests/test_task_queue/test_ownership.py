@@ -0,0 +1,30 @@
+"""排队 / 调度归属进程选举测试"""
+import multiprocessing
+
+from services.task_queue import ownership
+
+
+def _try_acquire(db_path, result):
+    result.put(ownership.acquire_queue_ownership(db_path))
+
+
+def test_single_owner_across_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ownership, '_held', {})
+    db_path = str(tmp_path / 'task_queue.db')
+
+    assert ownership.acquire_queue_ownership(db_path)
+    # 同一进程重复调用仍为归属进程
+    assert ownership.acquire_queue_ownership(db_path)
+
+    ctx = multiprocessing.get_context('spawn')
+    result = ctx.Queue()
+    process = ctx.Process(target=_try_acquire, args=(db_path, result))
+    process.start()
+    process.join(10)
+    assert result.get(timeout=5) is False
+
+    ownership._held.popitem()[1].close()
+    process = ctx.Process(target=_try_acquire, args=(db_path, result))
+    process.start()
+    process.join(10)
+    assert result.get(timeout=5) is True
@@ -0,0 +1,162 @@
+"""
+书籍扫描并发/分批测试
+测试摘要并发生成与批量写回、分批分类合并、书籍详情批量查询
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from services import book_scanner_service
+from services.book_scanner_service import BookScannerService
+from services.database_service import DatabaseService
+
+
+@pytest.fixture
+def db_service():
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        yield DatabaseService(db_path)
+    finally:
+        if os.path.exists(db_path):
+            os.unlink(db_path)
+
+
+def _save_blog(db_service, blog_id, topic):
+    db_service.save_history(
+        history_id=blog_id, topic=topic, article_type='tutorial',
+        target_length='medium', markdown_content=f'# {topic}\n\n正文内容', outline='{}'
+    )
+
+
+class BatchClassifierLLM:
+    """按批次返回分类结果：每批都新建同名书籍《Redis 实战》"""
+
+    def __init__(self, fail_on=None):
+        self.calls = 0
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def chat(self, messages):
+        with self.lock:
+            self.calls += 1
+        prompt = messages[0]['content']
+        blog_ids = [line.split(':', 1)[1].strip() for line in prompt.splitlines()
+                    if line.startswith('博客ID:')]
+        if self.fail_on and self.fail_on in blog_ids:
+            raise RuntimeError('模拟 LLM 失败')
+        return json.dumps({
+            'classifications': [
+                {'blog_id': bid, 'target_book': 'new_book_1'} for bid in blog_ids
+            ],
+            'new_books': [{'temp_id': 'new_book_1', 'title': '《Redis 实战》', 'theme': 'database'}],
+        }, ensure_ascii=False)
+
+
+@pytest.mark.unit
+class TestSummaryGeneration:
+
+    def test_summaries_generated_concurrently_and_written_in_batches(self, db_service, monkeypatch):
+        monkeypatch.setattr(book_scanner_service, 'SUMMARY_MAX_WORKERS', 4)
+        monkeypatch.setattr(book_scanner_service, 'SUMMARY_WRITE_BATCH', 3)
+        for i in range(8):
+            _save_blog(db_service, f'blog_{i}', f'主题{i}')
+        blogs = [db_service.get_history(f'blog_{i}') for i in range(8)]
+
+        active = []
+        peak = []
+
+        def fake_summary(llm_client, title, content, max_length):
+            active.append(1)
+            peak.append(len(active))
+            time.sleep(0.05)
+            active.pop()
+            return f'{title} 的摘要'
+
+        service = BookScannerService(db_service, llm_client=object())
+        with patch('services.blog_generator.blog_service.extract_article_summary', fake_summary), \
+                patch.object(db_service, 'update_history_summaries',
+                             wraps=db_service.update_history_summaries) as batch_write:
+            count = service._ensure_blog_summaries(blogs)
+
+        assert count == 8
+        assert max(peak) > 1
+        assert batch_write.call_count == 3
+        assert db_service.get_history('blog_5')['summary'] == '主题5 的摘要'
+
+    def test_failed_summary_is_skipped(self, db_service):
+        _save_blog(db_service, 'ok', '成功')
+        _save_blog(db_service, 'bad', '失败')
+        blogs = [db_service.get_history('ok'), db_service.get_history('bad')]
+
+        def fake_summary(llm_client, title, content, max_length):
+            if title == '失败':
+                raise RuntimeError('boom')
+            return '摘要'
+
+        service = BookScannerService(db_service, llm_client=object())
+        with patch('services.blog_generator.blog_service.extract_article_summary', fake_summary):
+            assert service._ensure_blog_summaries(blogs) == 1
+        assert not db_service.get_history('bad').get('summary')
+
+
+@pytest.mark.unit
+class TestBatchedClassification:
+
+    def test_split_respects_size_and_chars(self, monkeypatch):
+        monkeypatch.setattr(book_scanner_service, 'CLASSIFY_BATCH_SIZE', 3)
+        monkeypatch.setattr(book_scanner_service, 'CLASSIFY_BATCH_CHARS', 25)
+        batches = BookScannerService._split_classify_batches(['x' * 10] * 7 + ['y' * 40])
+        assert batches == [[0, 1], [2, 3], [4, 5], [6], [7]]
+
+    def test_batches_merge_same_new_book(self, db_service, monkeypatch):
+        monkeypatch.setattr(book_scanner_service, 'CLASSIFY_BATCH_SIZE', 2)
+        blogs = [{'id': f'b{i}', 'topic': f'Redis {i}', 'summary': '摘要'} for i in range(5)]
+        llm = BatchClassifierLLM()
+
+        result = BookScannerService(db_service, llm)._classify_blogs(blogs, [])
+
+        assert llm.calls == 3
+        assert len(result['new_books']) == 1
+        assert {c['target_book'] for c in result['classifications']} == {'new_book_1'}
+        assert len(result['classifications']) == 5
+
+    def test_failed_batch_falls_back_to_default(self, db_service, monkeypatch):
+        monkeypatch.setattr(book_scanner_service, 'CLASSIFY_BATCH_SIZE', 2)
+        blogs = [{'id': f'b{i}', 'topic': f'Redis {i}', 'summary': '摘要'} for i in range(4)]
+
+        result = BookScannerService(db_service, BatchClassifierLLM(fail_on='b3'))._classify_blogs(blogs, [])
+
+        titles = {b['temp_id']: b['title'] for b in result['new_books']}
+        targets = {c['blog_id']: titles[c['target_book']] for c in result['classifications']}
+        assert targets['b0'] == '《Redis 实战》'
+        assert targets['b3'] == '技术博客合集'
+
+
+@pytest.mark.unit
+class TestBookDetailsBatchQuery:
+
+    def test_details_loaded_with_batch_queries(self, db_service):
+        _save_blog(db_service, 'blog_a', 'Redis 入门')
+        db_service.create_book('book_1', 'Redis 指南')
+        db_service.create_book('book_2', '空书')
+        db_service.save_book_chapters('book_1', [
+            {'chapter_index': 1, 'chapter_title': '入门', 'section_index': '1.1',
+             'section_title': '安装', 'blog_id': 'blog_a'},
+        ])
+
+        service = BookScannerService(db_service)
+        with patch.object(db_service, 'get_book_chapters') as single_chapters, \
+                patch.object(db_service, 'get_blogs_by_book') as single_blogs:
+            books = {b['id']: b for b in service._get_existing_books_with_details()}
+
+        single_chapters.assert_not_called()
+        single_blogs.assert_not_called()
+        assert [c['section_title'] for c in books['book_1']['chapters']] == ['安装']
+        assert [b['id'] for b in books['book_1']['related_blogs']] == ['blog_a']
+        assert books['book_2']['chapters'] == [] and books['book_2']['related_blogs'] == []
@@ -0,0 +1,209 @@
+"""
+浏览器池测试（替身 Playwright，不启动真实浏览器）
+测试浏览器 / 上下文复用、Cookie 只注入一次、换账号重建上下文、跨平台并发上限、上下文回收，以及多平台并发发布
+"""
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from services.publishers.browser_pool import BrowserPool
+from services.publishers.publisher import Publisher
+
+COOKIES = [{'name': 'sid', 'value': 'a', 'domain': '.example.com', 'path': '/'}]
+
+
+class FakePage:
+    def __init__(self, heap_bytes):
+        self.heap_bytes = heap_bytes
+        self.url = 'about:blank'
+        self.filled = {}
+
+    async def goto(self, url, timeout=None):
+        self.url = url
+
+    async def wait_for_timeout(self, ms):
+        await asyncio.sleep(ms / 1000)
+
+    async def fill(self, selector, value):
+        self.filled[selector] = value
+
+    async def evaluate(self, script, *args):
+        if 'usedJSHeapSize' in script:
+            return self.heap_bytes
+        return None
+
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.cookie_calls = []
+        self.closed = False
+
+    async def add_cookies(self, cookies):
+        self.cookie_calls.append(('add', cookies))
+
+    async def clear_cookies(self):
+        self.cookie_calls.append(('clear', None))
+
+    async def new_page(self):
+        return FakePage(self.browser.heap_bytes)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, heap_bytes):
+        self.heap_bytes = heap_bytes
+        self.contexts = []
+
+    def is_connected(self):
+        return True
+
+    async def new_context(self, **kwargs):
+        ctx = FakeContext(self)
+        self.contexts.append(ctx)
+        return ctx
+
+    async def close(self):
+        pass
+
+
+class FakePlaywright:
+    def __init__(self, heap_bytes=50 * 1024 * 1024):
+        self.browsers = []
+        self.heap_bytes = heap_bytes
+        self.chromium = self
+
+    async def launch(self, **kwargs):
+        browser = FakeBrowser(self.heap_bytes)
+        self.browsers.append(browser)
+        return browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_playwright():
+    fake = FakePlaywright()
+    with patch('playwright.async_api.async_playwright', return_value=fake):
+        yield fake
+
+
+@pytest.fixture
+def pool():
+    pool = BrowserPool(max_concurrency=2, max_context_uses=100, keep_alive=True)
+    yield pool
+    pool.close()
+
+
+async def _noop(page):
+    return page.url
+
+
+@pytest.mark.unit
+class TestBrowserPool:
+
+    def test_browser_and_context_reused(self, fake_playwright, pool):
+        for _ in range(3):
+            asyncio.run(pool.run('csdn', COOKIES, True, _noop))
+
+        assert len(fake_playwright.browsers) == 1
+        [ctx] = fake_playwright.browsers[0].contexts
+        assert ctx.cookie_calls == [('add', COOKIES)]
+        assert pool.stats['context_reuses'] == 2
+
+    def test_cookie_change_recreates_context(self, fake_playwright, pool):
+        other = [dict(COOKIES[0], value='b')]
+        asyncio.run(pool.run('csdn', COOKIES, True, _noop))
+        asyncio.run(pool.run('csdn', other, True, _noop))
+
+        # 换账号不复用旧上下文，上一个账号的 localStorage / IndexedDB 随之丢弃
+        first, second = fake_playwright.browsers[0].contexts
+        assert first.closed and first.cookie_calls == [('add', COOKIES)]
+        assert not second.closed and second.cookie_calls == [('add', other)]
+
+    def test_concurrency_bounded_across_platforms(self, fake_playwright, pool):
+        active, peak = 0, 0
+
+        async def slow(page):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.1)
+            active -= 1
+
+        async def main():
+            await asyncio.gather(*(pool.run(p, COOKIES, True, slow) for p in ('a', 'b', 'c', 'd')))
+
+        start = time.monotonic()
+        asyncio.run(main())
+        assert peak == 2
+        assert time.monotonic() - start >= 0.2
+
+    def test_context_recycled_after_max_uses(self, fake_playwright):
+        pool = BrowserPool(max_context_uses=2, keep_alive=True)
+        try:
+            for _ in range(3):
+                asyncio.run(pool.run('zhihu', COOKIES, True, _noop))
+            first, second = fake_playwright.browsers[0].contexts
+            assert first.closed and not second.closed
+            assert pool.stats['recycles'] == 1
+        finally:
+            pool.close()
+
+    def test_context_recycled_on_heap_growth(self):
+        fake = FakePlaywright(heap_bytes=600 * 1024 * 1024)
+        pool = BrowserPool(max_heap_mb=512, keep_alive=True)
+        try:
+            with patch('playwright.async_api.async_playwright', return_value=fake):
+                asyncio.run(pool.run('juejin', COOKIES, True, _noop))
+            assert fake.browsers[0].contexts[0].closed
+        finally:
+            pool.close()
+
+
+@pytest.mark.unit
+class TestConcurrentPublish:
+
+    def test_publish_to_multiple_runs_concurrently(self, fake_playwright, pool, tmp_path, monkeypatch):
+        for pid in ('alpha', 'beta', 'gamma'):
+            (tmp_path / f'{pid}.yaml').write_text(f"""
+platform: {{id: {pid}, name: {pid}, editor_url: 'http://local/{pid}', settle_ms: 300}}
+header: {{enabled: false}}
+content_upload: {{type: codemirror, title_selector: '.title', content_selector: '.CodeMirror'}}
+workflow: []
+result_url: {{type: current_url}}
+""")
+        pool.max_concurrency = 3
+        publisher = Publisher(config_dir=str(tmp_path), pool=pool)
+        active, peak = 0, 0
+        settle = FakePage.wait_for_timeout
+
+        async def tracked(page, ms):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await settle(page, ms)
+            active -= 1
+
+        monkeypatch.setattr(FakePage, 'wait_for_timeout', tracked)
+        results = asyncio.run(publisher.publish_to_multiple(
+            platforms=['alpha', 'beta', 'missing', 'gamma'],
+            cookies_map={'alpha': COOKIES, 'beta': COOKIES, 'gamma': COOKIES, 'missing': []},
+            title='标题', content='正文',
+        ))
+
+        assert peak == 3  # 顺序执行时同一时刻只有一个平台在等待页面稳定
+        assert [r['success'] for r in results] == [True, True, False, True]
+        assert results[0]['url'] == 'http://local/alpha'
+        assert len(fake_playwright.browsers) == 1
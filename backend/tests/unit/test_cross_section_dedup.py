@@ -0,0 +1,95 @@
+"""
+跨章节去重测试
+测试 MinHash 签名估计 Jaccard、LSH 候选生成、只对候选对计算相似度、跨调用复用段落指纹
+"""
+import pytest
+
+from services.blog_generator.cross_section_dedup import (
+    CrossSectionDeduplicator, FingerprintCache, lsh_candidates, minhash_signature, shingles,
+)
+
+PARA_A = 'LangGraph 通过状态图编排多个智能体，每个节点读取共享状态并返回增量更新，框架负责合并这些更新。'
+PARA_A2 = 'LangGraph 通过状态图编排多个智能体，每个节点读取共享状态并返回增量更新，由框架负责合并这些更新。'
+PARA_B = 'Redis 是内存键值数据库，支持字符串、哈希、列表等多种数据结构，常用于缓存、排行榜和消息队列场景。'
+PARA_C = 'Kubernetes 以声明式配置管理容器化应用，控制器不断把集群的实际状态收敛到用户声明的期望状态。'
+
+
+class CountingProvider:
+    """记录 embed 调用的段落数；同一段落文本映射到同一向量，近似段落按字符重合度得到相似向量"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self):
+        return self
+
+    def embed(self, texts):
+        self.embedded.append(len(texts))
+        vocab = sorted(shingles(PARA_A) | shingles(PARA_B) | shingles(PARA_C))
+        return [[1.0 if s in shingles(t) else 0.0 for s in vocab] for t in texts]
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    from services.blog_generator.services import semantic_compressor
+    fake = CountingProvider()
+    monkeypatch.setattr(semantic_compressor, 'EmbeddingProvider', fake)
+    return fake
+
+
+def _sections(*paragraph_lists):
+    return [{'id': f's{i}', 'content': '\n\n'.join(paras)} for i, paras in enumerate(paragraph_lists)]
+
+
+@pytest.mark.unit
+class TestMinHashLSH:
+
+    def test_signature_estimates_jaccard(self):
+        a, a2, b = map(minhash_signature, (PARA_A, PARA_A2, PARA_B))
+        agree = lambda x, y: sum(p == q for p, q in zip(x, y)) / len(x)
+        assert agree(a, a2) > 0.6
+        assert agree(a, b) < 0.2
+        assert minhash_signature(PARA_A) == a
+
+    def test_candidates_cross_section_only(self):
+        sigs = [minhash_signature(p) for p in (PARA_A, PARA_A2, PARA_B, PARA_A2)]
+        assert lsh_candidates(sigs, [0, 1, 2, 0], bands=16) == {(0, 1), (1, 3)}
+
+
+@pytest.mark.unit
+class TestCrossSectionDeduplicator:
+
+    def test_only_candidates_are_embedded(self, provider):
+        dedup = CrossSectionDeduplicator(threshold=0.85, min_paragraph_len=10, fingerprints=FingerprintCache())
+        sections = _sections([PARA_A, PARA_C], [PARA_B, PARA_A2], [PARA_C + '补充说明。'])
+
+        duplicates = dedup.detect_duplicates(sections)
+        assert [(d['section_a'], d['section_b']) for d in duplicates] == [(0, 1), (0, 2)]
+        # 5 个段落中只有参与候选对的 4 个生成 embedding
+        assert provider.embedded == [4]
+        assert dedup.stats['candidates'] == 2
+
+    def test_fingerprints_reused_across_calls(self, provider):
+        cache = FingerprintCache()
+        sections = _sections([PARA_A, PARA_C], [PARA_B, PARA_A2])
+        CrossSectionDeduplicator(min_paragraph_len=10, fingerprints=cache).detect_duplicates(sections)
+
+        # 修订循环改写了一个段落后再次去重：新实例，未改动段落不再重新计算
+        provider.embedded.clear()
+        sections[0]['content'] = sections[0]['content'].replace(PARA_C, PARA_C + '修订补充。')
+        dedup = CrossSectionDeduplicator(min_paragraph_len=10, fingerprints=cache)
+        duplicates = dedup.detect_duplicates(sections)
+        assert dedup.stats['signatures_reused'] == 3
+        assert dedup.stats['similarities_reused'] == 1
+        assert provider.embedded == []
+        assert [(d['section_a'], d['section_b']) for d in duplicates] == [(0, 1)]
+
+        dedup.deduplicate(sections)
+        assert 'LangGraph' not in sections[1]['content'] and PARA_B in sections[1]['content']
+
+    def test_cache_bounded(self):
+        cache = FingerprintCache(max_entries=2)
+        for text in (PARA_A, PARA_B, PARA_C):
+            cache.signature(cache.key(text), text)
+        assert cache.signature(cache.key(PARA_A), PARA_A)[1] is False
+        assert cache.signature(cache.key(PARA_C), PARA_C)[1] is True
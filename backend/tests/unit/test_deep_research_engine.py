@@ -0,0 +1,116 @@
+"""
+深度研究引擎测试
+测试补充查询并发执行、每轮截止时间、缺口分析与最慢查询重叠、覆盖度提前停止，以及增量知识摘要
+"""
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.blog_generator.services.deep_research_engine import (
+    DeepResearchEngine, _KnowledgeDigest,
+)
+
+GAPS = {
+    'gaps': [{'topic': f'缺口{i}', 'search_query': f'query-{i}'} for i in range(3)],
+    'coverage_score': 40,
+}
+
+
+class SlowSearch:
+    """按查询返回固定延迟的搜索替身，记录每次调用的开始 / 结束时间"""
+
+    def __init__(self, delays=None, default=0.2):
+        self.delays = delays or {}
+        self.default = default
+        self.events = []
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results=5):
+        start = time.monotonic()
+        time.sleep(self.delays.get(query, self.default))
+        with self._lock:
+            self.events.append((query, start, time.monotonic()))
+        return {'success': True, 'results': [
+            {'url': f'https://example.com/{query}/{i}', 'title': query, 'content': f'{query} 内容 {i}'}
+            for i in range(2)
+        ]}
+
+
+def make_engine(monkeypatch, search, responses, rounds=2, timeout='5'):
+    monkeypatch.setenv('DEEP_RESEARCH_MAX_ROUNDS', str(rounds))
+    monkeypatch.setenv('DEEP_RESEARCH_ROUND_TIMEOUT', timeout)
+    llm = MagicMock()
+    llm.chat.side_effect = [json.dumps(r) for r in responses]
+    return DeepResearchEngine(llm, search), llm
+
+
+@pytest.mark.unit
+class TestConcurrentRounds:
+
+    def test_queries_run_concurrently(self, monkeypatch):
+        search = SlowSearch(default=0.2)
+        engine, _ = make_engine(monkeypatch, search, [GAPS, GAPS])
+
+        start = time.monotonic()
+        result = engine.run('Kafka', initial_results=[{'url': 'https://seed', 'content': '种子'}])
+        elapsed = time.monotonic() - start
+
+        # 顺序执行需 2 轮 × 3 查询 × 0.2s = 1.2s
+        assert elapsed < 0.8
+        assert result['rounds'] == 2 and result['total_queries'] == 6
+        assert len(result['results']) == 1 + 3 * 2  # 第二轮查询重复，按 URL 去重
+
+    def test_round_deadline_moves_slow_query_to_background(self, monkeypatch):
+        search = SlowSearch(delays={'query-2': 2.0}, default=0.05)
+        engine, _ = make_engine(monkeypatch, search, [GAPS], rounds=1, timeout='0.3')
+
+        start = time.monotonic()
+        result = engine.run('Kafka')
+        assert time.monotonic() - start < 1.0
+        assert result['total_queries'] == 3
+        assert {r['title'] for r in result['results']} == {'query-0', 'query-1'}
+
+    def test_gap_analysis_overlaps_slowest_search(self, monkeypatch):
+        search = SlowSearch(delays={'query-2': 0.5}, default=0.05)
+        engine, _ = make_engine(monkeypatch, search, [GAPS, {'gaps': [], 'coverage_score': 90}])
+        analyzed_at = []
+        original = engine._analyze_gaps
+
+        def record(*args):
+            analyzed_at.append(time.monotonic())
+            return original(*args)
+
+        engine._analyze_gaps = record
+        result = engine.run('Kafka')
+
+        slowest_end = max(end for q, _, end in search.events if q == 'query-2')
+        assert len(analyzed_at) == 2 and analyzed_at[1] < slowest_end
+        assert result['rounds'] == 2 and result['coverage_score'] == 90
+        # 最慢查询的结果仍然合并进最终结果
+        assert 'query-2' in {r['title'] for r in result['results']}
+
+    def test_early_stop_on_coverage(self, monkeypatch):
+        search = SlowSearch()
+        engine, _ = make_engine(monkeypatch, search, [dict(GAPS, coverage_score=90)], rounds=3)
+
+        result = engine.run('Kafka')
+        assert result['rounds'] == 1 and result['total_queries'] == 0
+        assert search.events == []
+
+
+@pytest.mark.unit
+class TestKnowledgeDigest:
+
+    def test_matches_full_rebuild(self):
+        results = [{'content': f'内容{i}' * 100} if i % 2 else {'snippet': f'摘要{i}'} for i in range(30)]
+        digest = _KnowledgeDigest()
+        for r in results:
+            digest.add(r)
+
+        expected = "\n".join(
+            (r.get('content', '') or r.get('snippet', ''))[:300] for r in results[:15]
+        )
+        assert digest.text == expected
@@ -0,0 +1,126 @@
+"""
+事实核查按章节并行测试
+测试候选 Claim 提取、按 Claim 检索证据、章节并行核查、报告合并与按章自动修复
+"""
+import json
+import re
+import threading
+import time
+
+import pytest
+
+from services.blog_generator.agents.factcheck import (
+    EvidenceIndex, FactCheckAgent, extract_claim_candidates,
+)
+
+
+class FakeLLM:
+    """按 Prompt 中的章节返回核查结果，记录每次调用看到的证据编号"""
+
+    def __init__(self, delay=0.0, verdicts=None, fail_sections=()):
+        self.delay = delay
+        self.verdicts = verdicts or {}
+        self.fail_sections = set(fail_sections)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def chat(self, messages, response_format=None):
+        prompt = messages[0]['content']
+        sid = re.search(r'^\[(s\d+)\]', prompt, re.M).group(1)
+        evidence = re.findall(r'^\[(S\d+)\]', prompt, re.M)
+        with self.lock:
+            self.calls.append((sid, evidence))
+        time.sleep(self.delay)
+        if sid in self.fail_sections:
+            raise RuntimeError('LLM 超时')
+        v = self.verdicts.get(sid, 'S')
+        report = {'score': 5 if v == 'S' else 2, 'claims': [{'id': 1, 'text': f'{sid} claim', 'sid': '', 'v': v}],
+                  'fixes': []}
+        if v == 'C':
+            report['fixes'] = [{'sid': sid, 'old': '2019 年', 'new': '2017 年'}]
+        return json.dumps(report)
+
+
+SEARCH_RESULTS = [
+    {'title': 'Transformer 论文', 'content': 'Transformer 由 Google 于 2017 年在 Attention Is All You Need 中提出'},
+    {'title': 'PostgreSQL 发布说明', 'content': 'PostgreSQL 16 发布，并行查询性能提升 40%'},
+    {'title': 'Rust 语言', 'content': 'Rust 1.0 于 2015 年发布，由 Mozilla 开发'},
+]
+
+
+def _sections():
+    return [
+        {'id': 's1', 'title': '注意力', 'content': 'Transformer 由 Google 于 2019 年提出。它改变了 NLP。'},
+        {'id': 's2', 'title': '数据库', 'content': 'PostgreSQL 16 的并行查询性能提升 40%。'},
+        {'id': 's3', 'title': '总结', 'content': '技术选型要结合团队情况，没有银弹。'},
+    ]
+
+
+@pytest.mark.unit
+class TestClaimEvidence:
+
+    def test_extract_claim_candidates(self):
+        claims = extract_claim_candidates('Rust 于 2015 年发布。写代码要开心！PostgreSQL 比 MySQL 更快吗？')
+        assert claims == ['Rust 于 2015 年发布。']
+        assert extract_claim_candidates('好的架构需要权衡。保持简单。') == []
+
+    def test_evidence_selected_per_claim(self):
+        index = EvidenceIndex(SEARCH_RESULTS)
+        assert index.select(['PostgreSQL 16 并行查询'])[0] == 1
+        rendered = index.render(index.select(['Transformer 2017 Google']))
+        assert rendered.startswith('[S1] Transformer 论文')
+        assert EvidenceIndex([]).render([]) == '(无证据)'
+
+    def test_evidence_ranked_by_raw_score_across_claims(self):
+        index = EvidenceIndex(SEARCH_RESULTS)
+        # 弱相关 Claim 的最佳命中不应与强相关 Claim 的命中并列
+        assert index.select(['PostgreSQL', 'Rust 1.0 于 2015 年发布，由 Mozilla 开发'], top_k=1) == [2]
+
+
+@pytest.mark.unit
+class TestFactCheckSections:
+
+    def test_sections_checked_with_relevant_evidence_only(self):
+        llm = FakeLLM()
+        report = FactCheckAgent(llm).check_sections(_sections(), SEARCH_RESULTS)
+
+        calls = dict(llm.calls)
+        # 无候选 Claim 的 s3 不调用 LLM
+        assert set(calls) == {'s1', 's2'}
+        assert 'S1' in calls['s1'] and 'S2' not in calls['s1']
+        assert calls['s2'][0] == 'S2'
+        assert report['checked_sections'] == 2
+        assert report['skipped_sections'] == ['s3'] and 's3' not in report['section_scores']
+        assert [c['id'] for c in report['claims']] == [1, 2]
+        assert [c['section_id'] for c in report['claims']] == ['s1', 's2']
+
+    def test_sections_run_concurrently(self):
+        sections = [
+            {'id': f's{i}', 'title': f'第 {i} 章', 'content': f'某框架于 20{10 + i} 年发布。'} for i in range(8)
+        ]
+        llm = FakeLLM(delay=0.2)
+        start = time.perf_counter()
+        report = FactCheckAgent(llm, max_workers=8).check_sections(sections, SEARCH_RESULTS)
+        assert time.perf_counter() - start < 1.2
+        assert report['total_claims'] == 8 and report['supported'] == 8
+
+    def test_merged_score_and_partial_failure(self):
+        llm = FakeLLM(verdicts={'s1': 'C'}, fail_sections={'s2'})
+        report = FactCheckAgent(llm).check_sections(_sections(), SEARCH_RESULTS)
+        assert report['overall_score'] == 2
+        assert report['contradicted'] == 1
+        assert report['errors'] == [{'section_id': 's2', 'error': 'LLM 超时'}]
+
+        with pytest.raises(RuntimeError):
+            FactCheckAgent(FakeLLM(fail_sections={'s1', 's2'})).check_sections(_sections(), SEARCH_RESULTS)
+
+    def test_run_fixes_only_low_score_sections(self):
+        agent = FactCheckAgent(FakeLLM(verdicts={'s1': 'C'}))
+        agent.auto_fix = True
+        state = {'sections': _sections(), 'search_results': SEARCH_RESULTS}
+        state['sections'][1]['content'] += '该版本 2019 年的测试基线。'
+
+        state = agent.run(state)
+        assert state['factcheck_report']['section_scores'] == {'s1': 2, 's2': 5}
+        assert '2017 年提出' in state['sections'][0]['content']
+        assert '2019 年' in state['sections'][1]['content']
@@ -0,0 +1,177 @@
+"""
+飞书进度通知测试
+测试事件驱动推送（无轮询线程）、同一会话阶段变化合并、结束通知、限流与限频重发、超时提醒
+"""
+import threading
+import time
+import uuid
+
+import pytest
+
+from services.feishu_client import RATE_LIMITED_CODE
+from services.feishu_notifier import FeishuNotifier, TokenBucket
+from services.task_service import TaskManager
+
+
+class FakeSender:
+    def __init__(self, responses=None):
+        self.sent = []
+        self.responses = list(responses or [])
+        self.lock = threading.Lock()
+
+    def __call__(self, chat_id, message):
+        with self.lock:
+            self.sent.append((chat_id, message['kind'], message.get('stage'), time.monotonic()))
+            return self.responses.pop(0) if self.responses else {'code': 0}
+
+    def kinds(self, chat_id=None):
+        return [(s[1], s[2]) for s in self.sent if chat_id in (None, s[0])]
+
+
+def render(kind, task):
+    return {'kind': kind, 'stage': task.current_stage if task else None}
+
+
+@pytest.fixture
+def task_manager():
+    return TaskManager()
+
+
+@pytest.fixture
+def make_notifier(task_manager):
+    created = []
+
+    def factory(**kwargs):
+        sender = kwargs.pop('sender', None) or FakeSender()
+        kwargs.setdefault('min_interval', 0)
+        notifier = FeishuNotifier(send=sender, task_manager=task_manager, **kwargs)
+        created.append(notifier)
+        return notifier, sender
+
+    yield factory
+    for notifier in created:
+        notifier.stop()
+
+
+def _new_task(task_manager):
+    task_id = task_manager.create_task(task_id=f'feishu_{uuid.uuid4().hex[:8]}')
+    task_manager.set_running(task_id)
+    return task_id
+
+
+@pytest.mark.unit
+class TestFeishuNotifier:
+
+    def test_stage_and_completion_pushed_by_events(self, task_manager, make_notifier):
+        notifier, sender = make_notifier()
+        task_id = _new_task(task_manager)
+        finished = []
+        notifier.watch(task_id, 'chat1', render, on_finish=finished.append)
+
+        task_manager.send_progress(task_id, 'outline', 50, '生成大纲')
+        assert notifier.wait_idle()
+        task_manager.send_progress(task_id, 'outline', 80, '同一阶段不重复推送')
+        task_manager.send_complete(task_id, {'word_count': 1200})
+        assert notifier.wait_idle()
+
+        assert sender.kinds() == [('progress', 'outline'), ('completed', 'outline')]
+        assert finished == ['completed']
+        assert task_id not in notifier._watches
+
+    def test_thread_count_independent_of_watched_tasks(self, task_manager, make_notifier):
+        threads_before = threading.active_count()
+        notifier, sender = make_notifier(workers=2, rate=1000, chat_rate=1000)
+        task_ids = [_new_task(task_manager) for _ in range(50)]
+        for i, task_id in enumerate(task_ids):
+            notifier.watch(task_id, f'chat{i}', render)
+        for task_id in task_ids:
+            task_manager.send_progress(task_id, 'content', 10, '')
+        assert notifier.wait_idle()
+
+        # 1 个调度线程 + 2 个发送线程
+        assert threading.active_count() - threads_before <= 3
+        assert len(sender.sent) == 50
+
+    def test_rapid_stage_changes_coalesced_per_chat(self, task_manager, make_notifier):
+        notifier, sender = make_notifier(min_interval=0.3)
+        task_id = _new_task(task_manager)
+        notifier.watch(task_id, 'chat1', render)
+
+        task_manager.send_progress(task_id, 'analyze', 10, '')
+        assert notifier.wait_idle()
+        for stage in ('metaphor', 'outline', 'content'):
+            task_manager.send_progress(task_id, stage, 10, '')
+            time.sleep(0.02)
+        time.sleep(0.4)
+        assert notifier.wait_idle()
+
+        assert sender.kinds() == [('progress', 'analyze'), ('progress', 'content')]
+        assert notifier.stats['coalesced'] >= 1
+
+    def test_terminal_notice_replaces_pending_progress(self, task_manager, make_notifier):
+        notifier, sender = make_notifier(min_interval=10)
+        task_id = _new_task(task_manager)
+        notifier.watch(task_id, 'chat1', render)
+
+        task_manager.send_progress(task_id, 'analyze', 10, '')
+        assert notifier.wait_idle()
+        task_manager.send_progress(task_id, 'content', 10, '')
+        task_manager.send_error(task_id, 'content', 'LLM 超时')
+        assert notifier.wait_idle()
+
+        assert sender.kinds() == [('progress', 'analyze'), ('failed', 'content')]
+
+    def test_per_chat_rate_limit(self, task_manager, make_notifier):
+        notifier, sender = make_notifier(chat_rate=5)
+        task_ids = [_new_task(task_manager) for _ in range(8)]
+        for task_id in task_ids:
+            notifier.watch(task_id, 'busy-chat', render)
+        for task_id in task_ids:
+            task_manager.send_complete(task_id, {})
+        assert notifier.wait_idle()
+
+        times = [s[3] for s in sender.sent]
+        assert len(times) == 8
+        # 令牌桶容量 5：前 5 条立即发出，其余按 5/s 补充
+        assert times[-1] - times[0] >= 0.5
+
+    def test_rate_limited_response_retried_in_order(self, task_manager, make_notifier):
+        sender = FakeSender(responses=[
+            {'code': 0},
+            {'code': RATE_LIMITED_CODE, 'retry_after': 0.1},
+        ])
+        notifier, _ = make_notifier(sender=sender)
+        task_id = _new_task(task_manager)
+        notifier.watch(task_id, 'chat1', render)
+
+        task_manager.send_progress(task_id, 'analyze', 10, '')
+        assert notifier.wait_idle()
+        task_manager.send_complete(task_id, {})
+        assert notifier.wait_idle()
+
+        assert sender.kinds() == [
+            ('progress', 'analyze'), ('completed', 'analyze'), ('completed', 'analyze'),
+        ]
+        assert notifier.stats['rate_limited'] == 1 and notifier.stats['sent'] == 2
+
+    def test_timeout_notice(self, task_manager, make_notifier):
+        notifier, sender = make_notifier(timeout=0.1)
+        finished = []
+        notifier.watch(_new_task(task_manager), 'chat1', render, on_finish=finished.append)
+
+        time.sleep(0.25)
+        assert notifier.wait_idle()
+        assert sender.kinds() == [('timeout', None)]
+        assert finished == ['timeout']
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+
+    def test_refills_at_rate(self):
+        bucket = TokenBucket(rate=2, burst=1)
+        now = bucket.updated
+        assert bucket.wait_time(now) == 0
+        bucket.take()
+        assert bucket.wait_time(now) == pytest.approx(0.5)
+        assert bucket.wait_time(now + 0.5) == 0
@@ -0,0 +1,176 @@
+"""
+知识分块检索索引测试
+测试 BM25 索引构建/检索、随 save_chunks 持久化、按章节检索
+"""
+import os
+import tempfile
+
+import pytest
+
+from services.database_service import DatabaseService
+from services.knowledge_index import ChunkIndex, tokenize
+from services.knowledge_service import KnowledgeService
+
+
+@pytest.fixture
+def db_service():
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        yield DatabaseService(db_path)
+    finally:
+        if os.path.exists(db_path):
+            os.unlink(db_path)
+
+
+@pytest.fixture
+def sample_chunks():
+    return [
+        {'id': 'c0', 'document_id': 'd1', 'title': '安装', 'content': 'pip install redis 安装客户端，配置连接地址。'},
+        {'id': 'c1', 'document_id': 'd1', 'title': '持久化', 'content': 'Redis 持久化有 RDB 快照和 AOF 日志两种方式。'},
+        {'id': 'c2', 'document_id': 'd1', 'title': '集群', 'content': 'Redis Cluster 通过哈希槽实现数据分片与高可用。'},
+    ]
+
+
+def _create_ready_document(db_service, doc_id, filename='redis.pdf'):
+    db_service.create_document(
+        doc_id=doc_id, filename=filename, file_path=f'/tmp/{filename}',
+        file_size=1024, file_type='pdf'
+    )
+    db_service.save_parse_result(doc_id, '# Redis', None)
+
+
+@pytest.mark.unit
+class TestChunkIndex:
+
+    def test_tokenize_mixed_text(self):
+        tokens = tokenize('Redis 持久化')
+        assert 'redis' in tokens
+        assert '持久' in tokens and '久化' in tokens
+
+    def test_search_ranks_relevant_chunk_first(self, sample_chunks):
+        index = ChunkIndex.build(sample_chunks, with_embeddings=False)
+        results = index.search('AOF 持久化', top_k=2)
+        assert results[0][0] == 'c1'
+        assert results[0][1] == pytest.approx(1.0)
+
+    def test_search_no_match_returns_empty(self, sample_chunks):
+        index = ChunkIndex.build(sample_chunks, with_embeddings=False)
+        assert index.search('kubernetes') == []
+
+    def test_roundtrip_and_merge(self, sample_chunks):
+        index = ChunkIndex.build(sample_chunks[:2], with_embeddings=False)
+        restored = ChunkIndex.from_dict(index.to_dict())
+        assert restored.search('快照')[0][0] == 'c1'
+
+        other = ChunkIndex.build(sample_chunks[2:], with_embeddings=False)
+        merged = ChunkIndex.merge([restored, other])
+        assert len(merged) == 3
+        assert merged.search('哈希槽 分片')[0][0] == 'c2'
+
+    def test_from_dict_rejects_other_version(self):
+        assert ChunkIndex.from_dict({'version': -1}) is None
+
+
+@pytest.mark.unit
+class TestChunkIndexPersistence:
+
+    def test_save_chunks_persists_index(self, db_service):
+        _create_ready_document(db_service, 'doc_a')
+        db_service.save_chunks('doc_a', [
+            {'title': '安装', 'content': 'pip install redis'},
+            {'title': '持久化', 'content': 'RDB 快照与 AOF 日志'},
+        ])
+
+        indexes = db_service.get_chunk_indexes(['doc_a'])
+        assert len(indexes['doc_a']) == 2
+        assert indexes['doc_a'].search('AOF')[0][0] == 'chunk_doc_a_1'
+
+    def test_missing_index_is_rebuilt(self, db_service):
+        _create_ready_document(db_service, 'doc_b')
+        db_service.save_chunks('doc_b', [{'title': '集群', 'content': '哈希槽分片'}])
+        with db_service.get_connection() as conn:
+            conn.execute('DELETE FROM knowledge_chunk_indexes')
+
+        indexes = db_service.get_chunk_indexes(['doc_b'])
+        assert indexes['doc_b'].search('哈希槽')[0][0] == 'chunk_doc_b_0'
+
+
+@pytest.mark.unit
+class TestSectionRetrieval:
+
+    def test_retriever_returns_top_k_for_section(self, db_service):
+        _create_ready_document(db_service, 'doc_c')
+        db_service.save_chunks('doc_c', [
+            {'title': f'第{i}章', 'content': f'无关内容 {i} ' * 20} for i in range(20)
+        ] + [{'title': '持久化', 'content': 'AOF 重写与 RDB 快照的取舍'}])
+
+        retriever = KnowledgeService().load_chunk_retriever(['doc_c'], db_service=db_service)
+        items = retriever.retrieve('持久化 AOF', top_k=2)
+        assert items[0].title == 'redis.pdf - 持久化'
+        assert len(items) <= 2
+
+        prompt = retriever.format_for_prompt('持久化 AOF', top_k=1)
+        assert 'AOF 重写' in prompt
+        assert '无关内容' not in prompt
+
+    def test_merged_knowledge_v2_uses_query_ranking(self, sample_chunks, monkeypatch):
+        monkeypatch.setenv('KNOWLEDGE_MAX_DOC_ITEMS', '1')
+        service = KnowledgeService()
+        documents = [{'id': 'd1', 'filename': 'redis.pdf'}]
+
+        merged = service.get_merged_knowledge_v2(
+            documents, sample_chunks, [], [], query='哈希槽 集群'
+        )
+        assert merged[0].title == 'redis.pdf - 集群'
+
+    def test_merged_knowledge_v2_keeps_document_order_without_hits(self, sample_chunks, monkeypatch):
+        monkeypatch.setenv('KNOWLEDGE_MAX_DOC_ITEMS', '2')
+        documents = [{'id': 'd1', 'filename': 'redis.pdf'}]
+
+        merged = KnowledgeService().get_merged_knowledge_v2(
+            documents, sample_chunks, [], [], query='kubernetes'
+        )
+        assert [m.title for m in merged] == ['redis.pdf - 安装', 'redis.pdf - 持久化']
+
+    def test_section_top_k_from_service_config(self, sample_chunks):
+        items = KnowledgeService(section_top_k=1).retrieve_chunks('Redis', sample_chunks)
+        assert len(items) == 1
+
+    def test_retrieval_disabled(self, db_service):
+        _create_ready_document(db_service, 'doc_d')
+        db_service.save_chunks('doc_d', [{'title': '集群', 'content': '哈希槽分片'}])
+        service = KnowledgeService(section_retrieval_enabled=False)
+        assert service.load_chunk_retriever(['doc_d'], db_service=db_service) is None
+
+    def test_researcher_background_ranked_by_topic(self, db_service, monkeypatch):
+        from unittest.mock import Mock
+        from services.blog_generator.agents import ResearcherAgent
+
+        monkeypatch.setenv('KNOWLEDGE_MAX_DOC_ITEMS', '2')
+        _create_ready_document(db_service, 'doc_r')
+        db_service.save_chunks('doc_r', [
+            {'title': f'第{i}章', 'content': f'无关内容 {i} ' * 20} for i in range(20)
+        ] + [{'title': '持久化', 'content': 'AOF 重写与 RDB 快照的取舍'}])
+
+        service = KnowledgeService()
+        load = service.load_chunk_retriever
+        monkeypatch.setattr(service, 'load_chunk_retriever', lambda ids: load(ids, db_service=db_service))
+        agent = ResearcherAgent(Mock(), knowledge_service=service)
+        agent._sub_query_engine = None
+        agent.smart_search_enabled = False
+        agent._material_store = agent._deep_scraper = None
+        agent.search = lambda topic, audience: []
+
+        state = agent.run({
+            'topic': 'Redis 持久化 AOF',
+            'document_ids': ['doc_r'],
+            'document_knowledge': [{'file_name': 'redis.pdf', 'content': '无关内容 0 ' * 200}],
+        })
+
+        # 按主题检索分块，而不是按原始顺序截取前 N 条
+        assert 'AOF 重写' in state['background_knowledge']
+        assert '无关内容 0' not in state['background_knowledge']
+
+    def test_no_documents_returns_none(self, db_service):
+        assert KnowledgeService().load_chunk_retriever([], db_service=db_service) is None
@@ -0,0 +1,93 @@
+"""
+冷启动懒加载测试
+测试 LazyProxy 的按需创建与透明转发、services 包的懒导出、BlogService.generator 的延迟编译，
+以及 create_app 启动期不导入 LangGraph / Playwright / 全部 Agent
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.lazy import LazyProxy
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+@pytest.mark.unit
+class TestLazyProxy:
+
+    def test_factory_runs_on_first_access_only(self):
+        factory = MagicMock(return_value=MagicMock(name='target'))
+        proxy = LazyProxy(factory)
+
+        assert not proxy.resolved
+        factory.assert_not_called()
+
+        proxy.search('q')
+        proxy.search('q2')
+        assert proxy.resolved
+        factory.assert_called_once()
+        assert factory.return_value.search.call_count == 2
+
+    def test_setattr_forwards_to_target(self):
+        class Target:
+            value = 1
+
+        target = Target()
+        proxy = LazyProxy(lambda: target)
+        proxy.value = 42
+        assert target.value == 42 and proxy.value == 42
+
+    def test_repr_does_not_resolve(self):
+        proxy = LazyProxy(lambda: 'x')
+        assert 'unresolved' in repr(proxy)
+        assert not proxy.resolved
+
+
+@pytest.mark.unit
+class TestLazyServices:
+
+    def test_package_exports_resolve_on_demand(self):
+        import services
+
+        assert 'BlogService' in dir(services)
+        from services import BlogService, get_blog_service  # noqa: F401
+        with pytest.raises(AttributeError):
+            services.NoSuchService  # noqa: B018
+
+    def test_blog_generator_compiled_on_first_access(self):
+        from services.blog_generator.blog_service import BlogService
+
+        with patch.object(BlogService, '_create_generator', return_value='compiled') as create:
+            service = BlogService(llm_client=MagicMock(), search_service=None)
+            create.assert_not_called()
+            assert service.generator == 'compiled'
+            assert service.generator == 'compiled'
+            create.assert_called_once()
+
+
+@pytest.mark.unit
+class TestColdStartImports:
+
+    def test_create_app_skips_heavy_modules(self):
+        probe = textwrap.dedent("""
+            import json, sys
+            import app
+            app.create_app()
+            heavy = ('langgraph', 'playwright', 'services.blog_generator.generator',
+                     'services.chat.agent_dispatcher')
+            print(json.dumps(sorted(
+                m for m in sys.modules if m in heavy or m.split('.')[0] in heavy
+            )))
+        """)
+        env = dict(os.environ, LLM_MIN_REQUEST_INTERVAL='0')
+        proc = subprocess.run(
+            [sys.executable, '-c', probe], cwd=BACKEND_DIR, env=env,
+            capture_output=True, text=True, timeout=120,
+        )
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,150 @@
+"""
+LLM 响应缓存测试
+测试缓存键归一化、TTL、LRU 淘汰，以及 LLMService.chat / chat_stream 的命中回放与命中率统计
+"""
+import time
+
+import pytest
+
+from services.llm_service import LLMService
+from services.offline_providers import OfflineChatModel, OfflineProfile, OfflineStats
+from utils.llm_response_cache import (
+    LLMResponseCache, make_cache_key, reset_llm_response_cache,
+)
+from utils.token_tracker import TokenTracker
+
+MESSAGES = [{'role': 'user', 'content': '介绍一下 Python 异步编程'}]
+
+
+@pytest.fixture
+def cache_env(tmp_path, monkeypatch):
+    monkeypatch.setenv('LLM_RESPONSE_CACHE_ENABLED', 'true')
+    monkeypatch.setenv('LLM_RESPONSE_CACHE_PATH', str(tmp_path / 'cache.db'))
+    monkeypatch.setenv('LLM_MIN_REQUEST_INTERVAL', '0')
+    reset_llm_response_cache()
+    yield
+    reset_llm_response_cache()
+
+
+@pytest.fixture
+def service():
+    svc = LLMService(provider_format='offline', text_model='offline')
+    stats = OfflineStats()
+    svc._text_chat_model = OfflineChatModel(profile=OfflineProfile(), stats=stats)
+    svc.token_tracker = TokenTracker()
+    return svc, stats
+
+
+@pytest.mark.unit
+class TestResponseCacheStore:
+
+    def test_key_normalizes_whitespace(self):
+        a = make_cache_key([{'role': 'user', 'content': 'hello  \r\nworld\n'}], model='m')
+        b = make_cache_key([{'role': 'user', 'content': 'hello\nworld'}], model='m')
+        assert a == b
+        assert a != make_cache_key([{'role': 'user', 'content': 'hello\nworld'}], model='m', tier='fast')
+        assert a != make_cache_key([{'role': 'user', 'content': 'hello\nworld'}], model='m',
+                                   response_format={'type': 'json_object'})
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / 'c.db'), ttl_seconds=0.05)
+        cache.set('k', 'v')
+        assert cache.get('k') == 'v'
+        time.sleep(0.1)
+        assert cache.get('k') is None
+        assert cache.stats()['entries'] == 0
+
+    def test_lru_eviction(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path / 'c.db'), max_bytes=350)
+        for i in range(3):
+            cache.set(f'k{i}', str(i) * 100)
+        cache.get('k0')  # k0 最近访问，k1 最久未访问
+        cache.set('k3', '3' * 100)
+
+        assert cache.get('k1') is None
+        assert cache.get('k0') and cache.get('k3')
+        assert cache.stats()['bytes'] <= 350
+
+    def test_persists_across_instances(self, tmp_path):
+        LLMResponseCache(str(tmp_path / 'c.db')).set('k', '持久化')
+        assert LLMResponseCache(str(tmp_path / 'c.db')).get('k') == '持久化'
+
+
+@pytest.mark.unit
+class TestLLMServiceCache:
+
+    def test_chat_replays_cached_response(self, cache_env, service):
+        svc, stats = service
+        first = svc.chat(MESSAGES, caller='researcher')
+        second = svc.chat(MESSAGES, caller='researcher')
+
+        assert first == second
+        assert stats.snapshot()['total_calls'] == 1
+        assert svc.token_tracker.get_cache_hit_rates()['researcher'] == {
+            'hits': 1, 'misses': 1, 'hit_rate': 0.5,
+        }
+
+    def test_stream_replay_pushes_chunks(self, cache_env, service):
+        svc, stats = service
+        live, replayed = [], []
+        first = svc.chat_stream(MESSAGES, on_chunk=lambda d, acc: live.append(acc), caller='writer')
+        second = svc.chat_stream(MESSAGES, on_chunk=lambda d, acc: replayed.append(acc), caller='writer')
+
+        assert first == second and stats.snapshot()['total_calls'] == 1
+        assert len(replayed) > 1 and replayed[-1] == first
+
+    def test_disabled_by_default(self, service, monkeypatch):
+        monkeypatch.delenv('LLM_RESPONSE_CACHE_ENABLED', raising=False)
+        monkeypatch.setenv('LLM_MIN_REQUEST_INTERVAL', '0')
+        reset_llm_response_cache()
+        svc, stats = service
+        svc.chat(MESSAGES)
+        svc.chat(MESSAGES)
+        assert stats.snapshot()['total_calls'] == 2
+        assert svc.token_tracker.response_cache == {}
+
+    def test_caller_allowlist(self, cache_env, service, monkeypatch):
+        monkeypatch.setenv('LLM_RESPONSE_CACHE_CALLERS', 'planner')
+        reset_llm_response_cache()
+        svc, stats = service
+        for caller in ('planner', 'planner', 'writer', 'writer'):
+            svc.chat(MESSAGES, caller=caller)
+        assert stats.snapshot()['total_calls'] == 3
+
+    def test_truncated_responses_not_cached(self, cache_env, service, monkeypatch):
+        from utils import resilient_llm_caller
+        svc, stats = service
+        calls = []
+
+        def truncated_chat(model, messages, caller=''):
+            calls.append(caller)
+            return '被截断的一半', {'truncated': True, 'attempts': 1}
+
+        monkeypatch.setattr(resilient_llm_caller, 'resilient_chat', truncated_chat)
+        svc.chat(MESSAGES, caller='researcher')
+        svc.chat(MESSAGES, caller='researcher')
+        assert len(calls) == 2
+
+        monkeypatch.setattr(resilient_llm_caller, 'is_truncated', lambda response: True)
+        svc.chat_stream(MESSAGES, caller='writer')
+        svc.chat_stream(MESSAGES, caller='writer')
+        assert stats.snapshot()['total_calls'] == 2
+
+    def test_broken_cache_degrades_to_uncached_call(self, cache_env, service, monkeypatch):
+        from utils import llm_response_cache
+        svc, stats = service
+        original = llm_response_cache.get_llm_response_cache
+
+        def broken():
+            raise RuntimeError('database disk image is malformed')
+
+        monkeypatch.setattr(llm_response_cache, 'get_llm_response_cache', broken)
+        assert svc.chat(MESSAGES, caller='researcher')
+
+        def unserializable(*args, **kwargs):
+            raise TypeError('Object of type bytes is not JSON serializable')
+
+        monkeypatch.setattr(llm_response_cache, 'get_llm_response_cache', original)
+        monkeypatch.setattr(llm_response_cache, 'make_cache_key', unserializable)
+        assert svc.chat(MESSAGES, caller='researcher')
+        assert stats.snapshot()['total_calls'] == 2
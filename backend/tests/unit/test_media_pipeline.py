@@ -0,0 +1,216 @@
+"""
+媒体流水线测试
+测试片段并发下载、ffprobe 探测决定流拷贝、OSS 分片流式上传
+"""
+import io
+import json
+import subprocess
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from services import media_pipeline
+from services.oss_service import OSSService
+
+
+def _probe_output(codec='h264', width=1080):
+    return json.dumps({'streams': [
+        {'codec_type': 'video', 'codec_name': codec, 'width': width, 'height': 1920,
+         'pix_fmt': 'yuv420p', 'time_base': '1/15360'},
+        {'codec_type': 'audio', 'codec_name': 'aac', 'sample_rate': '44100', 'channels': 2},
+    ]})
+
+
+class FakeBucket:
+    """记录分片上传调用的内存 Bucket"""
+
+    def __init__(self):
+        self.parts = {}
+        self.completed = {}
+        self.aborted = []
+
+    def init_multipart_upload(self, key, headers=None):
+        return SimpleNamespace(upload_id=f'up_{key}')
+
+    def upload_part(self, key, upload_id, part_number, data):
+        self.parts[(key, part_number)] = data
+        return SimpleNamespace(etag=f'etag{part_number}')
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        self.completed[key] = b''.join(self.parts[(key, p.part_number)] for p in parts)
+
+    def abort_multipart_upload(self, key, upload_id):
+        self.aborted.append(key)
+
+
+class ShortReadStream(io.BytesIO):
+    """模拟管道短读：每次最多返回 7 字节"""
+
+    def read(self, n=-1):
+        return super().read(min(n, 7) if n and n > 0 else 7)
+
+
+@pytest.fixture
+def oss():
+    service = OSSService(access_key_id='', access_key_secret='', bucket_name='')
+    service.bucket_name = 'bucket'
+    service._bucket = FakeBucket()
+    service._initialized = True
+    return service
+
+
+@pytest.mark.unit
+class TestDownloadSegments:
+
+    def test_downloads_concurrently_and_keeps_order(self, tmp_path):
+        active, peak = [], []
+
+        class FakeResponse:
+            def __init__(self, url):
+                self.url = url
+
+            def __enter__(self):
+                active.append(1)
+                peak.append(len(active))
+                time.sleep(0.05)
+                return self
+
+            def __exit__(self, *args):
+                active.pop()
+
+            def raise_for_status(self):
+                if 'bad' in self.url:
+                    raise RuntimeError('404')
+
+            def iter_content(self, chunk_size):
+                yield self.url.encode()
+
+        urls = ['http://x/a.mp4', 'http://x/bad.mp4', 'http://x/c.mp4', 'http://x/d.mp4']
+        with patch('requests.get', lambda url, **kw: FakeResponse(url)):
+            paths = media_pipeline.download_segments(urls, str(tmp_path), max_workers=4)
+
+        assert paths[1] is None
+        assert open(paths[2], 'rb').read() == b'http://x/c.mp4'
+        assert max(peak) > 1
+
+    def test_local_files_are_reused(self, tmp_path):
+        clip = tmp_path / 'clip.mp4'
+        clip.write_bytes(b'data')
+        assert media_pipeline.download_segments([str(clip)], str(tmp_path)) == [str(clip)]
+
+
+@pytest.mark.unit
+class TestConcat:
+
+    def test_matching_codecs_use_stream_copy(self, tmp_path):
+        calls = []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            if 'ffprobe' in cmd[0]:
+                return subprocess.CompletedProcess(cmd, 0, _probe_output(), '')
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+
+        with patch('subprocess.run', fake_run):
+            mode = media_pipeline.concat_videos(['a.mp4', 'b.mp4'], str(tmp_path / 'out.mp4'))
+
+        assert mode == 'copy'
+        ffmpeg_cmd = [c for c in calls if 'ffprobe' not in c[0]]
+        assert len(ffmpeg_cmd) == 1 and '-c' in ffmpeg_cmd[0] and 'libx264' not in ffmpeg_cmd[0]
+
+    def test_mismatched_codecs_reencode(self, tmp_path):
+        def fake_run(cmd, **kwargs):
+            if 'ffprobe' in cmd[0]:
+                width = 720 if cmd[-1] == 'b.mp4' else 1080
+                return subprocess.CompletedProcess(cmd, 0, _probe_output(width=width), '')
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+
+        with patch('subprocess.run', fake_run):
+            assert media_pipeline.concat_videos(['a.mp4', 'b.mp4'], str(tmp_path / 'o.mp4')) == 'reencode'
+
+    def test_failed_copy_falls_back_to_reencode(self, tmp_path):
+        def fake_run(cmd, **kwargs):
+            if 'ffprobe' in cmd[0]:
+                return subprocess.CompletedProcess(cmd, 0, _probe_output(), '')
+            return subprocess.CompletedProcess(cmd, 0 if 'libx264' in cmd else 1, '', 'non monotonic DTS')
+
+        with patch('subprocess.run', fake_run):
+            assert media_pipeline.concat_videos(['a.mp4', 'b.mp4'], str(tmp_path / 'o.mp4')) == 'reencode'
+
+    def test_pipe_output_uses_fragmented_mp4(self):
+        cmd = media_pipeline.build_concat_command('list.txt', '-', stream_copy=True)
+        assert cmd[-1] == 'pipe:1'
+        assert 'frag_keyframe+empty_moov' in cmd
+
+
+@pytest.mark.unit
+class TestMergeVideos:
+
+    def test_uses_ffmpeg_path_and_removes_uploaded_file(self, tmp_path):
+        clips = []
+        for name in ('a.mp4', 'b.mp4'):
+            clip = tmp_path / name
+            clip.write_bytes(b'data')
+            clips.append(str(clip))
+        calls, uploaded = [], []
+
+        def fake_run(cmd, **kwargs):
+            calls.append(cmd)
+            if 'ffprobe' in cmd[0]:
+                return subprocess.CompletedProcess(cmd, 0, _probe_output(), '')
+            open(cmd[-1], 'wb').write(b'merged')
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+
+        def upload_file(path, remote_path, content_type=None):
+            uploaded.append(open(path, 'rb').read())
+            return {'success': True, 'url': f'https://oss/{remote_path}'}
+
+        oss = SimpleNamespace(is_available=True, upload_file=upload_file)
+        output_dir = tmp_path / 'out'
+        with patch('subprocess.run', fake_run):
+            result = media_pipeline.merge_videos(
+                clips, oss, output_dir=str(output_dir), stream_upload=False, ffmpeg_path='/opt/ffmpeg',
+            )
+
+        assert result['success'] and result['url'].startswith('https://oss/')
+        assert [c[0] for c in calls if 'ffprobe' not in c[0]] == ['/opt/ffmpeg']
+        assert uploaded == [b'merged']
+        assert result['local_path'] is None and list(output_dir.iterdir()) == []
+
+
+@pytest.mark.unit
+class TestOSSUploadStream:
+
+    def test_uploads_parts_from_short_reads(self, oss):
+        payload = bytes(range(256)) * 5
+        result = oss.upload_stream(ShortReadStream(payload), 'v/merged.mp4', 'video/mp4', part_size=300)
+
+        assert result['success'] and result['parts'] == 5
+        assert result['size'] == len(payload)
+        assert oss._bucket.completed['v/merged.mp4'] == payload
+
+    def test_failure_aborts_upload(self, oss):
+        def broken(*args, **kwargs):
+            raise IOError('network down')
+
+        oss._bucket.upload_part = broken
+        result = oss.upload_stream(io.BytesIO(b'x' * 10), 'v/broken.mp4', part_size=4)
+
+        assert not result['success']
+        assert oss._bucket.aborted == ['v/broken.mp4']
+
+    def test_large_file_upload_uses_multipart(self, oss, tmp_path, monkeypatch):
+        from services import oss_service
+        monkeypatch.setattr(oss_service, 'MULTIPART_THRESHOLD', 10)
+        monkeypatch.setattr(oss_service, 'MULTIPART_PART_SIZE', 8)
+        oss._bucket.object_exists = lambda key: False
+        video = tmp_path / 'big.mp4'
+        video.write_bytes(b'0123456789' * 3)
+
+        result = oss.upload_file(str(video), 'v/big.mp4')
+
+        assert result['success'] and result['parts'] == 4 and result['skipped'] is False
+        assert oss._bucket.completed['v/big.mp4'] == video.read_bytes()
@@ -0,0 +1,128 @@
+"""
+离线替身提供商测试
+测试确定性响应、429 注入、录制回放、工厂接入、搜索 / 图片替身与 mini 工作流端到端
+"""
+import json
+
+import pytest
+
+from services.offline_providers import (
+    OfflineChatModel, OfflineProfile, OfflineResponder, OfflineSearchService,
+    OfflineStats, install_offline_providers, messages_key,
+)
+
+PLANNER_PROMPT = (
+    '你是一个专业的技术博客大纲规划师。\n'
+    '技术主题: Rust 所有权\n'
+    '**目标章节数**: 3\n'
+    '**目标配图数**: 1\n'
+)
+
+
+@pytest.mark.unit
+class TestOfflineChatModel:
+
+    def test_deterministic_response(self):
+        first = OfflineChatModel(profile=OfflineProfile(seed=7), stats=OfflineStats())
+        second = OfflineChatModel(profile=OfflineProfile(seed=7), stats=OfflineStats())
+        assert first.invoke(PLANNER_PROMPT).content == second.invoke(PLANNER_PROMPT).content
+
+    def test_planner_outline_follows_prompt(self):
+        stats = OfflineStats()
+        model = OfflineChatModel(profile=OfflineProfile(), stats=stats)
+        outline = json.loads(model.invoke(PLANNER_PROMPT).content)
+
+        assert len(outline['sections']) == 3
+        assert 'Rust 所有权' in outline['title']
+        assert [s['image_type'] != 'none' for s in outline['sections']] == [True, False, False]
+        assert stats.snapshot()['calls'] == {'planner': 1}
+
+    def test_usage_metadata_and_stream(self):
+        model = OfflineChatModel(profile=OfflineProfile(), stats=OfflineStats())
+        message = model.invoke('写一段话')
+        assert message.usage_metadata['output_tokens'] > 0
+
+        streamed = ''.join(chunk.content for chunk in model.stream('写一段话'))
+        assert streamed == message.content
+
+    def test_rate_limit_injection(self):
+        stats = OfflineStats()
+        model = OfflineChatModel(profile=OfflineProfile(rate_limit_ratio=1.0), stats=stats)
+        with pytest.raises(RuntimeError, match='429'):
+            model.invoke('hello')
+        assert stats.snapshot()['rate_limited'] == 1
+
+    def test_rate_limit_reproducible_with_seed(self):
+        def outcomes(seed):
+            model = OfflineChatModel(profile=OfflineProfile(seed=seed, rate_limit_ratio=0.5), stats=OfflineStats())
+            result = []
+            for _ in range(20):
+                try:
+                    model.invoke('hello')
+                    result.append(True)
+                except RuntimeError:
+                    result.append(False)
+            return result
+
+        first = outcomes(7)
+        assert first == outcomes(7)
+        # 同一 prompt 重试时结果会变化，而不是永远命中 429
+        assert True in first and False in first
+
+    def test_recordings_replay(self, tmp_path):
+        messages = [{'role': 'user', 'content': 'hello'}]
+        recordings = tmp_path / 'recordings.jsonl'
+        recordings.write_text(json.dumps({'key': messages_key(messages), 'response': '录制响应'}) + '\n')
+
+        responder = OfflineResponder(OfflineProfile(recordings=str(recordings)))
+        assert responder.respond(messages) == ('recorded', '录制响应')
+        assert responder.respond([{'role': 'user', 'content': 'other'}])[0] != 'recorded'
+
+    def test_factory_creates_offline_model(self):
+        from services.llm_factory import create_llm_client
+
+        model = create_llm_client('offline', model_name='offline-smart', max_tokens=1024)
+        assert isinstance(model, OfflineChatModel)
+        assert model.model_name == 'offline-smart'
+
+
+@pytest.mark.unit
+class TestOfflineServices:
+
+    def test_search_result_shape(self):
+        service = OfflineSearchService(OfflineProfile())
+        result = service.search('Python 异步', max_results=3)
+
+        assert result['success'] and len(result['results']) == 3
+        assert {'title', 'url', 'content', 'source'} <= set(result['results'][0])
+        assert service.search('Python 异步', max_results=3) == result
+
+    def test_install_and_generate_image(self, tmp_path):
+        from services import get_image_service, get_llm_service
+        from services.image_service import AspectRatio, ImageSize
+        from services.blog_generator.services.search_service import get_search_service
+
+        providers = install_offline_providers(str(tmp_path), OfflineProfile())
+        assert get_llm_service() is providers['llm'] and get_llm_service().is_available()
+        assert get_search_service() is providers['search']
+
+        result = get_image_service().generate(
+            '流程图', aspect_ratio=AspectRatio.LANDSCAPE_16_9, image_size=ImageSize.SIZE_1K,
+        )
+        assert result is not None and result.oss_url
+        assert list((tmp_path / 'oss').rglob('*.png'))
+
+
+@pytest.mark.unit
+class TestOfflineWorkflow:
+
+    def test_mini_workflow_end_to_end(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('LLM_MIN_REQUEST_INTERVAL', '0')
+        from services.blog_generator import BlogGenerator
+
+        providers = install_offline_providers(str(tmp_path), OfflineProfile())
+        generator = BlogGenerator(providers['llm'], search_service=providers['search'])
+        result = generator.generate(topic='Python 异步编程', target_length='mini')
+
+        assert result['success'], result.get('error')
+        assert result['markdown'].count('## ') >= result['sections_count'] > 0
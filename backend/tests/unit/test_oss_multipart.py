@@ -0,0 +1,185 @@
+"""
+OSS 分片上传测试（LocalBucket 本地目录 Bucket）
+测试并发分片、断点续传、URL 流式中转、批量上传
+"""
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+
+from services import oss_service
+from services.oss_local_bucket import LocalBucket
+from services.oss_service import OSSService
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    return LocalBucket(str(tmp_path / 'bucket'))
+
+
+@pytest.fixture
+def oss(bucket, tmp_path, monkeypatch):
+    monkeypatch.setattr(oss_service, 'CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+    return OSSService(bucket=bucket)
+
+
+@pytest.fixture
+def big_file(tmp_path):
+    path = tmp_path / 'merged.mp4'
+    path.write_bytes(os.urandom(1000))
+    return path
+
+
+class FlakyPart:
+    """让指定分片第一次上传失败"""
+
+    def __init__(self, bucket, fail_part):
+        self.original = bucket.upload_part
+        self.fail_part = fail_part
+        self.failed = False
+
+    def __call__(self, key, upload_id, part_number, data, **kwargs):
+        if part_number == self.fail_part and not self.failed:
+            self.failed = True
+            raise IOError('connection reset')
+        return self.original(key, upload_id, part_number, data, **kwargs)
+
+
+class FakeStreamResponse:
+    def __init__(self, payload, headers=None):
+        self.raw = io.BytesIO(payload)
+        self.content = payload
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.mark.unit
+class TestMultipartFileUpload:
+
+    def test_concurrent_parts_reassemble(self, oss, bucket, big_file):
+        result = oss.upload_file_multipart(str(big_file), 'v/a.mp4', part_size=128, num_threads=4)
+
+        assert result['success'] and result['parts'] == 8 and result['resumed_parts'] == 0
+        assert bucket.get_object_bytes('v/a.mp4') == big_file.read_bytes()
+        assert os.listdir(oss_service.CHECKPOINT_DIR) == []
+
+    def test_interrupted_upload_resumes_missing_parts(self, oss, bucket, big_file):
+        bucket.upload_part = FlakyPart(bucket, fail_part=5)
+        first = oss.upload_file_multipart(str(big_file), 'v/b.mp4', part_size=128, num_threads=1)
+        assert not first['success'] and first['resumable']
+        assert len(os.listdir(oss_service.CHECKPOINT_DIR)) == 1
+
+        calls_before = bucket.upload_part_calls
+        second = oss.upload_file_multipart(str(big_file), 'v/b.mp4', part_size=128, num_threads=2)
+
+        assert second['success'] and second['resumed_parts'] == 7
+        assert bucket.upload_part_calls - calls_before == 1
+        assert bucket.get_object_bytes('v/b.mp4') == big_file.read_bytes()
+
+    def test_expired_upload_id_restarts(self, oss, bucket, big_file):
+        bucket.upload_part = FlakyPart(bucket, fail_part=2)
+        oss.upload_file_multipart(str(big_file), 'v/c.mp4', part_size=256, num_threads=1)
+        for upload_id in os.listdir(bucket._uploads_dir):
+            bucket.abort_multipart_upload('v/c.mp4', upload_id)
+
+        result = oss.upload_file_multipart(str(big_file), 'v/c.mp4', part_size=256)
+
+        assert result['success'] and result['resumed_parts'] == 0
+        assert bucket.get_object_bytes('v/c.mp4') == big_file.read_bytes()
+
+    def test_modified_file_discards_checkpoint(self, oss, bucket, big_file):
+        bucket.upload_part = FlakyPart(bucket, fail_part=3)
+        oss.upload_file_multipart(str(big_file), 'v/d.mp4', part_size=256, num_threads=1)
+        big_file.write_bytes(os.urandom(700))
+
+        result = oss.upload_file_multipart(str(big_file), 'v/d.mp4', part_size=256)
+
+        assert result['success'] and result['resumed_parts'] == 0
+        assert bucket.get_object_bytes('v/d.mp4') == big_file.read_bytes()
+
+
+@pytest.mark.unit
+class TestStreamingAndBatch:
+
+    def test_url_without_length_streams_into_multipart(self, oss, bucket, monkeypatch):
+        monkeypatch.setattr(oss_service, 'MULTIPART_PART_SIZE', 100)
+        payload = os.urandom(450)
+        with patch('requests.get', return_value=FakeStreamResponse(payload, {'Content-Type': 'video/mp4'})), \
+                patch.object(oss, 'upload_stream', wraps=oss.upload_stream) as stream_upload:
+            result = oss.upload_from_url('https://cdn/x.mp4', 'v/x.mp4')
+
+        assert result['success']
+        stream_upload.assert_called_once()
+        assert bucket.get_object_bytes('v/x.mp4') == payload
+
+    def test_small_url_uses_single_put(self, oss, bucket):
+        response = FakeStreamResponse(b'png-bytes', {'Content-Length': '9'})
+        with patch('requests.get', return_value=response), \
+                patch.object(oss, 'upload_stream') as stream_upload:
+            result = oss.upload_from_url('https://cdn/a.png', 'img/a.png')
+
+        assert result['success']
+        stream_upload.assert_not_called()
+        assert bucket.get_object_bytes('img/a.png') == b'png-bytes'
+
+
+@pytest.mark.unit
+class TestImageSetUpload:
+
+    def test_image_service_uploads_set_concurrently(self, oss, bucket, monkeypatch):
+        from services.image_service import NanoBananaService
+
+        def fake_get(url, **kwargs):
+            if 'broken' in url:
+                raise IOError('404')
+            payload = url.encode()
+            return FakeStreamResponse(payload, {'Content-Length': str(len(payload))})
+
+        monkeypatch.setattr(oss_service, 'get_oss_service', lambda: oss)
+        service = NanoBananaService(api_key='x', output_folder='/tmp/vibe-blog-test-images')
+        with patch('requests.get', fake_get):
+            urls = service.upload_images_to_oss(['https://cdn/a.png', 'https://cdn/broken.png', 'https://cdn/c.png'])
+
+        assert urls[1] is None and all(urls[i] for i in (0, 2))
+        assert sorted(bucket.get_object_bytes(u.split('/', 3)[-1]) for u in (urls[0], urls[2])) == [
+            b'https://cdn/a.png', b'https://cdn/c.png',
+        ]
+
+    def test_artist_mini_images_uploaded_as_one_batch(self, monkeypatch):
+        from services import image_service
+        from services.blog_generator.agents.artist import ArtistAgent
+        from services.image_service import ImageResult
+
+        class FakeImageService:
+            def __init__(self):
+                self.batches = []
+
+            def is_available(self):
+                return True
+
+            def generate(self, prompt, download=True, **kwargs):
+                assert download is False  # 生成线程内不逐张上传
+                return ImageResult(url=f'https://cdn/{len(prompt)}.png')
+
+            def upload_images_to_oss(self, image_urls):
+                self.batches.append(list(image_urls))
+                return [u.replace('https://cdn/', 'https://oss/') for u in image_urls]
+
+        fake = FakeImageService()
+        monkeypatch.setattr(image_service, '_image_service', fake)
+        sections = [{'title': '一', 'content': '短'}, {'title': '二', 'content': '稍长一些的内容'}]
+
+        state = ArtistAgent(llm_client=None)._generate_mini_section_images({'topic': 't'}, sections)
+
+        assert len(fake.batches) == 1 and len(fake.batches[0]) == 2
+        assert all(url.startswith('https://oss/') for url in state['section_images'])
+        assert [img['rendered_path'] for img in state['images']] == state['section_images']
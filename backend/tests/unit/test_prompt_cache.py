@@ -0,0 +1,190 @@
+"""
+Prompt 前缀缓存测试
+测试模板稳定前缀拆分、Anthropic cache_control 断点、Writer 共享前缀，以及缓存 token 的统计与计费
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from infrastructure.prompts import cached_prompt_message, get_prompt_manager
+from services.llm_service import LLMService
+from utils.cost_tracker import CostTracker
+from utils.token_tracker import TokenTracker, TokenUsage
+
+SPLIT_TEMPLATES = [
+    ('blog/questioner', {'section_outline': {'title': 'T'}, 'depth_requirement': 'medium'}),
+    ('blog/section_evaluator', {'section_title': 'T'}),
+    ('blog/humanizer_score', {}),
+    ('blog/humanizer', {'audience_adaptation': 'technical-beginner'}),
+]
+
+
+@pytest.mark.unit
+class TestTemplatePrefix:
+
+    @pytest.mark.parametrize('template,kwargs', SPLIT_TEMPLATES)
+    def test_prefix_is_stable_across_sections(self, template, kwargs):
+        pm = get_prompt_manager()
+        prefix_a, suffix_a = pm.render_split(template, section_content='第一章正文', **kwargs)
+        prefix_b, suffix_b = pm.render_split(template, section_content='第二章正文', **kwargs)
+
+        assert prefix_a and prefix_a == prefix_b
+        assert '第一章正文' in suffix_a and '第一章正文' not in prefix_a
+
+    @pytest.mark.parametrize('template,kwargs', SPLIT_TEMPLATES)
+    def test_plain_render_has_no_marker(self, template, kwargs):
+        rendered = get_prompt_manager().render(template, section_content='正文', **kwargs)
+        assert 'CACHE_BREAKPOINT' not in rendered and '正文' in rendered
+
+    def test_template_without_breakpoint(self, tmp_path):
+        from infrastructure.prompts import PromptManager
+
+        (tmp_path / 'plain.j2').write_text('你好 {{ name }}')
+        assert PromptManager(str(tmp_path)).render_split('plain', name='世界') == ('', '你好 世界')
+
+    def test_cached_message_keeps_full_content(self):
+        message = cached_prompt_message('稳定前缀', '可变内容')
+        assert message['content'] == '稳定前缀\n\n可变内容'
+        assert message['content'].startswith(message['cache_prefix'])
+        assert cached_prompt_message('', 'only') == {'role': 'user', 'content': 'only'}
+
+
+@pytest.mark.unit
+class TestCacheBreakpoints:
+
+    def test_anthropic_blocks(self, monkeypatch):
+        monkeypatch.delenv('LLM_PROMPT_CACHE_ENABLED', raising=False)
+        svc = LLMService(provider_format='anthropic')
+        assert svc._use_cache_breakpoints()
+
+        [converted] = svc._convert_messages(
+            [cached_prompt_message('前缀', '后缀')], cache_breakpoints=True,
+        )
+        assert converted.content == [
+            {'type': 'text', 'text': '前缀', 'cache_control': {'type': 'ephemeral'}},
+            {'type': 'text', 'text': '后缀'},
+        ]
+
+    def test_openai_keeps_single_string(self):
+        svc = LLMService(provider_format='openai', openai_api_key='x')
+        assert not svc._use_cache_breakpoints()
+        [converted] = svc._convert_messages([cached_prompt_message('前缀', '后缀')])
+        assert converted.content == '前缀\n\n后缀'
+
+    def test_disabled_by_env(self, monkeypatch):
+        monkeypatch.setenv('LLM_PROMPT_CACHE_ENABLED', 'false')
+        assert not LLMService(provider_format='anthropic')._use_cache_breakpoints()
+
+    def test_prefix_caching_providers(self, monkeypatch):
+        monkeypatch.delenv('LLM_PROMPT_CACHE_ENABLED', raising=False)
+        assert LLMService(provider_format='anthropic').caches_prompt_prefix()
+        assert LLMService(provider_format='openai').caches_prompt_prefix()
+        assert LLMService(provider_format='openai', openai_api_base='https://api.deepseek.com/v1').caches_prompt_prefix()
+        assert not LLMService(provider_format='openai', openai_api_base='http://localhost:8000/v1').caches_prompt_prefix()
+        assert not LLMService(provider_format='gemini').caches_prompt_prefix()
+        monkeypatch.setenv('LLM_PROMPT_CACHE_ENABLED', 'false')
+        assert not LLMService(provider_format='openai').caches_prompt_prefix()
+
+
+@pytest.mark.unit
+class TestWriterSharedPrefix:
+
+    def test_sections_share_prefix(self):
+        from services.blog_generator.agents.writer import WriterAgent
+
+        llm = MagicMock()
+        llm.chat.return_value = '## 章节\n\n正文'
+        writer = WriterAgent(llm)
+        writer.task_manager = None
+
+        for i in (1, 2):
+            writer.write_section(
+                section_outline={'id': f'section_{i}', 'title': f'第 {i} 章'},
+                background_knowledge='共享背景知识',
+                _persona_prompt='你是资深工程师',
+            )
+
+        messages = [call.kwargs['messages'][0] for call in llm.chat.call_args_list]
+        assert messages[0]['cache_prefix'] == messages[1]['cache_prefix']
+        assert '共享背景知识' in messages[0]['cache_prefix']
+        assert messages[0]['cache_prefix'].startswith('你是资深工程师')
+        assert messages[0]['content'] != messages[1]['content']
+
+    @staticmethod
+    def _run_two_sections(monkeypatch, background, prefix_cached):
+        from services.blog_generator.agents.writer import WriterAgent
+        from services.knowledge_service import KnowledgeService
+
+        class Retriever:
+            def format_for_prompt(self, query):
+                return f'## 📚 文档相关片段\n\n{query} 的专属片段'
+
+        llm = MagicMock()
+        llm.chat.return_value = '## 章节\n\n正文'
+        llm.caches_prompt_prefix.return_value = prefix_cached
+        writer = WriterAgent(llm)
+        monkeypatch.setattr(KnowledgeService, 'load_chunk_retriever', lambda self, ids, db_service=None: Retriever())
+        state = {
+            'outline': {'title': '缓存', 'sections': [
+                {'id': 'section_1', 'title': '持久化', 'key_concept': 'AOF'},
+                {'id': 'section_2', 'title': '集群', 'key_concept': '哈希槽'},
+            ]},
+            'background_knowledge': background,
+            'document_ids': ['doc_1'],
+            '_persona_prompt': '你是资深工程师',
+            '_writing_skill_prompt': '<writing-skill name="t">方法论</writing-skill>',
+        }
+        writer.run(state, max_workers=1)
+        return [call.kwargs['messages'][0] for call in llm.chat.call_args_list]
+
+    def test_run_prefix_bytes_identical_across_sections(self, monkeypatch):
+        background = '很长的全文背景知识。' * 50
+        messages = self._run_two_sections(monkeypatch, background, prefix_cached=True)
+        prefixes = [m['cache_prefix'].encode('utf-8') for m in messages]
+        assert len(prefixes) == 2 and prefixes[0] == prefixes[1]
+        # 完整背景知识与全文大纲在前缀中，章节文档片段只出现在断点之后
+        assert background in messages[0]['cache_prefix']
+        assert '2. 集群：哈希槽' in messages[0]['cache_prefix']
+        assert '专属片段' not in messages[0]['cache_prefix']
+        assert all('专属片段' in m['content'][len(m['cache_prefix']):] for m in messages)
+
+    def test_run_truncates_background_without_prefix_cache(self, monkeypatch):
+        background = '很长的全文背景知识。' * 50
+        messages = self._run_two_sections(monkeypatch, background, prefix_cached=False)
+        # 提供方不缓存前缀：只有首章带完整背景知识，后续章节截断，避免按全价重复计费
+        assert background in messages[0]['content']
+        assert background not in messages[1]['content']
+        assert background[:100] + '...' in messages[1]['content']
+        assert '全文大纲' not in messages[1]['content']
+
+
+@pytest.mark.unit
+class TestCachedTokenAccounting:
+
+    def test_token_tracker_prompt_cache_stats(self):
+        tracker = TokenTracker()
+        tracker.record(TokenUsage(input_tokens=1000, cache_read_tokens=0, cache_write_tokens=800), agent='writer')
+        tracker.record(TokenUsage(input_tokens=1000, cache_read_tokens=800), agent='writer')
+
+        assert TokenUsage(input_tokens=1000, cache_read_tokens=800).uncached_input_tokens == 200
+        assert tracker.get_summary()['prompt_cache'] == {
+            'cached_input_tokens': 800,
+            'uncached_input_tokens': 1200,
+            'cache_write_tokens': 800,
+            'cached_ratio': 0.4,
+        }
+
+    def test_cost_tracker_bills_cached_tokens_at_cache_price(self):
+        tracker = CostTracker(budget_usd=100)
+        tracker.record_call(
+            input_tokens=1_000_000, output_tokens=0,
+            cache_read_tokens=800_000, model='claude-3.5-sonnet', agent='writer',
+        )
+        summary = tracker.get_summary()
+
+        # 0.2M * 3.00 + 0.8M * 0.30 = 0.84
+        assert summary['total_cost_usd'] == pytest.approx(0.84)
+        # 0.8M * (3.00 - 0.30) = 2.16
+        assert summary['cache_savings_usd'] == pytest.approx(2.16)
+        assert summary['cached_input_tokens'] == 800_000
+        assert summary['uncached_input_tokens'] == 200_000
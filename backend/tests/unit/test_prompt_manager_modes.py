@@ -0,0 +1,54 @@
+"""
+PromptManager 运行模式测试
+测试 production 预编译 / 关闭 auto_reload、static_block 缓存、字节码缓存与渲染耗时统计
+"""
+import pytest
+
+from infrastructure.prompts import PromptManager
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / 'page.j2').write_text("{{ static_block('_style', tone=tone) }}\n正文：{{ body }}")
+    (tmp_path / '_style.j2').write_text('语气：{{ tone }}')
+    return tmp_path
+
+
+@pytest.mark.unit
+class TestPromptManagerModes:
+
+    def test_production_precompiles_and_ignores_edits(self, template_dir, monkeypatch):
+        monkeypatch.delenv('PROMPT_TEMPLATE_MODE', raising=False)
+        pm = PromptManager(str(template_dir))
+        assert pm.production and not pm.env.auto_reload
+        assert len(pm.env.cache) == 2
+
+        (template_dir / 'page.j2').write_text('已修改')
+        assert pm.render('page', tone='正式', body='A') == '语气：正式\n正文：A'
+
+    def test_development_reloads_edits(self, template_dir, monkeypatch):
+        monkeypatch.setenv('PROMPT_TEMPLATE_MODE', 'development')
+        pm = PromptManager(str(template_dir))
+        assert pm.render('page', tone='正式', body='A') == '语气：正式\n正文：A'
+
+        (template_dir / '_style.j2').write_text('风格：{{ tone }}')
+        assert pm.render('page', tone='正式', body='A') == '风格：正式\n正文：A'
+
+    def test_static_block_memoized_and_metrics(self, template_dir, monkeypatch):
+        monkeypatch.delenv('PROMPT_TEMPLATE_MODE', raising=False)
+        pm = PromptManager(str(template_dir))
+        for body in ('A', 'B', 'C'):
+            pm.render('page', tone='正式', body=body)
+        pm.render('page', tone='轻松', body='D')
+
+        metrics = pm.get_render_metrics()
+        assert metrics['page.j2']['renders'] == 4
+        assert metrics['_style.j2']['renders'] == 2
+        assert metrics['_style.j2']['static_hits'] == 2
+        assert metrics['page.j2']['avg_ms'] > 0
+
+    def test_bytecode_cache(self, template_dir, tmp_path, monkeypatch):
+        monkeypatch.delenv('PROMPT_TEMPLATE_MODE', raising=False)
+        monkeypatch.setenv('PROMPT_TEMPLATE_BYTECODE_DIR', str(tmp_path / 'bytecode'))
+        PromptManager(str(template_dir))
+        assert len(list((tmp_path / 'bytecode').iterdir())) == 2
@@ -0,0 +1,83 @@
+"""
+可读性分析器测试
+测试单次扫描分块的结构统计、代码块屏蔽，以及整篇 / 段落块两级缓存
+"""
+import pytest
+
+from vibe_reviewer.pipeline.readability_analyzer import ReadabilityAnalyzer, _split_blocks
+
+ARTICLE = """---
+title: Redis 入门
+---
+
+# Redis 简介
+
+Redis 是一个**内存数据库**，支持[多种数据结构](https://redis.io)。它的读写性能很高！适合用作缓存层。
+
+## 数据结构
+
+- 字符串：最基础的类型
+- 哈希：适合存储对象
+- 列表：可以实现消息队列
+
+```bash
+# 这不是标题
+redis-cli ping
+
+redis-cli info
+```
+
+| 类型 | 场景 |
+|---|---|
+| string | 计数器 |
+"""
+
+
+@pytest.mark.unit
+class TestReadabilityTokenizer:
+
+    def test_code_block_kept_as_single_block(self):
+        blocks = _split_blocks(ARTICLE)
+        assert not any('title: Redis' in b for b in blocks)
+        code = [b for b in blocks if b.startswith('```')]
+        assert len(code) == 1 and 'redis-cli info' in code[0]
+
+    def test_structure_counts(self):
+        metrics = ReadabilityAnalyzer().analyze(ARTICLE)
+        assert metrics.heading_count == 2       # 代码块内的 # 注释不计入
+        assert metrics.list_count == 3
+        assert metrics.code_block_count == 1
+        assert metrics.has_structure
+
+    def test_sentences_exclude_markup(self):
+        analyzer = ReadabilityAnalyzer()
+        stats = analyzer._analyze_block(
+            'Redis 是一个**内存数据库**，支持[多种数据结构](https://redis.io)。它的读写性能很高！'
+        )
+        assert stats.sentence_lengths == (16, 8)
+        assert stats.paragraph_length == 24
+
+
+@pytest.mark.unit
+class TestReadabilityCache:
+
+    def test_document_cache_returns_copy(self):
+        analyzer = ReadabilityAnalyzer()
+        first = analyzer.analyze(ARTICLE, content_hash='h1')
+        first.overall_score = 0
+        second = analyzer.analyze(ARTICLE, content_hash='h1')
+
+        assert second.overall_score != 0
+        assert analyzer.cache_info()['document_hits'] == 1
+
+    def test_small_edit_reanalyzes_changed_paragraph_only(self):
+        analyzer = ReadabilityAnalyzer()
+        baseline = analyzer.analyze(ARTICLE)
+        misses = analyzer.cache_info()['block_misses']
+
+        edited = ARTICLE.replace('适合用作缓存层。', '适合用作缓存层，也能做排行榜。')
+        metrics = analyzer.analyze(edited)
+
+        assert analyzer.cache_info()['block_misses'] == misses + 1
+        assert metrics.char_count > baseline.char_count
+        assert metrics.to_dict() == ReadabilityAnalyzer().analyze(edited).to_dict()
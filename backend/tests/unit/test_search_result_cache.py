@@ -0,0 +1,213 @@
+"""
+搜索结果缓存测试
+测试归一化查询命中、按源 TTL、stale-while-revalidate、失败负缓存、结果条数覆盖、单飞，
+以及 SearchService / RetrieverRegistry 接入
+"""
+import threading
+import time
+
+import pytest
+
+from services.blog_generator.services import search_result_cache as src
+from services.blog_generator.services.search_result_cache import SearchResultCache
+
+
+class Upstream:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.version = 1
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def __call__(self, n=3):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('上游超时')
+        return {'success': True, 'results': [
+            {'url': f'https://example.com/{i}', 'title': f'v{self.version}'} for i in range(n)
+        ]}
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def factory(**kwargs):
+        return SearchResultCache(path=str(tmp_path / 'search.db'), **kwargs)
+    return factory
+
+
+@pytest.mark.unit
+class TestSearchResultCache:
+
+    def test_normalized_query_hit_returns_copies(self, make_cache):
+        cache, upstream = make_cache(), Upstream()
+        first = cache.fetch('google', 'LangGraph  教程', 3, upstream)
+        second = cache.fetch('google', 'langgraph 教程', 3, upstream)
+        second['results'][0]['title'] = '被调用方修改'
+
+        assert upstream.calls == 1
+        assert 'from_cache' not in first and second['from_cache'] is True
+        assert cache.fetch('google', 'LANGGRAPH 教程', 3, upstream)['results'][0]['title'] == 'v1'
+        # 不同源互不命中
+        cache.fetch('sogou', 'langgraph 教程', 3, upstream)
+        assert upstream.calls == 2
+
+    def test_source_ttls(self, make_cache):
+        cache = make_cache(default_ttl=3600, ttls={'google': 600})
+        assert cache.ttl_for('arxiv', 'transformer') == 7 * 24 * 3600
+        assert cache.ttl_for('google', 'transformer') == 600
+        assert cache.ttl_for('arxiv', '大模型 最新进展') == 30 * 60
+        assert cache.ttl_for('general', 'LLM news today') == 30 * 60
+
+    def test_stale_while_revalidate(self, make_cache):
+        cache, upstream = make_cache(default_ttl=1, stale_seconds=10), Upstream()
+        cache.fetch('general', 'q', 3, upstream)
+        # 宽限期不超过 TTL：1s 后过期，2s 前仍可返回旧结果
+        time.sleep(1.1)
+        upstream.version = 2
+
+        stale = cache.fetch('general', 'q', 3, upstream)
+        assert stale['results'][0]['title'] == 'v1'
+        deadline = time.monotonic() + 2
+        while cache.stats['refreshes'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.fetch('general', 'q', 3, upstream)['results'][0]['title'] == 'v2'
+        assert upstream.calls == 2
+
+    def test_failed_refresh_keeps_stale(self, make_cache):
+        cache, upstream = make_cache(default_ttl=1, stale_seconds=10), Upstream()
+        cache.fetch('general', 'q', 3, upstream)
+        time.sleep(1.1)
+        upstream.fail = True
+
+        assert cache.fetch('general', 'q', 3, upstream)['results'][0]['title'] == 'v1'
+        deadline = time.monotonic() + 2
+        while cache.stats['refresh_failures'] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.fetch('general', 'q', 3, upstream)['success'] is True
+
+    def test_negative_caching(self, make_cache):
+        cache, upstream = make_cache(negative_ttl=1), Upstream()
+        upstream.fail = True
+        with pytest.raises(RuntimeError):
+            cache.fetch('sogou', 'q', 3, upstream)
+        cached = cache.fetch('sogou', 'q', 3, upstream)
+        assert cached['success'] is False and '上游超时' in cached['error']
+        assert upstream.calls == 1
+
+        time.sleep(1.1)
+        upstream.fail = False
+        assert cache.fetch('sogou', 'q', 3, upstream)['success'] is True
+        assert upstream.calls == 2
+
+    def test_max_results_coverage(self, make_cache):
+        cache, upstream = make_cache(), Upstream()
+        cache.fetch('google', 'q', 3, lambda: upstream(3))
+        assert len(cache.fetch('google', 'q', 2, lambda: upstream(2))['results']) == 2
+        assert upstream.calls == 1
+        # 缓存了满额 3 条，请求 5 条需重新搜索
+        assert len(cache.fetch('google', 'q', 5, lambda: upstream(5))['results']) == 5
+        assert upstream.calls == 2
+        # 上游只返回 1 条（未满额）时，更大的请求也可命中
+        cache.fetch('google', 'rare', 5, lambda: upstream(1))
+        cache.fetch('google', 'rare', 10, lambda: upstream(1))
+        assert upstream.calls == 3
+
+    def test_concurrent_misses_single_flight(self, make_cache):
+        cache, upstream = make_cache(), Upstream(delay=0.1)
+        threads = [threading.Thread(target=cache.fetch, args=('arxiv', 'q', 3, upstream)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert upstream.calls == 1
+        assert cache.stats['misses'] == 1 and cache.stats['hits'] == 7
+
+
+@pytest.fixture
+def global_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('SEARCH_RESULT_CACHE_ENABLED', 'true')
+    monkeypatch.setenv('SEARCH_RESULT_CACHE_PATH', str(tmp_path / 'global.db'))
+    monkeypatch.setattr(src, '_search_result_cache', None)
+    yield src.get_search_result_cache()
+    monkeypatch.setattr(src, '_search_result_cache', None)
+
+
+@pytest.mark.unit
+class TestSearchCacheIntegration:
+
+    def test_search_service_caches_sub_queries(self, global_cache, monkeypatch):
+        from services.blog_generator.services.search_service import SearchService
+        service = SearchService(api_key='test')
+        upstream = Upstream()
+        monkeypatch.setattr(service, '_search_zai', lambda query, max_results: upstream(max_results))
+
+        service.search('RAG 最佳实践', max_results=3)
+        again = service.search('rag  最佳实践', max_results=3)
+        assert upstream.calls == 1 and again['from_cache'] is True
+
+    def test_registry_caches_cacheable_retrievers(self, global_cache):
+        from services.blog_generator.retriever_registry import (
+            BaseRetriever, RetrieverRegistry, SearchItem,
+        )
+
+        calls = []
+
+        class PaperRetriever(BaseRetriever):
+            name = 'paper-test'
+
+            def search(self, query, max_results=10):
+                calls.append(query)
+                return [SearchItem(href='https://arxiv.org/abs/1', title='论文', body='摘要')]
+
+        retriever = PaperRetriever()
+        first = RetrieverRegistry._search_one(retriever, 'attention', 5)
+        second = RetrieverRegistry._search_one(retriever, 'Attention', 5)
+        assert len(calls) == 1
+        assert [i.href for i in second] == [i.href for i in first] == ['https://arxiv.org/abs/1']
+
+    def test_hedged_backup_bypasses_single_flight(self, global_cache, tmp_path, monkeypatch):
+        from services.blog_generator.services.smart_search_service import SmartSearchService
+        monkeypatch.setenv('SOURCE_STATS_PATH', str(tmp_path / 'source_stats.json'))
+        service = SmartSearchService(llm_client=None)
+        service.hedge_enabled = True
+        monkeypatch.setattr(service.curator, 'hedge_delay', lambda source_id: 0.05)
+
+        calls = []
+        lock = threading.Lock()
+
+        def upstream():
+            with lock:
+                calls.append(time.monotonic())
+                first = len(calls) == 1
+            time.sleep(1.0 if first else 0.01)
+            return {'success': True, 'results': [{'url': 'slow' if first else 'fast'}]}
+
+        def search_google(query, max_results):
+            return src.cached_search('google', query, max_results, upstream)
+
+        start = time.monotonic()
+        result = service._timed_search('google', search_google, ('q', 5))
+        # 原请求仍持有单飞锁时，对冲请求照常打到上游并先返回
+        assert time.monotonic() - start < 0.6
+        assert len(calls) == 2 and result['results'][0]['url'] == 'fast'
+
+    def test_general_search_rate_limits_only_on_miss(self, global_cache, monkeypatch):
+        from services.blog_generator.services import smart_search_service
+        from services.blog_generator.services.search_service import SearchService
+        from utils import rate_limiter
+
+        service = SearchService(api_key='test')
+        upstream = Upstream()
+        monkeypatch.setattr(service, '_search_zai', lambda query, max_results: upstream(max_results))
+        monkeypatch.setattr(smart_search_service, 'get_search_service', lambda: service)
+        waits = []
+        limiter = type('Limiter', (), {'wait_sync': lambda self, domain: waits.append(domain)})()
+        monkeypatch.setattr(rate_limiter, 'get_global_rate_limiter', lambda: limiter)
+
+        smart = smart_search_service.SmartSearchService(llm_client=None)
+        smart._search_general('Kafka 分区', 3)
+        smart._search_general('kafka  分区', 3)
+        assert upstream.calls == 1 and waits == ['search_general']
@@ -0,0 +1,127 @@
+"""
+源可信度筛选测试
+测试 URL 规范化与内容指纹、评分缓存 TTL、规则预筛、分批 LLM 评估、缓存复用统计
+"""
+import json
+import re
+import threading
+
+import pytest
+
+from services.blog_generator.services.credibility_score_cache import (
+    CredibilityScoreCache, canonical_url, score_key,
+)
+from services.blog_generator.services.source_credibility_filter import (
+    SourceCredibilityFilter, rule_scores,
+)
+
+
+class FakeLLM:
+    """按 Prompt 中的条目数返回评分，记录每次调用的条目数"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def chat(self, messages, caller=''):
+        indices = re.findall(r'^\[(\d+)\] 标题', messages[0]['content'], re.M)
+        with self.lock:
+            self.batches.append(len(indices))
+        if self.fail:
+            raise RuntimeError('LLM 不可用')
+        return json.dumps([
+            {'index': int(i), 'authority': 8, 'freshness': 8, 'relevance': 9, 'depth': 7,
+             'total_score': 8.15, 'reason': '官方文档'}
+            for i in indices
+        ])
+
+
+def _results(n, prefix='doc'):
+    return [
+        {'title': f'LangGraph {prefix} {i}', 'url': f'https://www.example.com/{prefix}/{i}/?utm_source=x',
+         'content': f'LangGraph 教程内容 {i} ' * (i + 1), 'source': 'general'}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CredibilityScoreCache(path=str(tmp_path / 'credibility.db'))
+
+
+@pytest.mark.unit
+class TestCredibilityScoreCache:
+
+    def test_canonical_url_and_fingerprint(self):
+        assert canonical_url('HTTP://www.Example.com/a/?utm_source=x&b=2&a=1#sec') == \
+            'https://example.com/a?a=1&b=2'
+        result = {'url': 'https://example.com/a', 'title': 'T', 'content': '内容  A'}
+        assert score_key(result) == score_key(dict(result, url='https://www.example.com/a/', content='内容 A'))
+        assert score_key(result) != score_key(dict(result, content='内容 B'))
+        assert score_key({'url': '', 'title': 'T'}) == ''
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = CredibilityScoreCache(path=str(tmp_path / 'c.db'), ttl_seconds=60)
+        cache.set_many({'https://a.com#1': {'authority': 8, 'freshness': 7, 'depth': 6, 'reason': 'r'}})
+        assert cache.get_many(['https://a.com#1'])['https://a.com#1']['authority'] == 8
+        cache._conn().execute('UPDATE credibility_scores SET created_at = created_at - 120')
+        assert cache.get_many(['https://a.com#1']) == {}
+        assert cache.purge_expired() == 1
+
+
+@pytest.mark.unit
+class TestSourceCredibilityFilter:
+
+    def test_unseen_results_scored_in_bounded_batches_then_cached(self, cache):
+        llm = FakeLLM()
+        f = SourceCredibilityFilter(llm, max_results=10, min_score=5, cache=cache, batch_size=4)
+        results = _results(10)
+
+        curated, stats = f.curate_with_stats('LangGraph 教程', results)
+        assert sorted(llm.batches) == [2, 4, 4]
+        assert stats['llm_scored'] == 10 and stats['cached'] == 0
+        assert len(curated) == 10 and curated[0]['credibility_detail']['reason'] == '官方文档'
+
+        llm.batches.clear()
+        curated, stats = f.curate_with_stats('LangGraph 教程', results)
+        assert llm.batches == []
+        assert stats['cached'] == 10 and stats['cache_hit_ratio'] == 1.0
+        assert len(curated) == 10
+
+    def test_prescreen_limits_llm_candidates(self, cache):
+        llm = FakeLLM()
+        f = SourceCredibilityFilter(llm, max_results=3, min_score=5, cache=cache, batch_size=8,
+                                    prescreen_factor=2)
+        results = _results(8)
+        results[0]['url'] = 'https://docs.python.org/3/library/asyncio.html'
+
+        curated, stats = f.curate_with_stats('LangGraph 教程', results)
+        assert llm.batches == [6]
+        assert stats['prescreened_out'] == 2
+        assert len(curated) == 3
+        # 高权威域名的结果进入 LLM 候选
+        assert len(cache.get_many([score_key(results[0])])) == 1
+
+    def test_only_new_results_sent_when_partially_cached(self, cache):
+        llm = FakeLLM()
+        f = SourceCredibilityFilter(llm, max_results=20, min_score=5, cache=cache, batch_size=8)
+        f.curate('LangGraph 教程', _results(6))
+        llm.batches.clear()
+
+        _, stats = f.curate_with_stats('LangGraph 教程', _results(6) + _results(3, prefix='new'))
+        assert llm.batches == [3]
+        assert stats['cached'] == 6 and stats['llm_scored'] == 3
+
+    def test_llm_failure_falls_back(self, cache):
+        f = SourceCredibilityFilter(FakeLLM(fail=True), max_results=5, cache=cache)
+        results = _results(8)
+        assert f.curate('LangGraph 教程', results) == results
+        assert len(cache) == 0
+
+    def test_rule_scores_prefer_authority_and_relevance(self):
+        official = {'url': 'https://docs.python.org/3/', 'title': 'asyncio 教程', 'content': 'asyncio ' * 100,
+                    'publish_date': '2025-01-01'}
+        unrelated = {'url': 'https://blog.example.com/x', 'title': '旅行', 'content': '风景'}
+        assert rule_scores('asyncio 教程', official)['total_score'] > \
+            rule_scores('asyncio 教程', unrelated)['total_score']
@@ -0,0 +1,138 @@
+"""
+搜索源延迟感知测试
+测试延迟直方图分位数、统计持久化、慢源跳过与排序、超过 p95 的对冲请求，以及源统计管理接口
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from services.blog_generator.services.smart_search_service import SmartSearchService
+from services.blog_generator.services.source_curator import SourceCurator, SourceStats
+
+
+def feed(curator, source_id, latency, count=20, results=5, success=True):
+    for _ in range(count):
+        curator.record_latency(source_id, latency, success=success, result_count=results)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_STATS_PATH', str(tmp_path / 'source_stats.json'))
+    monkeypatch.setenv('AI_BOOST_ENABLED', 'false')
+    svc = SmartSearchService(llm_client=None)
+    svc._route_search_sources = lambda topic: {'sources': ['general', 'arxiv'], 'blog_query': topic}
+    return svc
+
+
+@pytest.mark.unit
+class TestSourceStats:
+
+    def test_percentiles_from_histogram(self):
+        stats = SourceStats()
+        for i in range(100):
+            stats.record(0.25 if i < 90 else 4.0, success=True, result_count=3)
+
+        assert 0.2 <= stats.percentile(0.5) <= 0.3
+        assert 3.0 <= stats.percentile(0.95) <= 5.0
+        assert stats.avg_yield == 3 and stats.success_rate == 1.0
+
+    def test_persisted_across_instances(self, tmp_path):
+        path = str(tmp_path / 'stats.json')
+        curator = SourceCurator(stats_path=path)
+        feed(curator, 'arxiv', 0.4, results=2)
+        curator.record_hedge('arxiv', won=True)
+        curator.flush_stats()
+
+        stats = SourceCurator(stats_path=path).get_stats()['arxiv']
+        assert stats['calls'] == 20 and stats['avg_results'] == 2
+        assert stats['hedge_wins'] == 1 and stats['healthy'] is True
+        assert 0.3 <= stats['p50_seconds'] <= 0.5
+
+    def test_flush_throttled_and_registered_at_exit(self, tmp_path):
+        path = tmp_path / 'stats.json'
+        with patch('services.blog_generator.services.source_curator.atexit.register') as register:
+            curator = SourceCurator(stats_path=str(path))
+        register.assert_called_once_with(curator.flush_stats)
+
+        feed(curator, 'arxiv', 0.4)
+        assert not path.exists()  # 未到 STATS_FLUSH_INTERVAL，不落盘
+        register.call_args[0][0]()
+        assert path.exists()
+
+    def test_slow_source_skipped_until_probe_interval(self):
+        curator = SourceCurator()
+        feed(curator, 'sogou', 15.0)
+        feed(curator, 'google', 0.3, count=5)  # 样本不足，不判断
+
+        assert curator.is_slow('sogou')
+        assert not curator.is_slow('google')
+        with patch('services.blog_generator.services.source_curator.SLOW_SOURCE_PROBE_INTERVAL', 0):
+            assert not curator.is_slow('sogou')
+
+    def test_prioritize_by_yield_per_second(self):
+        curator = SourceCurator()
+        feed(curator, 'arxiv', 2.5, results=5)
+        feed(curator, 'general', 0.4, results=5)
+        feed(curator, 'google', 0.4, results=1)
+
+        assert curator.prioritize(['arxiv', 'google', 'general', 'new']) == [
+            'new', 'general', 'google', 'arxiv',
+        ]
+
+
+@pytest.mark.unit
+class TestLatencyAwareSearch:
+
+    def test_skips_slow_source(self, service):
+        feed(service.curator, 'arxiv', 20.0)
+        service._search_general = MagicMock(return_value={'success': True, 'results': [{'url': 'u1'}]})
+        service._search_arxiv = MagicMock()
+
+        result = service.search('Kafka 分区')
+        service._search_arxiv.assert_not_called()
+        assert len(result['results']) == 1
+        assert service.curator.get_stats()['general']['calls'] == 1
+
+    def test_hedged_request_after_p95(self, service):
+        feed(service.curator, 'general', 0.05)
+        calls = []
+        lock = threading.Lock()
+
+        def flaky_search(query, max_results):
+            with lock:
+                calls.append(time.monotonic())
+                first = len(calls) == 1
+            time.sleep(1.0 if first else 0.01)
+            return {'success': True, 'results': [{'url': 'slow' if first else 'fast'}]}
+
+        service._search_general = flaky_search
+        start = time.monotonic()
+        result = service._timed_search('general', service._search_general, ('q', 5))
+
+        assert time.monotonic() - start < 0.5
+        assert result['results'][0]['url'] == 'fast' and len(calls) == 2
+        assert service.curator.get_stats()['general']['hedge_wins'] == 1
+
+    def test_no_hedge_without_samples(self, service):
+        service._search_general = MagicMock(return_value={'success': True, 'results': []})
+        service._timed_search('general', service._search_general, ('q', 5))
+        assert service.curator.get_stats()['general']['hedged'] == 0
+
+
+@pytest.mark.unit
+class TestSourceStatsEndpoint:
+
+    def test_endpoint_reports_stats(self, service):
+        from routes.settings_routes import settings_bp
+
+        feed(service.curator, 'general', 0.3)
+        app = Flask(__name__)
+        app.register_blueprint(settings_bp)
+        with patch('services.blog_generator.services.smart_search_service._smart_search_service', service):
+            resp = app.test_client().get('/api/settings/search-sources/stats')
+
+        assert resp.status_code == 200
+        assert resp.get_json()['sources']['general']['calls'] == 20
@@ -0,0 +1,165 @@
+"""
+SSE 网关测试
+测试 asyncio 网关的事件推送、积压事件、多订阅者广播、线程占用
+"""
+import asyncio
+import json
+import threading
+import uuid
+
+import pytest
+
+from services.sse_gateway import SSEGateway, format_sse
+from services.task_service import TaskManager
+
+
+@pytest.fixture
+def task_manager():
+    return TaskManager()
+
+
+@pytest.fixture
+def gateway(task_manager):
+    gw = SSEGateway(task_manager=task_manager, host='127.0.0.1', port=0, heartbeat_interval=0.2)
+    assert gw.start()
+    yield gw
+    gw.stop()
+
+
+def _new_task(task_manager):
+    return task_manager.create_task(task_id=f'sse_{uuid.uuid4().hex[:8]}')
+
+
+async def _read_stream(port, path, on_connected=None, timeout=5):
+    """读取完整响应，返回 (状态行, [(event, data), ...])"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: test\r\n\r\n'.encode())
+    await writer.drain()
+    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+    events = []
+    buffer = b''
+    while True:
+        chunk = await asyncio.wait_for(reader.read(65536), timeout)
+        if not chunk:
+            break
+        buffer += chunk
+        while b'\n\n' in buffer:
+            frame, buffer = buffer.split(b'\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in frame.decode().split('\n'))
+            events.append((fields['event'], json.loads(fields['data'])))
+            if fields['event'] == 'connected' and on_connected:
+                on_connected()
+    writer.close()
+    return head.decode().split('\r\n')[0], events
+
+
+def _send_later(task_manager, task_id, events, delay=0.05):
+    def run():
+        import time
+        time.sleep(delay)
+        for event, data in events:
+            task_manager.send_event(task_id, event, data)
+    threading.Thread(target=run, daemon=True).start()
+
+
+@pytest.mark.unit
+class TestSSEGateway:
+
+    def test_streams_events_until_complete(self, gateway, task_manager):
+        task_id = _new_task(task_manager)
+        _send_later(task_manager, task_id, [
+            ('progress', {'stage': 'outline', 'progress': 50}),
+            ('complete', {'status': 'completed'}),
+            ('progress', {'after': 'complete'}),
+        ])
+
+        status, events = asyncio.run(_read_stream(gateway.port, f'/api/tasks/{task_id}/stream'))
+
+        assert status == 'HTTP/1.1 200 OK'
+        assert [e for e, _ in events] == ['connected', 'progress', 'complete']
+        assert events[1][1]['stage'] == 'outline' and '_ts' in events[1][1]
+
+    def test_backlog_before_connect_is_delivered(self, gateway, task_manager):
+        task_id = _new_task(task_manager)
+        task_manager.send_event(task_id, 'log', {'message': 'early'})
+        task_manager.send_event(task_id, 'error', {'message': 'boom', 'recoverable': False})
+
+        _, events = asyncio.run(_read_stream(gateway.port, f'/api/tasks/{task_id}/stream'))
+
+        assert [e for e, _ in events] == ['connected', 'log', 'error']
+
+    def test_unknown_task(self, gateway):
+        _, events = asyncio.run(_read_stream(gateway.port, '/api/tasks/missing/stream'))
+        assert events[-1] == ('error', {'message': '任务不存在', 'recoverable': False})
+
+        status, _ = asyncio.run(_read_stream(gateway.port, '/api/xhs/stream/missing'))
+        assert status.startswith('HTTP/1.1 404')
+
+    def test_heartbeat_when_idle(self, gateway, task_manager):
+        task_id = _new_task(task_manager)
+        _send_later(task_manager, task_id, [('complete', {})], delay=0.5)
+
+        _, events = asyncio.run(_read_stream(gateway.port, f'/api/tasks/{task_id}/stream'))
+
+        assert 'heartbeat' in [e for e, _ in events]
+
+    def test_many_subscribers_share_one_thread(self, gateway, task_manager):
+        subscribers = 200
+        task_ids = [_new_task(task_manager) for _ in range(20)]
+        threads_before = threading.active_count()
+        connected = []
+
+        async def run():
+            def on_connected():
+                connected.append(1)
+                if len(connected) == subscribers:
+                    for task_id in task_ids:
+                        _send_later(task_manager, task_id, [
+                            ('progress', {'progress': i}) for i in range(5)
+                        ] + [('complete', {})], delay=0)
+
+            return await asyncio.gather(*[
+                _read_stream(gateway.port, f'/api/tasks/{task_ids[i % len(task_ids)]}/stream', on_connected)
+                for i in range(subscribers)
+            ])
+
+        results = asyncio.run(run())
+
+        # 同一任务的多个订阅者都收到完整事件（广播而非争抢）
+        for _, events in results:
+            names = [e for e, _ in events if e != 'heartbeat']
+            assert names == ['connected'] + ['progress'] * 5 + ['complete']
+        assert gateway.stats['connections'] >= subscribers
+        assert threading.active_count() - threads_before < 40
+        # 最后一个订阅者断开后不再保留任务状态，长期运行的 worker 不累积
+        assert gateway._subscribers == {} and gateway._finished_tasks == set()
+
+
+@pytest.mark.unit
+class TestFormatSSE:
+
+    def test_matches_flask_frame_format(self):
+        frame = format_sse({'event': 'progress', 'id': 'abc', 'timestamp': 1.5, 'data': {'msg': '中文'}})
+        assert frame == 'id: abc\nevent: progress\ndata: {"msg": "中文", "_ts": 1.5}\n\n'
+
+    def test_without_id(self):
+        frame = format_sse({'event': 'log', 'id': 'abc', 'timestamp': 1.5, 'data': {}}, include_id=False)
+        assert frame == 'event: log\ndata: {}\n\n'
+
+
+@pytest.mark.unit
+class TestTaskCleanup:
+
+    def test_delayed_cleanup_uses_single_thread(self, task_manager):
+        import time
+        task_ids = [_new_task(task_manager) for _ in range(30)]
+        threads_before = threading.active_count()
+
+        for task_id in task_ids:
+            task_manager.cleanup_task(task_id, delay=0.05)
+
+        assert threading.active_count() - threads_before <= 1
+        deadline = time.time() + 2
+        while time.time() < deadline and any(task_manager.get_task(t) for t in task_ids):
+            time.sleep(0.02)
+        assert not any(task_manager.get_queue(t) for t in task_ids)
@@ -0,0 +1,142 @@
+"""
+流式 Markdown 分块测试
+测试 FileParserService.iter_markdown_chunks 及 DatabaseService.save_chunks_stream
+"""
+import io
+import os
+import tempfile
+
+import pytest
+
+from services.database_service import DatabaseService
+from services.file_parser_service import FileParserService
+from utils import context_guard
+from utils.context_guard import estimate_tokens
+
+
+@pytest.fixture(autouse=True)
+def offline_token_estimate(monkeypatch):
+    """分块测试使用确定性的字符估算，避免 tiktoken 下载编码表"""
+    monkeypatch.setattr(
+        context_guard, 'estimate_tokens',
+        lambda text, method='auto': estimate_tokens(text, method='char')
+    )
+
+
+@pytest.fixture
+def parser(tmp_path):
+    return FileParserService(mineru_token='', upload_folder=str(tmp_path))
+
+
+@pytest.fixture
+def db_service():
+    fd, db_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        yield DatabaseService(db_path)
+    finally:
+        if os.path.exists(db_path):
+            os.unlink(db_path)
+
+
+def _long_markdown(sections=3, paragraphs=30):
+    parts = ['# 文档标题\n\n前言内容。\n']
+    for s in range(sections):
+        parts.append(f'## 第{s}章\n')
+        for p in range(paragraphs):
+            parts.append(f'第{s}章第{p}段：这是一段用于测试的正文内容，包含若干中文句子。\n')
+    return '\n'.join(parts)
+
+
+@pytest.mark.unit
+class TestIterMarkdownChunks:
+
+    def test_is_generator(self, parser):
+        chunks = parser.iter_markdown_chunks(io.StringIO('## A\n\ntext\n'))
+        assert not isinstance(chunks, list)
+        assert next(chunks)['title'] == 'A'
+
+    def test_short_sections_become_section_chunks(self, parser):
+        md = '## 安装\n\npip install x\n\n## 使用\n\nimport x\n'
+        chunks = list(parser.iter_markdown_chunks(io.StringIO(md)))
+        assert [c['title'] for c in chunks] == ['安装', '使用']
+        assert all(c['chunk_type'] == 'section' for c in chunks)
+
+    def test_offsets_point_into_source(self, parser):
+        md = _long_markdown()
+        for chunk in parser.iter_markdown_chunks(io.StringIO(md), chunk_tokens=120, chunk_overlap_tokens=20):
+            first_line = chunk['content'].split('\n')[0]
+            assert md[chunk['start_pos']:].startswith(first_line)
+            assert md[:chunk['end_pos']].endswith(chunk['content'].split('\n')[-1])
+
+    def test_chunks_respect_token_budget(self, parser):
+        md = _long_markdown()
+        chunks = list(parser.iter_markdown_chunks(io.StringIO(md), chunk_tokens=150, chunk_overlap_tokens=30))
+        long_parts = [c for c in chunks if c['chunk_type'] == 'paragraph']
+        assert len(long_parts) > 3
+        assert long_parts[0]['title'] == '第0章 (Part 1)'
+        for c in chunks:
+            assert c['token_count'] <= 150
+            assert estimate_tokens(c['content'], method='char') <= 150 + 10
+
+    def test_overlap_repeats_trailing_paragraph(self, parser):
+        md = _long_markdown(sections=1)
+        chunks = [c for c in parser.iter_markdown_chunks(io.StringIO(md), chunk_tokens=150, chunk_overlap_tokens=40)
+                  if c['chunk_type'] == 'paragraph']
+        first = chunks[0]['content'].split('\n\n')
+        second = chunks[1]['content'].split('\n\n')
+        overlap = [p for p in second if p in first]
+        assert overlap and overlap == first[-len(overlap):]
+        assert chunks[1]['start_pos'] < chunks[0]['end_pos']
+
+    def test_headers_inside_code_blocks_are_ignored(self, parser):
+        md = '## 示例\n\n```bash\n## not a header\n\necho hi\n```\n'
+        chunks = list(parser.iter_markdown_chunks(io.StringIO(md)))
+        assert len(chunks) == 1
+        assert '## not a header' in chunks[0]['content']
+
+    def test_oversized_paragraph_is_split(self, parser):
+        md = '## 表格\n\n' + '数据' * 2000 + '\n'
+        chunks = list(parser.iter_markdown_chunks(io.StringIO(md), chunk_tokens=200, chunk_overlap_tokens=0))
+        assert len(chunks) > 5
+        assert all(c['token_count'] <= 200 for c in chunks)
+
+    def test_from_file_matches_in_memory(self, parser, tmp_path):
+        md = _long_markdown()
+        path = tmp_path / 'doc.md'
+        path.write_text(md, encoding='utf-8')
+        from_file = list(parser.iter_markdown_chunks_from_file(str(path), 200, 20))
+        in_memory = list(parser.iter_markdown_chunks(io.StringIO(md), 200, 20))
+        assert from_file == in_memory
+
+
+@pytest.mark.unit
+class TestSaveChunksStream:
+
+    def test_writes_in_batches_and_builds_index(self, parser, db_service):
+        db_service.create_document('doc_s', 'big.md', '/tmp/big.md', 1, 'md')
+        chunk_iter = parser.iter_markdown_chunks(io.StringIO(_long_markdown(sections=5)), 100, 10)
+
+        count = db_service.save_chunks_stream('doc_s', chunk_iter, batch_size=7)
+
+        saved = db_service.get_chunks_by_document('doc_s')
+        assert count == len(saved) > 7
+        assert [c['chunk_index'] for c in saved] == list(range(count))
+        index = db_service.get_chunk_indexes(['doc_s'])['doc_s']
+        assert len(index) == count
+
+    def test_failure_midway_keeps_old_chunks(self, db_service):
+        db_service.create_document('doc_f', 'big.md', '/tmp/big.md', 1, 'md')
+        db_service.save_chunks('doc_f', [{'title': '旧', 'content': f'旧内容 {i}'} for i in range(3)])
+
+        def broken_iter():
+            for i in range(20):
+                yield {'title': '新', 'content': f'新内容 {i}'}
+            raise IOError('文件读取中断')
+
+        with pytest.raises(IOError):
+            db_service.save_chunks_stream('doc_f', broken_iter(), batch_size=7)
+
+        saved = db_service.get_chunks_by_document('doc_f')
+        assert [c['content'] for c in saved] == [f'旧内容 {i}' for i in range(3)]
+        assert len(db_service.get_chunk_indexes(['doc_f'])['doc_f']) == 3
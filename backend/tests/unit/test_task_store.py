@@ -0,0 +1,227 @@
+"""
+任务状态共享存储测试
+测试 SQLite WAL 存储下多个 TaskManager（模拟多 worker / 生成进程）共享进度、取消与事件流
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from queue import Empty
+
+import pytest
+
+from services.sse_gateway import SSEGateway
+from services.task_service import TaskManager
+from services.task_store import SQLiteTaskStore
+
+
+def _manager(db_path) -> TaskManager:
+    """创建绑定共享存储的 TaskManager（绕过单例，相当于一个独立进程）"""
+    mgr = object.__new__(TaskManager)
+    mgr._initialized = False
+    mgr.__init__(store=SQLiteTaskStore(str(db_path)))
+    return mgr
+
+
+def _produce(db_path, task_id, count):
+    mgr = _manager(db_path)
+    mgr.set_running(task_id)
+    for i in range(count):
+        mgr.send_progress(task_id, 'content', i, f'step {i}')
+    mgr.send_complete(task_id, {'markdown': '# done'})
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'task_state.db'
+
+
+@pytest.mark.unit
+class TestSharedTaskState:
+
+    def test_state_visible_across_managers(self, db_path):
+        web, worker = _manager(db_path), _manager(db_path)
+        task_id = web.create_task()
+
+        worker.set_running(task_id)
+        worker.send_result(task_id, 'outline', 'outline', {'title': '标题'})
+        worker.send_progress(task_id, 'content', 50, '写作中')
+
+        task = web.get_task(task_id)
+        assert task.status == 'running' and task.current_stage == 'content'
+        assert task.results['outline'] == {'completed': True, 'data': {'title': '标题'}}
+        assert task.overall_progress == 20 + 15
+
+    def test_concurrent_results_are_merged(self, db_path):
+        web = _manager(db_path)
+        task_id = web.create_task()
+        workers = [_manager(db_path) for _ in range(4)]
+        for worker in workers:
+            # 放大读-改-写窗口：整列覆盖的实现会在此丢失其他阶段的结果
+            read = worker.store.get_task
+            worker.store.get_task = lambda tid, read=read: (time.sleep(0.005), read(tid))[1]
+        stages = [f'section_{i}' for i in range(40)]
+        barrier = threading.Barrier(len(workers))
+
+        def report(idx, worker):
+            barrier.wait()
+            for stage in stages[idx::len(workers)]:
+                worker.send_result(task_id, stage, 'section', {'idx': stage, 'note': None})
+
+        threads = [threading.Thread(target=report, args=(i, w)) for i, w in enumerate(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        results = web.get_task(task_id).results
+        assert sorted(results) == sorted(stages)
+        assert results['section_7'] == {'completed': True, 'data': {'idx': 'section_7', 'note': None}}
+
+    def test_concurrent_results_in_memory(self):
+        mgr = object.__new__(TaskManager)
+        mgr._initialized = False
+        mgr.__init__()
+        task_id = mgr.create_task()
+        threads = [
+            threading.Thread(target=mgr.send_result, args=(task_id, f'stage_{i}', 'x', {'i': i}))
+            for i in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(mgr.get_task(task_id).results) == 20
+
+    def test_cancel_from_another_worker(self, db_path):
+        web, worker = _manager(db_path), _manager(db_path)
+        task_id = web.create_task()
+        worker.set_running(task_id)
+
+        assert web.cancel_task(task_id)
+        assert not worker.cancel_task(task_id)
+        assert worker.is_cancelled(task_id)
+        # 取消后生成进程的进度更新不覆盖取消状态
+        worker.send_progress(task_id, 'content', 80, 'late')
+        assert web.get_task(task_id).status == 'cancelled'
+
+    def test_each_subscriber_gets_full_stream(self, db_path):
+        web, worker = _manager(db_path), _manager(db_path)
+        task_id = web.create_task()
+        first, second = web.get_queue(task_id), web.get_queue(task_id)
+
+        worker.send_event(task_id, 'log', {'message': 'a'})
+        worker.send_complete(task_id, {})
+
+        for queue in (first, second):
+            assert [queue.get(timeout=1)['event'] for _ in range(2)] == ['log', 'complete']
+            with pytest.raises(Empty):
+                queue.get(timeout=0.1)
+
+    def test_unknown_and_cleaned_tasks(self, db_path):
+        mgr = _manager(db_path)
+        assert mgr.get_queue('missing') is None
+        mgr.send_event('missing', 'log', {})
+
+        task_id = mgr.create_task()
+        mgr.send_event(task_id, 'log', {})
+        mgr.cleanup_task(task_id, delay=0)
+        mgr._cleanup_thread.join(0.5)
+        assert mgr.get_task(task_id) is None
+        assert mgr.store.read_events(task_id, 0) == []
+
+    def test_events_from_separate_process(self, db_path):
+        web = _manager(db_path)
+        task_id = web.create_task()
+        queue = web.get_queue(task_id)
+
+        process = multiprocessing.get_context('spawn').Process(
+            target=_produce, args=(str(db_path), task_id, 20)
+        )
+        process.start()
+        events = []
+        while not events or events[-1]['event'] != 'complete':
+            events.append(queue.get(timeout=10))
+        process.join(10)
+
+        assert [e['data']['progress'] for e in events[:-1]] == list(range(20))
+        assert web.get_task(task_id).outputs == {'markdown': '# done'}
+
+
+@pytest.mark.unit
+class TestGatewayWithSharedStore:
+
+    def test_gateway_polls_events_from_other_worker(self, db_path):
+        web, worker = _manager(db_path), _manager(db_path)
+        task_id = web.create_task()
+        gateway = SSEGateway(task_manager=web, host='127.0.0.1', port=0, heartbeat_interval=5)
+        assert gateway.start()
+
+        async def read():
+            reader, writer = await asyncio.open_connection('127.0.0.1', gateway.port)
+            writer.write(f'GET /api/tasks/{task_id}/stream HTTP/1.1\r\nHost: test\r\n\r\n'.encode())
+            await writer.drain()
+            await reader.readuntil(b'\r\n\r\n')
+            await reader.readuntil(b'\n\n')  # connected
+            worker.send_progress(task_id, 'outline', 50, '大纲')
+            worker.send_complete(task_id, {})
+            body = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return body.decode()
+
+        try:
+            body = asyncio.run(read())
+        finally:
+            gateway.stop()
+
+        assert 'event: progress' in body and body.rstrip().split('\n')[-2] == 'event: complete'
+
+
+@pytest.mark.unit
+class TestInterruptRouting:
+
+    def test_interrupt_claimed_once(self, db_path):
+        web, worker = SQLiteTaskStore(str(db_path)), SQLiteTaskStore(str(db_path))
+        worker.register_interrupt('t1')
+
+        assert web.claim_interrupt('t1')
+        assert not worker.claim_interrupt('t1')
+
+    def test_commands_taken_once_in_order(self, db_path):
+        web, worker = SQLiteTaskStore(str(db_path)), SQLiteTaskStore(str(db_path))
+        web.post_command('t1', {'type': 'resume', 'action': 'accept'})
+        web.post_command('t2', {'type': 'resume'})
+        web.post_command('t1', {'type': 'resume', 'action': 'edit'})
+
+        taken = worker.take_commands(['t1'])
+        assert [c['action'] for _, c in taken] == ['accept', 'edit']
+        assert web.take_commands(['t1']) == []
+        assert worker.take_commands([]) == []
+        assert [t for t, _ in web.take_commands(['t1', 't2'])] == ['t2']
+
+    def test_resume_forwarded_to_owning_worker(self, db_path, monkeypatch):
+        from services import task_store
+        from services.blog_generator.blog_service import BlogService
+
+        monkeypatch.setattr(task_store, 'COMMAND_POLL_INTERVAL', 0.01)
+        owner_mgr, other_mgr = _manager(db_path), _manager(db_path)
+        owner, other = BlogService(llm_client=None), BlogService(llm_client=None)
+        resumed = threading.Event()
+        calls = []
+
+        def start_resume(task_id, task_info, action, outline=None):
+            calls.append((task_id, action, outline))
+            resumed.set()
+            return True
+
+        monkeypatch.setattr(owner, '_start_resume', start_resume)
+        owner._interrupted_tasks['t1'] = {'task_manager': owner_mgr}
+        owner_mgr.store.register_interrupt('t1')
+        owner._watch_resume_commands(owner_mgr.store)
+
+        monkeypatch.setattr(BlogService, '_shared_task_store', staticmethod(lambda info=None: other_mgr.store))
+        assert other.resume_generation('t1', action='edit', outline={'title': 'x'})
+        assert not other.resume_generation('t1')
+
+        assert resumed.wait(2)
+        assert calls == [('t1', 'edit', {'title': 'x'})]
@@ -0,0 +1,134 @@
+"""
+WritingSessionManager 存储测试
+测试 WAL 文件持久化、逐章节局部写入、旧版 sections 迁移、热会话 LRU、并发编辑
+"""
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from services.chat.writing_session import WritingSessionManager
+
+
+def _sections(n, size=10):
+    return [{"id": f"s{i}", "title": f"第 {i} 章", "content": "内容" * size} for i in range(n)]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "writing_sessions.db")
+
+
+@pytest.mark.unit
+class TestWritingSessionStore:
+
+    def test_sessions_survive_restart(self, db_path):
+        mgr = WritingSessionManager(db_path=db_path)
+        session = mgr.create(topic="持久化", user_id="u1", sections=_sections(3))
+        mgr.update_section(session.session_id, "s1", {"id": "s1", "content": "改写"}, status="writing")
+
+        reopened = WritingSessionManager(db_path=db_path).get(session.session_id, user_id="u1")
+        assert reopened.status == "writing"
+        assert [s["id"] for s in reopened.sections] == ["s0", "s1", "s2"]
+        assert reopened.sections[1] == {"id": "s1", "content": "改写"}
+        assert sqlite3.connect(db_path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_update_section_writes_single_row(self, db_path):
+        mgr = WritingSessionManager(db_path=db_path)
+        session = mgr.create(topic="局部写入", sections=_sections(50))
+        conn = mgr._conn()
+
+        before = conn.total_changes
+        mgr.update_section(session.session_id, "s10", {"id": "s10", "content": "新内容"})
+        # 会话行 updated_at + 一个章节行
+        assert conn.total_changes - before == 2
+
+        before = conn.total_changes
+        mgr.update_section(session.session_id, "s99", {"id": "s99", "content": "追加"})
+        assert conn.total_changes - before == 2
+        assert mgr.get(session.session_id).sections[-1]["id"] == "s99"
+
+    def test_update_sections_diffs_against_current(self):
+        mgr = WritingSessionManager(db_path=":memory:")
+        session = mgr.create(topic="整体更新", sections=_sections(5))
+        sections = _sections(5)
+        sections[2]["content"] = "只改这一章"
+
+        before = mgr._conn().total_changes
+        mgr.update(session.session_id, sections=sections)
+        assert mgr._conn().total_changes - before == 2
+
+        mgr.update(session.session_id, sections=sections[:2])
+        assert len(mgr.get(session.session_id).sections) == 2
+        assert mgr._conn().execute(
+            "SELECT COUNT(*) FROM writing_session_sections WHERE session_id = ?", (session.session_id,)
+        ).fetchone()[0] == 2
+
+    def test_returned_sessions_are_copies(self):
+        mgr = WritingSessionManager(db_path=":memory:")
+        session = mgr.create(topic="副本", outline={"sections": []}, sections=_sections(1))
+        fetched = mgr.get(session.session_id)
+        fetched.outline["sections"].append({"id": "x"})
+        fetched.sections[0]["content"] = "未保存的修改"
+
+        again = mgr.get(session.session_id)
+        assert again.outline == {"sections": []}
+        assert again.sections == _sections(1)
+
+    def test_lru_evicts_and_reloads(self, db_path):
+        mgr = WritingSessionManager(db_path=db_path, cache_size=2)
+        ids = [mgr.create(topic=f"会话 {i}").session_id for i in range(4)]
+        assert list(mgr._cache) == ids[2:]
+
+        mgr.update(ids[0], status="writing")
+        assert mgr.get(ids[0]).status == "writing"
+        assert list(mgr._cache) == [ids[3], ids[0]]
+
+    def test_legacy_sections_blob_migrated(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE writing_sessions (
+                session_id TEXT PRIMARY KEY, topic TEXT NOT NULL,
+                article_type TEXT, target_audience TEXT, target_length TEXT,
+                outline TEXT, sections TEXT, search_results TEXT, research_summary TEXT,
+                key_concepts TEXT, code_blocks TEXT, images TEXT, status TEXT,
+                created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+            )
+        """)
+        conn.execute(
+            "INSERT INTO writing_sessions (session_id, topic, sections, created_at, updated_at) "
+            "VALUES ('ws_legacy', '旧会话', ?, 't', 't')",
+            (json.dumps(_sections(3), ensure_ascii=False),),
+        )
+        conn.commit()
+        conn.close()
+
+        mgr = WritingSessionManager(db_path=db_path)
+        session = mgr.get("ws_legacy")
+        assert session.user_id == ""
+        assert session.sections == _sections(3)
+        assert mgr._conn().execute("SELECT sections FROM writing_sessions").fetchone()[0] is None
+
+    def test_concurrent_section_edits_not_lost(self, db_path):
+        mgr = WritingSessionManager(db_path=db_path)
+        session = mgr.create(topic="并发编辑", sections=_sections(8))
+        errors = []
+
+        def edit(i):
+            try:
+                for round_ in range(10):
+                    mgr.update_section(session.session_id, f"s{i}", {"id": f"s{i}", "content": f"v{round_}"})
+                    mgr.get(session.session_id)
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+
+        threads = [threading.Thread(target=edit, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors
+        reloaded = WritingSessionManager(db_path=db_path).get(session.session_id)
+        assert [s["content"] for s in reloaded.sections] == ["v9"] * 8
@@ -8,6 +8,10 @@ vibe-blog 是单轮调用场景，回退策略是分段裁剪而非移除对话
 """
 import logging
 import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
@@ -39,9 +43,38 @@ MODEL_CONTEXT_LIMITS = {
 # 安全系数
 SAFETY_MARGIN_RATIO = float(os.environ.get('CONTEXT_SAFETY_MARGIN', '0.85'))
 
+# Token 计数缓存容量（按内容哈希缓存，同一段调研资料在一篇文章中会被反复估算）
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_ESTIMATE_CACHE_SIZE', '4096'))
+
+_CJK_RUN_RE = re.compile('[\u4e00-\u9fff]+')
+
+_token_cache: "OrderedDict[Tuple[str, int, int], int]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+_token_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _get_encoder():
+    """加载 tiktoken 编码器（只尝试一次；不可用时记为 None，后续直接走字符估算）"""
+    if hasattr(estimate_tokens, "_encoder"):
+        return estimate_tokens._encoder
+    encoder = None
+    try:
+        import tiktoken
+        try:
+            encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            encoder = tiktoken.get_encoding("cl100k_base")
+    except ImportError:
+        logger.info("tiktoken 未安装，token 估算使用字符规则")
+    except Exception as e:
+        logger.warning(f"tiktoken 编码器加载失败: {e}，token 估算使用字符规则")
+    estimate_tokens._encoder = encoder
+    return encoder
+
+
 def estimate_tokens(text: str, method: str = "auto") -> int:
     """
-    估算文本的 token 数。
+    估算文本的 token 数（按内容哈希缓存，重复估算同一文本只需一次字典查找）。
 
     Args:
         text: 输入文本
@@ -50,36 +83,91 @@ def estimate_tokens(text: str, method: str = "auto") -> int:
     if not text:
         return 0
 
-    if method == "char":
-        return _estimate_by_chars(text)
-
-    if method in ("tiktoken", "auto"):
+    encoder = None if method == "char" else _get_encoder()
+    if encoder is None and method == "tiktoken":
+        logger.warning("tiktoken 不可用，降级为字符估算")
+
+    # str 的 hash 计算一次后缓存在对象上，同一字符串反复估算几乎零成本
+    key = ("tiktoken" if encoder is not None else "char", len(text), hash(text))
+    with _token_cache_lock:
+        tokens = _token_cache.get(key)
+        if tokens is not None:
+            _token_cache.move_to_end(key)
+            _token_cache_stats["hits"] += 1
+            return tokens
+        _token_cache_stats["misses"] += 1
+
+    tokens = None
+    if encoder is not None:
         try:
-            import tiktoken
-            if not hasattr(estimate_tokens, "_encoder"):
-                try:
-                    estimate_tokens._encoder = tiktoken.get_encoding("o200k_base")
-                except Exception:
-                    estimate_tokens._encoder = tiktoken.get_encoding("cl100k_base")
-            return len(estimate_tokens._encoder.encode(text))
-        except ImportError:
-            if method == "tiktoken":
-                logger.warning("tiktoken 未安装，降级为字符估算")
-            return _estimate_by_chars(text)
+            tokens = len(encoder.encode(text, disallowed_special=()))
         except Exception as e:
             logger.warning(f"tiktoken 编码失败: {e}，降级为字符估算")
-            return _estimate_by_chars(text)
+    if tokens is None:
+        tokens = _estimate_by_chars(text)
 
-    return _estimate_by_chars(text)
+    if TOKEN_CACHE_SIZE > 0:
+        with _token_cache_lock:
+            _token_cache[key] = tokens
+            while len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return tokens
+
+
+def estimate_messages_tokens(messages: list) -> int:
+    """
+    增量估算消息列表的 token 数：逐条（逐个 content block）取缓存计数后求和。
+
+    多轮调用之间 system prompt、调研资料等消息内容不变，只有新增 / 变化的消息需要重新编码。
+    分段求和与整体编码在片段边界处可能相差个位数 token，对预检来说可以忽略。
+    """
+    total = 0
+    for msg in messages:
+        content = msg.get("content", "") if isinstance(msg, dict) else ""
+        if isinstance(content, list):
+            for block in content:
+                if isinstance(block, dict):
+                    total += estimate_tokens(block.get("text", ""))
+        else:
+            total += estimate_tokens(str(content))
+    return total
+
+
+def get_token_cache_stats() -> Dict:
+    """token 计数缓存统计"""
+    with _token_cache_lock:
+        hits, misses = _token_cache_stats["hits"], _token_cache_stats["misses"]
+        size = len(_token_cache)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "size": size,
+        "max_size": TOKEN_CACHE_SIZE,
+    }
+
+
+def clear_token_cache() -> None:
+    """清空 token 计数缓存与统计（测试用）"""
+    with _token_cache_lock:
+        _token_cache.clear()
+        _token_cache_stats["hits"] = 0
+        _token_cache_stats["misses"] = 0
 
 
 def _estimate_by_chars(text: str) -> int:
     """按字符数估算 token。中文约 1.5 字/token，英文约 4 字符/token。"""
-    chinese_chars = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
+    if text.isascii():
+        chinese_chars = 0
+    else:
+        # 按连续汉字片段统计，扫描在正则引擎（C 层）内完成，避免逐字符 Python 循环
+        chinese_chars = sum(map(len, _CJK_RUN_RE.findall(text)))
     other_chars = len(text) - chinese_chars
     return int(chinese_chars / 1.5 + other_chars / 4)
 
 
+@lru_cache(maxsize=None)
 def get_context_limit(model_name: str) -> int:
     """获取模型的上下文窗口大小（精确匹配 → 前缀匹配 → 默认 128K）"""
     if model_name in MODEL_CONTEXT_LIMITS:
@@ -117,17 +205,7 @@ class ContextGuard:
         Returns:
             {estimated_tokens, safe_limit, context_limit, usage_ratio, is_safe, overflow_tokens}
         """
-        total_text = ""
-        for msg in messages:
-            content = msg.get("content", "") if isinstance(msg, dict) else ""
-            if isinstance(content, list):
-                for block in content:
-                    if isinstance(block, dict):
-                        total_text += block.get("text", "")
-            else:
-                total_text += str(content)
-
-        estimated = estimate_tokens(total_text)
+        estimated = estimate_messages_tokens(messages)
         overflow = estimated - self.safe_input_limit
 
         result = {
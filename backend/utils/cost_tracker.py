@@ -29,6 +29,10 @@ class CostTracker:
     _accumulated_cost: float = 0.0
     _budget_exceeded: bool = False
     _cost_by_agent: Dict[str, float] = field(default_factory=dict)
+    # prompt 缓存：已缓存 / 未缓存输入 token 与相对全价输入节省的成本
+    _cached_input_tokens: int = 0
+    _uncached_input_tokens: int = 0
+    _cache_savings: float = 0.0
 
     def __post_init__(self):
         if self.budget_usd <= 0:
@@ -39,17 +43,28 @@ class CostTracker:
     def record_call(self, input_tokens: int, output_tokens: int,
                     cache_read_tokens: int = 0, cache_write_tokens: int = 0,
                     model: str = "", agent: str = "unknown"):
-        """记录一次 LLM 调用的成本"""
+        """记录一次 LLM 调用的成本
+
+        input_tokens 含缓存读取 / 写入部分（与 usage_metadata 一致），
+        缓存读取按 cache_read 单价、写入按 cache_write 单价计费，其余按 input 单价。
+        """
         from utils.token_tracker import _match_pricing
+        uncached_tokens = max(0, input_tokens - cache_read_tokens - cache_write_tokens)
+        self._cached_input_tokens += cache_read_tokens
+        self._uncached_input_tokens += input_tokens - cache_read_tokens
         prices = _match_pricing(model)
         if not prices:
             return
 
+        input_price = prices.get("input", 0)
         cost = (
-            input_tokens * prices.get("input", 0)
+            uncached_tokens * input_price
             + output_tokens * prices.get("output", 0)
-            + cache_read_tokens * prices.get("cache_read", 0)
-            + cache_write_tokens * prices.get("cache_write", 0)
+            + cache_read_tokens * prices.get("cache_read", input_price)
+            + cache_write_tokens * prices.get("cache_write", input_price)
+        ) / 1_000_000
+        self._cache_savings += (
+            cache_read_tokens * (input_price - prices.get("cache_read", input_price))
         ) / 1_000_000
 
         self._accumulated_cost += cost
@@ -84,6 +99,9 @@ class CostTracker:
             "budget_usd": self.budget_usd,
             "budget_exceeded": self._budget_exceeded,
             "cost_by_agent": {k: round(v, 6) for k, v in self._cost_by_agent.items()},
+            "cached_input_tokens": self._cached_input_tokens,
+            "uncached_input_tokens": self._uncached_input_tokens,
+            "cache_savings_usd": round(self._cache_savings, 6),
             "rate_limiter_metrics": rate_limiter_metrics,
         }
 
@@ -96,6 +114,12 @@ class CostTracker:
             f"  Budget:       ${self.budget_usd:.2f} USD",
             f"  Budget Used:  {self._accumulated_cost / max(self.budget_usd, 0.01) * 100:.1f}%",
         ]
+        if self._cached_input_tokens:
+            lines.append(
+                f"  Prompt Cache: {self._cached_input_tokens:,} cached / "
+                f"{self._uncached_input_tokens:,} uncached input tokens, "
+                f"saved ${self._cache_savings:.4f}"
+            )
         if self._cost_by_agent:
             lines.append("  Agent Breakdown:")
             for agent, cost in sorted(self._cost_by_agent.items(), key=lambda x: -x[1]):
@@ -62,3 +62,40 @@ class LazyResource:
             old = obj.__dict__.pop(self._attr_name, None)
             if old is not None and self.cleanup:
                 self.cleanup(old)
+
+
+class LazyProxy:
+    """
+    懒加载对象代理：首次访问任意属性时才调用 factory 创建目标对象，之后透明转发。
+
+    适用于"初始化时就要把依赖交给别人，但依赖本身导入 / 构造很重"的场景，
+    例如 create_app 中注册给路由的服务实例：
+
+        dispatcher = LazyProxy(lambda: AgentDispatcher(llm_client=...))
+        init_chat_service(session_mgr, dispatcher)  # 此时不导入 AgentDispatcher
+        dispatcher.search(...)                       # 首次调用时创建
+    """
+
+    _target = LazyResource(factory=lambda self: self.__dict__['_factory']())
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.__dict__['_factory'] = factory
+
+    @property
+    def resolved(self) -> bool:
+        """目标对象是否已创建"""
+        return '_lazy__target' in self.__dict__
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target, name, value)
+
+    def __bool__(self) -> bool:
+        return bool(self._target)
+
+    def __repr__(self) -> str:
+        if not self.resolved:
+            return f"<LazyProxy unresolved factory={self.__dict__['_factory']!r}>"
+        return f"<LazyProxy {self._target!r}>"
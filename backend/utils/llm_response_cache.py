@@ -0,0 +1,231 @@
+"""
+LLM 响应缓存 - 开发 / 评测场景下的录制与回放
+
+A/B 评测、下游失败后的重新生成会向 LLMService 重复发送字节级相同的 prompt
+（researcher / planner / 骨架等），开启缓存后直接回放上次的响应：
+
+- 键：(model, tier, temperature, 归一化 messages, response_format) 的 sha256
+- 存储：SQLite 文件（WAL），多进程共享；读取时校验 TTL
+- 淘汰：总大小超过上限时按最近访问时间（LRU）删除
+- chat_stream 命中时把缓存文本按块推给 on_chunk，SSE 事件形态与真实调用一致
+
+默认关闭，仅建议在开发 / 评测环境开启（生产环境同一 prompt 通常期望不同输出）。
+
+环境变量：
+- LLM_RESPONSE_CACHE_ENABLED: 是否启用（默认 false）
+- LLM_RESPONSE_CACHE_PATH: SQLite 文件路径（默认 data/llm_response_cache.db）
+- LLM_RESPONSE_CACHE_TTL_HOURS: 过期时间（小时，默认 168）
+- LLM_RESPONSE_CACHE_MAX_MB: 缓存总大小上限（MB，默认 256）
+- LLM_RESPONSE_CACHE_CALLERS: 仅缓存这些 caller（逗号分隔，留空缓存全部）
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'llm_response_cache.db'
+)
+# 回放流式响应时每块的字符数
+REPLAY_CHUNK_SIZE = 40
+# 淘汰时删到上限的比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    caller TEXT NOT NULL DEFAULT '',
+    model TEXT NOT NULL DEFAULT '',
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses(accessed_at);
+"""
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """归一化消息：统一换行、去掉行尾空白与首尾空行，只保留 role / content"""
+    normalized = []
+    for msg in messages:
+        content = msg.get('content', '')
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        content = re.sub(r'[ \t]+\n', '\n', content.replace('\r\n', '\n')).strip()
+        normalized.append({'role': msg.get('role', 'user'), 'content': content})
+    return normalized
+
+
+def make_cache_key(
+    messages: List[Dict[str, Any]],
+    model: str = '',
+    tier: str = '',
+    temperature: float = None,
+    response_format: Dict[str, Any] = None,
+) -> str:
+    """生成缓存键"""
+    payload = json.dumps({
+        'model': model,
+        'tier': tier or '',
+        'temperature': temperature,
+        'messages': normalize_messages(messages),
+        'response_format': response_format or None,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def replay_chunks(text: str, size: int = REPLAY_CHUNK_SIZE) -> Iterator[str]:
+    """把缓存文本切成流式块"""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+class LLMResponseCache:
+    """SQLite 持久化的 LLM 响应缓存（线程安全：每个线程一个连接）"""
+
+    def __init__(
+        self,
+        path: str = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        callers: Optional[List[str]] = None,
+    ):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.callers = set(callers) if callers else None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._conn().executescript(_SCHEMA)
+        self._total_bytes = self._conn().execute(
+            'SELECT COALESCE(SUM(size), 0) FROM llm_responses'
+        ).fetchone()[0]
+
+    @classmethod
+    def from_env(cls) -> 'LLMResponseCache':
+        callers = [c.strip() for c in os.getenv('LLM_RESPONSE_CACHE_CALLERS', '').split(',') if c.strip()]
+        return cls(
+            path=os.getenv('LLM_RESPONSE_CACHE_PATH') or None,
+            ttl_seconds=float(os.getenv('LLM_RESPONSE_CACHE_TTL_HOURS', '168')) * 3600,
+            max_bytes=int(float(os.getenv('LLM_RESPONSE_CACHE_MAX_MB', '256')) * 1024 * 1024),
+            callers=callers or None,
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def enabled_for(self, caller: str) -> bool:
+        """caller 是否在缓存范围内"""
+        return self.callers is None or caller in self.callers
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，不存在或已过期返回 None"""
+        conn = self._conn()
+        row = conn.execute(
+            'SELECT response, created_at FROM llm_responses WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        now = time.time()
+        if self.ttl_seconds and now - created_at > self.ttl_seconds:
+            self.delete(key)
+            return None
+        conn.execute(
+            'UPDATE llm_responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?', (now, key)
+        )
+        return response
+
+    def set(self, key: str, response: str, caller: str = '', model: str = '') -> None:
+        """写入缓存（空响应不缓存），超过大小上限时按 LRU 淘汰"""
+        if not response:
+            return
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._write_lock:
+            conn = self._conn()
+            old = conn.execute('SELECT size FROM llm_responses WHERE key = ?', (key,)).fetchone()
+            conn.execute(
+                'INSERT OR REPLACE INTO llm_responses '
+                '(key, caller, model, response, size, created_at, accessed_at, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                (key, caller, model, response, size, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        removed = 0
+        for key, size in conn.execute(
+            'SELECT key, size FROM llm_responses ORDER BY accessed_at'
+        ).fetchall():
+            if self._total_bytes <= target:
+                break
+            conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+            self._total_bytes -= size
+            removed += 1
+        logger.debug(f"LLM 响应缓存淘汰 {removed} 条，当前 {self._total_bytes / 1024:.0f}KB")
+
+    def delete(self, key: str) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            row = conn.execute('SELECT size FROM llm_responses WHERE key = ?', (key,)).fetchone()
+            if row:
+                conn.execute('DELETE FROM llm_responses WHERE key = ?', (key,))
+                self._total_bytes -= row[0]
+
+    def clear(self) -> int:
+        """清空缓存，返回删除条数"""
+        with self._write_lock:
+            cursor = self._conn().execute('DELETE FROM llm_responses')
+            self._total_bytes = 0
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        entries, hits = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM llm_responses'
+        ).fetchone()
+        return {'entries': entries, 'hits': hits, 'bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """获取全局响应缓存；LLM_RESPONSE_CACHE_ENABLED 未开启时返回 None"""
+    global _response_cache
+    if os.getenv('LLM_RESPONSE_CACHE_ENABLED', 'false').lower() != 'true':
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = LLMResponseCache.from_env()
+                logger.info(f"LLM 响应缓存已启用: {_response_cache.path}")
+    return _response_cache
+
+
+def reset_llm_response_cache() -> None:
+    """重置全局响应缓存（测试 / 切换配置时使用）"""
+    global _response_cache
+    _response_cache = None
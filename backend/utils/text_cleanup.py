@@ -14,6 +14,9 @@
   9. 清理 Markdown 格式问题
   10. 清理多余空白
 
+规则表在导入时按步骤编译为单个不分组的交替正则（命中后按位置匹配规则分派替换），每步只扫描一次全文；
+围栏代码块与行内代码会被屏蔽，不参与任何一步清理。
+
 Usage:
     from utils.text_cleanup import apply_full_cleanup
     result = apply_full_cleanup(text)
@@ -23,10 +26,13 @@ Usage:
 
 import re
 import datetime
-from typing import Dict, Any
+from typing import Any, Dict, List, Tuple
 
 CURRENT_YEAR = datetime.datetime.now().year
 
+# 规则表约定：每条 pattern 以字面字符开头（不以分组 / 字符类开头），
+# 这样按步骤合并后的交替正则仍能使用 re 的首字符快速过滤
+
 # ============================================================
 # Step 1: 中文填充词开头
 # ============================================================
@@ -70,9 +76,12 @@ SYNONYM_CHAINS_ZH = [
 # ============================================================
 META_PATTERNS_ZH = [
     r"本[节章]将(?:详细)?(?:介绍|讨论|探讨|分析|阐述)[^。]+[。]\s*",
-    r"(?:接下来|下面)[，,]?(?:我们|本文)(?:将)?(?:介绍|讨论|探讨|分析)[^。]+[。]\s*",
+    r"接下来[，,]?(?:我们|本文)(?:将)?(?:介绍|讨论|探讨|分析)[^。]+[。]\s*",
+    r"下面[，,]?(?:我们|本文)(?:将)?(?:介绍|讨论|探讨|分析)[^。]+[。]\s*",
     r"在(?:本[节章]|这[一]?部分)中[，,](?:我们|本文)(?:将)?[^。]+[。]\s*",
-    r"(?:首先|其次|最后)[，,](?:我们|本文)(?:来)?(?:看看|了解|介绍)[^。]+[。]\s*",
+    r"首先[，,](?:我们|本文)(?:来)?(?:看看|了解|介绍)[^。]+[。]\s*",
+    r"其次[，,](?:我们|本文)(?:来)?(?:看看|了解|介绍)[^。]+[。]\s*",
+    r"最后[，,](?:我们|本文)(?:来)?(?:看看|了解|介绍)[^。]+[。]\s*",
 ]
 
 # ============================================================
@@ -93,7 +102,7 @@ CLAIM_CALIBRATION_ZH = [
     (r"毫无疑问地?(?:证明|表明)了?", "有力地支持了"),
     (r"无可争辩地?", ""),
     (r"毋庸置疑地?", ""),
-    (r"(?:完美|完全)(?:地)?解决了", "有效地解决了"),
+    (r"完(?:美|全)(?:地)?解决了", "有效地解决了"),
     (r"是唯一的(?:方案|选择|方法)", "是一个关键的方案"),
     (r"是最(?:好|佳|优)的", "是较为有效的"),
     (r"彻底(?:改变|颠覆)了", "显著改变了"),
@@ -121,137 +130,185 @@ TIME_HALLUCINATION_PATTERNS = [
     (rf"截至\s*{CURRENT_YEAR - 2}\s*年", f"截至{CURRENT_YEAR}年"),
     (rf"目前是\s*{CURRENT_YEAR - 1}\s*年", f"目前是{CURRENT_YEAR}年"),
     (rf"目前是\s*{CURRENT_YEAR - 2}\s*年", f"目前是{CURRENT_YEAR}年"),
-    (rf"[Aa]s of {CURRENT_YEAR - 1}", f"as of {CURRENT_YEAR}"),
-    (rf"[Aa]s of {CURRENT_YEAR - 2}", f"as of {CURRENT_YEAR}"),
+    (rf"As of {CURRENT_YEAR - 1}", f"as of {CURRENT_YEAR}"),
+    (rf"as of {CURRENT_YEAR - 1}", f"as of {CURRENT_YEAR}"),
+    (rf"As of {CURRENT_YEAR - 2}", f"as of {CURRENT_YEAR}"),
+    (rf"as of {CURRENT_YEAR - 2}", f"as of {CURRENT_YEAR}"),
     (rf"截止到?\s*{CURRENT_YEAR - 1}\s*年", f"截至{CURRENT_YEAR}年"),
     (rf"截止到?\s*{CURRENT_YEAR - 2}\s*年", f"截至{CURRENT_YEAR}年"),
 ]
 
 
 # ============================================================
-# 管道实现
+# 编译后的规则引擎
 # ============================================================
 
-def _step_fillers(text: str) -> tuple:
-    count = 0
-    for pattern in FILLER_STARTS_ZH:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, "", text)
-    return text, count
-
-
-def _step_intensifiers(text: str) -> tuple:
-    count = 0
-    for pattern, replacement in INTENSIFIERS_ZH:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, replacement, text)
-    return text, count
-
-
-def _step_synonyms(text: str) -> tuple:
-    count = 0
-    for pattern, replacement in SYNONYM_CHAINS_ZH:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, replacement, text)
-    return text, count
+# 围栏代码块（``` / ~~~，未闭合时延伸到文末）与行内代码，清理时原样保留
+_CODE_RE = re.compile(
+    r"^(`{3,}|~{3,})[^\n]*\n.*?(?:^\1[ \t]*$|\Z)|`[^`\n]+`",
+    re.MULTILINE | re.DOTALL,
+)
 
 
-def _step_meta(text: str) -> tuple:
-    count = 0
-    for pattern in META_PATTERNS_ZH:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, "", text)
-    return text, count
+class _RuleSet:
+    """
+    把一组 (pattern, replacement) 编译为单个交替正则，一次扫描完成。
 
+    交替正则不加分组（分组会让 re 失去首字符前缀过滤而显著变慢），命中后再在命中位置
+    依次用各条已编译规则 match，取第一条结束位置一致的规则做替换。
+    """
 
-def _step_verbose(text: str) -> tuple:
-    count = 0
-    for pattern, replacement in VERBOSE_PHRASES_ZH:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, replacement, text)
-    return text, count
+    def __init__(self, rules: List[Tuple[str, str]]):
+        self._rules = [(re.compile(pattern), replacement) for pattern, replacement in rules]
+        self._regex = re.compile("|".join(f"(?:{pattern})" for pattern, _ in rules))
+        replacements = {replacement for _, replacement in rules}
+        # 所有规则替换为同一字符串时无需分派
+        self._replace = replacements.pop() if len(replacements) == 1 else self._dispatch
+
+    def _dispatch(self, match: "re.Match") -> str:
+        start, end = match.span()
+        for rule, replacement in self._rules:
+            hit = rule.match(match.string, start)
+            if hit and hit.end() == end:
+                return replacement
+        return match.group(0)
+
+    def apply(self, prose: List[str]) -> int:
+        count = 0
+        for i, segment in enumerate(prose):
+            prose[i], n = self._regex.subn(self._replace, segment)
+            count += n
+        return count
+
+
+_FILLERS = _RuleSet([(pattern, "") for pattern in FILLER_STARTS_ZH])
+_INTENSIFIERS = _RuleSet(INTENSIFIERS_ZH)
+_SYNONYMS = _RuleSet(SYNONYM_CHAINS_ZH)
+_META = _RuleSet([(pattern, "") for pattern in META_PATTERNS_ZH])
+_VERBOSE = _RuleSet(VERBOSE_PHRASES_ZH)
+_CLAIMS = _RuleSet(CLAIM_CALIBRATION_ZH)
+_TIME_HALLUCINATIONS = _RuleSet(TIME_HALLUCINATION_PATTERNS)
+
+_VOCAB_ALTERNATIVES = dict(VOCAB_DIVERSITY_ZH)
+_VOCAB_RE = re.compile("|".join(re.escape(word) for word, _ in VOCAB_DIVERSITY_ZH))
+
+_EXTRA_BLANK_LINES_RE = re.compile(r"\n\n\n\n+")    # 清理多余空行（>3 行 → 2 行）
+# 清理行尾空格：正文片段在行内代码处被切开，片段末尾不一定是行尾，
+# 因此只匹配真实换行前的空白；最后一个片段的末尾才是全文末尾
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+(?=\n)")
+_TRAILING_SPACE_END_RE = re.compile(r"[ \t]+\Z")
+# 写成字面前缀形式（而非 \n{3,}），re 可直接按子串快速定位
+_BLANK_LINES_RE = re.compile(r"\n\n\n+")
+_MULTI_SPACE_RE = re.compile(r"  +")
+
+
+def _split_code(text: str) -> Tuple[List[str], List[str]]:
+    """拆分为正文片段与代码片段：prose[i] 之后紧跟 code[i]，len(prose) == len(code) + 1"""
+    prose, code = [], []
+    last = 0
+    for match in _CODE_RE.finditer(text):
+        prose.append(text[last:match.start()])
+        code.append(match.group(0))
+        last = match.end()
+    prose.append(text[last:])
+    return prose, code
+
+
+def _join_code(prose: List[str], code: List[str]) -> str:
+    parts = [prose[0]]
+    for block, segment in zip(code, prose[1:]):
+        parts.append(block)
+        parts.append(segment)
+    return "".join(parts)
 
-def _step_claims(text: str) -> tuple:
-    count = 0
-    for pattern, replacement in CLAIM_CALIBRATION_ZH:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, replacement, text)
-    return text, count
 
+# ============================================================
+# 管道实现（每步只处理正文片段，原地修改并返回修复数）
+# ============================================================
 
-def _step_vocab_diversity(text: str) -> tuple:
+def _step_vocab_diversity(prose: List[str]) -> int:
+    # 一次扫描收集全部出现位置，再从第 4 次出现开始轮换（保持原有"从后往前"的同义词分配）
+    hits = [list(_VOCAB_RE.finditer(segment)) for segment in prose]
+    totals: Dict[str, int] = {}
+    for matches in hits:
+        for match in matches:
+            totals[match.group(0)] = totals.get(match.group(0), 0) + 1
+    if not any(n > 3 for n in totals.values()):
+        return 0
+
+    seen: Dict[str, int] = {}
     count = 0
-    for word, alternatives in VOCAB_DIVERSITY_ZH:
-        positions = [m.start() for m in re.finditer(re.escape(word), text)]
-        if len(positions) <= 3:
-            continue
-        # 从第 4 次出现开始轮换（从后往前替换避免偏移）
-        for i, pos in enumerate(reversed(positions[3:])):
-            alt = alternatives[i % len(alternatives)]
-            text = text[:pos] + alt + text[pos + len(word):]
+    for i, matches in enumerate(hits):
+        segment, parts, last = prose[i], [], 0
+        for match in matches:
+            word = match.group(0)
+            index = seen.get(word, 0)
+            seen[word] = index + 1
+            if index < 3 or totals[word] <= 3:
+                continue
+            alternatives = _VOCAB_ALTERNATIVES[word]
+            parts.append(segment[last:match.start()])
+            parts.append(alternatives[(totals[word] - 1 - index) % len(alternatives)])
+            last = match.end()
             count += 1
-    return text, count
-
-
-def _step_time_hallucinations(text: str) -> tuple:
-    count = 0
-    for pattern, replacement in TIME_HALLUCINATION_PATTERNS:
-        matches = re.findall(pattern, text)
-        count += len(matches)
-        text = re.sub(pattern, replacement, text)
-    return text, count
-
-
-def _step_markdown(text: str) -> tuple:
-    count = 0
-    # 清理多余空行（>3 行 → 2 行）
-    before = text
-    text = re.sub(r"\n{4,}", "\n\n\n", text)
-    if text != before:
-        count += 1
-    # 清理行尾空格
-    before = text
-    text = re.sub(r"[ \t]+$", "", text, flags=re.MULTILINE)
-    if text != before:
-        count += 1
-    return text, count
-
-
-def _step_whitespace(text: str) -> tuple:
-    count = 0
-    before = text
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"  +", " ", text)
-    if text != before:
-        count += 1
-    return text, count
+        if parts:
+            parts.append(segment[last:])
+            prose[i] = "".join(parts)
+    return count
+
+
+def _sub_segments(prose: List[str], regex: "re.Pattern", replacement: str, last: "re.Pattern" = None) -> int:
+    """对每个正文片段做替换（last 给出时用于最后一个片段），返回是否有改动"""
+    changed = False
+    for i, segment in enumerate(prose):
+        cleaned = regex.sub(replacement, segment)
+        if last is not None and i == len(prose) - 1:
+            cleaned = last.sub(replacement, cleaned)
+        changed = changed or cleaned != segment
+        prose[i] = cleaned
+    return int(changed)
+
+
+def _step_markdown(prose: List[str]) -> int:
+    return (
+        _sub_segments(prose, _EXTRA_BLANK_LINES_RE, "\n\n\n")
+        + _sub_segments(prose, _TRAILING_SPACE_RE, "", last=_TRAILING_SPACE_END_RE)
+    )
+
+
+def _step_whitespace(prose: List[str]) -> int:
+    # 空行折叠只匹配片段内部的连续换行（行内代码不含换行，不会把一段空行拆到两个片段）
+    changed = False
+    for i, segment in enumerate(prose):
+        cleaned = _MULTI_SPACE_RE.sub(" ", _BLANK_LINES_RE.sub("\n\n", segment))
+        changed = changed or cleaned != segment
+        prose[i] = cleaned
+    return int(changed)
+
+
+_PIPELINE = [
+    ("fillers", _FILLERS.apply),
+    ("intensifiers", _INTENSIFIERS.apply),
+    ("synonyms", _SYNONYMS.apply),
+    ("meta", _META.apply),
+    ("verbose", _VERBOSE.apply),
+    ("claims", _CLAIMS.apply),
+    ("vocab_diversified", _step_vocab_diversity),
+    ("time_hallucinations", _TIME_HALLUCINATIONS.apply),
+    ("markdown_fixes", _step_markdown),
+    ("whitespace", _step_whitespace),
+]
 
 
 def apply_full_cleanup(text: str) -> Dict[str, Any]:
     """
-    10 步确定性清理管道。
+    10 步确定性清理管道（代码块与行内代码不参与清理）。
 
     Returns:
         {"text": cleaned_text, "stats": {"fillers": N, ...}, "total_fixes": N}
     """
-    stats = {}
-
-    text, stats["fillers"] = _step_fillers(text)
-    text, stats["intensifiers"] = _step_intensifiers(text)
-    text, stats["synonyms"] = _step_synonyms(text)
-    text, stats["meta"] = _step_meta(text)
-    text, stats["verbose"] = _step_verbose(text)
-    text, stats["claims"] = _step_claims(text)
-    text, stats["vocab_diversified"] = _step_vocab_diversity(text)
-    text, stats["time_hallucinations"] = _step_time_hallucinations(text)
-    text, stats["markdown_fixes"] = _step_markdown(text)
-    text, stats["whitespace"] = _step_whitespace(text)
+    prose, code = _split_code(text)
+    stats = {name: step(prose) for name, step in _PIPELINE}
 
     total = sum(stats.values())
-    return {"text": text, "stats": stats, "total_fixes": total}
+    return {"text": _join_code(prose, code), "stats": stats, "total_fixes": total}
@@ -29,6 +29,11 @@ class TokenUsage:
     def total_tokens(self) -> int:
         return self.input_tokens + self.output_tokens
 
+    @property
+    def uncached_input_tokens(self) -> int:
+        """未命中 prompt 缓存的输入 token（input_tokens 含缓存读取部分）"""
+        return max(0, self.input_tokens - self.cache_read_tokens)
+
 
 @dataclass
 class TokenTracker:
@@ -54,6 +59,9 @@ class TokenTracker:
     # 最近一次调用
     last_call: Optional[TokenUsage] = None
 
+    # LLM 响应缓存命中统计（按 Agent 分组）
+    response_cache: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
     def record(self, usage: TokenUsage, agent: str = "unknown"):
         """
         记录一次 LLM 调用的 token 用量。
@@ -92,6 +100,39 @@ class TokenTracker:
             f"cache_r={usage.cache_read_tokens} cache_w={usage.cache_write_tokens}"
         )
 
+    def record_cache_lookup(self, agent: str, hit: bool):
+        """
+        记录一次 LLM 响应缓存查询（命中时不会再调用 record）。
+
+        Args:
+            agent: 调用方 Agent 名称
+            hit: 是否命中
+        """
+        stats = self.response_cache.setdefault(agent, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+    def get_cache_hit_rates(self) -> Dict[str, Dict]:
+        """按 Agent 汇总响应缓存命中率"""
+        result = {}
+        for agent, stats in self.response_cache.items():
+            lookups = stats["hits"] + stats["misses"]
+            result[agent] = {
+                **stats,
+                "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+        return result
+
+    def get_prompt_cache_stats(self) -> Dict:
+        """提供商 prompt 缓存统计：已缓存 / 未缓存输入 token 与命中比例"""
+        cached = self.total_cache_read_tokens
+        uncached = max(0, self.total_input_tokens - cached)
+        return {
+            "cached_input_tokens": cached,
+            "uncached_input_tokens": uncached,
+            "cache_write_tokens": self.total_cache_write_tokens,
+            "cached_ratio": round(cached / self.total_input_tokens, 3) if self.total_input_tokens else 0.0,
+        }
+
     def get_summary(self) -> Dict:
         """获取汇总数据（供 BlogTaskLog 使用）"""
         return {
@@ -101,7 +142,9 @@ class TokenTracker:
             "total_cache_write_tokens": self.total_cache_write_tokens,
             "total_tokens": self.total_input_tokens + self.total_output_tokens,
             "total_calls": len(self.call_history),
+            "prompt_cache": self.get_prompt_cache_stats(),
             "agent_breakdown": dict(self.agent_usage),
+            "response_cache": self.get_cache_hit_rates(),
         }
 
     def format_summary(self) -> str:
@@ -113,6 +156,7 @@ class TokenTracker:
             f"  Output Tokens:      {self.total_output_tokens:>10,}",
             f"  Cache Read Tokens:  {self.total_cache_read_tokens:>10,}",
             f"  Cache Write Tokens: {self.total_cache_write_tokens:>10,}",
+            f"  Cached Input Ratio: {self.get_prompt_cache_stats()['cached_ratio']:>10.1%}",
             f"  Total Tokens:       {self.total_input_tokens + self.total_output_tokens:>10,}",
             f"  LLM Calls:          {len(self.call_history):>10}",
             "─" * 53,
@@ -131,6 +175,14 @@ class TokenTracker:
                     f"({stats['calls']} calls)"
                 )
 
+        if self.response_cache:
+            lines.append("  Response Cache:")
+            for agent, stats in sorted(self.get_cache_hit_rates().items()):
+                lines.append(
+                    f"    {agent:>12}: {stats['hits']} hits / {stats['misses']} misses "
+                    f"({stats['hit_rate']:.0%})"
+                )
+
         return "\n".join(lines)
 
 
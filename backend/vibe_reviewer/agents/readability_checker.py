@@ -33,7 +33,7 @@ class ReadabilityChecker:
         self.pm = get_prompt_manager()
         self.analyzer = get_readability_analyzer()
     
-    def check(self, content: str) -> ReadabilityResult:
+    def check(self, content: str, content_hash: Optional[str] = None) -> ReadabilityResult:
         """
         检查内容可读性
         
@@ -41,12 +41,13 @@ class ReadabilityChecker:
         
         Args:
             content: 待检查内容
+            content_hash: 内容哈希（用于复用可读性指标缓存）
             
         Returns:
             可读性评估结果
         """
         # 1. 先使用专业工具计算可读性指标
-        metrics = self.analyzer.analyze(content)
+        metrics = self.analyzer.analyze(content, content_hash=content_hash)
         logger.info(f"专业可读性分析: score={metrics.overall_score}, level={metrics.difficulty_level}")
         
         # 2. 将指标信息传递给 LLM 进行综合分析
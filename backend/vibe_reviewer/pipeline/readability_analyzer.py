@@ -9,11 +9,18 @@
 5. 结构化程度 - 标题、列表、代码块的使用
 
 参考: python-readability-cn 的思路，但针对技术博客优化
+
+实现：逐行扫描一次把 Markdown 切成段落块（围栏代码块整体为一块），每块在一次处理中
+得到结构计数、清理后文本与分句结果；块级结果按块哈希缓存，整篇结果按内容哈希缓存，
+章节小幅修改后只需重新分析变化的段落。段落边界同时视为句子边界。
 """
+import hashlib
 import logging
 import re
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, field
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, NamedTuple, Tuple
+from dataclasses import dataclass, field, replace
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +86,87 @@ class ReadabilityMetrics:
         }
 
 
+# ========== 单次扫描 Markdown 分块 ==========
+
+_HAN_RE = re.compile(r'[\u4e00-\u9fff]')
+_SENTENCE_END_RE = re.compile(r'[。！？!?]+')
+_NON_WORD_RE = re.compile(r'^[\s\W]+$')
+_HEADING_RE = re.compile(r'#{1,6}\s+')
+_LIST_ITEM_RE = re.compile(r'\s*(?:[-*+]|\d+\.)\s+')
+_TABLE_ROW_RE = re.compile(r'\|[^\n]+\|')
+_TABLE_RULE_RE = re.compile(r'^[-|:\s]+$')
+# 行内语法一次扫描：行内代码 / 图片 / HTML 删除，链接与强调保留文字
+_INLINE_RE = re.compile(
+    r'`[^`\n]+`'
+    r'|!\[[^\]]*\]\([^)]+\)'
+    r'|<[^>]+>'
+    r'|\[([^\]]+)\]\([^)]+\)'
+    r'|\*\*([^*]+)\*\*'
+    r'|\*([^*]+)\*'
+    r'|__([^_]+)__'
+    r'|_([^_]+)_'
+)
+
+
+class _BlockStats(NamedTuple):
+    """单个段落块（空行分隔；围栏代码块整体为一块）的统计结果"""
+    headings: int = 0
+    lists: int = 0
+    fences: int = 0
+    chars: int = 0
+    words: int = 0
+    sentence_lengths: Tuple[int, ...] = ()
+    paragraph_length: Optional[int] = None   # 清理后超过 10 字才计为段落
+
+
+def _md5(text: str) -> str:
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def _strip_inline(match: re.Match) -> str:
+    if not match.lastindex:
+        return ''
+    # 链接文字 / 强调内容中可能嵌套其他行内语法
+    return _INLINE_RE.sub(_strip_inline, match.group(match.lastindex))
+
+
+def _split_blocks(text: str) -> List[str]:
+    """
+    逐行扫描一次，按空行切分段落块
+
+    - YAML front matter 整体跳过
+    - 围栏代码块（含其中的空行）整体作为一块，不参与正文统计
+    """
+    lines = text.split('\n')
+    start = 0
+    if lines and lines[0].startswith('---'):
+        for i in range(1, len(lines)):
+            if '---' in lines[i]:
+                start = i + 1
+                break
+
+    blocks, current, in_fence = [], [], False
+    for line in lines[start:]:
+        is_fence = line.lstrip().startswith('```')
+        if in_fence:
+            current.append(line)
+            if is_fence:
+                blocks.append('\n'.join(current))
+                current, in_fence = [], False
+        elif is_fence:
+            if current:
+                blocks.append('\n'.join(current))
+            current, in_fence = [line], True
+        elif line.strip():
+            current.append(line)
+        elif current:
+            blocks.append('\n'.join(current))
+            current = []
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+
 class ReadabilityAnalyzer:
     """
     中文技术博客可读性分析器
@@ -90,174 +178,169 @@ class ReadabilityAnalyzer:
     4. 整体流畅度 (20%) - 综合评估
     """
     
+    # 整篇结果缓存条数 / 段落块结果缓存条数（LRU）
+    DOCUMENT_CACHE_SIZE = 256
+    BLOCK_CACHE_SIZE = 8192
+
     def __init__(self):
+        self._lock = threading.Lock()
+        self._document_cache: "OrderedDict[str, ReadabilityMetrics]" = OrderedDict()
+        self._block_cache: "OrderedDict[str, _BlockStats]" = OrderedDict()
+        self._cache_info = {'document_hits': 0, 'block_hits': 0, 'block_misses': 0}
         self.jieba_available = JIEBA_AVAILABLE
         if self.jieba_available:
             # 静默加载 jieba
             jieba.setLogLevel(logging.WARNING)
     
-    def analyze(self, text: str) -> ReadabilityMetrics:
+    def analyze(self, text: str, content_hash: Optional[str] = None) -> ReadabilityMetrics:
         """
         分析文本可读性
-        
+
+        整篇结果按内容哈希缓存；未命中时按段落块分析，段落块结果按块哈希复用，
+        小幅修改后只重新分析变化的段落。
+
         Args:
             text: 待分析的 Markdown 文本
-            
+            content_hash: 内容哈希（如 DocumentProcessor 计算的 MD5），不传则自动计算
+
         Returns:
             可读性指标
         """
         metrics = ReadabilityMetrics()
-        
+
         if not text or len(text.strip()) < 50:
             metrics.summary = "文本过短，无法进行有效分析"
             return metrics
-        
-        # 1. 提取结构信息（在清理前）
-        self._extract_structure(text, metrics)
-        
-        # 2. 清理 Markdown 语法
-        clean_text = self._clean_markdown(text)
-        
-        # 3. 基础统计
-        self._basic_stats(clean_text, metrics)
-        
-        # 4. 句子分析
-        self._sentence_analysis(clean_text, metrics)
-        
-        # 5. 段落分析
-        self._paragraph_analysis(clean_text, metrics)
-        
-        # 6. 计算综合评分
+
+        content_hash = content_hash or _md5(text)
+        with self._lock:
+            cached = self._document_cache.get(content_hash)
+            if cached is not None:
+                self._document_cache.move_to_end(content_hash)
+                self._cache_info['document_hits'] += 1
+                return replace(cached)
+
+        # 1. 单次扫描切分段落块，逐块统计（命中缓存的块直接复用）
+        blocks = [self._block_stats(block) for block in _split_blocks(text)]
+
+        # 2. 汇总结构、基础、句子、段落指标
+        self._aggregate(blocks, metrics)
+
+        # 3. 计算综合评分
         self._calculate_score(metrics)
-        
+
+        with self._lock:
+            self._document_cache[content_hash] = replace(metrics)
+            if len(self._document_cache) > self.DOCUMENT_CACHE_SIZE:
+                self._document_cache.popitem(last=False)
         return metrics
-    
-    def _extract_structure(self, text: str, metrics: ReadabilityMetrics):
-        """提取文档结构信息"""
-        # 标题数量
-        metrics.heading_count = len(re.findall(r'^#{1,6}\s+', text, re.MULTILINE))
-        
-        # 列表项数量
-        metrics.list_count = len(re.findall(r'^[\s]*[-*+]\s+', text, re.MULTILINE))
-        metrics.list_count += len(re.findall(r'^[\s]*\d+\.\s+', text, re.MULTILINE))
-        
-        # 代码块数量
-        metrics.code_block_count = len(re.findall(r'```', text)) // 2
-        
-        # 判断是否有良好结构
+
+    def cache_info(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        with self._lock:
+            return dict(self._cache_info)
+
+    def _block_stats(self, block: str) -> _BlockStats:
+        key = _md5(block)
+        with self._lock:
+            cached = self._block_cache.get(key)
+            if cached is not None:
+                self._block_cache.move_to_end(key)
+                self._cache_info['block_hits'] += 1
+                return cached
+            self._cache_info['block_misses'] += 1
+
+        stats = self._analyze_block(block)
+        with self._lock:
+            self._block_cache[key] = stats
+            if len(self._block_cache) > self.BLOCK_CACHE_SIZE:
+                self._block_cache.popitem(last=False)
+        return stats
+
+    def _analyze_block(self, block: str) -> _BlockStats:
+        """分析单个段落块：结构计数、清理后文本、分句与字数统计"""
+        fences = block.count('```')
+        if block.lstrip().startswith('```'):
+            return _BlockStats(fences=fences)
+
+        headings = lists = 0
+        lines = []
+        for line in block.split('\n'):
+            heading = _HEADING_RE.match(line)
+            if heading:
+                headings += 1
+                line = line[heading.end():]
+            else:
+                item = _LIST_ITEM_RE.match(line)
+                if item:
+                    lists += 1
+                    line = line[item.end():]
+                elif line.startswith('>'):
+                    line = line[1:].lstrip()
+            if '|' in line:
+                line = _TABLE_ROW_RE.sub('', line)
+                if _TABLE_RULE_RE.match(line):
+                    line = ''
+            lines.append(line)
+
+        clean = _INLINE_RE.sub(_strip_inline, '\n'.join(lines)).strip()
+        if not clean:
+            return _BlockStats(headings=headings, lists=lists, fences=fences)
+
+        sentences = [s.strip() for s in _SENTENCE_END_RE.split(clean)]
+        sentence_lengths = tuple(
+            len(_HAN_RE.findall(s)) for s in sentences if len(s) > 5
+        )
+        chars = len(_HAN_RE.findall(clean))
+
+        if self.jieba_available:
+            words = sum(1 for w in jieba.cut(clean) if w.strip() and not _NON_WORD_RE.match(w))
+        else:
+            words = 0
+
+        return _BlockStats(
+            headings=headings,
+            lists=lists,
+            fences=fences,
+            chars=chars,
+            words=words,
+            sentence_lengths=sentence_lengths,
+            paragraph_length=chars if len(clean) > 10 else None,
+        )
+
+    def _aggregate(self, blocks: List[_BlockStats], metrics: ReadabilityMetrics):
+        """汇总各段落块的统计"""
+        # 结构信息
+        metrics.heading_count = sum(b.headings for b in blocks)
+        metrics.list_count = sum(b.lists for b in blocks)
+        metrics.code_block_count = sum(b.fences for b in blocks) // 2
         metrics.has_structure = (
-            metrics.heading_count >= 2 or 
-            metrics.list_count >= 3 or 
+            metrics.heading_count >= 2 or
+            metrics.list_count >= 3 or
             metrics.code_block_count >= 1
         )
-    
-    def _clean_markdown(self, text: str) -> str:
-        """清理 Markdown 语法，保留纯文本"""
-        # 移除代码块
-        text = re.sub(r'```[\s\S]*?```', '', text)
-        text = re.sub(r'`[^`]+`', '', text)
-        
-        # 移除 YAML front matter
-        text = re.sub(r'^---[\s\S]*?---', '', text)
-        
-        # 移除链接，保留文字
-        text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-        
-        # 移除图片
-        text = re.sub(r'!\[([^\]]*)\]\([^)]+\)', '', text)
-        
-        # 移除 HTML 标签
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # 移除标题标记
-        text = re.sub(r'^#+\s*', '', text, flags=re.MULTILINE)
-        
-        # 移除强调标记
-        text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-        text = re.sub(r'\*([^*]+)\*', r'\1', text)
-        text = re.sub(r'__([^_]+)__', r'\1', text)
-        text = re.sub(r'_([^_]+)_', r'\1', text)
-        
-        # 移除列表标记
-        text = re.sub(r'^[\s]*[-*+]\s+', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^[\s]*\d+\.\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除引用标记
-        text = re.sub(r'^>\s*', '', text, flags=re.MULTILINE)
-        
-        # 移除表格
-        text = re.sub(r'\|[^\n]+\|', '', text)
-        text = re.sub(r'^[-|:\s]+$', '', text, flags=re.MULTILINE)
-        
-        # 清理多余空白
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        return text.strip()
-    
-    def _basic_stats(self, text: str, metrics: ReadabilityMetrics):
-        """基础统计"""
-        # 中文字符数
-        chinese_chars = re.findall(r'[\u4e00-\u9fff]', text)
-        metrics.char_count = len(chinese_chars)
-        
-        # 分词统计
+
+        # 基础统计：中文字符数与分词数（无 jieba 时按约 2 字/词估算）
+        metrics.char_count = sum(b.chars for b in blocks)
         if self.jieba_available and metrics.char_count > 0:
-            words = list(jieba.cut(text))
-            # 过滤空白和标点
-            words = [w for w in words if w.strip() and not re.match(r'^[\s\W]+$', w)]
-            metrics.word_count = len(words)
+            metrics.word_count = sum(b.words for b in blocks)
         else:
-            # 简单估算：中文约 1.5 字/词
             metrics.word_count = max(1, metrics.char_count // 2)
-    
-    def _sentence_analysis(self, text: str, metrics: ReadabilityMetrics):
-        """句子分析"""
-        # 按中文句号、问号、感叹号分句
-        sentences = re.split(r'[。！？!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 5]
-        
-        metrics.sentence_count = len(sentences)
-        
-        if metrics.sentence_count == 0:
-            return
-        
-        # 计算每句的中文字符数
-        sentence_lengths = []
-        long_count = 0
-        very_long_count = 0
-        
-        for s in sentences:
-            # 只统计中文字符
-            chinese_len = len(re.findall(r'[\u4e00-\u9fff]', s))
-            sentence_lengths.append(chinese_len)
-            
-            if chinese_len > 40:
-                long_count += 1
-            if chinese_len > 60:
-                very_long_count += 1
-        
-        # 平均句长
-        metrics.avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
-        
-        # 长句比例
-        metrics.long_sentence_ratio = long_count / metrics.sentence_count
-        metrics.very_long_sentence_ratio = very_long_count / metrics.sentence_count
-    
-    def _paragraph_analysis(self, text: str, metrics: ReadabilityMetrics):
-        """段落分析"""
-        # 按空行分段
-        paragraphs = re.split(r'\n\s*\n', text)
-        paragraphs = [p.strip() for p in paragraphs if p.strip() and len(p.strip()) > 10]
-        
-        metrics.paragraph_count = len(paragraphs)
-        
-        if metrics.paragraph_count == 0:
-            return
-        
-        # 计算平均段落长度（中文字符）
-        para_lengths = [len(re.findall(r'[\u4e00-\u9fff]', p)) for p in paragraphs]
-        metrics.avg_paragraph_length = sum(para_lengths) / len(para_lengths)
-    
+
+        # 句子分析
+        sentence_lengths = [n for b in blocks for n in b.sentence_lengths]
+        metrics.sentence_count = len(sentence_lengths)
+        if sentence_lengths:
+            metrics.avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
+            metrics.long_sentence_ratio = sum(1 for n in sentence_lengths if n > 40) / len(sentence_lengths)
+            metrics.very_long_sentence_ratio = sum(1 for n in sentence_lengths if n > 60) / len(sentence_lengths)
+
+        # 段落分析
+        para_lengths = [b.paragraph_length for b in blocks if b.paragraph_length is not None]
+        metrics.paragraph_count = len(para_lengths)
+        if para_lengths:
+            metrics.avg_paragraph_length = sum(para_lengths) / len(para_lengths)
+
     def _calculate_score(self, metrics: ReadabilityMetrics):
         """
         计算综合可读性评分
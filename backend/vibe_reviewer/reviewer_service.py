@@ -307,6 +307,7 @@ class ReviewerService:
                     'file_path': md_file.file_path,
                     'title': md_file.title,
                     'content': md_file.content,
+                    'content_hash': md_file.content_hash,
                     'base_path': os.path.dirname(os.path.join(local_path, md_file.file_path)),
                 })
             
@@ -433,7 +434,9 @@ class ReviewerService:
                     # 4.5 可读性检测
                     emit("log", level="info", message="   📖 正在检测可读性...")
                     emit("chapter_step", chapter_id=chapter_id, step="readability", status="start")
-                    readability_result = readability_checker.check(content) if readability_checker else None
+                    readability_result = readability_checker.check(
+                        content, content_hash=chapter.get('content_hash')
+                    ) if readability_checker else None
                     emit("chapter_step", chapter_id=chapter_id, step="readability", status="complete")
                     if readability_result:
                         emit("log", level="info", message=f"   ✓ 可读性检测完成: 评分={readability_result.score}, 级别={readability_result.level.value}")
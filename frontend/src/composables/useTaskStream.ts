@@ -226,6 +226,12 @@ export function useTaskStream() {
             addProgressItem(`📖 深度抓取完成: ${data.count} 篇高质量素材`, 'success')
           }
           break
+        case 'credibility_scored':
+          addProgressItem(
+            `⚖️ 来源评估: 复用缓存 ${data.cached} 条，LLM 评估 ${data.llm_scored} 条，保留 ${data.kept} 条`,
+            'info',
+          )
+          break
         case 'search_completed':
           // 将残留的 searching 骨架屏转换为完成状态（不删除，保留动画体验）
           for (let ci = progressItems.value.length - 1; ci >= 0; ci--) {